@@ -0,0 +1,46 @@
+"""
+株価アラートを定期的に評価する常駐スクリプト
+
+使用例:
+    python scripts/alert_daemon.py --config alerts.json --interval 600
+    python scripts/alert_daemon.py --config alerts.json --once
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.alerts import DEFAULT_ALERT_DIR, AlertEngine, JsonlSink, load_rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="株価アラートの評価")
+    parser.add_argument("--config", required=True, help="アラート条件の設定ファイル（JSON）")
+    parser.add_argument("--interval", type=float, default=600, help="取得間隔（秒）")
+    parser.add_argument("--once", action="store_true", help="1回だけ評価して終了する")
+    parser.add_argument("--state", default=str(DEFAULT_ALERT_DIR / "state.json"), help="計算状態の保存先")
+    parser.add_argument("--sink", default=str(DEFAULT_ALERT_DIR / "alerts.jsonl"), help="アラートの出力先")
+    args = parser.parse_args()
+
+    engine = AlertEngine(load_rules(args.config), JsonlSink(args.sink), args.state)
+    print(f"{len(engine.rules)} 件の条件を監視します（出力先: {args.sink}）")
+    while True:
+        result = engine.poll()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{now}] 日足 {result['bars']} 本を反映、アラート {len(result['alerts'])} 件")
+        for alert in result["alerts"]:
+            print(f"  {alert['date']} {alert['symbol']}: {alert['name']}")
+        for key, error in result["errors"].items():
+            print(f"  取得エラー {key}: {error}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+起動時間（import時間と最初のページ表示までの時間）を計測するスクリプト
+
+毎回新しいPythonプロセスを `python -X importtime` で起動し、モックサーバーを相手に
+アプリの最初のページを表示するまでの時間と、時間のかかったモジュールを表示する。
+
+使用例:
+    python scripts/profile_startup.py                 # アプリの最初のページ
+    python scripts/profile_startup.py --repeat 5 --top 20
+    python scripts/profile_startup.py --module utils.visualizer
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.mock_server import MockServer
+
+# 子プロセスで実行するコード（アプリを1回実行し、実行開始以降のimportを区別する目印を出力する）
+APP_SNIPPET = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+sys.stderr.write("__RUN_START__\\n")
+started = time.perf_counter()
+at.run()
+print("__RESULT__", time.perf_counter() - started, len(at.exception))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    -X importtime の出力を (モジュール名, 自身のμs, 累積μs, 階層) のリストにする
+    （実行開始の目印がある場合は、それ以降のimportのみ）
+    """
+    if "__RUN_START__" in stderr:
+        stderr = stderr.split("__RUN_START__", 1)[1]
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def run_once(module=None, env=None):
+    """
+    新しいプロセスで1回計測する
+
+    Parameters:
+    -----------
+    module : str, optional
+        アプリの代わりにimportするモジュール
+    env : dict, optional
+        子プロセスの環境変数
+
+    Returns:
+    --------
+    dict
+        seconds: アプリの実行時間（またはモジュールのimport時間）, exceptions: アプリの例外数,
+        import_ms: 計測対象のimport時間の合計, modules: トップレベルのimport（累積時間順）
+    """
+    if module:
+        code = f"import sys, time; t = time.perf_counter(); import {module}; " \
+               f"print('__RESULT__', time.perf_counter() - t, 0)"
+    else:
+        code = APP_SNIPPET.format(app=str(project_root / "src" / "app.py"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+        cwd=project_root, env={**os.environ, "PYTHONPATH": str(project_root), **(env or {})}
+    )
+    result = [line for line in proc.stdout.splitlines() if line.startswith("__RESULT__")]
+    if not result:
+        raise RuntimeError(f"計測に失敗しました:\n{proc.stderr[-2000:]}")
+    _, seconds, n_exceptions = result[-1].split()
+    rows = parse_importtime(proc.stderr)
+    top_level = sorted(((name, cum) for name, _, cum, depth in rows if depth == 0), key=lambda r: -r[1])
+    return {
+        "seconds": float(seconds),
+        "exceptions": int(n_exceptions),
+        "import_ms": sum(self_us for _, self_us, _, _ in rows) / 1000,
+        "modules": [(name, cum / 1000) for name, cum in top_level],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="起動時間の計測")
+    parser.add_argument("--module", help="アプリの代わりに計測するモジュール（例: utils.visualizer）")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数（最小値を採用）")
+    parser.add_argument("--top", type=int, default=15, help="表示するモジュール数")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args()
+
+    if args.module:
+        runs = [run_once(args.module) for _ in range(args.repeat)]
+    else:
+        # アプリの取得処理はモックサーバーに向ける
+        with MockServer() as server:
+            env = {**server.env(), "JQUANTS_EMAIL": "mock@example.com", "JQUANTS_PASSWORD": "mock"}
+            runs = [run_once(env=env) for _ in range(args.repeat)]
+    best = min(runs, key=lambda r: r["seconds"])
+
+    if args.json:
+        print(json.dumps({"best": best, "seconds": [r["seconds"] for r in runs]}, indent=2, ensure_ascii=False))
+        return
+
+    if args.module:
+        print(f"対象: import {args.module}")
+    else:
+        print(f"対象: src/app.py（最初のページ、例外 {best['exceptions']} 件）")
+    print(f"処理時間: {best['seconds'] * 1000:.0f} ms（{args.repeat} 回中の最小値）")
+    print(f"うちimport時間: {best['import_ms']:.0f} ms\n")
+    print(f"{'モジュール':<40} {'累積(ms)':>10}")
+    for name, ms in best["modules"][:args.top]:
+        print(f"{name:<40} {ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+株価・指標・スクリーニング結果を返すHTTP APIを起動するスクリプト
+
+使用例:
+    python scripts/run_api_server.py --port 8000
+    curl "http://127.0.0.1:8000/prices/7203?from=2024-01-01"
+    curl "http://127.0.0.1:8000/indicators/AAPL?ma=5,25&rsi=1"
+    curl "http://127.0.0.1:8000/screen?q=RSI%20%3C%2030&sort=RSI"
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.api_server import ApiServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="株価・指標・スクリーニング結果のHTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=8000, help="待ち受けポート")
+    parser.add_argument("--panel", default=None, help="スクリーニングに使う株価パネルのディレクトリ")
+    parser.add_argument("--verbose", action="store_true", help="アクセスログを出力する")
+    args = parser.parse_args()
+
+    server = ApiServer(host=args.host, port=args.port, panel_dir=args.panel, verbose=args.verbose)
+    print(f"APIサーバーを起動しました: {server.url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nAPIサーバーを停止します")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
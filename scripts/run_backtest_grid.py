@@ -0,0 +1,76 @@
+"""
+株価パネルの銘柄に対してパラメータグリッドのバックテストを実行するスクリプト
+
+使用例:
+    python scripts/run_backtest_grid.py ma_crossover --fast 5:50:5 --slow 20:200:10 --output grid.csv
+    python scripts/run_backtest_grid.py rsi --window 14 --lower 20:40:5 --upper 50:80:5 --workers 8
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.backtest import STAT_COLUMNS, run_grid_on_panel
+
+
+def parse_range(text):
+    """"5:50:5"（開始:終了:刻み、終了を含む）または "5,25,75" を数値のリストにする"""
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        values = np.arange(start, stop + step / 2, step).tolist()
+    else:
+        values = [float(v) for v in text.split(",")]
+    return [int(v) if float(v).is_integer() else v for v in values]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="パラメータグリッドのバックテスト")
+    parser.add_argument("strategy", choices=["ma_crossover", "rsi"], help="戦略")
+    parser.add_argument("--fast", default="5:50:5", help="短期移動平均の期間（ma_crossover）")
+    parser.add_argument("--slow", default="20:200:10", help="長期移動平均の期間（ma_crossover）")
+    parser.add_argument("--window", default="14", help="RSIの計算期間（rsi）")
+    parser.add_argument("--lower", default="20:40:5", help="買いの閾値（rsi）")
+    parser.add_argument("--upper", default="50:80:5", help="手仕舞いの閾値（rsi）")
+    parser.add_argument("--cost-bps", type=float, default=10.0, help="片道の売買コスト（bp）")
+    parser.add_argument("--from-date", help="開始日（YYYY-MM-DD）")
+    parser.add_argument("--to-date", help="終了日（YYYY-MM-DD）")
+    parser.add_argument("--symbol", action="append", help="対象銘柄（複数指定可、省略時は全銘柄）")
+    parser.add_argument("--panel", help="株価パネルのディレクトリ")
+    parser.add_argument("--workers", type=int, help="プロセス数")
+    parser.add_argument("--output", help="結果を保存するCSVファイル")
+    args = parser.parse_args()
+
+    if args.strategy == "ma_crossover":
+        params = dict(fast_windows=parse_range(args.fast), slow_windows=parse_range(args.slow))
+        keys = ["fast", "slow"]
+    else:
+        params = dict(windows=parse_range(args.window), lower_levels=parse_range(args.lower),
+                      upper_levels=parse_range(args.upper))
+        keys = ["window", "lower", "upper"]
+
+    started = time.perf_counter()
+    result = run_grid_on_panel(
+        args.strategy, symbols=args.symbol, panel_path=args.panel, from_date=args.from_date,
+        to_date=args.to_date, max_workers=args.workers, cost_bps=args.cost_bps, **params
+    )
+    elapsed = time.perf_counter() - started
+    print(f"{len(result):,} 件（{result['symbol'].nunique() if len(result) else 0} 銘柄）を {elapsed:.1f} 秒で評価しました")
+
+    if len(result):
+        summary = result.groupby(keys)[STAT_COLUMNS].median().sort_values("sharpe", ascending=False)
+        print("\nパラメータ別の中央値（シャープレシオ上位10件）")
+        print(summary.head(10).to_string(float_format=lambda v: f"{v:.3f}"))
+
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"\n結果を保存しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+取得データの変換・指標計算・描画・CSV出力の各ステージを計測するスクリプト
+
+使用例:
+    python scripts/run_benchmark.py --years 20 --repeat 5
+    python scripts/run_benchmark.py --save-baseline
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.benchmark import (
+    DEFAULT_BASELINE_PATH, DEFAULT_REGRESSION_THRESHOLD,
+    run_benchmarks, save_baseline, load_baseline, compare_with_baseline, format_report
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ステージ別ベンチマーク")
+    parser.add_argument("--years", type=int, default=10, help="疑似データの年数")
+    parser.add_argument("--repeat", type=int, default=5, help="各ステージの繰り返し回数")
+    parser.add_argument("--stage", action="append", help="実行するステージ（複数指定可）")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="ベースラインのパス")
+    parser.add_argument("--save-baseline", action="store_true", help="結果をベースラインとして保存する")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="回帰とみなす悪化率（0.2 = 20%%）")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args()
+
+    report = run_benchmarks(years=args.years, repeat=args.repeat, stages=args.stage)
+
+    comparison = None
+    baseline = load_baseline(args.baseline)
+    if baseline and not args.save_baseline:
+        comparison = compare_with_baseline(report, baseline, args.threshold)
+
+    if args.json:
+        print(json.dumps({"report": report, "comparison": comparison}, indent=2, ensure_ascii=False))
+    else:
+        print(format_report(report, comparison))
+
+    if args.save_baseline:
+        save_baseline(report, args.baseline)
+        print(f"\nベースラインを保存しました: {args.baseline}")
+
+    if comparison and any(row["regression"] for row in comparison):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
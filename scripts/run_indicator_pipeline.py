@@ -0,0 +1,44 @@
+"""
+株価パネルの全銘柄のテクニカル指標を並列計算して保存するスクリプト
+
+使用例:
+    python scripts/run_indicator_pipeline.py --market jp --workers 32
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.pipeline import run_indicator_pipeline
+from utils.screener import DEFAULT_MA_WINDOWS, DEFAULT_RSI_WINDOW, DEFAULT_VOLATILITY_WINDOW
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全銘柄の指標計算バッチ")
+    parser.add_argument("--panel", help="株価パネルのディレクトリ")
+    parser.add_argument("--market", choices=["jp", "us"], help="銘柄マスタで対象を絞り込む市場")
+    parser.add_argument("--symbol", action="append", help="対象銘柄（複数指定可）")
+    parser.add_argument("--output", help="指標パネルの保存先（省略時はパネル内の indicators/）")
+    parser.add_argument("--workers", type=int, help="プロセス数（省略時はCPU数）")
+    parser.add_argument("--ma", default=",".join(map(str, DEFAULT_MA_WINDOWS)), help="移動平均の期間（カンマ区切り）")
+    parser.add_argument("--rsi-window", type=int, default=DEFAULT_RSI_WINDOW, help="RSIの計算期間")
+    parser.add_argument("--volatility-window", type=int, default=DEFAULT_VOLATILITY_WINDOW,
+                        help="ボラティリティの計算期間")
+    args = parser.parse_args()
+
+    result = run_indicator_pipeline(
+        panel_path=args.panel, symbols=args.symbol, market=args.market, output_path=args.output,
+        max_workers=args.workers, ma_windows=[int(w) for w in args.ma.split(",")],
+        rsi_window=args.rsi_window, volatility_window=args.volatility_window
+    )
+    print(
+        f"{result['symbols']:,} 銘柄 × {result['days']:,} 営業日を {result['workers']} プロセスで "
+        f"{result['seconds']:.1f} 秒で計算しました: {result['path']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+銘柄マスタの銘柄の日足を API から取得して株価パネルに書き込むスクリプト（cron での定期実行用）
+
+使用例:
+    python scripts/run_ingest.py --market jp --workers 8
+    python scripts/run_ingest.py --market us --symbol AAPL --symbol MSFT
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.ingest import DEFAULT_LOOKBACK, DEFAULT_MAX_RETRIES, DEFAULT_RATES, DEFAULT_WORKERS, ingest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日足のバッチ取り込み")
+    parser.add_argument("--market", choices=["jp", "us"], required=True, help="市場")
+    parser.add_argument("--symbol", action="append", help="対象銘柄（複数指定可、省略時は銘柄マスタの全銘柄）")
+    parser.add_argument("--panel", help="株価パネルのディレクトリ")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="取得に使うスレッド数")
+    parser.add_argument("--rate", type=float,
+                        help=f"1秒あたりのリクエスト数の上限（省略時は jp: {DEFAULT_RATES['jp']:g}, "
+                             f"us: {DEFAULT_RATES['us']:.3f}）")
+    parser.add_argument("--retries", type=int, default=DEFAULT_MAX_RETRIES, help="一時的なエラーの再試行回数")
+    parser.add_argument("--lookback", type=int, default=DEFAULT_LOOKBACK, help="初回取得時の日足の本数")
+    args = parser.parse_args()
+
+    result = ingest(args.market, symbols=args.symbol, panel_path=args.panel, workers=args.workers, rate=args.rate,
+                    max_retries=args.retries, lookback=args.lookback)
+
+    seconds = max(result["seconds"], 1e-9)
+    print(
+        f"{result['symbols']:,} 銘柄を {result['seconds']:.1f} 秒で処理しました"
+        f"（{result['symbols'] / seconds:.2f} 銘柄/秒、{result['rows'] / seconds:,.0f} 本/秒）"
+    )
+    print(f"  更新 {result['updated']:,} 銘柄（日足 {result['rows']:,} 本）、最新 {result['up_to_date']:,} 銘柄、"
+          f"上限のため次回に持ち越し {result['deferred']:,} 銘柄、失敗 {len(result['failed']):,} 銘柄")
+    print(f"  API呼び出し {result['requests']:,} 回（再試行 {result['retries']:,} 回）、"
+          f"レート制限による待ち時間 {result['throttled_seconds']:.1f} 秒")
+    quota = result["quota"]
+    limit = f"{quota['daily_limit']:,} 回" if quota["daily_limit"] else "なし"
+    used = f"{quota['used_today']:,} 回" if quota["used_today"] is not None else "不明"
+    print(f"  {quota['provider']} の1日あたりの上限: {limit}、今日の利用: {used}（うち今回 {quota['requests']:,} 回）")
+    for symbol, error in sorted(result["failed"].items()):
+        print(f"  取得エラー {symbol}: {error}")
+    if result["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+J-Quants / Alpha Vantage APIのモックサーバーを起動するスクリプト
+
+使用例:
+    python scripts/run_mock_server.py --port 8765 --latency 0.05 --rate-limit 5 --page-size 500
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.mock_server import MockServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="J-Quants / Alpha Vantage APIのモックサーバー")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=8765, help="待ち受けポート")
+    parser.add_argument("--latency", type=float, default=0.0, help="固定遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="遅延に加える乱数の最大値（秒）")
+    parser.add_argument("--rate-limit", type=float, default=None, help="1秒あたりの許容リクエスト数")
+    parser.add_argument("--page-size", type=int, default=0, help="daily_quotesの1ページあたりの件数")
+    parser.add_argument("--cassette-dir", default=None, help="記録済みカセットのディレクトリ")
+    parser.add_argument("--verbose", action="store_true", help="アクセスログを出力する")
+    args = parser.parse_args()
+
+    server = MockServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        page_size=args.page_size,
+        cassette_dir=args.cassette_dir,
+        verbose=args.verbose,
+    )
+    print(f"モックサーバーを起動しました: {server.url}")
+    print("クライアント側で以下の環境変数を設定してください:")
+    for key, value in server.env().items():
+        print(f"export {key}=\"{value}\"")
+    print("export JQUANTS_EMAIL=\"mock@example.com\" JQUANTS_PASSWORD=\"mock\"")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nモックサーバーを停止します")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+アプリの各ページ
+
+ページごとのモジュールは選択された時点で読み込むため、再実行時には表示中のページの
+処理（と、そのページが使うモジュールの import）のみが行われる。
+"""
+import importlib
+
+# サイドバーに表示するページ名とモジュール名
+PAGES = {
+    "株式チャート": "stock",
+    "投資信託特設ページ": "fund",
+    "スクリーナー": "screener",
+    "相関分析": "correlation",
+    "ポートフォリオ分析": "portfolio",
+}
+
+
+def render_page(page):
+    """
+    選択されたページを表示する
+
+    Parameters:
+    -----------
+    page : str
+        PAGES のページ名
+    """
+    if page not in PAGES:
+        raise ValueError(f"不明なページです: {page}")
+    importlib.import_module(f".{PAGES[page]}", __name__).render()
@@ -0,0 +1,225 @@
+"""
+各ページで共通に使う表示用の関数
+"""
+import re
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from utils.instrumentation import span
+from utils.symbols import load_company_names
+
+
+def get_company_names(market: str) -> dict:
+    """
+    銘柄マスタ（Excelファイル）から会社名の辞書を読み込む関数（市場ごとに必要になった時点で読み込む）
+    """
+    try:
+        return load_company_names(market)
+    except Exception as e:
+        label = "日本株" if market == "jp" else "アメリカ株"
+        st.error(f"{label}データの読み込みに失敗しました: {e}")
+        return {}
+
+
+def get_company_name(code: str, market: str) -> str:
+    """
+    証券コードから会社名を取得する関数
+    """
+    code = code.strip().upper()
+    if market == "jp":
+        m = re.match(r"(\d{4})", code)
+        if m:
+            key = m.group(1).zfill(4)
+            return get_company_names("jp").get(key, code)
+        return get_company_names("jp").get(code.replace('.T', '').zfill(4), code)
+    else:
+        return get_company_names("us").get(code, code)
+
+
+def get_display_name(code: str, market: str) -> str:
+    """
+    見出しに表示する「コード 会社名」を作成する関数
+    """
+    company_name = get_company_name(code, market)
+    # 日本株の場合は.Tを除去して表示
+    display_code = code.replace('.T', '') if market == "jp" else code
+    # 銘柄名が取得できなかった場合はコードのみ表示
+    if company_name and company_name != display_code:
+        return f"{display_code} {company_name}"
+    return display_code
+
+
+def normalize_stock_code(code: str, market: str) -> str:
+    """
+    証券コードを正規化する関数
+
+    Parameters:
+    -----------
+    code : str
+        証券コード
+    market : str
+        市場（"jp" または "us"）
+
+    Returns:
+    --------
+    str
+        正規化された証券コード
+    """
+    code = code.strip().upper()
+
+    if market == "jp":
+        if code.isdigit() and len(code) == 4:
+            return f"{code}.T"
+        return code
+    else:
+        return code
+
+
+def get_date_range(days: int) -> tuple:
+    """
+    今日から指定日数さかのぼった (from_date, to_date) を YYYY-MM-DD 形式で返す関数
+    """
+    today = datetime.now().date()
+    from_date = (today - timedelta(days=days)).strftime("%Y-%m-%d")
+    return from_date, today.strftime("%Y-%m-%d")
+
+
+def metric_card(label: str, value: str, color_class: str = "") -> None:
+    """
+    指標カードを表示する関数
+    """
+    st.markdown(f"""
+    <div class="metric-card">
+        <div class="metric-label">{label}</div>
+        <div class="metric-value {color_class}">{value}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def return_class(value: float) -> str:
+    """
+    リターンの符号に応じたCSSクラス名を返す関数
+    """
+    return "positive" if value >= 0 else "negative"
+
+
+def render_data_table(data, columns: list, column_names: dict, file_name: str, key: str) -> None:
+    """
+    データテーブルを表示する関数
+
+    キャッシュ済みの時系列の列をコピーせずに参照し、絞り込み・並べ替えを行ったうえで
+    表示するページ・選択した列だけを読み出す（utils.table.TableSource）。CSV はボタンを押した時点で作成する。
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        日付順の時系列
+    columns : list
+        最初に表示する列
+    column_names : dict
+        列名 → 表示名（ここに含まれる列だけを選択できる）
+    file_name : str
+        CSV のファイル名
+    key : str
+        ウィジェットのキーの接頭辞
+    """
+    from utils.table import DATE_COLUMN, DEFAULT_PAGE_SIZE, TableSource
+
+    source = TableSource.from_frame(data)
+    available = [col for col in column_names if col in source.columns]
+
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        selected = st.multiselect("表示する列", available, default=[col for col in columns if col in available],
+                                  format_func=lambda col: column_names.get(col, col), key=f"{key}_columns")
+    with col2:
+        sort_by = st.selectbox("並べ替え", [DATE_COLUMN] + available,
+                               format_func=lambda col: "日付" if col == DATE_COLUMN else column_names.get(col, col),
+                               key=f"{key}_sort")
+    with col3:
+        descending = st.checkbox("降順", value=True, key=f"{key}_descending")
+    where = st.text_input("絞り込み（例: Daily_Return < -3 and Volume > 1000000）", key=f"{key}_where")
+
+    try:
+        rows = source.rows(where, sort_by, ascending=not descending)
+    except ValueError as e:
+        st.error(f"絞り込み条件のエラー: {e}")
+        return
+
+    total_pages = max(1, -(-len(rows) // DEFAULT_PAGE_SIZE))
+    page = st.number_input("ページ", min_value=1, max_value=total_pages, value=1, step=1, key=f"{key}_page") - 1
+    page = min(page, total_pages - 1)
+    visible = rows[page * DEFAULT_PAGE_SIZE:(page + 1) * DEFAULT_PAGE_SIZE]
+
+    def to_display(table):
+        table.index = table.index.strftime('%Y-%m-%d')
+        table.columns = [column_names.get(col, col) for col in table.columns]
+        return table
+
+    display_data = to_display(source.take(visible, selected))
+    st.dataframe(display_data.style.format('{:.2f}'), use_container_width=True)
+    first_row = page * DEFAULT_PAGE_SIZE + 1 if len(rows) else 0
+    st.caption(f"{len(rows):,}件中 {first_row:,}〜{page * DEFAULT_PAGE_SIZE + len(display_data):,}件目"
+               f"（{page + 1}/{total_pages}ページ）")
+
+    st.download_button(
+        label="CSVダウンロード",
+        data=lambda: to_display(source.take(rows, selected)).to_csv(),
+        file_name=file_name,
+        mime="text/csv",
+        key=f"{key}_download",
+    )
+
+
+def render_footer(source: str) -> None:
+    """
+    データソースと最終更新日を表示する関数
+    """
+    st.markdown("---")
+    st.caption(f"データソース: {source}")
+    st.caption("最終更新日: " + datetime.now().strftime("%Y年%m月%d日"))
+
+
+# リターン分布の要約に表示する統計量
+DISTRIBUTION_STATS = {
+    "mean": "平均",
+    "std": "標準偏差",
+    "skew": "歪度",
+    "kurtosis": "尖度（超過）",
+    "q01": "1%点",
+    "q05": "5%点",
+    "q50": "中央値",
+    "q95": "95%点",
+    "q99": "99%点",
+}
+
+
+def render_return_distribution(service, market_code: str, stock_code: str, from_date: str, to_date: str,
+                               adjusted: bool = False) -> None:
+    """
+    日次リターンの分布（集計済みのヒストグラムと要約統計量）を表示する関数
+    """
+    from utils.visualizer import plot_returns_histogram
+
+    try:
+        distribution = service.return_distribution(market_code, stock_code, from_date, to_date, adjusted=adjusted)
+    except Exception as e:
+        st.error(f"リターン分布の計算エラー: {e}")
+        return
+    if distribution.n < 4:
+        st.info("リターンの分布を表示するにはデータが不足しています。")
+        return
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        fig = plot_returns_histogram(distribution)
+        with span("render.plotly_chart", chart="return_distribution"):
+            st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        summary = distribution.summary()
+        st.table({
+            "統計量": list(DISTRIBUTION_STATS.values()),
+            "値": [f"{summary[key]:.3f}" for key in DISTRIBUTION_STATS],
+        })
+        st.caption(f"{summary['n']:,}日分の日次リターン(%)")
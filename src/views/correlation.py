@@ -0,0 +1,130 @@
+"""
+銘柄間の相関分析ページ
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.instrumentation import span
+from utils.panel import PricePanel
+
+from src.views.common import get_company_names, get_date_range
+
+PERIOD_DAYS = {
+    "3ヶ月": 90,
+    "6ヶ月": 180,
+    "1年": 365,
+    "2年": 365*2
+}
+
+# 銘柄を指定しない場合に対象とする銘柄数の選択肢
+UNIVERSE_SIZES = [100, 300, 500, 1000, 2000]
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_correlation(panel_updated: str, symbols: tuple, from_date: str, to_date: str):
+    """
+    相関行列と並べ替えの順序を計算する関数（パネルの更新日時・銘柄・期間ごとにキャッシュ）
+    """
+    from utils.correlation import pairwise_cov_corr, return_panel, seriation_order
+
+    returns, symbols, _ = return_panel(PricePanel.open(), list(symbols), from_date, to_date)
+    _, corr, _ = pairwise_cov_corr(returns)
+    return corr, symbols, seriation_order(corr)
+
+
+def _parse_symbols(text, panel):
+    codes = [code.strip().upper().replace(".T", "") for code in text.replace("、", ",").split(",")]
+    codes = [code for code in codes if code]
+    missing = [code for code in codes if code not in panel]
+    return [code for code in codes if code in panel], missing
+
+
+def _default_universe(panel, size, from_date, to_date):
+    """期間内で取引のある日が多い順に銘柄を選ぶ"""
+    sliced = panel.select(None, from_date, to_date, fields=["Close"])
+    observed = (~np.isnan(sliced.field("Close"))).sum(axis=1)
+    top = np.argsort(-observed, kind="stable")[:size]
+    return tuple(sorted(sliced.symbols[i] for i in top if observed[i] > 0))
+
+
+def top_pairs(corr, symbols, n=20, ascending=False):
+    """
+    相関が高い（ascending=True の場合は低い）銘柄の組を返す関数
+    """
+    rows, cols = np.triu_indices(len(symbols), k=1)
+    values = corr[rows, cols]
+    finite = np.isfinite(values)
+    rows, cols, values = rows[finite], cols[finite], values[finite]
+    n = min(n, len(values))
+    if not n:
+        return pd.DataFrame(columns=["銘柄1", "銘柄2", "相関"])
+    key = values if ascending else -values
+    selected = np.argpartition(key, n - 1)[:n]
+    selected = selected[np.argsort(key[selected], kind="stable")]
+    return pd.DataFrame({
+        "銘柄1": [symbols[i] for i in rows[selected]],
+        "銘柄2": [symbols[i] for i in cols[selected]],
+        "相関": values[selected],
+    })
+
+
+def render():
+    """
+    相関分析ページを表示する
+    """
+    from utils.visualizer import plot_clustered_correlation_heatmap
+
+    st.header("銘柄間の相関分析")
+
+    try:
+        panel = PricePanel.open()
+    except ValueError:
+        st.info("株価パネルがまだ作成されていません。全銘柄のデータを取り込んでから利用してください。")
+        st.stop()
+    panel_updated = panel.meta.get("updated") or ""
+
+    col1, col2 = st.columns(2)
+    with col1:
+        period = st.selectbox("期間:", list(PERIOD_DAYS.keys()), index=2)
+    with col2:
+        size = st.selectbox("銘柄数（銘柄を指定しない場合）:", UNIVERSE_SIZES, index=0)
+    text = st.text_input("銘柄コード（カンマ区切り、空欄の場合はパネルの銘柄から選択）:", value="")
+    from_date, to_date = get_date_range(PERIOD_DAYS[period])
+
+    if text.strip():
+        symbols, missing = _parse_symbols(text, panel)
+        if missing:
+            st.warning(f"パネルにない銘柄は除外しました: {', '.join(missing)}")
+        symbols = tuple(symbols)
+    else:
+        symbols = _default_universe(panel, size, from_date, to_date)
+    if len(symbols) < 2:
+        st.error("相関を計算するには2銘柄以上が必要です。")
+        st.stop()
+
+    started = datetime.now()
+    with st.spinner(f"{len(symbols)}銘柄の相関を計算中..."):
+        corr, symbols, order = load_correlation(panel_updated, symbols, from_date, to_date)
+    elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+
+    names = get_company_names("jp")
+    labels = [f"{names.get(code, '')}({code})" if names.get(code) else code for code in symbols]
+    fig = plot_clustered_correlation_heatmap(corr, labels, order=order, title="")
+    with span("render.plotly_chart", chart="correlation_heatmap"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{len(symbols)}銘柄・{period}の日次リターン（両銘柄の取引がある日のみ使用） ／ 処理時間: {elapsed_ms:.0f} ms")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("相関の高い組")
+        st.dataframe(top_pairs(corr, labels).style.format({"相関": "{:.3f}"}), use_container_width=True)
+    with col2:
+        st.subheader("相関の低い組")
+        st.dataframe(top_pairs(corr, labels, ascending=True).style.format({"相関": "{:.3f}"}),
+                     use_container_width=True)
+
+    st.markdown("---")
+    st.caption("データソース: 株価パネル（J-Quants API）")
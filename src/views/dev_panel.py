@@ -0,0 +1,52 @@
+"""
+開発者向けの計測パネル（環境変数 STOCK_VISUALIZER_DEV_PANEL=1 で表示）
+"""
+import pandas as pd
+import streamlit as st
+
+from utils.instrumentation import get_recorder, to_prometheus
+
+
+def render():
+    """
+    サイドバーに計測結果を表示する
+    """
+    with st.sidebar.expander("🛠 計測（開発者向け）"):
+        recorder = get_recorder()
+        snapshot = recorder.snapshot()
+        if snapshot["spans"]:
+            span_table = pd.DataFrame.from_dict(snapshot["spans"], orient="index").sort_values("total_ms", ascending=False)
+            st.dataframe(
+                span_table[["count", "mean_ms", "max_ms", "last_ms", "errors"]].style.format(
+                    {"mean_ms": "{:.1f}", "max_ms": "{:.1f}", "last_ms": "{:.1f}"}
+                ),
+                use_container_width=True
+            )
+        else:
+            st.caption("計測データはまだありません")
+
+        cache_stats = snapshot["gauges"].get("price_cache")
+        if cache_stats:
+            st.caption(
+                f"株価キャッシュ: ヒット {cache_stats['hits']} / ミス {cache_stats['misses']}、"
+                f"{cache_stats['items']} 件（{cache_stats['nbytes'] / 1024 / 1024:.1f} MB）"
+            )
+        service_stats = snapshot["gauges"].get("data_service")
+        if service_stats:
+            st.caption(
+                f"指標キャッシュ: ヒット {service_stats['indicator_hits']} / ミス {service_stats['indicator_misses']}、"
+                f"図キャッシュ: ヒット {service_stats['figure_hits']} / ミス {service_stats['figure_misses']}"
+            )
+
+        recent = list(recorder.recent)[-20:]
+        if recent:
+            st.caption("直近の区間")
+            st.dataframe(
+                pd.DataFrame(recent)[["start", "name", "parent", "ms", "error"]].iloc[::-1],
+                use_container_width=True, hide_index=True
+            )
+
+        st.download_button("Prometheus形式でダウンロード", to_prometheus(snapshot),
+                           file_name="metrics.txt", mime="text/plain")
+        if st.button("計測値をリセット"):
+            recorder.reset()
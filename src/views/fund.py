@@ -0,0 +1,145 @@
+"""
+投資信託特設ページ
+"""
+import pandas as pd
+import streamlit as st
+
+from utils.data_service import get_data_service
+from utils.instrumentation import span
+from utils.quota import QuotaExceeded
+
+from src.views.common import (get_date_range, metric_card, render_data_table, render_footer, render_return_distribution,
+                              return_class)
+
+FUNDS = {
+    "オルカン（eMAXIS Slim 全世界株式）": "2559.T",
+    "S&P500（eMAXIS Slim）": "2558.T",
+    "日経225インデックス": "1321.T",
+}
+
+PERIOD_DAYS = {
+    "1ヶ月": 30,
+    "3ヶ月": 90,
+    "6ヶ月": 180,
+    "1年": 365,
+    "2年": 365*2
+}
+
+MA_WINDOWS = (5, 20, 60)
+
+# 移動平均線の色
+MA_COLORS = {5: '#FFC107', 20: '#FF5722', 60: '#9C27B0'}
+
+# 基準価額チャートの線（列名, 凡例の名前, 色, 線の太さ）
+PRICE_LINES = [('Close', '基準価額', '#2196F3', 2.5)] + [
+    (f'MA_{window}', f'MA({window}日)', MA_COLORS[window], 1.5) for window in MA_WINDOWS
+]
+
+RETURN_LINES = [('Cumulative_Return', '累積リターン', '#4CAF50', 2)]
+
+COLUMN_NAMES = {
+    'Close': '基準価額',
+    'MA_5': '移動平均(5日)',
+    'MA_20': '移動平均(20日)',
+    'MA_60': '移動平均(60日)',
+    'Daily_Return': '日次リターン(%)',
+    'Cumulative_Return': '累積リターン(%)'
+}
+
+
+def build_monthly_figure(data):
+    """
+    月次リターンの棒グラフを作成する関数
+    """
+    from utils.resample import period_starts
+    from utils.visualizer import build_signed_bar_figure
+
+    # resample('M') は pandas 2.2 以降で 'ME' に変わったため、月の区切りは period_starts で求める
+    months = pd.DatetimeIndex(period_starts(data.index, "monthly")).strftime('%Y-%m')
+    monthly_returns = data['Daily_Return'].groupby(months).sum()
+    return build_signed_bar_figure(monthly_returns.index, monthly_returns, '月次リターン')
+
+
+def render():
+    """
+    投資信託特設ページを表示する
+    """
+    from utils.visualizer import build_line_figure
+
+    service = get_data_service()
+
+    st.header("人気投資信託の値動き特設ページ")
+
+    selected_fund = st.selectbox("投資信託を選択:", list(FUNDS.keys()))
+    fund_code = FUNDS[selected_fund]
+
+    period = st.selectbox(
+        "期間:",
+        list(PERIOD_DAYS.keys()),
+        index=4
+    )
+    from_date, to_date = get_date_range(PERIOD_DAYS[period])
+
+    with st.spinner("データを取得中..."):
+        try:
+            data = service.indicators("jp", fund_code, from_date, to_date, ma_windows=MA_WINDOWS, returns=True)
+        except QuotaExceeded as e:
+            st.warning(f"{e}。保存済みのデータもないため、しばらくしてから再度お試しください。")
+            st.stop()
+        except Exception as e:
+            st.error(f"データ取得エラー: {e}")
+            st.stop()
+
+    if data is None or data.empty or data['Close'].dropna().empty:
+        st.error("データが取得できませんでした。")
+    else:
+        # API の利用回数の上限に達して保存済みのデータを表示している場合（図のキャッシュも分ける）
+        notice = service.degraded("jp", fund_code)
+        if notice:
+            st.warning(notice)
+        data_key = ("jp", fund_code, from_date, to_date, notice is not None)
+        close_col = data['Close']
+        tabs = st.tabs(["基準価額チャート", "パフォーマンス分析", "データテーブル"])
+
+        with tabs[0]:
+            st.subheader(f"{selected_fund}の基準価額推移")
+
+            fig = service.figure(("fund_price", data_key), build_line_figure, data, PRICE_LINES)
+            with span("render.plotly_chart", chart="fund_price"):
+                st.plotly_chart(fig, use_container_width=True)
+
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                metric_card("現在基準価額", f"¥{close_col.iloc[-1]:,.0f}")
+
+            with col2:
+                daily_return = (close_col.iloc[-1] / close_col.iloc[-2] - 1) * 100 if len(close_col) > 1 else 0
+                metric_card("日次リターン", f"{daily_return:+.2f}%", return_class(daily_return))
+
+            with col3:
+                total_return = ((close_col.iloc[-1] / close_col.iloc[0]) - 1) * 100
+                metric_card("期間リターン", f"{total_return:+.2f}%", return_class(total_return))
+
+        with tabs[1]:
+            st.subheader(f"{selected_fund}のパフォーマンス分析")
+
+            fig = service.figure(("fund_returns", data_key), build_line_figure, data, RETURN_LINES,
+                                 height=400)
+            with span("render.plotly_chart", chart="fund_returns"):
+                st.plotly_chart(fig, use_container_width=True)
+
+            fig = service.figure(("fund_monthly", data_key), build_monthly_figure, data)
+            with span("render.plotly_chart", chart="fund_monthly"):
+                st.plotly_chart(fig, use_container_width=True)
+
+            st.subheader("日次リターンの分布")
+            render_return_distribution(service, "jp", fund_code, from_date, to_date)
+
+        with tabs[2]:
+            st.subheader(f"{selected_fund}のデータテーブル")
+
+            render_data_table(data, list(COLUMN_NAMES.keys()), COLUMN_NAMES, f"{selected_fund}_data.csv",
+                              key="fund_table")
+
+    render_footer("J-Quants API")
@@ -0,0 +1,100 @@
+"""
+ポートフォリオ分析ページ
+"""
+import streamlit as st
+
+from utils.instrumentation import span
+from utils.panel import PricePanel
+
+from src.views.common import get_company_names, metric_card, render_footer, return_class
+
+DEFAULT_TRADES = """Date,Symbol,Quantity,Price
+2023-01-04,7203,100,
+2023-01-04,6758,50,
+2023-06-01,9984,100,
+2023-09-01,7203,-50,
+"""
+
+COLUMN_NAMES = {
+    'Name': '銘柄名',
+    'Value': '評価額',
+    'Weight': '構成比(%)',
+    'PnL': '損益',
+    'Contribution': '寄与度(%)'
+}
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def load_tracker(trades_csv: str, cash: float):
+    """
+    売買履歴・初期資金ごとに PortfolioTracker を保持する（再実行時は追加された営業日だけを評価する）
+    """
+    from utils.portfolio import Portfolio, PortfolioTracker
+    return PortfolioTracker(Portfolio(trades=trades_csv, cash=cash))
+
+
+def render():
+    """
+    ポートフォリオ分析ページを表示する
+    """
+    from utils.portfolio import drawdown, risk_metrics
+    from utils.visualizer import build_nav_figure
+
+    st.header("ポートフォリオ分析")
+
+    try:
+        panel = PricePanel.open()
+    except ValueError:
+        st.info("株価パネルがまだ作成されていません。全銘柄のデータを取り込んでから利用してください。")
+        st.stop()
+
+    trades_csv = st.text_area("売買履歴（CSV: Date, Symbol, Quantity, Price。Price を省略した場合は当日の終値）:",
+                              value=DEFAULT_TRADES, height=180)
+    cash = st.number_input("初期資金（円）:", min_value=0.0, value=10_000_000.0, step=1_000_000.0)
+
+    try:
+        tracker = load_tracker(trades_csv, float(cash))
+        with span("portfolio.update"):
+            tracker.update(panel)
+        nav = tracker.nav
+        metrics = risk_metrics(tracker.returns)
+    except ValueError as e:
+        st.error(f"ポートフォリオの評価エラー: {e}")
+        st.stop()
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        metric_card("NAV", f"¥{nav.iloc[-1]:,.0f}")
+    with col2:
+        total_return = (nav.iloc[-1] / nav.iloc[0] - 1) * 100
+        metric_card("期間リターン", f"{total_return:+.2f}%", return_class(total_return))
+    with col3:
+        metric_card("ボラティリティ(年率)", f"{metrics['volatility']:.2f}%")
+    with col4:
+        metric_card("最大ドローダウン", f"{metrics['max_drawdown']:.2f}%", return_class(metrics['max_drawdown']))
+
+    tabs = st.tabs(["NAV推移", "寄与度", "リスク指標"])
+
+    with tabs[0]:
+        fig = build_nav_figure(nav, drawdown(nav))
+        with span("render.plotly_chart", chart="portfolio_nav"):
+            st.plotly_chart(fig, use_container_width=True)
+
+    with tabs[1]:
+        names = get_company_names("jp")
+        table = tracker.contributions()
+        table.insert(0, 'Name', [names.get(code, code) for code in table.index])
+        table = table.sort_values('PnL', ascending=False).rename(columns=COLUMN_NAMES)
+        table.index.name = 'コード'
+        st.dataframe(table.style.format('{:,.2f}', subset=list(COLUMN_NAMES.values())[1:]), use_container_width=True)
+
+    with tabs[2]:
+        st.table({
+            "指標": ["ボラティリティ(年率)", "VaR 95%（ヒストリカル, 1日）", "VaR 95%（正規分布, 1日）",
+                    "CVaR 95%（1日）", "最大ドローダウン", "現在のドローダウン"],
+            "値(%)": [f"{metrics[key]:.2f}" for key in ["volatility", "var_historical", "var_parametric", "cvar",
+                                                        "max_drawdown", "current_drawdown"]],
+        })
+        st.caption(f"評価期間: {nav.index[0]:%Y-%m-%d} 〜 {nav.index[-1]:%Y-%m-%d}（{len(nav)}営業日）")
+
+    render_footer("株価パネル（J-Quants API）")
@@ -0,0 +1,86 @@
+"""
+テクニカル・スクリーナーページ
+"""
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from utils.panel import PricePanel
+from utils.screener import screen
+
+from src.views.common import get_company_names
+
+COLUMN_NAMES = {
+    'Close': '終値',
+    'Volume': '出来高',
+    'Daily_Return': '日次リターン(%)',
+    'MA_5': '移動平均(5日)',
+    'MA_25': '移動平均(25日)',
+    'MA_75': '移動平均(75日)',
+    'RSI': 'RSI(14)',
+    'Volatility': 'ボラティリティ(20日)'
+}
+
+
+@st.cache_resource(show_spinner=False)
+def load_screener_table(panel_updated: str) -> pd.DataFrame:
+    """
+    スクリーナー用の最新指標表を読み込む関数（パネルの更新日時ごとにキャッシュ）
+    """
+    from utils.screener import open_latest_table
+    return open_latest_table()
+
+
+def render():
+    """
+    スクリーナーページを表示する
+    """
+    st.header("テクニカル・スクリーナー")
+
+    try:
+        panel_updated = PricePanel.open().meta.get("updated") or ""
+    except ValueError:
+        st.info("株価パネルがまだ作成されていません。全銘柄のデータを取り込んでから利用してください。")
+        st.stop()
+
+    expression = st.text_input(
+        "条件式（例: Close > MA_75 and RSI < 30）:",
+        value="Close > MA_75 and RSI < 30"
+    )
+    st.caption(
+        "利用可能な指標: Close, Volume, Daily_Return, MA_5, MA_25, MA_75, RSI, Volatility ／ "
+        "演算子: and, or, not, <, <=, >, >=, ==, !=, +, -, *, /"
+    )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("並べ替え:", list(COLUMN_NAMES.keys()), index=6,
+                               format_func=lambda col: COLUMN_NAMES[col])
+    with col2:
+        ascending = st.radio("順序:", ["昇順", "降順"], horizontal=True) == "昇順"
+    with col3:
+        limit = st.number_input("最大件数:", min_value=10, max_value=5000, value=200, step=10)
+
+    try:
+        started = datetime.now()
+        table = load_screener_table(panel_updated)
+        result = screen(expression, table, names=get_company_names("jp"), sort_by=sort_by,
+                        ascending=ascending, limit=int(limit))
+        elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+    except ValueError as e:
+        st.error(f"条件式エラー: {e}")
+        st.stop()
+
+    st.subheader(f"{len(result)}銘柄が一致（基準日: {table.attrs.get('as_of')}、対象: {len(table)}銘柄）")
+    st.caption(f"処理時間: {elapsed_ms:.0f} ms")
+
+    display_data = result.rename(columns=COLUMN_NAMES)
+    display_data.index.name = 'コード'
+    st.dataframe(
+        display_data.style.format('{:.2f}', subset=[name for name in COLUMN_NAMES.values() if name in display_data.columns]),
+        use_container_width=True
+    )
+
+    st.markdown("---")
+    st.caption("データソース: 株価パネル（J-Quants API）")
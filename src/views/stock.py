@@ -0,0 +1,223 @@
+"""
+株式チャートページ
+"""
+import streamlit as st
+
+from utils.data_service import get_data_service
+from utils.instrumentation import span
+from utils.quota import QuotaExceeded
+
+from src.views.common import (get_date_range, get_display_name, metric_card, normalize_stock_code, render_data_table,
+                              render_footer, render_return_distribution, return_class)
+
+PERIOD_DAYS = {
+    "1週間": 7,
+    "1ヶ月": 30,
+    "3ヶ月": 90,
+    "6ヶ月": 180,
+    "1年": 365,
+    "2年": 365*2,
+    "5年": 365*5,
+    "10年": 365*10
+}
+
+# 足の種類（日足は期間が長いと読みにくいため、長期間は週足・月足で表示する）
+TIMEFRAMES = {
+    "日足": "daily",
+    "週足": "weekly",
+    "月足": "monthly"
+}
+
+MA_WINDOWS = (5, 25, 75)
+
+# 日中チャートの表示期間（None は保持している全期間）
+INTRADAY_SPAN_DAYS = {
+    "1日": 1,
+    "5日": 5,
+    "1ヶ月": 30,
+    "全期間": None
+}
+
+INTRADAY_TIER_NAMES = {"1min": "1分足", "5min": "5分足", "60min": "1時間足", "daily": "日足"}
+
+# 移動平均線の色
+MA_COLORS = {5: '#FFC107', 25: '#FF5722', 75: '#2196F3'}
+
+COLUMN_NAMES = {
+    'Open': '始値',
+    'High': '高値',
+    'Low': '安値',
+    'Close': '終値',
+    'Volume': '出来高',
+    'MA_5': '移動平均(5日)',
+    'MA_25': '移動平均(25日)',
+    'MA_75': '移動平均(75日)',
+    'RSI': 'RSI(14)',
+    'Volatility': 'ボラティリティ(20日)',
+    'Daily_Return': '日次リターン(%)'
+}
+
+
+def render():
+    """
+    株式チャートページを表示する
+    """
+    from utils.visualizer import build_intraday_figure, build_price_figure, build_technical_figure
+
+    service = get_data_service()
+
+    st.sidebar.header("市場選択")
+    market = st.sidebar.radio(
+        "市場:",
+        ["日本株 (J-Quants)", "米国株 (Alpha Vantage)"],
+        index=0
+    )
+
+    market_code = "jp" if "日本株" in market else "us"
+
+    st.sidebar.header("銘柄選択")
+
+    if market_code == "jp":
+        input_code = st.sidebar.text_input(
+            "証券コードを入力（例: 7203, 1321.T, 9984）:",
+            value="7203"
+        )
+        placeholder_text = "トヨタ自動車(7203)、ソフトバンクグループ(9984)など"
+    else:
+        input_code = st.sidebar.text_input(
+            "ティッカーシンボルを入力（例: AAPL, MSFT, GOOGL）:",
+            value="AAPL"
+        )
+        placeholder_text = "Apple(AAPL)、Microsoft(MSFT)、Amazon(AMZN)など"
+
+    stock_code = normalize_stock_code(input_code, market_code)
+
+    st.sidebar.subheader("期間選択")
+    period = st.sidebar.selectbox(
+        "期間:",
+        list(PERIOD_DAYS.keys()),
+        index=5
+    )
+    from_date, to_date = get_date_range(PERIOD_DAYS[period])
+    timeframe_name = st.sidebar.radio("足の種類:", list(TIMEFRAMES.keys()), index=0, horizontal=True)
+    timeframe = TIMEFRAMES[timeframe_name]
+    adjusted = st.sidebar.checkbox("株式分割・配当を調整", value=False)
+
+    st.sidebar.subheader("テクニカル指標")
+    show_ma = st.sidebar.checkbox("移動平均線", value=True)
+    show_volume = st.sidebar.checkbox("出来高", value=True)
+    show_rsi = st.sidebar.checkbox("RSI", value=False)
+    show_volatility = st.sidebar.checkbox("ボラティリティ", value=False)
+    # 分足は Alpha Vantage のみ対応
+    show_intraday = market_code == "us" and st.sidebar.checkbox("日中足（分足）を表示", value=False)
+
+    with st.spinner(f"データを取得中... ({stock_code})"):
+        try:
+            data = service.indicators(
+                market_code, stock_code, from_date, to_date,
+                ma_windows=MA_WINDOWS if show_ma else (), rsi=show_rsi, volatility=show_volatility,
+                adjusted=adjusted
+            )
+        except QuotaExceeded as e:
+            # 証券コードの誤りではないため入力のヒントは表示しない
+            st.warning(f"{e}。保存済みのデータもないため、しばらくしてから再度お試しください。")
+            st.stop()
+        except Exception as e:
+            st.error(f"データ取得エラー: {e}")
+            st.info(f"ヒント: {placeholder_text}")
+            st.stop()
+
+    if data is None or data.empty or data['Close'].dropna().empty:
+        st.error("データが取得できませんでした。証券コードを確認してください。")
+        st.info(f"ヒント: {placeholder_text}")
+    else:
+        # API の利用回数の上限に達して保存済みのデータを表示している場合（図のキャッシュも分ける）
+        notice = service.degraded(market_code, stock_code)
+        if notice:
+            st.warning(notice)
+        data_key = (market_code, stock_code, from_date, to_date, adjusted, notice is not None)
+        ma_colors = MA_COLORS if show_ma else None
+        display_name = get_display_name(stock_code, market_code)
+        close_col = data['Close']
+        tab_names = ["価格チャート", "テクニカル分析", "データテーブル"]
+        if show_intraday:
+            tab_names.insert(1, "日中チャート")
+        tabs = dict(zip(tab_names, st.tabs(tab_names)))
+
+        currency_symbol = "¥" if market_code == "jp" else "$"
+
+        with tabs["価格チャート"]:
+            st.subheader(f"{display_name}")
+
+            # 週足・月足は取得済みの日足から作成する（終了した期間の集約結果は再利用される）
+            candles = None
+            if timeframe != "daily":
+                candles = service.candles(market_code, stock_code, from_date, to_date, timeframe, adjusted=adjusted)
+            fig = service.figure(("stock_price", data_key, timeframe, show_ma, show_volume),
+                                 build_price_figure, data, ma_colors, show_volume, candles=candles)
+            with span("render.plotly_chart", chart="stock_price"):
+                st.plotly_chart(fig, use_container_width=True)
+
+            col1, col2, col3, col4 = st.columns(4)
+
+            with col1:
+                metric_card("現在値", f"{currency_symbol}{close_col.iloc[-1]:,.0f}")
+
+            with col2:
+                daily_return = (close_col.iloc[-1] / close_col.iloc[-2] - 1) * 100 if len(close_col) > 1 else 0
+                metric_card("日次リターン", f"{daily_return:+.2f}%", return_class(daily_return))
+
+            with col3:
+                total_return = ((close_col.iloc[-1] / close_col.iloc[0]) - 1) * 100
+                metric_card("期間リターン", f"{total_return:+.2f}%", return_class(total_return))
+
+            with col4:
+                high_low_ratio = ((data['High'].max() / data['Low'].min()) - 1) * 100
+                metric_card("高値/安値レンジ", f"{high_low_ratio:.2f}%")
+
+        if show_intraday:
+            with tabs["日中チャート"]:
+                st.subheader(f"{display_name} 日中チャート")
+                span_name = st.selectbox("表示期間:", list(INTRADAY_SPAN_DAYS.keys()), index=0)
+                try:
+                    tier, intraday_data = service.intraday(stock_code, days=INTRADAY_SPAN_DAYS[span_name])
+                except Exception as e:
+                    st.error(f"分足データ取得エラー: {e}")
+                else:
+                    if intraday_data.empty:
+                        st.info("分足データがありません。")
+                    else:
+                        intraday_key = (stock_code, span_name, tier, intraday_data.index[-1],
+                                        float(intraday_data['Volume'].iloc[-1]))
+                        intraday_fig = service.figure(("stock_intraday", intraday_key),
+                                                      build_intraday_figure, intraday_data, tier)
+                        with span("render.plotly_chart", chart="stock_intraday"):
+                            st.plotly_chart(intraday_fig, use_container_width=True)
+                        st.caption(f"{INTRADAY_TIER_NAMES[tier]}で表示（{len(intraday_data):,}本）")
+
+        with tabs["テクニカル分析"]:
+            st.subheader(f"{display_name} テクニカル分析")
+
+            tech_fig = service.figure(("stock_technical", data_key, show_ma, show_rsi, show_volatility),
+                                      build_technical_figure, data, ma_colors, show_rsi, show_volatility)
+            with span("render.plotly_chart", chart="stock_technical"):
+                st.plotly_chart(tech_fig, use_container_width=True)
+
+            st.subheader("日次リターンの分布")
+            render_return_distribution(service, market_code, stock_code, from_date, to_date, adjusted=adjusted)
+
+        with tabs["データテーブル"]:
+            st.subheader(f"{display_name} データテーブル")
+
+            columns_to_display = ['Open', 'High', 'Low', 'Close', 'Volume']
+            if show_ma:
+                columns_to_display.extend([f'MA_{window}' for window in MA_WINDOWS])
+            if show_rsi:
+                columns_to_display.append('RSI')
+            if show_volatility:
+                columns_to_display.append('Volatility')
+            columns_to_display.append('Daily_Return')
+
+            render_data_table(data, columns_to_display, COLUMN_NAMES, f"{stock_code}_data.csv", key="stock_table")
+
+    render_footer("J-Quants API" if market_code == "jp" else "Alpha Vantage API")
@@ -0,0 +1,137 @@
+"""
+株式分割・配当による株価調整のテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.adjustment import AdjustedHistory, AdjustmentStore, extract_events
+from utils.compact import CompactCache
+from utils.data_service import DataService
+from utils.decoder import decode_daily_quotes, decode_time_series_daily
+from utils.mock_server import MockServer, synthetic_daily_quotes, synthetic_time_series_daily
+
+
+def _bars(start, closes, factors=None):
+    """終値の列から日足を作る（factors は J-Quants の AdjustmentFactor）"""
+    index = pd.bdate_range(start, periods=len(closes), name="Date")
+    closes = np.asarray(closes, dtype=float)
+    data = pd.DataFrame({"Open": closes, "High": closes * 1.01, "Low": closes * 0.99, "Close": closes,
+                         "Volume": np.full(len(closes), 1000.0)}, index=index)
+    data["AdjustmentFactor"] = 1.0 if factors is None else factors
+    return data
+
+
+def test_split_is_applied_lazily_and_incrementally():
+    """新しい分割はイベント日より前の行だけを調整し直し、全体を計算し直した結果と一致すること"""
+    first = _bars("2024-01-01", [100, 102, 104, 52, 53], factors=[1, 1, 1, 0.5, 1])
+    history = AdjustedHistory.from_frame(first)
+    adjusted = history.adjusted()
+    assert adjusted["Close"].tolist() == [50, 51, 52, 52, 53]
+    assert adjusted["Volume"].tolist() == [2000, 2000, 2000, 1000, 1000]
+    assert history.raw()["Close"].tolist() == [100, 102, 104, 52, 53]
+
+    # 1:3 の分割を含む日足を追加する
+    second = _bars("2024-01-08", [54, 18, 18.5], factors=[1, 1 / 3, 1])
+    assert history.append(second) == 3
+    assert history.readjusted_rows == 6
+    expected = AdjustedHistory.from_frame(pd.concat([first, second])).adjusted()
+    result = history.adjusted()
+    assert np.allclose(result.to_numpy(), expected.to_numpy())
+    assert np.allclose(result["Close"].iloc[:3], [100 / 6, 102 / 6, 104 / 6])
+
+    # 取得済みの日付は追加しない
+    assert history.append(second) == 0
+    assert history.adjusted("2024-01-05", "2024-01-09")["Close"].size == 3
+
+
+def test_alphavantage_split_and_dividend():
+    data = _bars("2024-01-01", [100, 50, 49]).drop(columns="AdjustmentFactor")
+    data["Split Coefficient"] = [1.0, 2.0, 1.0]
+    data["Dividend"] = [0.0, 0.0, 1.0]
+    events = extract_events(data)
+    assert [(str(day), pf, vf) for day, pf, vf in events] == [
+        ("2024-01-02", 0.5, 2.0), ("2024-01-03", pytest.approx(0.98), 1.0)
+    ]
+    adjusted = AdjustedHistory.from_frame(data).adjusted()
+    assert np.allclose(adjusted["Close"], [100 * 0.5 * 0.98, 50 * 0.98, 49])
+
+
+def test_decoders_keep_adjustment_columns():
+    rows = synthetic_daily_quotes("7203", "2024-01-01", "2024-01-31")
+    assert "AdjustmentFactor" not in decode_daily_quotes(rows).columns
+    data = decode_daily_quotes(rows, adjustment=True)
+    assert {"AdjustmentFactor", "Adj Close"} <= set(data.columns)
+
+    data = decode_time_series_daily(synthetic_time_series_daily("AAPL", adjusted=True))
+    assert {"Adj Close", "Dividend", "Split Coefficient", "Volume"} <= set(data.columns)
+
+
+def test_store_and_service(tmp_path, monkeypatch):
+    """調整後株価を保存し、同じ日の2回目以降は取得しないこと"""
+    store = AdjustmentStore(tmp_path)
+    history = AdjustedHistory.from_frame(_bars("2024-01-01", [100, 50], factors=[1, 0.5]))
+    store.save("jp", "1234.T", history)
+    loaded = store.load("jp", "1234.T")
+    assert np.allclose(loaded.adjusted().to_numpy(), history.adjusted().to_numpy())
+    assert loaded.coverage_start == "2024-01-01"
+
+    with MockServer() as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        service = DataService(price_cache=CompactCache(), adjustment_store=store)
+        adjusted = service.prices("jp", "7203.T", "2023-01-01", "2023-06-30", adjusted=True)
+        raw = service.prices("jp", "7203.T", "2023-01-01", "2023-06-30")
+        service.prices("jp", "7203.T", "2023-03-01", "2023-06-30", adjusted=True)
+        assert server.stats["/v1/prices/daily_quotes"] == 2
+    # 疑似データには分割がないため未調整の株価と一致する
+    assert np.allclose(adjusted[["Open", "Close"]].to_numpy(), raw[["Open", "Close"]].to_numpy())
+    assert store.path("jp", "7203.T").exists()
+
+
+def test_service_retries_failed_incremental_update(tmp_path, monkeypatch):
+    """差分の取得が一時的なエラーの場合は保持している履歴を返し、キャッシュせずに次の呼び出しで取得し直すこと"""
+    import utils.data_fetcher as data_fetcher
+    from utils.errors import RetryableError
+
+    store = AdjustmentStore(tmp_path)
+    store.save("jp", "7203.T", AdjustedHistory.from_frame(_bars("2024-01-01", np.linspace(100, 120, 130))))
+    fetch = data_fetcher.get_stock_data_jquants
+
+    def failing(error):
+        def fetcher(*args, **kwargs):
+            raise error
+        return fetcher
+
+    with MockServer() as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        service = DataService(price_cache=CompactCache(), adjustment_store=store)
+        args = ("jp", "7203.T", "2024-03-01", "2024-12-31")
+
+        monkeypatch.setattr(data_fetcher, "get_stock_data_jquants", failing(RetryableError("503", 503)))
+        held = service.prices(*args, adjusted=True)
+        assert held.index[-1] == pd.Timestamp("2024-06-28")
+        assert service.price_cache.stats()["items"] == 0
+
+        # 一時的でないエラーはそのまま送出する
+        monkeypatch.setattr(data_fetcher, "get_stock_data_jquants", failing(ValueError("不正なレスポンス")))
+        with pytest.raises(ValueError, match="不正なレスポンス"):
+            service.prices(*args, adjusted=True)
+
+        monkeypatch.setattr(data_fetcher, "get_stock_data_jquants", fetch)
+        updated = service.prices(*args, adjusted=True)
+        assert updated.index[-1] > pd.Timestamp("2024-12-01")
+        assert service.price_cache.stats()["items"] == 1
+        assert server.stats["/v1/prices/daily_quotes"] == 1
@@ -0,0 +1,122 @@
+"""
+株価アラートの評価エンジンのテスト
+"""
+import json
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.alerts import AlertEngine, AlertRule, IndicatorState, JsonlSink, fetch_new_bars
+from utils.data_processor import calculate_moving_averages, calculate_returns, calculate_rsi, calculate_volatility
+from utils.decoder import decode_daily_quotes
+from utils.errors import NoDataError
+from utils.mock_server import MockServer, synthetic_daily_quotes
+
+DATA = decode_daily_quotes(synthetic_daily_quotes("7203", "2022-01-01", "2023-06-30"))
+
+
+def fake_fetcher(calls):
+    def fetch(market, symbol, since, lookback, today):
+        calls.append((symbol, since, lookback))
+        data = DATA[DATA.index <= pd.Timestamp(today)]
+        if since:
+            return data[data.index > pd.Timestamp(since)]
+        return data.iloc[-lookback:]
+    return fetch
+
+
+def test_incremental_state_matches_data_processor():
+    """1本ずつ更新した指標が calculate_* 関数と一致し、保存・復元後も継続できること"""
+    state = IndicatorState([5, 25])
+    half = len(DATA) // 2
+    for day, row in DATA.iloc[:half].iterrows():
+        state.update(day.strftime("%Y-%m-%d"), row.to_dict())
+    state = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    for day, row in DATA.iloc[half:].iterrows():
+        latest = state.update(day.strftime("%Y-%m-%d"), row.to_dict())
+
+    expected = calculate_volatility(calculate_rsi(calculate_returns(calculate_moving_averages(DATA, [5, 25]))))
+    last = expected.iloc[-1]
+    for column in ["MA_5", "MA_25", "RSI", "Daily_Return", "Volatility"]:
+        assert np.isclose(latest[column], last[column]), column
+
+
+def test_alerts_fire_on_new_bars_only(tmp_path):
+    """初回は状態の初期化のみ行い、以降は差分の日足で条件が真に変わったときだけ発火すること"""
+    calls = []
+    rules = [AlertRule("jp", "7203", "Close > MA_25"), AlertRule("jp", "7203", "RSI < 40", name="売られすぎ")]
+    sink = JsonlSink(tmp_path / "alerts.jsonl")
+    engine = AlertEngine(rules, sink, tmp_path / "state.json", fetcher=fake_fetcher(calls))
+
+    result = engine.poll(today=date(2023, 1, 31))
+    assert result["alerts"] == [] and result["errors"] == {}
+    assert calls[0] == ("7203", None, 25)
+
+    engine = AlertEngine(rules, sink, tmp_path / "state.json", fetcher=fake_fetcher(calls))
+    result = engine.poll(today=date(2023, 6, 30))
+    assert calls[-1] == ("7203", "2023-01-31", 25)
+    assert result["bars"] == len(DATA.loc["2023-02-01":"2023-06-30"])
+
+    # 全期間の指標から、条件が偽から真に変わった日を求めて比較する
+    df = calculate_rsi(calculate_moving_averages(DATA, [25]))
+    period = df.loc["2023-01-31":"2023-06-30"]
+    expected = 0
+    for condition in [period["Close"] > period["MA_25"], period["RSI"] < 40]:
+        expected += int((condition & ~condition.shift(1, fill_value=True)).iloc[1:].sum())
+    assert len(result["alerts"]) == expected > 0
+
+    written = [json.loads(line) for line in open(tmp_path / "alerts.jsonl", encoding="utf-8")]
+    assert written == result["alerts"]
+    assert {a["name"] for a in written} <= {"Close > MA_25", "売られすぎ"}
+
+
+def test_invalid_rules():
+    with pytest.raises(ValueError):
+        AlertRule("jp", "7203", "MA_5 >")
+    with pytest.raises(ValueError, match="使えない指標"):
+        AlertRule("jp", "7203", "Cumulative_Return > 10")
+    with pytest.raises(ValueError):
+        AlertRule("hk", "0700", "Close > MA_5")
+
+
+def test_poll_without_new_bars_is_not_an_error(tmp_path, monkeypatch):
+    """新しい日足がない間（同じ日・休日）の取得はエラーにならないこと"""
+    with MockServer() as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        engine = AlertEngine([AlertRule("jp", "7203", "Close > MA_5")], state_path=tmp_path / "state.json")
+
+        result = engine.poll(today=date(2023, 6, 30))
+        assert result["errors"] == {} and result["bars"] > 0
+        # 同じ日と、翌日以降の休日（土日）の取得
+        for today in (date(2023, 6, 30), date(2023, 7, 2)):
+            result = engine.poll(today=today)
+            assert result == {"alerts": [], "bars": 0, "errors": {}}
+        assert fetch_new_bars("jp", "7203", "2023-06-30", today=date(2023, 7, 2)).empty
+        assert engine.states[("jp", "7203")].last_date == "2023-06-30"
+
+
+def test_poll_outside_subscription_window_is_an_error(tmp_path, monkeypatch):
+    """サブスクリプション対象期間外の取得は「新しい日足なし」ではなくエラーとして報告されること"""
+    with MockServer() as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        engine = AlertEngine([AlertRule("jp", "7203", "Close > MA_5")], state_path=tmp_path / "state.json")
+
+        result = engine.poll(today=date(2026, 10, 19))
+        assert result["bars"] == 0 and "サブスクリプション対象期間" in result["errors"]["jp:7203"]
+        with pytest.raises(ValueError, match="サブスクリプション対象期間") as excinfo:
+            fetch_new_bars("jp", "7203", "2025-02-10", today=date(2026, 10, 19))
+        assert not isinstance(excinfo.value, NoDataError)
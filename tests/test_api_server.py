@@ -0,0 +1,132 @@
+"""
+HTTP APIのテスト
+"""
+import gzip
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+import utils.data_fetcher as data_fetcher
+from utils.adjustment import AdjustedHistory, AdjustmentStore
+from utils.api_server import ApiServer
+from utils.compact import CompactCache
+from utils.data_service import DataService
+from utils.decoder import decode_daily_quotes
+from utils.mock_server import MockServer, synthetic_daily_quotes
+from utils.panel import PricePanel
+from utils.quota import QuotaExceeded
+
+
+def _get(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as res:
+            return res.status, dict(res.headers), res.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    panel = PricePanel.create(tmp_path)
+    panel.update({code: decode_daily_quotes(synthetic_daily_quotes(code, "2022-06-01", "2023-06-30"))
+                  for code in ["1301", "7203", "9984"]})
+    with MockServer() as mock:
+        for key, value in mock.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        service = DataService(price_cache=CompactCache(), panel_path=tmp_path,
+                              adjustment_store=AdjustmentStore(tmp_path / "adjusted"))
+        with ApiServer(service=service, panel_dir=tmp_path) as server:
+            yield server, mock
+
+
+def test_prices_etag_and_gzip(api):
+    """同じ要求はキャッシュから返し、ETag一致で304、gzip要求で圧縮すること"""
+    server, mock = api
+    url = f"{server.url}/prices/7203?from=2023-01-01&to=2023-06-30"
+    status, headers, body = _get(url)
+    assert status == 200
+    payload = json.loads(body)
+    assert payload["symbol"] == "7203.T" and payload["market"] == "jp"
+    assert len(payload["dates"]) == len(payload["columns"]["Close"]) > 100
+    # float32 で保持した価格も元の桁数の値で返すこと
+    assert all(round(value, 1) == value for value in payload["columns"]["Close"])
+
+    status, _, _ = _get(url, {"If-None-Match": headers["ETag"]})
+    assert status == 304
+
+    status, gz_headers, gz_body = _get(url, {"Accept-Encoding": "gzip"})
+    assert gz_headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gz_body) == body
+    assert server.api.stats()["hits"] == 2
+    assert mock.stats["/v1/prices/daily_quotes"] == 1
+
+
+def test_indicators_and_screen(api):
+    server, _ = api
+    status, _, body = _get(f"{server.url}/indicators/7203?from=2023-01-01&to=2023-06-30&ma=5,25&volatility=0")
+    assert status == 200
+    columns = json.loads(body)["columns"]
+    assert {"MA_5", "MA_25", "RSI", "Daily_Return"} <= set(columns) and "Volatility" not in columns
+    assert columns["MA_25"][0] is None
+
+    status, _, body = _get(f"{server.url}/screen?q=Close%20%3E%200&sort=RSI&limit=2")
+    payload = json.loads(body)
+    assert status == 200 and payload["universe"] == 3 and payload["count"] == 2
+    assert payload["columns"]["RSI"] == sorted(payload["columns"]["RSI"])
+
+
+def test_errors(api):
+    server, _ = api
+    assert _get(f"{server.url}/prices/7203?from=2023-13-01")[0] == 400
+    assert _get(f"{server.url}/indicators/7203?ma=x")[0] == 400
+    assert _get(f"{server.url}/screen?q=Close%20%3E")[0] == 400
+    assert _get(f"{server.url}/unknown")[0] == 404
+    status, _, body = _get(f"{server.url}/metrics")
+    assert status == 200 and b"stock_visualizer_api_requests_total" in body
+
+
+def test_quota_fallback_is_not_cached(api, monkeypatch):
+    """上限に達して保存済みのデータで代替した結果は印を付けて返し、上限の解除後は取得し直すこと"""
+    server, mock = api
+    fetch = data_fetcher.get_stock_data_jquants
+
+    def exhausted(*args, **kwargs):
+        raise QuotaExceeded("J-Quants の1日あたりの利用回数の上限に達しました", "jquants", retry_after=120.5)
+
+    # 調整後株価は5月末までの履歴を保持している
+    history = AdjustedHistory.from_frame(
+        decode_daily_quotes(synthetic_daily_quotes("7203", "2022-06-01", "2023-05-31"), adjustment=True))
+    server.api.service.adjustment_store.save("jp", "7203.T", history)
+
+    monkeypatch.setattr(data_fetcher, "get_stock_data_jquants", exhausted)
+    url = f"{server.url}/prices/7203?from=2023-01-01&to=2023-06-30"
+    adjusted_url = f"{url}&adjusted=1"
+    for target in (url, adjusted_url):
+        status, headers, body = _get(target)
+        assert status == 200 and "上限" in json.loads(body)["degraded"]
+        assert headers["Cache-Control"] == "no-store" and "Warning" in headers
+    assert json.loads(body)["dates"][-1] == "2023-05-31"
+    # 株価パネルにもない銘柄は 503
+    status, headers, _ = _get(f"{server.url}/prices/6758?from=2023-01-01&to=2023-06-30")
+    assert status == 503 and headers["Retry-After"] == "121"
+
+    monkeypatch.setattr(data_fetcher, "get_stock_data_jquants", fetch)
+    for target in (url, adjusted_url):
+        status, headers, body = _get(target)
+        assert status == 200 and "degraded" not in json.loads(body)
+        assert headers["Cache-Control"] != "no-store" and "Warning" not in headers
+        assert _get(target)[2] == body
+    assert json.loads(body)["dates"][-1] == "2023-06-30"
+    assert mock.stats["/v1/prices/daily_quotes"] == 2
+    assert server.api.stats()["hits"] == 2
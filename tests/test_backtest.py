@@ -0,0 +1,79 @@
+"""
+ベクトル化バックテストのテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.backtest import (backtest_rules, hold_positions, rolling_means, rolling_rsi, run_grid_on_panel,
+                            run_ma_crossover_grid, run_rsi_grid)
+from utils.data_processor import calculate_moving_averages, calculate_rsi
+from utils.decoder import decode_daily_quotes
+from utils.mock_server import synthetic_daily_quotes
+from utils.panel import PricePanel
+
+CODES = ["1301", "7203", "9984"]
+
+
+def _frame(code):
+    return decode_daily_quotes(synthetic_daily_quotes(code, "2021-01-01", "2023-06-30"))
+
+
+def test_indicators_match_data_processor():
+    """cumsum による移動平均・RSIが calculate_* 関数と一致すること"""
+    data = _frame("7203")
+    closes = data["Close"].to_numpy()
+    expected = calculate_rsi(calculate_moving_averages(data, windows=[5, 25]), window=14)
+    means = rolling_means(closes, [5, 25])
+    assert np.allclose(means[0, 0], expected["MA_5"], equal_nan=True)
+    assert np.allclose(means[1, 0], expected["MA_25"], equal_nan=True)
+    assert np.allclose(rolling_rsi(closes, [14])[0, 0], expected["RSI"], equal_nan=True)
+
+
+def test_hold_positions():
+    """エントリーで保有、エグジットで手仕舞い、それ以外は状態を維持すること"""
+    entry = np.array([False, True, False, False, True, True, False])
+    exit = np.array([False, False, False, True, False, True, False])
+    assert hold_positions(entry, exit).tolist() == [0, 1, 1, 0, 1, 0, 0]
+
+
+def test_grid_matches_rules():
+    """パラメータグリッドの結果が条件式による1銘柄のバックテストと一致すること"""
+    data = {code: _frame(code) for code in CODES}
+    closes = np.vstack([data[code]["Close"].to_numpy() for code in CODES])
+
+    grid = run_ma_crossover_grid(closes, CODES, [5, 10], [10, 25], cost_bps=5)
+    assert len(grid) == 3 * len(CODES)
+    row = grid[(grid["symbol"] == "9984") & (grid["fast"] == 5) & (grid["slow"] == 25)].iloc[0]
+    df = calculate_moving_averages(data["9984"], windows=[5, 25])
+    result = backtest_rules(df, "MA_5 > MA_25", cost_bps=5)
+    for key, value in result.attrs["stats"].items():
+        assert np.isclose(row[key], value), key
+    assert np.isclose(result["Equity"].iloc[-1] - 1, row["total_return"])
+
+    grid = run_rsi_grid(closes, CODES, [14], [30], [50, 70])
+    row = grid[(grid["symbol"] == "1301") & (grid["upper"] == 70)].iloc[0]
+    result = backtest_rules(calculate_rsi(data["1301"]), "RSI < 30", "RSI > 70")
+    assert np.isclose(row["sharpe"], result.attrs["stats"]["sharpe"])
+    assert row["trades"] == result.attrs["stats"]["trades"]
+
+
+def test_grid_on_panel(tmp_path):
+    """パネルを分割して並列実行しても同一プロセスと同じ結果になること"""
+    panel = PricePanel.create(tmp_path)
+    panel.update({code: _frame(code) for code in CODES})
+    kwargs = dict(fast_windows=[5], slow_windows=[25, 75])
+    serial = run_grid_on_panel("ma_crossover", panel_path=tmp_path, max_workers=1, **kwargs)
+    parallel = run_grid_on_panel("ma_crossover", panel_path=tmp_path, max_workers=2, shard_size=2, **kwargs)
+    assert len(serial) == 2 * len(CODES)
+    assert np.allclose(
+        serial.sort_values(["symbol", "slow"])["sharpe"], parallel.sort_values(["symbol", "slow"])["sharpe"]
+    )
+    with pytest.raises(ValueError):
+        run_grid_on_panel("unknown", panel_path=tmp_path)
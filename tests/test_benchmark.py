@@ -0,0 +1,32 @@
+"""
+ステージ別ベンチマークのテスト
+"""
+import os
+import sys
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.benchmark import run_benchmarks, compare_with_baseline, format_report, save_baseline, load_baseline
+
+
+def test_run_benchmarks(tmp_path):
+    """全ステージが計測され、ベースラインとの比較ができること"""
+    report = run_benchmarks(years=1, repeat=1)
+    print(format_report(report))
+    assert set(report["stages"]) == {
+        "decode_jquants", "decode_alphavantage", "calculate_returns", "calculate_moving_averages",
+        "calculate_volatility", "calculate_rsi", "build_figure", "serialize_figure", "to_csv",
+    }
+    assert report["meta"]["rows"] > 200
+
+    path = tmp_path / "baseline.json"
+    save_baseline(report, path)
+    baseline = load_baseline(path)
+    assert not any(row["regression"] for row in compare_with_baseline(report, baseline))
+
+    slower = {"stages": {"to_csv": {**report["stages"]["to_csv"]}}}
+    slower["stages"]["to_csv"]["median_ms"] = report["stages"]["to_csv"]["median_ms"] * 2
+    rows = compare_with_baseline(slower, baseline)
+    assert any(row["regression"] for row in rows if row["metric"] == "median_ms")
@@ -0,0 +1,74 @@
+"""
+コンパクトな株価データ保持形式とプロセス内キャッシュのテスト
+"""
+import os
+import sys
+
+import numpy as np
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.compact import CompactFrame, CompactCache
+from utils.decoder import decode_daily_quotes
+from utils.data_processor import calculate_moving_averages, calculate_rsi
+from utils.mock_server import synthetic_daily_quotes
+
+
+def _sample(from_date="2020-01-01", to_date="2023-12-31"):
+    return decode_daily_quotes(synthetic_daily_quotes("7203", from_date, to_date))
+
+
+def test_round_trip_and_dtypes():
+    """型を縮小しても元の値に戻せること"""
+    data = _sample()
+    compact = CompactFrame.from_frame(data)
+    assert compact.days.dtype == np.int32
+    assert compact.prices.dtype == np.float32
+    assert compact.volume.dtype == np.uint64
+    assert compact.nbytes < data.memory_usage(index=True).sum() * 0.7
+
+    restored = compact.to_frame()
+    assert restored.index.equals(data.index)
+    assert np.allclose(restored[["Open", "High", "Low", "Close"]].values, data[["Open", "High", "Low", "Close"]].values)
+    assert np.array_equal(restored["Volume"].values, data["Volume"].values)
+
+
+def test_float64_when_precision_requires():
+    """float32 で桁が失われる価格は float64 のまま保持すること"""
+    data = _sample().astype(float)
+    data["Close"] = data["Close"] + 0.123456
+    compact = CompactFrame.from_frame(data)
+    assert compact.prices.dtype == np.float64
+
+
+def test_zero_copy_views():
+    """to_frame() と slice() が配列をコピーしないこと"""
+    compact = CompactFrame.from_frame(_sample())
+    frame = compact.to_frame()
+    assert np.shares_memory(frame["Close"].to_numpy(), compact.prices)
+    assert np.shares_memory(frame["Volume"].to_numpy(), compact.volume)
+
+    part = compact.slice("2022-01-01", "2022-12-31")
+    assert np.shares_memory(part.prices, compact.prices)
+    assert part.to_frame().index.min().year == 2022
+    assert part.to_frame().index.max().year == 2022
+
+    result = calculate_rsi(calculate_moving_averages(frame, windows=[5, 25]))
+    assert {"MA_5", "MA_25", "RSI"} <= set(result.columns)
+    assert "MA_5" not in frame.columns
+
+
+def test_cache_eviction():
+    """上限を超えると古いものから破棄されること"""
+    compact = CompactFrame.from_frame(_sample())
+    cache = CompactCache(max_bytes=compact.nbytes * 2)
+    cache.put("a", compact)
+    cache.put("b", compact)
+    assert cache.get("a") is compact
+    cache.put("c", compact)
+    assert "b" not in cache
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert stats["items"] == 2 and stats["hits"] == 1 and stats["misses"] == 1
@@ -0,0 +1,85 @@
+"""
+銘柄間の相関行列・共分散行列のテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.correlation import (RollingCorrelation, downsample_matrix, pairwise_cov_corr, return_panel,
+                               seriation_order)
+from utils.decoder import decode_daily_quotes
+from utils.mock_server import synthetic_daily_quotes
+from utils.panel import PricePanel
+
+
+def _returns(n_symbols=40, n_days=300, missing=0.1, seed=1):
+    """3つのグループに分かれた疑似リターン（一部は欠損）"""
+    rng = np.random.default_rng(seed)
+    factors = rng.standard_normal((3, n_days)) * 0.01
+    groups = rng.integers(0, 3, n_symbols)
+    returns = (factors[groups] + rng.standard_normal((n_symbols, n_days)) * 0.01).astype(np.float32)
+    returns[rng.random(returns.shape) < missing] = np.nan
+    return returns, groups
+
+
+@pytest.mark.parametrize("missing", [0.0, 0.1])
+def test_matches_pandas_pairwise(missing):
+    returns, _ = _returns(missing=missing)
+    # 上場直後の銘柄（共通日数が min_periods 未満の組は NaN）
+    returns[5, :285] = np.nan
+    cov, corr, counts = pairwise_cov_corr(returns, min_periods=20, block_size=16)
+    frame = pd.DataFrame(returns.T.astype(np.float64))
+    expected_corr = frame.corr(min_periods=20).to_numpy()
+    expected_cov = frame.cov(min_periods=20).to_numpy()
+    assert np.array_equal(np.isnan(corr), np.isnan(expected_corr))
+    assert np.allclose(corr, expected_corr, atol=1e-5, equal_nan=True)
+    assert np.allclose(cov, expected_cov, rtol=1e-4, atol=1e-9, equal_nan=True)
+    assert counts[0, 1] == (~np.isnan(returns[0]) & ~np.isnan(returns[1])).sum()
+
+
+def test_rolling_matches_window():
+    returns, _ = _returns()
+    rolling = RollingCorrelation(len(returns), window=60)
+    rolling.extend(returns[:, :200])
+    for day in range(200, 210):
+        rolling.push(returns[:, day])
+    cov, corr, _ = rolling.cov_corr()
+    expected_cov, expected_corr, _ = pairwise_cov_corr(returns[:, 150:210])
+    assert np.allclose(corr, expected_corr, atol=1e-5, equal_nan=True)
+    assert np.allclose(cov, expected_cov, rtol=1e-4, atol=1e-9, equal_nan=True)
+    with pytest.raises(ValueError):
+        RollingCorrelation(3, window=1)
+
+
+def test_seriation_groups_similar_symbols():
+    returns, groups = _returns(missing=0.0)
+    _, corr, _ = pairwise_cov_corr(returns)
+    order = seriation_order(corr)
+    assert sorted(order) == list(range(len(groups)))
+    # 同じグループの銘柄が連続して並ぶ（グループの切り替わりが少ない）
+    assert (np.diff(groups[order]) != 0).sum() <= 4
+
+    matrix, starts = downsample_matrix(corr[np.ix_(order, order)], 10)
+    assert matrix.shape == (10, 10) and starts[0] == 0
+
+
+def test_return_panel(tmp_path):
+    panel = PricePanel.create(tmp_path)
+    frames = {code: decode_daily_quotes(synthetic_daily_quotes(code, "2023-01-01", "2023-06-30"))
+              for code in ["7203", "6758", "9984"]}
+    frames["6758"] = frames["6758"].drop(frames["6758"].index[10:12])
+    panel.update(frames)
+    returns, symbols, dates = return_panel(PricePanel.open(tmp_path), ["7203", "6758"])
+    assert symbols == ["7203", "6758"] and returns.dtype == np.float32
+    expected = frames["7203"]["Close"].astype(np.float32).pct_change().iloc[1:]
+    assert np.allclose(returns[0], expected.to_numpy(), atol=1e-6)
+    # 欠損日とその翌日のリターンは NaN
+    assert np.isnan(returns[1]).sum() == 3
+    assert len(dates) == returns.shape[1]
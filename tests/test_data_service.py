@@ -0,0 +1,94 @@
+"""
+共有データサービスのテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.compact import CompactCache
+from utils.data_processor import calculate_moving_averages, calculate_returns, calculate_rsi
+from utils.data_service import DataService
+from utils.instrumentation import get_recorder
+from utils.mock_server import MockServer
+
+
+@pytest.fixture
+def service(monkeypatch):
+    with MockServer() as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        yield DataService(price_cache=CompactCache())
+
+
+def test_indicators_are_cached_and_read_only(service):
+    """同じ条件の指標は再計算せず、キャッシュの配列は書き換えられないこと"""
+    args = ("jp", "7203.T", "2023-01-01", "2023-12-31")
+    first = service.indicators(*args, ma_windows=(5, 25), rsi=True)
+    second = service.indicators(*args, ma_windows=(5, 25), rsi=True)
+
+    assert np.shares_memory(first["RSI"].to_numpy(), second["RSI"].to_numpy())
+    assert service.stats()["indicator_hits"] == 1
+    assert service.price_cache.stats()["misses"] == 1
+    with pytest.raises(ValueError):
+        first["Close"].to_numpy()[0] = 0
+
+    # 別の指標の組み合わせでも株価は取得し直さない
+    service.indicators(*args, ma_windows=(5,))
+    assert service.price_cache.stats()["hits"] == 1
+
+
+def test_indicators_match_calculate_functions(service):
+    args = ("jp", "7203.T", "2023-01-01", "2023-12-31")
+    data = service.indicators(*args, ma_windows=(5, 25), rsi=True)
+    expected = calculate_rsi(calculate_returns(calculate_moving_averages(service.prices(*args), windows=[5, 25])))
+    assert list(data.columns) == list(expected.columns)
+    assert np.allclose(data.to_numpy(dtype=float), expected.to_numpy(dtype=float), equal_nan=True)
+
+
+def test_figure_memo():
+    service = DataService(price_cache=CompactCache(), figure_cache_size=2)
+    calls = []
+
+    def build(value):
+        calls.append(value)
+        return {"value": value}
+
+    assert service.figure(("a",), build, 1) is service.figure(("a",), build, 1)
+    service.figure(("b",), build, 2)
+    service.figure(("c",), build, 3)
+    service.figure(("a",), build, 1)
+    assert calls == [1, 2, 3, 1]
+    assert service.stats()["figure_items"] == 2
+
+
+def test_return_distribution(service):
+    args = ("jp", "7203.T", "2023-01-01", "2023-12-31")
+    distribution = service.return_distribution(*args)
+    returns = service.indicators(*args, returns=True)["Daily_Return"].dropna()
+    assert distribution.n == len(returns)
+    assert np.isclose(distribution.std, returns.std()) and np.isclose(distribution.skew, returns.skew())
+    # 2回目は前回の分布を使い回す
+    service.return_distribution(*args)
+    assert service.stats()["distribution_reused_values"] == len(returns)
+
+
+def test_each_method_has_own_span(service):
+    """各メソッドの呼び出しが自身の区間名で1回だけ記録されること"""
+    recorder = get_recorder()
+    args = ("jp", "7203.T", "2023-01-01", "2023-12-31")
+    for method, name in ((service.return_distribution, "service.return_distribution"),
+                         (service.indicators, "service.indicators")):
+        recorder.reset()
+        method(*args)
+        spans = recorder.snapshot()["spans"]
+        assert spans[name]["count"] == 1
+        other = {"service.return_distribution", "service.indicators"} - {name}
+        assert not other & spans.keys()
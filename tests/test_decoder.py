@@ -0,0 +1,58 @@
+"""
+APIレスポンスのデコーダーのテスト
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.decoder import decode_daily_quotes, decode_time_series_daily, loads
+from utils.mock_server import synthetic_daily_quotes, synthetic_time_series_daily
+
+
+def test_decode_daily_quotes():
+    """従来の DataFrame 経由の変換と同じ値になること"""
+    rows = synthetic_daily_quotes("7203", "2023-01-01", "2023-12-31")
+    df = decode_daily_quotes(rows)
+
+    expected = pd.DataFrame(rows)
+    expected["Date"] = pd.to_datetime(expected["Date"])
+    expected = expected.set_index("Date")[["Open", "High", "Low", "Close", "Volume"]].astype(float)
+
+    assert df.index.name == "Date"
+    assert df["Volume"].dtype == np.int64
+    assert df["Close"].dtype == np.float64
+    assert np.array_equal(df.index.values, expected.index.values.astype("datetime64[ns]"))
+    assert np.allclose(df.astype(float).values, expected.values)
+
+
+def test_decode_daily_quotes_missing_values():
+    """欠損値（売買停止日）は NaN になり、出来高は float64 のままになること"""
+    rows = synthetic_daily_quotes("7203", "2023-03-01", "2023-03-10")
+    rows[2] = {**rows[2], "Open": None, "Close": None, "Volume": None}
+    df = decode_daily_quotes(list(reversed(rows)))
+    assert df.index.is_monotonic_increasing
+    assert np.isnan(df["Close"].iloc[2])
+    assert df["Volume"].dtype == np.float64
+
+
+def test_decode_time_series_daily():
+    """Alpha Vantage のレスポンスを日付昇順の型付き列に変換できること"""
+    raw = json.dumps(synthetic_time_series_daily("AAPL", "compact"))
+    df = decode_time_series_daily(raw)
+
+    expected = pd.DataFrame(loads(raw)["Time Series (Daily)"]).T.astype(float)
+    expected.index = pd.to_datetime(expected.index)
+    expected = expected.sort_index()
+
+    assert list(df.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert df.index.is_monotonic_increasing
+    assert df["Volume"].dtype == np.int64
+    assert np.allclose(df[["Open", "High", "Low", "Close"]].values, expected.iloc[:, :4].values)
+    assert np.array_equal(df["Volume"].values, expected.iloc[:, 4].values.astype(np.int64))
@@ -0,0 +1,69 @@
+"""
+リターン分布（ヒストグラム・要約統計量）のテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.distribution import QUANTILES, DistributionCache, ReturnDistribution
+
+
+def _returns(n, seed=0):
+    return np.random.default_rng(seed).standard_t(4, n) * 1.5
+
+
+def test_streaming_moments_and_quantiles():
+    values = _returns(2000)
+    distribution = ReturnDistribution(values[:500]).add(values[500:]).remove(values[:300])
+    expected = pd.Series(values[300:])
+    assert distribution.n == len(expected)
+    assert np.isclose(distribution.mean, expected.mean())
+    assert np.isclose(distribution.std, expected.std())
+    assert np.isclose(distribution.skew, expected.skew())
+    assert np.isclose(distribution.kurtosis, expected.kurt())
+    # 分位点の誤差は細かいビン1本の幅以下
+    exact = np.quantile(expected, QUANTILES, method="inverted_cdf")
+    assert np.abs(distribution.quantiles() - exact).max() <= distribution.width
+
+    with pytest.raises(ValueError):
+        ReturnDistribution([0.0, 1.0]).remove([100.0])
+
+
+def test_histogram_bins_and_coarsening():
+    values = _returns(1000)
+    distribution = ReturnDistribution(values, max_fine_bins=256)
+    width = distribution.width
+    # 範囲外の値でビンの幅が広がっても、度数は同じ境界で数え直した結果と一致する
+    distribution.add([40.0, -35.0])
+    assert distribution.width > width and len(distribution._counts) <= 256
+    edges, counts = distribution.histogram(50)
+    assert len(counts) <= 50 and counts.sum() == 1002
+    all_values = np.concatenate([values, [40.0, -35.0]])
+    assert np.array_equal(counts, np.histogram(all_values, bins=edges)[0])
+    assert edges[0] <= all_values.min() and edges[-1] > all_values.max()
+
+
+def test_cache_updates_incrementally():
+    dates = pd.bdate_range("2023-01-02", periods=300).to_numpy()
+    values = _returns(300)
+    cache = DistributionCache()
+    cache.update("7203", dates[:250], values[:250])
+
+    # 期間が20日ずれ、前回の最終日の値が修正された場合は21日分だけ入れ替える
+    revised = values.copy()
+    revised[249] += 1.0
+    distribution = cache.update("7203", dates[20:270], revised[20:270])
+    stats = cache.stats()
+    assert stats["added_values"] == 250 + 21 and stats["removed_values"] == 21
+    assert stats["reused_values"] == 229
+    expected = ReturnDistribution(revised[20:270])
+    assert distribution.n == 250
+    assert np.isclose(distribution.mean, expected.mean) and np.isclose(distribution.kurtosis, expected.kurtosis)
+    assert np.allclose(distribution.quantiles(), expected.quantiles(), atol=max(distribution.width, expected.width))
@@ -0,0 +1,127 @@
+"""
+日足のバッチ取り込みのテスト
+"""
+import os
+import sys
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.errors import RetryableError, is_retryable_status
+from utils.ingest import TokenBucket, ingest
+from utils.panel import PricePanel
+
+TODAY = date(2024, 6, 28)
+
+
+def _bars(since, n=40):
+    """since より後（省略時は n 営業日分）の疑似日足"""
+    end = pd.Timestamp(TODAY)
+    dates = pd.bdate_range(end=end, periods=n)
+    if since:
+        dates = dates[dates > pd.Timestamp(since)]
+    close = np.arange(len(dates), dtype=np.float64) + 1000
+    return pd.DataFrame({"Open": close, "High": close + 5, "Low": close - 5, "Close": close,
+                         "Volume": np.full(len(dates), 1e5)}, index=dates)
+
+
+class FakeFetcher:
+    """銘柄ごとに決めた回数だけ失敗してから日足を返す fetch_new_bars の代わり"""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, market, symbol, since, lookback, today):
+        with self.lock:
+            self.calls.append((symbol, since))
+            error = self.failures.get(symbol)
+            if error:
+                message, remaining = error
+                if remaining:
+                    self.failures[symbol] = (message, remaining - 1)
+                    status = int(message.rsplit(" ", 1)[-1])
+                    raise RetryableError(message, status) if is_retryable_status(status) else ValueError(message)
+        return _bars(since)
+
+
+def test_ingest_retries_and_updates_incrementally(tmp_path, monkeypatch):
+    monkeypatch.setenv("STOCK_VISUALIZER_QUOTA_DIR", str(tmp_path / "quota"))
+    fetcher = FakeFetcher({
+        "7203": ("J-Quants APIエラー: ステータスコード 429", 2),
+        "6758": ("J-Quants APIエラー: ステータスコード 404", 1),
+        "9984": ("J-Quants APIエラー: ステータスコード 503", 10),
+    })
+    result = ingest("jp", ["7203.T", "6758", "9984", "8306"], panel_path=tmp_path, workers=3, rate=1000,
+                    max_retries=3, fetcher=fetcher, sleep=lambda seconds: None, today=TODAY)
+
+    # 429 は再試行して成功、404 は再試行しない、503 が続く場合は再試行回数を使い切って失敗
+    assert result["updated"] == 2 and result["rows"] == 80
+    assert sorted(result["failed"]) == ["6758", "9984"]
+    assert result["retries"] == 2 + 3
+    assert result["requests"] == 3 + 1 + 4 + 1
+    assert result["quota"] == {"provider": "J-Quants", "requests": 9, "daily_limit": None, "used_today": 0}
+
+    panel = PricePanel.open(tmp_path)
+    assert sorted(panel.symbols) == ["7203", "8306"]
+    assert panel.last_date("7203") == pd.Timestamp(TODAY)
+
+    # 2回目は最終日より後だけを取得し、最新の銘柄には API を呼ばない
+    fetcher = FakeFetcher()
+    result = ingest("jp", ["7203", "8306", "6758"], panel_path=tmp_path, workers=2, rate=1000, fetcher=fetcher,
+                    sleep=lambda seconds: None, today=TODAY)
+    assert fetcher.calls == [("6758", None)]
+    assert (result["updated"], result["up_to_date"], result["requests"]) == (1, 2, 1)
+    assert len(PricePanel.open(tmp_path).frame("6758")) == 40
+
+
+def test_token_bucket_limits_rate():
+    clock = {"now": 0.0}
+
+    def sleep(seconds):
+        clock["now"] += seconds
+
+    bucket = TokenBucket(2.0, burst=2, clock=lambda: clock["now"], sleep=sleep)
+    waits = [bucket.acquire() for _ in range(6)]
+    # 貯まっていた2回分はすぐに、その後は0.5秒ごと
+    assert waits == pytest.approx([0, 0, 0.5, 0.5, 0.5, 0.5])
+    assert clock["now"] == pytest.approx(2.0)
+
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_fetchers_raise_typed_errors(monkeypatch):
+    """レート制限・通信エラーは RetryableError、それ以外の取得エラーは ValueError として送出されること"""
+    from utils.data_fetcher import get_stock_data_alpha_vantage, get_stock_data_jquants
+    from utils.mock_server import MockServer
+
+    monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+    monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+    with MockServer(rate_limit=0.01) as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        # 1回目で上限に達し、J-Quants は 429、Alpha Vantage は HTTP 200 の "Note" になる
+        with pytest.raises(RetryableError) as excinfo:
+            get_stock_data_jquants("7203", "2023-03-01", "2023-03-31")
+        assert excinfo.value.status == 429
+        with pytest.raises(RetryableError):
+            get_stock_data_alpha_vantage("AAPL")
+
+    # サーバーが停止している場合は通信エラー
+    with pytest.raises(RetryableError) as excinfo:
+        get_stock_data_alpha_vantage("AAPL")
+    assert excinfo.value.status is None
+
+    monkeypatch.setenv("JQUANTS_PASSWORD", "")
+    with pytest.raises(ValueError) as excinfo:
+        get_stock_data_jquants("7203", "2023-03-01", "2023-03-31")
+    assert not isinstance(excinfo.value, RetryableError)
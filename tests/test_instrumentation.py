@@ -0,0 +1,78 @@
+"""
+計測モジュールのテスト
+"""
+import json
+import os
+import sys
+
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.instrumentation import TRACE_LOG_ENV, Recorder, get_recorder, instrumented, span, to_prometheus
+from utils.jquants_api import get_stock_data
+from utils.mock_server import MockServer
+
+
+def test_spans_and_prometheus(tmp_path, monkeypatch):
+    """入れ子の区間・例外・カウンター・ゲージが集計され、テキスト形式で出力されること"""
+    recorder = Recorder()
+    log_path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(TRACE_LOG_ENV, str(log_path))
+
+    with recorder.span("outer"):
+        with recorder.span("inner", rows=3):
+            pass
+    with pytest.raises(KeyError):
+        with recorder.span("outer"):
+            raise KeyError("x")
+    recorder.increment("cache_requests", cache="price", result="hit")
+    recorder.increment("cache_requests", 2, cache="price", result="hit")
+    recorder.register_collector("price_cache", lambda: {"hits": 5, "misses": 1})
+
+    snapshot = recorder.snapshot()
+    assert snapshot["spans"]["outer"]["count"] == 2
+    assert snapshot["spans"]["outer"]["errors"] == 1
+    assert snapshot["counters"][("cache_requests", (("cache", "price"), ("result", "hit")))] == 3
+
+    records = [json.loads(line) for line in open(log_path, encoding="utf-8")]
+    assert [r["name"] for r in records] == ["inner", "outer", "outer"]
+    assert records[0]["parent"] == "outer" and records[0]["attrs"] == {"rows": 3}
+
+    text = to_prometheus(snapshot)
+    assert 'stock_visualizer_span_seconds_count{span="outer"} 2' in text
+    assert 'stock_visualizer_span_errors_total{span="outer"} 1' in text
+    assert 'stock_visualizer_cache_requests_total{cache="price",result="hit"} 3' in text
+    assert "stock_visualizer_price_cache_hits 5" in text
+
+
+def test_fetch_is_instrumented(monkeypatch):
+    """J-Quants の認証・取得・解析の各区間が記録されること"""
+    recorder = get_recorder()
+    recorder.reset()
+    with MockServer(page_size=100) as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        get_stock_data("7203", "2023-03-01", "2023-12-31")
+
+    spans = recorder.snapshot()["spans"]
+    assert spans["jquants.get_refresh_token"]["count"] == 1
+    assert spans["jquants.get_id_token"]["count"] == 1
+    assert spans["jquants.daily_quotes"]["count"] == spans["jquants.json_parse"]["count"] > 1
+    assert spans["jquants.decode"]["count"] == 1
+
+
+def test_instrumented_keeps_function():
+    @instrumented()
+    def add(a, b):
+        """足し算"""
+        return a + b
+
+    assert add(1, 2) == 3
+    assert add.__name__ == "add" and add.__doc__ == "足し算"
+    with span("noop"):
+        pass
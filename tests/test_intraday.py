@@ -0,0 +1,96 @@
+"""
+分足の段階的な保持（1分足 → 5分足 → 1時間足 → 日足）のテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.compact import CompactCache
+from utils.data_fetcher import get_intraday_data_alpha_vantage
+from utils.data_service import DataService
+from utils.decoder import decode_time_series_intraday
+from utils.intraday import IntradayStore, TieredBars
+from utils.mock_server import MockServer, synthetic_time_series_intraday
+
+AGGREGATION = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def _minutes(to_date="2024-03-15"):
+    return decode_time_series_intraday(synthetic_time_series_intraday("AAPL", "1min", "full", to_date=to_date))
+
+
+def test_rollup_matches_resample():
+    data = _minutes()
+    bars = TieredBars(retention_days={"1min": None, "5min": None, "60min": None})
+    bars.ingest(data)
+    for name, rule in [("5min", "5min"), ("60min", "60min"), ("daily", "D")]:
+        expected = data.resample(rule).agg(AGGREGATION).dropna(subset=["Open"])
+        result = bars.tier_frame(name)
+        assert result.index.equals(expected.index)
+        assert np.allclose(result.to_numpy(), expected.to_numpy())
+
+
+def test_incremental_ingest_and_retention():
+    """1日ずつ取り込んだ結果が一括で取り込んだ結果と一致し、保持期間を過ぎた足が削除されること"""
+    data = _minutes()
+    whole = TieredBars()
+    whole.ingest(data)
+    incremental = TieredBars()
+    for _, day in data.groupby(data.index.date):
+        incremental.ingest(day)
+    # 取得し直した足は置き換える
+    assert incremental.ingest(data.iloc[-100:]) == 100
+    for name in whole.tiers:
+        assert np.array_equal(whole.tiers[name][0], incremental.tiers[name][0])
+        assert np.allclose(whole.tiers[name][1], incremental.tiers[name][1])
+
+    # 1分足は最新の日を含む7日（暦日）分だけ保持する
+    assert whole.tier_frame("1min").index[0] == pd.Timestamp("2024-03-11 09:30")
+    assert len(whole.tier_frame("daily")) == 30
+
+
+def test_query_picks_finest_tier_within_budget():
+    bars = TieredBars()
+    bars.ingest(_minutes())
+    name, frame = bars.query("2024-03-15")
+    assert (name, len(frame)) == ("1min", 390)
+    # 1分足は7日分しか保持しないため、それより前を含む期間は5分足を使う
+    name, frame = bars.query("2024-03-01")
+    assert name == "5min" and frame.index[0] == pd.Timestamp("2024-03-01 09:30")
+    name, frame = bars.query(max_points=500)
+    assert name == "60min" and len(frame) <= 500
+    name, frame = bars.query(max_points=100)
+    assert name == "daily" and len(frame) == 30
+
+
+def test_store_and_service(tmp_path, monkeypatch):
+    store = IntradayStore(tmp_path)
+    bars = TieredBars()
+    bars.ingest(_minutes())
+    store.save("AAPL", bars)
+    loaded = store.load("AAPL")
+    assert loaded.first_time == bars.first_time
+    assert loaded.query()[1].equals(bars.query()[1])
+    assert store.load("MSFT") is None
+
+    with MockServer() as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        with pytest.raises(ValueError):
+            get_intraday_data_alpha_vantage("AAPL", interval="2min")
+
+        service = DataService(price_cache=CompactCache(), intraday_store=store)
+        name, frame = service.intraday("MSFT", days=1)
+        assert name == "1min" and len(frame) == 390
+        name, frame = service.intraday("MSFT", max_points=100)
+        assert name == "daily"
+        assert server.stats["/query"] == 1
+    assert store.path("MSFT").exists()
+
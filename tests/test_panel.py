@@ -0,0 +1,75 @@
+"""
+メモリマップ形式の株価パネルのテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.decoder import decode_daily_quotes
+from utils.mock_server import synthetic_daily_quotes
+from utils.panel import PricePanel
+
+
+def _frame(code, from_date, to_date):
+    return decode_daily_quotes(synthetic_daily_quotes(code, from_date, to_date))
+
+
+def test_incremental_update(tmp_path):
+    """新しい営業日は追記のみで更新され、値が保持されること"""
+    panel = PricePanel.create(tmp_path, day_capacity=300, symbol_capacity=4)
+    codes = ["1301", "7203", "9984"]
+    result = panel.update({code: _frame(code, "2023-01-01", "2023-06-30") for code in codes})
+    assert result["new_days"] > 100
+
+    result = panel.update({code: _frame(code, "2023-07-01", "2023-07-31") for code in codes})
+    assert not result["rebuilt"]
+    assert result["new_days"] == 21
+
+    reader = PricePanel.open(tmp_path)
+    assert reader.symbols == codes
+    expected = _frame("7203", "2023-01-01", "2023-07-31")
+    actual = reader.frame("7203")
+    assert actual.index.equals(expected.index)
+    assert np.allclose(actual["Close"].values, expected["Close"].values, rtol=1e-6)
+    assert reader.last_date("9984").strftime("%Y-%m-%d") == "2023-07-31"
+
+    with pytest.raises(ValueError):
+        reader.update({"1301": expected})
+
+
+def test_rebuild_on_growth_and_backfill(tmp_path):
+    """容量超過や過去日の追加ではファイルを作り直し、既存データを保持すること"""
+    panel = PricePanel.create(tmp_path, day_capacity=30, symbol_capacity=1)
+    panel.update({"7203": _frame("7203", "2023-03-01", "2023-03-31")})
+    result = panel.update({"9984": _frame("9984", "2023-01-01", "2023-04-30")})
+    assert result["rebuilt"]
+
+    reader = PricePanel.open(tmp_path)
+    assert reader.frame("7203").index.min().strftime("%Y-%m-%d") == "2023-03-01"
+    assert len(reader.frame("9984")) == len(_frame("9984", "2023-01-01", "2023-04-30"))
+
+
+def test_zero_copy_select(tmp_path):
+    """日付範囲・項目・連続する銘柄の切り出しがコピーを伴わないこと"""
+    panel = PricePanel.create(tmp_path)
+    codes = ["1301", "1332", "7203", "9984"]
+    panel.update({code: _frame(code, "2022-01-01", "2023-12-31") for code in codes})
+
+    reader = PricePanel.open(tmp_path)
+    part = reader.select(codes[1:3], "2023-01-01", "2023-03-31", ["Close"])
+    assert np.shares_memory(part.values, reader.values)
+    assert part.values.shape == (2, len(part.dates), 1)
+    assert part.dates.min().year == 2023 and part.dates.max().month == 3
+
+    close = reader.select(from_date="2023-06-01").field("Close")
+    assert np.shares_memory(close, reader.values)
+    assert close.shape[0] == len(codes)
+
+    scattered = reader.select([codes[0], codes[3]], fields=["Close"])
+    assert np.allclose(scattered.values[1, :, 0], reader.select([codes[3]]).field("Close")[0], equal_nan=True)
@@ -0,0 +1,55 @@
+"""
+並列指標パイプラインのテスト
+"""
+import os
+import sys
+
+import numpy as np
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.decoder import decode_daily_quotes
+from utils.mock_server import synthetic_daily_quotes
+from utils.panel import PricePanel
+from utils.pipeline import compute_indicators, load_indicators, run_indicator_pipeline
+
+CODES = ["1301", "1332", "2914", "6758", "7203", "9984"]
+
+
+def _make_panel(path):
+    panel = PricePanel.create(path)
+    frames = {code: decode_daily_quotes(synthetic_daily_quotes(code, "2022-01-01", "2023-06-30")) for code in CODES}
+    frames["6758"] = frames["6758"].iloc[100:]
+    panel.update(frames)
+    return PricePanel.open(path)
+
+
+def test_pipeline_matches_data_processor(tmp_path):
+    """並列実行の結果が1銘柄ずつ data_processor を適用した結果と一致すること"""
+    panel = _make_panel(tmp_path)
+    result = run_indicator_pipeline(tmp_path, max_workers=2)
+    assert result["symbols"] == len(CODES)
+    assert result["days"] == panel.n_days
+
+    for code in ["7203", "6758"]:
+        expected = compute_indicators(panel.frame(code).astype(np.float64))
+        actual = load_indicators(code, tmp_path)
+        assert actual.index.equals(expected.index)
+        for column in expected.columns:
+            assert np.allclose(actual[column], expected[column], rtol=1e-5, equal_nan=True), (code, column)
+
+    assert load_indicators("0000", tmp_path) is None
+
+
+def test_pipeline_serial_and_subset(tmp_path):
+    """同一プロセスでの実行と銘柄の絞り込み"""
+    _make_panel(tmp_path)
+    output = tmp_path / "subset"
+    result = run_indicator_pipeline(tmp_path, symbols=["9984", "1301", "0000"], output_path=output,
+                                    max_workers=1, ma_windows=[5])
+    assert result["symbols"] == 2
+    indicators = PricePanel.open(output)
+    assert indicators.symbols == ["9984", "1301"]
+    assert "MA_5" in indicators.fields and "MA_25" not in indicators.fields
@@ -0,0 +1,101 @@
+"""
+ポートフォリオ評価のテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.decoder import decode_daily_quotes
+from utils.mock_server import synthetic_daily_quotes
+from utils.panel import PricePanel
+from utils.portfolio import Portfolio, PortfolioTracker, drawdown, load_trades, risk_metrics
+
+CODES = ["7203", "6758", "9984"]
+
+TRADES = """Date,Symbol,Quantity,Price
+2023-01-04,7203.T,100,
+2023-01-07,6758,50,
+2023-02-01,7203,-40,2000
+2023-03-01,9984,10,
+"""
+
+
+@pytest.fixture
+def frames():
+    frames = {code: decode_daily_quotes(synthetic_daily_quotes(code, "2023-01-01", "2023-06-30")) for code in CODES}
+    # 売買停止日（終値は前日の値で評価する）
+    frames["6758"] = frames["6758"].drop(frames["6758"].index[30:32])
+    return frames
+
+
+def _naive_nav(frames, trades, cash):
+    """1日ずつループで計算した NAV"""
+    closes = pd.DataFrame({code: data["Close"].astype(np.float32).astype(float) for code, data in frames.items()})
+    closes = closes.ffill()
+    positions = dict.fromkeys(CODES, 0.0)
+    navs = []
+    pending = trades.copy()
+    for day, row in closes.iterrows():
+        due = pending[pending["Date"] <= day]
+        pending = pending[pending["Date"] > day]
+        for _, trade in due.iterrows():
+            price = row[trade["Symbol"]] if np.isnan(trade["Price"]) else trade["Price"]
+            positions[trade["Symbol"]] += trade["Quantity"]
+            cash -= trade["Quantity"] * price
+        navs.append(cash + sum(positions[code] * np.nan_to_num(row[code]) for code in CODES))
+    return pd.Series(navs, index=closes.index)
+
+
+def test_nav_matches_loop_and_updates_incrementally(tmp_path, frames):
+    trades = load_trades(TRADES)
+    assert trades["Symbol"].tolist() == ["7203", "6758", "7203", "9984"]
+
+    panel = PricePanel.create(tmp_path)
+    panel.update({code: data.loc[:"2023-03-31"] for code, data in frames.items()})
+    tracker = PortfolioTracker(Portfolio(trades=trades, cash=1_000_000))
+    tracker.update(PricePanel.open(tmp_path))
+    assert tracker.last_date == pd.Timestamp("2023-03-31")
+
+    panel = PricePanel.open(tmp_path, mode="r+")
+    panel.update({code: data.loc["2023-04-01":] for code, data in frames.items()})
+    panel = PricePanel.open(tmp_path)
+    assert tracker.update(panel) > 0
+    assert tracker.update(panel) == 0
+
+    expected = _naive_nav(frames, trades, 1_000_000).loc["2023-01-04":]
+    nav = tracker.nav
+    assert nav.index.equals(expected.index)
+    assert np.allclose(nav.to_numpy(), expected.to_numpy())
+
+    # 損益の寄与の合計は NAV の増減に一致する
+    contributions = tracker.contributions()
+    assert np.isclose(contributions["PnL"].sum(), nav.iloc[-1] - nav.iloc[0])
+    assert np.allclose(tracker.returns.iloc[1:], nav.pct_change().iloc[1:])
+
+
+def test_errors(tmp_path, frames):
+    with pytest.raises(ValueError, match="必要な列"):
+        load_trades("Date,Symbol\n2023-01-04,7203\n")
+    panel = PricePanel.create(tmp_path)
+    panel.update(frames)
+    with pytest.raises(ValueError, match="パネルにない銘柄"):
+        PortfolioTracker(Portfolio(holdings={"1301": 100})).update(PricePanel.open(tmp_path))
+
+
+def test_risk_metrics():
+    returns = np.array([0.01, -0.02, 0.015, -0.03, 0.02, 0.005, -0.01, 0.0, 0.01, -0.005])
+    metrics = risk_metrics(returns, confidence=0.9)
+    assert np.isclose(metrics["volatility"], returns.std(ddof=1) * np.sqrt(252) * 100)
+    assert np.isclose(metrics["var_historical"], -np.quantile(returns, 0.1) * 100)
+    assert np.isclose(metrics["var_parametric"], (1.2815515655 * returns.std(ddof=1) - returns.mean()) * 100)
+    nav = pd.Series(np.cumprod(1 + returns))
+    assert np.isclose(metrics["max_drawdown"], min(drawdown(pd.concat([pd.Series([1.0]), nav])).min(), 0))
+    with pytest.raises(ValueError):
+        risk_metrics([0.01])
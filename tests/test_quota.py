@@ -0,0 +1,146 @@
+"""
+API の利用回数の記録と上限に達した場合の動作のテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+import utils.data_fetcher as data_fetcher
+from utils.compact import CompactCache
+from utils.data_service import DataService
+from utils.mock_server import MockServer
+from utils.panel import PricePanel
+from utils.quota import BACKGROUND, INTERACTIVE, QuotaExceeded, QuotaLedger, request_priority
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    clock = FakeClock()
+    return QuotaLedger(tmp_path / "ledger.json", clock=clock, sleep=clock.sleep)
+
+
+def test_minute_and_daily_limits(ledger):
+    clock = ledger.clock
+    # Alpha Vantage は1分5回・1日25回。6回目は1分待ってから記録される
+    for _ in range(6):
+        ledger.acquire("alphavantage", "secret-key", INTERACTIVE, max_wait=120)
+    assert clock.now == pytest.approx(1_700_000_060.0)
+    usage = ledger.usage("alphavantage", "secret-key")
+    assert (usage["minute"], usage["day"], usage["per_day"]) == (1, 6, 25)
+
+    # 待ち時間が max_wait を超える場合はすぐに QuotaExceeded
+    for _ in range(4):
+        ledger.acquire("alphavantage", "secret-key", INTERACTIVE, max_wait=0)
+    with pytest.raises(QuotaExceeded, match="1分"):
+        ledger.acquire("alphavantage", "secret-key", INTERACTIVE, max_wait=0)
+
+    # 記録はファイルに保存され、API キーそのものは含まない
+    restored = QuotaLedger(ledger.path, clock=clock, sleep=clock.sleep)
+    assert restored.usage("alphavantage", "secret-key")["day"] == 10
+    assert "secret-key" not in ledger.path.read_text(encoding="utf-8")
+    # キーが異なれば別に数える
+    assert restored.usage("alphavantage", "other-key")["day"] == 0
+
+    # 1日の上限に達すると翌日（UTC）まで使えない
+    for _ in range(15):
+        clock.sleep(60)
+        ledger.acquire("alphavantage", "secret-key")
+    with pytest.raises(QuotaExceeded, match="1日") as excinfo:
+        ledger.acquire("alphavantage", "secret-key")
+    assert 0 < excinfo.value.retry_after <= 86400
+    clock.sleep(excinfo.value.retry_after)
+    ledger.acquire("alphavantage", "secret-key")
+    assert ledger.usage("alphavantage", "secret-key")["day"] == 1
+
+
+def test_background_leaves_reserve_for_interactive(ledger, monkeypatch):
+    monkeypatch.setenv("ALPHAVANTAGE_QUOTA_PER_MINUTE", "0")
+    # 先読みは1日25回のうち20回まで、残りは画面の操作用
+    with request_priority(BACKGROUND):
+        for _ in range(20):
+            ledger.acquire("alphavantage", "key")
+        with pytest.raises(QuotaExceeded):
+            ledger.acquire("alphavantage", "key")
+    for _ in range(5):
+        ledger.acquire("alphavantage", "key")
+    assert ledger.usage("alphavantage", "key")["day"] == 25
+
+    # J-Quants は上限なし（回数だけ記録する）
+    for _ in range(100):
+        ledger.acquire("jquants", "user@example.com", BACKGROUND)
+    assert ledger.usage("jquants", "user@example.com")["per_day"] is None
+
+
+def test_fetcher_requires_key_and_checks_quota(tmp_path, monkeypatch):
+    monkeypatch.setenv("STOCK_VISUALIZER_QUOTA_DIR", str(tmp_path))
+    monkeypatch.setenv("STOCK_VISUALIZER_HTTP_MODE", "live")
+    monkeypatch.delenv("ALPHAVANTAGE_API_BASE_URL", raising=False)
+    monkeypatch.delenv("ALPHAVANTAGE_API_KEY", raising=False)
+    # demo キーには暗黙に切り替えない
+    with pytest.raises(ValueError, match="ALPHAVANTAGE_API_KEY"):
+        data_fetcher.get_stock_data_alpha_vantage("AAPL")
+
+    # 上限に達している場合は API を呼ばずに QuotaExceeded（入力の誤りと区別するため ValueError にしない）
+    monkeypatch.setenv("ALPHAVANTAGE_API_KEY", "my-key")
+    monkeypatch.setenv("ALPHAVANTAGE_QUOTA_PER_DAY", "1")
+    from utils.quota import get_quota_ledger
+    get_quota_ledger().acquire("alphavantage", "my-key")
+    with pytest.raises(QuotaExceeded) as excinfo:
+        data_fetcher.get_stock_data_alpha_vantage("AAPL")
+    assert not isinstance(excinfo.value, ValueError)
+
+
+def test_service_falls_back_to_saved_prices(tmp_path, monkeypatch):
+    panel = PricePanel.create(tmp_path / "panel")
+    dates = pd.bdate_range("2023-03-01", "2023-03-31")
+    close = np.linspace(1000, 1100, len(dates))
+    panel.update({"6758": pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                                        "Volume": np.full(len(dates), 1e4)}, index=dates)})
+
+    with MockServer() as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        service = DataService(price_cache=CompactCache(), panel_path=tmp_path / "panel")
+        fetched = service.prices("jp", "7203.T", "2023-03-01", "2023-03-31")
+        assert service.degraded("jp", "7203.T") is None
+
+        def exhausted(*args, **kwargs):
+            raise QuotaExceeded("J-Quants の1日あたりの利用回数の上限に達しました", "jquants")
+
+        monkeypatch.setattr(data_fetcher, "get_stock_data_jquants", exhausted)
+
+        # 前回取得した株価から期間を切り出して返す
+        data = service.indicators("jp", "7203.T", "2023-03-10", "2023-03-31", ma_windows=(5,))
+        expected = fetched.loc["2023-03-10":, "Close"]
+        assert data.index.equals(expected.index) and np.allclose(data["Close"], expected)
+        assert "上限" in service.degraded("jp", "7203.T")
+        # 保存済みのデータから計算した指標はキャッシュしない
+        assert service.indicator_cache.stats()["items"] == 0
+
+        # 取得したことがない銘柄は株価パネルから返す
+        data = service.prices("jp", "6758.T", "2023-03-01", "2023-03-15")
+        assert len(data) == 11 and service.degraded("jp", "6758.T")
+
+        # どちらにもない場合はそのまま QuotaExceeded
+        with pytest.raises(QuotaExceeded):
+            service.prices("jp", "9984.T", "2023-03-01", "2023-03-31")
@@ -0,0 +1,80 @@
+"""
+モックサーバーと記録・再生モードのオフラインテスト
+"""
+import os
+import sys
+
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.mock_server import MOCK_ID_TOKEN, MOCK_REFRESH_TOKEN, MockServer
+from utils.jquants_api import get_stock_data
+from utils.data_fetcher import get_stock_data_alpha_vantage
+
+
+@pytest.fixture
+def mock_env(monkeypatch, tmp_path):
+    """モックサーバーを起動し、クライアントの接続先を切り替える"""
+    with MockServer(page_size=7) as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "mock@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "mock")
+        monkeypatch.setenv("ALPHAVANTAGE_API_KEY", "mock")
+        monkeypatch.setenv("STOCK_VISUALIZER_CASSETTE_DIR", str(tmp_path))
+        monkeypatch.setenv("STOCK_VISUALIZER_HTTP_MODE", "live")
+        yield server
+
+
+def test_jquants_pagination(mock_env):
+    """pagination_key をたどって全ページを取得できること"""
+    data = get_stock_data("7203", from_date="2023-03-01", to_date="2023-03-31")
+    print(f"行数: {len(data)}, リクエスト数: {mock_env.stats}")
+    assert len(data) == 23
+    assert list(data.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert data.index.is_monotonic_increasing
+    assert mock_env.stats["/v1/prices/daily_quotes"] == 4
+
+
+def test_alpha_vantage(mock_env):
+    """Alpha Vantage形式のレスポンスを変換できること"""
+    data = get_stock_data_alpha_vantage("AAPL", outputsize="compact")
+    assert len(data) == 100
+    assert {"Open", "High", "Low", "Close", "Volume"} <= set(data.columns)
+    assert data.index.is_monotonic_increasing
+
+
+def test_record_then_replay(mock_env, monkeypatch, tmp_path):
+    """記録したレスポンスをネットワークなしで再生できること"""
+    monkeypatch.setenv("STOCK_VISUALIZER_HTTP_MODE", "record")
+    recorded = get_stock_data("9984", from_date="2023-03-01", to_date="2023-03-10")
+    assert list(tmp_path.glob("*.json"))
+    # 認証情報・トークンはリクエストにもレスポンスにも保存しない
+    assert list(tmp_path.glob("v1_token_auth_user-*.json")) and list(tmp_path.glob("v1_token_auth_refresh-*.json"))
+    for cassette in tmp_path.glob("*.json"):
+        text = cassette.read_text(encoding="utf-8")
+        assert "mock@example.com" not in text
+        assert MOCK_REFRESH_TOKEN not in text and MOCK_ID_TOKEN not in text
+
+    monkeypatch.setenv("STOCK_VISUALIZER_HTTP_MODE", "replay")
+    monkeypatch.setenv("JQUANTS_API_BASE_URL", "http://127.0.0.1:9")
+    replayed = get_stock_data("9984", from_date="2023-03-01", to_date="2023-03-10")
+    assert replayed.equals(recorded)
+
+    with pytest.raises(ValueError):
+        get_stock_data("6758", from_date="2023-03-01", to_date="2023-03-10")
+
+
+def test_rate_limit(monkeypatch):
+    """レート制限を超えるとエラーになること"""
+    with MockServer(rate_limit=0.001) as server:
+        monkeypatch.setenv("ALPHAVANTAGE_API_BASE_URL", server.url)
+        monkeypatch.setenv("ALPHAVANTAGE_API_KEY", "mock")
+        monkeypatch.setenv("STOCK_VISUALIZER_HTTP_MODE", "live")
+        get_stock_data_alpha_vantage("MSFT", outputsize="compact")
+        with pytest.raises(ValueError, match="Alpha Vantage"):
+            get_stock_data_alpha_vantage("MSFT", outputsize="compact")
+        assert server.stats["rate_limited"] == 1
@@ -0,0 +1,86 @@
+"""
+週足・月足の作成と集約結果のキャッシュのテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.compact import CompactCache
+from utils.data_service import DataService
+from utils.decoder import decode_daily_quotes
+from utils.mock_server import MockServer, synthetic_daily_quotes
+from utils.resample import ResampleCache, period_starts, resample_ohlcv
+
+AGGREGATION = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def _daily(from_date="2022-01-01", to_date="2024-03-15"):
+    return decode_daily_quotes(synthetic_daily_quotes("7203", from_date, to_date))
+
+
+@pytest.mark.parametrize("timeframe, period", [("weekly", "W"), ("monthly", "M")])
+def test_resample_matches_pandas(timeframe, period):
+    data = _daily()
+    expected = data[list(AGGREGATION)].groupby(data.index.to_period(period).start_time).agg(AGGREGATION)
+    result = resample_ohlcv(data, timeframe)
+    assert np.array_equal(result.index.values, expected.index.values)
+    assert np.allclose(result.to_numpy(), expected.to_numpy())
+    assert (result.index.dayofweek == 0).all() if timeframe == "weekly" else (result.index.day == 1).all()
+
+
+def test_period_starts():
+    days = period_starts(pd.to_datetime(["2024-03-03", "2024-03-04", "2024-03-10", "2024-02-29"]), "weekly")
+    assert [str(day) for day in days] == ["2024-02-26", "2024-03-04", "2024-03-04", "2024-02-26"]
+    assert str(period_starts(pd.to_datetime(["2024-02-29"]), "monthly")[0]) == "2024-02-01"
+    with pytest.raises(ValueError):
+        period_starts(pd.to_datetime(["2024-02-29"]), "yearly")
+
+
+def test_cache_reuses_finished_periods():
+    """終了した期間だけを再利用し、過去の株価が変わった期間は集約し直すこと"""
+    cache = ResampleCache()
+    data = _daily("2024-01-01", "2024-03-15")
+    first = cache.resample(("jp", "7203"), data, "weekly", from_date="2024-01-01")
+    assert cache.stats()["reused_periods"] == 0
+    assert cache.stats()["periods"] == len(first) - 1
+
+    # 日足が1日増えても、終了した期間は集約し直さない
+    longer = _daily("2024-01-01", "2024-03-18")
+    result = cache.resample(("jp", "7203"), longer, "weekly", from_date="2024-01-01")
+    assert cache.stats()["reused_periods"] == len(first) - 1
+    assert np.allclose(result.to_numpy(), resample_ohlcv(longer, "weekly").to_numpy())
+
+    # 分割の調整などで過去の株価が変わった場合は使わない
+    halved = longer.copy()
+    halved[["Open", "High", "Low", "Close"]] /= 2
+    result = cache.resample(("jp", "7203"), halved, "weekly", from_date="2024-01-01")
+    assert np.allclose(result.to_numpy(), resample_ohlcv(halved, "weekly").to_numpy())
+
+    # 取得開始日より前から始まる期間はキャッシュしない
+    cache = ResampleCache()
+    cache.resample(("jp", "7203"), _daily("2024-01-03", "2024-03-15"), "weekly", from_date="2024-01-03")
+    assert cache.stats()["periods"] == len(first) - 2
+
+
+def test_service_candles_without_refetch(monkeypatch):
+    with MockServer() as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setenv("JQUANTS_EMAIL", "user@example.com")
+        monkeypatch.setenv("JQUANTS_PASSWORD", "password")
+        service = DataService(price_cache=CompactCache())
+        daily = service.candles("jp", "7203.T", "2020-01-01", "2024-03-15")
+        weekly = service.candles("jp", "7203.T", "2020-01-01", "2024-03-15", "weekly")
+        monthly = service.candles("jp", "7203.T", "2020-01-01", "2024-03-15", "monthly")
+        assert server.stats["/v1/prices/daily_quotes"] == 1
+    assert len(daily) > len(weekly) > len(monthly) > 1
+    first_month = daily.index[0].strftime("%Y-%m")
+    assert monthly["High"].iloc[0] == daily.loc[first_month, "High"].max()
+    assert service.stats()["resample_periods"] == len(weekly) - 1 + len(monthly) - 1
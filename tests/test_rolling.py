@@ -0,0 +1,115 @@
+"""
+移動窓の統計量のテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.data_processor import (calculate_beta, calculate_price_channel, calculate_return_quantiles,
+                                  calculate_returns, calculate_rolling_drawdown, calculate_rolling_sharpe,
+                                  calculate_volatility)
+from utils.rolling import (RollingQuantile, rolling_beta, rolling_cov, rolling_max, rolling_max_drawdown,
+                           rolling_mean_var, rolling_min, rolling_quantile, rolling_sharpe, rolling_std)
+
+
+def _series(n=1500, seed=1):
+    """欠損を含む疑似リターンと、それに連動するベンチマーク・価格"""
+    rng = np.random.default_rng(seed)
+    returns = rng.standard_normal(n)
+    benchmark = 0.5 * returns + rng.standard_normal(n) * 0.5
+    prices = 1000 * np.exp(np.cumsum(rng.standard_normal(n) * 0.02))
+    returns[[0, 500, 501, 1200]] = np.nan
+    benchmark[900] = np.nan
+    prices[[100, 1000]] = np.nan
+    return returns, benchmark, prices
+
+
+@pytest.mark.parametrize("window", [1, 3, 20, 250])
+def test_matches_pandas_rolling(window):
+    returns, benchmark, prices = _series()
+    series = pd.Series(returns)
+    assert np.allclose(rolling_max(returns, window), series.rolling(window).max(), equal_nan=True)
+    assert np.allclose(rolling_min(returns, window), series.rolling(window).min(), equal_nan=True)
+    for q in (0.0, 0.05, 0.5, 0.95, 1.0):
+        assert np.allclose(rolling_quantile(returns, window, q), series.rolling(window).quantile(q),
+                           equal_nan=True)
+    expected = pd.Series(prices).rolling(window).apply(
+        lambda x: (x / np.maximum.accumulate(x) - 1).min() * 100, raw=True)
+    assert np.allclose(rolling_max_drawdown(prices, window), expected, equal_nan=True)
+    if window > 1:
+        mean, var = rolling_mean_var(returns, window)
+        assert np.allclose(mean, series.rolling(window).mean(), equal_nan=True)
+        assert np.allclose(var, series.rolling(window).var(), equal_nan=True)
+        cov, var_benchmark = rolling_cov(returns, benchmark, window)
+        assert np.allclose(cov, series.rolling(window).cov(pd.Series(benchmark)), equal_nan=True)
+        assert np.allclose(var_benchmark, pd.Series(benchmark).rolling(window).var().where(~np.isnan(cov)),
+                           equal_nan=True)
+
+
+def test_streaming_quantile_and_precision():
+    # 1つずつ追加しても配列でまとめて求めた値と同じ
+    values = np.random.default_rng(2).integers(0, 5, 200).astype(float)
+    quantile = RollingQuantile(10, 0.25)
+    assert np.allclose([quantile.push(value) for value in values], rolling_quantile(values, 10, 0.25),
+                       equal_nan=True)
+    with pytest.raises(ValueError):
+        RollingQuantile(10, 1.5)
+
+    # 値が大きく分散が小さい系列でも桁落ちしない
+    values = 1e6 + np.random.default_rng(3).standard_normal(5000) * 1e-2
+    assert np.allclose(rolling_mean_var(values, 20)[1], pd.Series(values).rolling(20).var(), rtol=1e-6,
+                       equal_nan=True)
+
+
+def test_volatile_then_quiet():
+    """値動きの大きい期間の後に値動きのない・小さい期間が続いても累積の誤差が残らないこと"""
+    rng = np.random.default_rng(5)
+    values = np.concatenate([rng.standard_normal(5000) * 0.02, np.full(40, 0.001),
+                             rng.standard_normal(3000) * 0.02, 0.001 + rng.standard_normal(60) * 1e-9])
+    benchmark = rng.standard_normal(len(values)) * 0.02
+
+    # 値がすべて同じ窓は pandas と同じく 0
+    flat = slice(5019, 5040)
+    std = rolling_std(values, 20)
+    assert (std[flat] == 0).all()
+    assert np.isnan(rolling_sharpe(values, 20)[flat]).all()
+    assert (rolling_cov(values, benchmark, 20)[0][flat] == 0).all()
+    assert np.isnan(rolling_beta(benchmark, values, 20)[flat]).all()
+
+    # 値動きの小さい窓も窓ごとに直接計算した値と一致する
+    windows = np.lib.stride_tricks.sliding_window_view(values, 20)
+    exact = np.concatenate([np.full(19, np.nan), windows.std(axis=1, ddof=1)])
+    exact[flat] = 0.0
+    assert np.allclose(std, exact, rtol=1e-6, atol=0, equal_nan=True)
+    assert np.allclose(std[:5000], pd.Series(values).rolling(20).std()[:5000], equal_nan=True)
+
+
+def test_data_processor_functions():
+    index = pd.bdate_range("2020-01-01", periods=400)
+    rng = np.random.default_rng(4)
+    close = pd.Series(1000 * np.exp(np.cumsum(rng.standard_normal(400) * 0.01)), index=index)
+    data = calculate_returns(pd.DataFrame({"High": close * 1.01, "Low": close * 0.99, "Close": close}))
+
+    assert np.allclose(calculate_volatility(data)["Volatility"], data["Daily_Return"].rolling(20).std(),
+                       equal_nan=True)
+    sharpe = calculate_rolling_sharpe(data, window=60)["Sharpe"]
+    returns = data["Daily_Return"]
+    expected = returns.rolling(60).mean() / returns.rolling(60).std() * np.sqrt(252)
+    assert np.allclose(sharpe, expected, equal_nan=True)
+
+    # 自分自身に対するベータは1（ベンチマークの休場日は前日の終値で埋める）
+    benchmark = close.drop(index[[50, 51]])
+    beta = calculate_beta(data, pd.DataFrame({"Close": benchmark}), window=60)["Beta"]
+    assert np.allclose(beta.iloc[120:], 1.0)
+
+    result = calculate_return_quantiles(calculate_rolling_drawdown(calculate_price_channel(data)))
+    assert {"High_20", "Low_20", "Max_Drawdown", "Return_Q05", "Return_Q95"} <= set(result.columns)
+    assert (result["Max_Drawdown"].dropna() <= 0).all()
+    assert (result["Return_Q05"].dropna() <= result["Return_Q95"].dropna()).all()
@@ -0,0 +1,74 @@
+"""
+スクリーナーのテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.data_processor import calculate_moving_averages, calculate_returns, calculate_rsi, calculate_volatility
+from utils.decoder import decode_daily_quotes
+from utils.mock_server import synthetic_daily_quotes
+from utils.panel import PricePanel
+from utils.screener import build_latest_table, compile_predicate, load_latest_table, screen
+
+CODES = ["1301", "1332", "2914", "4063", "6758", "7203", "8306", "9432", "9984"]
+
+
+@pytest.fixture
+def panel(tmp_path):
+    panel = PricePanel.create(tmp_path)
+    frames = {code: decode_daily_quotes(synthetic_daily_quotes(code, "2022-06-01", "2023-06-30")) for code in CODES}
+    # 売買停止日（途中の欠損）と、最終日に取引のない銘柄を作る
+    frames["6758"] = frames["6758"].drop(frames["6758"].index[-10:-7])
+    frames["9432"] = frames["9432"].iloc[:-1]
+    panel.update(frames)
+    return PricePanel.open(tmp_path)
+
+
+def test_latest_matches_data_processor(panel):
+    """最新指標値が calculate_* 関数の最終行と一致すること"""
+    table = build_latest_table(panel)
+    assert table.attrs["as_of"] == "2023-06-30"
+    for code in ["7203", "6758"]:
+        data = panel.frame(code).astype(float)
+        data = calculate_moving_averages(data, windows=[5, 25, 75])
+        data = calculate_volatility(calculate_rsi(calculate_returns(data)))
+        last = data.iloc[-1]
+        for column in ["Close", "MA_5", "MA_25", "MA_75", "RSI", "Volatility", "Daily_Return"]:
+            assert np.isclose(table.loc[code, column], last[column], rtol=1e-5), (code, column)
+    assert table.loc["9432"].isna().all()
+
+
+def test_predicate_language():
+    """演算子の優先順位と不正な式のエラー"""
+    import pandas as pd
+    table = pd.DataFrame({"Close": [10.0, 20.0, np.nan], "MA_75": [15.0, 15.0, 1.0], "RSI": [25.0, 50.0, 10.0]})
+    assert compile_predicate("Close > MA_75 and RSI < 30").evaluate(table).tolist() == [False, False, False]
+    assert compile_predicate("Close < MA_75 or RSI > 40 and Close > 0").evaluate(table).tolist() == [True, True, False]
+    assert compile_predicate("not (Close / MA_75 - 1) * 100 > 10").evaluate(table).tolist() == [True, False, True]
+    assert compile_predicate("RSI <= -(-25)").evaluate(table).tolist() == [True, False, True]
+
+    for bad in ["", "Close >", "Close > MA_75)", "Close + 1", "RSI < 30 and Close", "Close $ 3"]:
+        with pytest.raises(ValueError):
+            compile_predicate(bad).evaluate(table)
+    with pytest.raises(ValueError, match="未知の指標"):
+        compile_predicate("MA_200 > 0").evaluate(table)
+
+
+def test_screen_with_cached_table(panel):
+    """保存済みの最新指標表を使ってスクリーニングできること"""
+    table = load_latest_table(panel)
+    assert (panel.path / "latest.npz").exists()
+    cached = load_latest_table(panel)
+    assert cached.equals(table)
+
+    result = screen("Close > 0", cached, names={"7203": "トヨタ自動車"}, sort_by="RSI", limit=5)
+    assert len(result) == 5
+    assert result["RSI"].is_monotonic_increasing
+    assert "9432" not in screen("Close > 0", cached).index
@@ -0,0 +1,30 @@
+"""
+銘柄マスタの読み込みのテスト
+"""
+import os
+import shutil
+import sys
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.symbols import CACHE_DIR_NAME, DATA_DIR, _read_symbol_master, load_symbol_master
+
+
+def test_symbol_master_cache(tmp_path):
+    """2回目以降はExcelではなくキャッシュから同じ内容を読み込むこと"""
+    shutil.copy(DATA_DIR / "data_j.xlsx", tmp_path / "data_j.xlsx")
+    first = load_symbol_master("jp", tmp_path)
+    assert (tmp_path / CACHE_DIR_NAME / "symbols_jp.json").exists()
+    assert first["code"].str.len().ge(4).all()
+
+    _read_symbol_master.cache_clear()
+    cached = load_symbol_master("jp", tmp_path)
+    assert cached.equals(first)
+
+    # Excelファイルが更新されたらキャッシュを使わない
+    os.utime(tmp_path / "data_j.xlsx", ns=(0, 0))
+    (tmp_path / CACHE_DIR_NAME / "symbols_jp.json").write_text("{}", encoding="utf-8")
+    _read_symbol_master.cache_clear()
+    assert load_symbol_master("jp", tmp_path).equals(first)
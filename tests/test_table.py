@@ -0,0 +1,84 @@
+"""
+データテーブルのページ単位の読み出しのテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.table import TableSource
+
+
+def _frame(n=600, seed=3):
+    """欠損と同じ値を含む疑似的な日足"""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "Close": np.round(rng.normal(1000, 50, n), 0),
+        "Volume": rng.integers(0, 10, n) * 1000.0,
+        "Daily_Return": rng.standard_normal(n),
+    }, index=pd.bdate_range("2020-01-01", periods=n, name="Date"))
+    data.iloc[[3, 200], 2] = np.nan
+    return data
+
+
+def test_pages_match_pandas():
+    data = _frame()
+    source = TableSource.from_frame(data)
+
+    # 既定は新しい順、列は指定した順に選択する
+    page = source.query(["Daily_Return", "Close"], page=2, page_size=50)
+    expected = data.sort_index(ascending=False)[["Daily_Return", "Close"]]
+    pd.testing.assert_frame_equal(page.frame, expected.iloc[100:150])
+    assert (page.total_rows, page.total_pages, page.first_row, page.last_row) == (600, 12, 101, 150)
+
+    # 値による並べ替え（同じ値は日付の向きも揃え、欠損値は最後）をページをまたいで連結すると全体の並べ替えと一致する
+    for ascending in (True, False):
+        base = data if ascending else data.iloc[::-1]
+        pages = [source.query(sort_by="Volume", ascending=ascending, page=i, page_size=70).frame for i in range(9)]
+        expected = base.sort_values("Volume", ascending=ascending, kind="stable")
+        pd.testing.assert_frame_equal(pd.concat(pages), expected)
+        pages = [source.query(sort_by="Daily_Return", ascending=ascending, page=i, page_size=70).frame
+                 for i in range(9)]
+        expected = base.sort_values("Daily_Return", ascending=ascending, kind="stable", na_position="last")
+        pd.testing.assert_frame_equal(pd.concat(pages), expected)
+
+    # 範囲外のページは最後のページに丸める
+    page = source.query(page=100, page_size=70)
+    assert page.page == 8 and len(page.frame) == 600 - 8 * 70
+
+
+def test_filter_and_date_range():
+    data = _frame()
+    source = TableSource.from_frame(data)
+
+    page = source.query(["Close"], where="Daily_Return < -1 and Volume >= 5000", sort_by="Close",
+                        from_date="2020-06-01", to_date="2021-05-31")
+    part = data.loc["2020-06-01":"2021-05-31"]
+    expected = part[(part["Daily_Return"] < -1) & (part["Volume"] >= 5000)].iloc[::-1]
+    expected = expected.sort_values("Close", ascending=False, kind="stable")[["Close"]]
+    pd.testing.assert_frame_equal(page.frame, expected)
+    assert page.total_rows == len(expected)
+
+    # 期間内にデータがない場合は空の表
+    page = source.query(from_date="2030-01-01")
+    assert page.total_rows == 0 and page.frame.empty and page.first_row == 0
+
+
+def test_reads_are_views_and_errors():
+    data = _frame()
+    source = TableSource.from_frame(data)
+    # 列はコピーせずに参照する
+    assert np.shares_memory(source._columns["Close"], data["Close"].to_numpy())
+
+    with pytest.raises(ValueError, match="未知の指標"):
+        source.query(where="RSI < 30")
+    with pytest.raises(ValueError, match="並べ替えの列"):
+        source.query(sort_by="RSI")
+    with pytest.raises(ValueError):
+        TableSource(data.index[::-1], {"Close": data["Close"].to_numpy()})
@@ -0,0 +1,75 @@
+"""
+チャート作成のテスト
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+project_root = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(project_root)
+
+from utils.visualizer import (MAX_BARS, WEBGL_THRESHOLD, _base_layout, aggregate_bars, build_price_figure,
+                              build_technical_figure, line_trace, make_figure, plot_line_chart, time_values)
+
+
+def _daily(n):
+    index = pd.date_range("1980-01-01", periods=n, freq="D", name="Date")
+    close = 1000 * np.exp(np.cumsum(np.random.default_rng(0).standard_normal(n) * 0.01))
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": np.arange(n, dtype=float)}, index=index)
+
+
+def test_webgl_switch_and_binary_arrays():
+    data = _daily(WEBGL_THRESHOLD + 1)
+    assert type(line_trace(time_values(data.index[:10]), data["Close"][:10])).__name__ == "Scatter"
+    fig = plot_line_chart(data)
+    assert type(fig.data[0]).__name__ == "Scattergl"
+    assert fig.layout.xaxis.type == "date"
+    # 日付も数値の配列として送られる
+    assert time_values(data.index[:1])[0] == pd.Timestamp("1980-01-01").value // 10**6
+    assert '"bdata"' in fig.to_json()
+
+
+def test_aggregate_bars():
+    data = _daily(MAX_BARS * 3 + 7)
+    x, bars = aggregate_bars(data)
+    assert len(x) <= MAX_BARS
+    # 4日ずつまとめる（始値は最初、終値は最後、高値・安値は最大・最小、出来高は合計）
+    first = data.iloc[:4]
+    assert x[0] == time_values(data.index[:1])[0] and x[1] == time_values(data.index[4:5])[0]
+    assert bars["Open"][0] == first["Open"].iloc[0] and bars["Close"][0] == first["Close"].iloc[-1]
+    assert bars["High"][0] == first["High"].max() and bars["Low"][0] == first["Low"].min()
+    assert bars["Volume"].sum() == data["Volume"].sum()
+
+    small = _daily(10)
+    x, bars = aggregate_bars(small)
+    assert len(x) == 10 and np.array_equal(bars["Close"], small["Close"].to_numpy())
+
+
+def test_figure_factory_reuses_layout():
+    data = _daily(300)
+    for window in (5, 25):
+        data[f'MA_{window}'] = data['Close'].rolling(window).mean()
+    data['RSI'] = 50.0
+    data['Volatility'] = 1.0
+
+    fig = build_technical_figure(data, {5: '#FFC107', 25: '#FF5722'}, show_rsi=True, show_volatility=True)
+    assert [trace.yaxis or "y" for trace in fig.data] == ["y", "y", "y", "y2", "y2", "y2", "y3"]
+    assert tuple(fig.layout.yaxis2.range) == (0, 100)
+    # 3段の配置（x 軸は最下段に揃える）
+    assert fig.layout.xaxis.matches == "x3" and fig.layout.xaxis3.matches is None
+    assert np.isclose(fig.layout.yaxis.domain[1], 1.0) and np.isclose(fig.layout.yaxis3.domain[0], 0.0)
+    # テンプレートは plotly_dark のレイアウトの一部だけ
+    assert fig.layout.template.layout.font.color == "#f2f5fa" and not fig.layout.template.data.scatter
+
+    # 同じ配置のレイアウトは使い回し、図ごとの変更は共有のレイアウトに影響しない
+    fig = build_price_figure(data, show_volume=True)
+    assert [trace.type for trace in fig.data] == ["candlestick", "bar"] and fig.data[1].xaxis == "x2"
+    assert fig.layout.xaxis2.tickangle == 45 and fig.layout.xaxis.tickangle == 0
+    misses = _base_layout.cache_info().misses
+    make_figure(row_heights=(0.7, 0.3), xaxis2=dict(tickangle=30))
+    assert _base_layout.cache_info().misses == misses
+    assert _base_layout((0.7, 0.3), 600, True)["xaxis2"]["tickangle"] == 0
@@ -1,15 +1,29 @@
 """
 Utility modules for stock visualizer
 """
+import importlib
 
-from .data_fetcher import get_stock_data_alpha_vantage, get_stock_data_jquants
-from .data_processor import calculate_returns, calculate_moving_averages, calculate_volatility, calculate_rsi
-
-__all__ = [
-    'get_stock_data_alpha_vantage',
-    'get_stock_data_jquants',
-    'calculate_returns',
-    'calculate_moving_averages',
-    'calculate_volatility',
-    'calculate_rsi'
-] 
\ No newline at end of file
+# サブモジュールは属性に初めてアクセスした時点で読み込む
+# （utils.compact などを import しただけで API クライアントや requests が読み込まれないようにする）
+_LAZY_ATTRIBUTES = {
+    'get_stock_data_alpha_vantage': '.data_fetcher',
+    'get_stock_data_jquants': '.data_fetcher',
+    'calculate_returns': '.data_processor',
+    'calculate_moving_averages': '.data_processor',
+    'calculate_volatility': '.data_processor',
+    'calculate_rsi': '.data_processor',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,344 @@
+"""
+株式分割・配当による株価の調整
+
+未調整の日足（raw）と、権利落ち日ごとの調整係数（イベント）を分けて保持し、
+調整後の株価は読み出し時に「その日より後のイベントの係数の積」を掛けて作成する。
+累積係数は初回の読み出し時に計算して保持し、新しいイベントが追加された場合は
+イベント日より前の区間の係数だけを更新する（過去の株価を取得し直す必要はない）。
+
+係数の向きは J-Quants の AdjustmentFactor と同じで、1:2 の株式分割なら 0.5
+（イベント日より前の価格に掛ける値）。出来高には価格係数の逆数（分割のみ）を掛ける。
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ADJUSTMENT_DIR_ENV = "STOCK_VISUALIZER_ADJUSTMENT_DIR"
+DEFAULT_ADJUSTMENT_DIR = Path(__file__).parent.parent / "data" / "adjusted"
+
+RAW_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+PRICE_FIELDS = ["Open", "High", "Low", "Close"]
+
+# 取得元のデータに含まれる調整関連の列（raw には保存しない）
+ADJUSTMENT_SOURCE_COLUMNS = ["AdjustmentFactor", "Adj Close", "Dividend", "Split Coefficient"]
+
+
+def get_adjustment_dir():
+    """
+    調整データの保存先ディレクトリを取得する関数（環境変数 STOCK_VISUALIZER_ADJUSTMENT_DIR で変更可能）
+
+    Returns:
+    --------
+    pathlib.Path
+    """
+    return Path(os.environ.get(ADJUSTMENT_DIR_ENV) or DEFAULT_ADJUSTMENT_DIR)
+
+
+def extract_events(data, previous_close=None):
+    """
+    取得した日足から調整イベント（権利落ち日と係数）を取り出す関数
+
+    J-Quants の AdjustmentFactor（1以外の日）と、Alpha Vantage の Split Coefficient・
+    Dividend（配当は前日終値に対する比率で価格係数にする）に対応する。
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        調整関連の列を含む日足（日付昇順）
+    previous_close : float, optional
+        data の初日の前営業日の終値（初日に配当がある場合に使う）
+
+    Returns:
+    --------
+    list of tuple
+        (日付, 価格係数, 出来高係数) のリスト
+    """
+    dates = data.index.values.astype("datetime64[D]")
+    n = len(data)
+    price_factor = np.ones(n)
+    volume_factor = np.ones(n)
+
+    if "AdjustmentFactor" in data.columns:
+        factor = data["AdjustmentFactor"].to_numpy(dtype=np.float64)
+        mask = np.isfinite(factor) & (factor > 0) & (factor != 1.0)
+        price_factor[mask] *= factor[mask]
+        volume_factor[mask] /= factor[mask]
+
+    if "Split Coefficient" in data.columns:
+        split = data["Split Coefficient"].to_numpy(dtype=np.float64)
+        mask = np.isfinite(split) & (split > 0) & (split != 1.0)
+        price_factor[mask] /= split[mask]
+        volume_factor[mask] *= split[mask]
+
+    if "Dividend" in data.columns and n:
+        dividend = data["Dividend"].to_numpy(dtype=np.float64)
+        close = data["Close"].to_numpy(dtype=np.float64)
+        prev_close = np.concatenate([[np.nan if previous_close is None else previous_close], close[:-1]])
+        mask = np.isfinite(dividend) & (dividend > 0) & np.isfinite(prev_close) & (prev_close > dividend)
+        price_factor[mask] *= 1 - dividend[mask] / prev_close[mask]
+
+    changed = np.flatnonzero((price_factor != 1.0) | (volume_factor != 1.0))
+    return [(dates[i], float(price_factor[i]), float(volume_factor[i])) for i in changed]
+
+
+class AdjustedHistory:
+    """
+    1銘柄分の未調整の日足と調整イベントを保持し、調整後の株価を作成するクラス
+
+    Parameters:
+    -----------
+    dates : numpy.ndarray
+        日付（datetime64[D]、昇順）
+    values : numpy.ndarray
+        未調整の Open/High/Low/Close/Volume（行数 × 5、float64）
+    events : list of tuple, optional
+        (日付, 価格係数, 出来高係数) のリスト
+    coverage_start : str, optional
+        取得を要求した期間の開始日（YYYY-MM-DD形式、取得済みの範囲の判定に使う）
+    """
+
+    def __init__(self, dates, values, events=(), coverage_start=None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.dates), len(RAW_FIELDS))
+        self.events = sorted((np.datetime64(day, "D"), float(pf), float(vf)) for day, pf, vf in events)
+        self.coverage_start = coverage_start or (str(self.dates[0]) if len(self.dates) else None)
+        # 累積係数（初回の読み出しで計算する）と、イベント追加時に更新した行数
+        self._price_factor = None
+        self._volume_factor = None
+        self.readjusted_rows = 0
+
+    @classmethod
+    def from_frame(cls, data, coverage_start=None):
+        """
+        取得した日足（調整関連の列を含む）から作成する
+
+        Parameters:
+        -----------
+        data : pandas.DataFrame
+            DatetimeIndex を持つ日足（get_stock_data_jquants(adjustment=True) または
+            get_stock_data_alpha_vantage(adjusted=True) の戻り値）
+        coverage_start : str, optional
+            取得を要求した期間の開始日
+
+        Returns:
+        --------
+        AdjustedHistory
+        """
+        history = cls(np.array([], dtype="datetime64[D]"), np.empty((0, len(RAW_FIELDS))),
+                      coverage_start=coverage_start)
+        history.append(data)
+        if history.coverage_start is None and len(history.dates):
+            history.coverage_start = str(history.dates[0])
+        return history
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def first_date(self):
+        return str(self.dates[0]) if len(self.dates) else None
+
+    @property
+    def last_date(self):
+        return str(self.dates[-1]) if len(self.dates) else None
+
+    def _cumulative_factors(self):
+        """各行に掛ける累積係数（その日より後のイベントの係数の積）を計算する"""
+        n = len(self.dates)
+        price = np.ones(n + 1)
+        volume = np.ones(n + 1)
+        for day, pf, vf in self.events:
+            # イベント日より前の行（0〜idx-1）が対象なので、位置 idx に係数を置いて後ろから累積する
+            idx = int(np.searchsorted(self.dates, day, side="left"))
+            price[idx] *= pf
+            volume[idx] *= vf
+        price = np.cumprod(price[::-1])[::-1][1:]
+        volume = np.cumprod(volume[::-1])[::-1][1:]
+        return price, volume
+
+    def _factors(self):
+        if self._price_factor is None:
+            self._price_factor, self._volume_factor = self._cumulative_factors()
+        return self._price_factor, self._volume_factor
+
+    def add_event(self, day, price_factor, volume_factor=None):
+        """
+        調整イベントを追加する（計算済みの累積係数はイベント日より前の行だけ更新する）
+
+        Parameters:
+        -----------
+        day : str or numpy.datetime64
+            権利落ち日
+        price_factor : float
+            イベント日より前の価格に掛ける係数（1:2 の分割なら 0.5）
+        volume_factor : float, optional
+            イベント日より前の出来高に掛ける係数（省略時は価格係数の逆数）
+
+        Returns:
+        --------
+        bool
+            追加したか（同じ日・同じ係数のイベントが既にあれば False）
+        """
+        day = np.datetime64(day, "D")
+        price_factor = float(price_factor)
+        volume_factor = 1.0 / price_factor if volume_factor is None else float(volume_factor)
+        if any(d == day and np.isclose(pf, price_factor) and np.isclose(vf, volume_factor)
+               for d, pf, vf in self.events):
+            return False
+        self.events.append((day, price_factor, volume_factor))
+        self.events.sort()
+        if self._price_factor is not None:
+            idx = int(np.searchsorted(self.dates, day, side="left"))
+            self._price_factor[:idx] *= price_factor
+            self._volume_factor[:idx] *= volume_factor
+            self.readjusted_rows += idx
+        return True
+
+    def append(self, data, previous_close=None):
+        """
+        取得した日足のうち、保持している最終日より後の行とそのイベントを追加する
+
+        Parameters:
+        -----------
+        data : pandas.DataFrame
+            調整関連の列を含む日足（日付昇順）
+        previous_close : float, optional
+            data の初日の前営業日の終値（省略時は保持している最終行の終値）
+
+        Returns:
+        --------
+        int
+            追加した行数
+        """
+        if data is None or data.empty:
+            return 0
+        data = data.sort_index()
+        if len(self.dates):
+            new = data.index.values.astype("datetime64[D]") > self.dates[-1]
+            data = data[new]
+            if data.empty:
+                return 0
+            if previous_close is None:
+                previous_close = float(self.values[-1, RAW_FIELDS.index("Close")])
+
+        dates = data.index.values.astype("datetime64[D]")
+        values = np.column_stack([
+            data[field].to_numpy(dtype=np.float64) if field in data.columns else np.full(len(data), np.nan)
+            for field in RAW_FIELDS
+        ])
+        n_old = len(self.dates)
+        self.dates = np.concatenate([self.dates, dates])
+        self.values = np.concatenate([self.values, values])
+        if self._price_factor is not None:
+            # 既存のイベントは新しい行より前の日付なので、新しい行の累積係数は 1 から始まる
+            if self.events and self.events[-1][0] > dates[0]:
+                self._price_factor = None
+                self._volume_factor = None
+            else:
+                self._price_factor = np.concatenate([self._price_factor, np.ones(len(dates))])
+                self._volume_factor = np.concatenate([self._volume_factor, np.ones(len(dates))])
+        for day, pf, vf in extract_events(data, previous_close):
+            self.add_event(day, pf, vf)
+        return len(self.dates) - n_old
+
+    def _select(self, from_date, to_date):
+        start = int(np.searchsorted(self.dates, np.datetime64(from_date, "D"), side="left")) if from_date else 0
+        stop = (int(np.searchsorted(self.dates, np.datetime64(to_date, "D"), side="right"))
+                if to_date else len(self.dates))
+        return start, stop
+
+    def _frame(self, values, start, stop):
+        index = pd.DatetimeIndex(self.dates[start:stop].astype("datetime64[ns]"), name="Date")
+        return pd.DataFrame({field: values[:, i] for i, field in enumerate(RAW_FIELDS)}, index=index)
+
+    def raw(self, from_date=None, to_date=None):
+        """
+        未調整の日足を返す
+
+        Parameters:
+        -----------
+        from_date : str, optional
+            開始日（YYYY-MM-DD形式）
+        to_date : str, optional
+            終了日（YYYY-MM-DD形式）
+
+        Returns:
+        --------
+        pandas.DataFrame
+        """
+        start, stop = self._select(from_date, to_date)
+        return self._frame(self.values[start:stop].copy(), start, stop)
+
+    def adjusted(self, from_date=None, to_date=None):
+        """
+        分割・配当を調整した日足を返す（最新の株価を基準に過去の株価を調整する）
+
+        Parameters:
+        -----------
+        from_date : str, optional
+            開始日（YYYY-MM-DD形式）
+        to_date : str, optional
+            終了日（YYYY-MM-DD形式）
+
+        Returns:
+        --------
+        pandas.DataFrame
+            Open/High/Low/Close/Volume（いずれも float64）
+        """
+        start, stop = self._select(from_date, to_date)
+        price, volume = self._factors()
+        values = self.values[start:stop].copy()
+        values[:, :len(PRICE_FIELDS)] *= price[start:stop, None]
+        values[:, RAW_FIELDS.index("Volume")] *= volume[start:stop]
+        return self._frame(values, start, stop)
+
+
+class AdjustmentStore:
+    """
+    AdjustedHistory を銘柄ごとのファイル（.npz）に保存・読み込みするクラス
+
+    Parameters:
+    -----------
+    root : str or pathlib.Path, optional
+        保存先ディレクトリ（省略時は get_adjustment_dir()）
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else get_adjustment_dir()
+
+    def path(self, market, symbol):
+        return self.root / market / f"{symbol}.npz"
+
+    def load(self, market, symbol):
+        """
+        保存済みの履歴を読み込む（なければ None）
+        """
+        path = self.path(market, symbol)
+        if not path.exists():
+            return None
+        with np.load(path) as f:
+            events = zip(f["event_dates"], f["event_price"], f["event_volume"])
+            coverage_start = str(f["coverage_start"]) or None
+            return AdjustedHistory(f["dates"], f["values"], events, coverage_start)
+
+    def save(self, market, symbol, history):
+        """
+        履歴を保存する（一時ファイルに書き込んでから置き換える）
+        """
+        path = self.path(market, symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        events = history.events
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                dates=history.dates,
+                values=history.values,
+                event_dates=np.array([day for day, _, _ in events], dtype="datetime64[D]"),
+                event_price=np.array([pf for _, pf, _ in events], dtype=np.float64),
+                event_volume=np.array([vf for _, _, vf in events], dtype=np.float64),
+                coverage_start=np.array(history.coverage_start or ""),
+            )
+        os.replace(tmp, path)
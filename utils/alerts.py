@@ -0,0 +1,477 @@
+"""
+株価アラートの評価エンジン
+
+監視銘柄ごとに移動平均・RSI・ボラティリティの計算状態（直近の窓の値と合計）を保持し、
+差分取得した新しい日足だけを1本ずつ反映する。1本あたりの計算量は窓の長さや
+過去データの年数によらず一定。
+
+アラート条件はスクリーナーと同じ条件式で指定し、条件が偽から真に変わった日足で発火する。
+
+設定ファイル（JSON）の例:
+    {
+      "rules": [
+        {"market": "jp", "symbol": "7203", "condition": "Close > MA_25"},
+        {"market": "us", "symbol": "AAPL", "condition": "RSI < 30", "name": "AAPL 売られすぎ"}
+      ]
+    }
+"""
+import json
+import math
+import os
+import re
+from collections import deque
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.data_fetcher import get_stock_data_alpha_vantage, get_stock_data_jquants
+from utils.errors import NoDataError
+from utils.screener import DEFAULT_RSI_WINDOW, DEFAULT_VOLATILITY_WINDOW, compile_predicate
+
+DEFAULT_ALERT_DIR = Path(__file__).parent.parent / "data" / "alerts"
+
+# 浮動小数点の誤差の蓄積を防ぐため、この回数ごとに合計を計算し直す
+RESUM_INTERVAL = 1000
+
+# Alpha Vantage の compact 出力の件数
+ALPHAVANTAGE_COMPACT_SIZE = 100
+
+_MA_RE = re.compile(r"^MA_(\d+)$")
+_BASE_COLUMNS = {"Open", "High", "Low", "Close", "Volume", "Daily_Return", "RSI", "Volatility"}
+
+
+class RollingWindow:
+    """
+    固定長の窓の合計と二乗和を O(1) で更新するクラス
+
+    Parameters:
+    -----------
+    window : int
+        窓の長さ
+    """
+
+    def __init__(self, window, values=()):
+        self.window = window
+        self.values = deque(values, maxlen=window)
+        self.total = math.fsum(self.values)
+        self.total_sq = math.fsum(v * v for v in self.values)
+        self._updates = 0
+
+    def push(self, value):
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        self._updates += 1
+        if self._updates % RESUM_INTERVAL == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+    @property
+    def full(self):
+        return len(self.values) == self.window
+
+    def mean(self):
+        """窓の平均（窓が埋まっていなければ NaN）"""
+        return self.total / self.window if self.full else math.nan
+
+    def std(self):
+        """窓の標準偏差（不偏、窓が埋まっていなければ NaN）"""
+        if not self.full or self.window < 2:
+            return math.nan
+        var = (self.total_sq - self.total * self.total / self.window) / (self.window - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class IndicatorState:
+    """
+    1銘柄分の指標の計算状態
+
+    calculate_moving_averages, calculate_rsi, calculate_returns, calculate_volatility と
+    同じ定義の値を、日足を1本ずつ追加しながら計算する。
+
+    Parameters:
+    -----------
+    ma_windows : list of int
+        移動平均の期間
+    rsi_window : int, optional
+        RSIの計算期間
+    volatility_window : int, optional
+        ボラティリティの計算期間
+    """
+
+    def __init__(self, ma_windows, rsi_window=DEFAULT_RSI_WINDOW, volatility_window=DEFAULT_VOLATILITY_WINDOW):
+        self.ma_windows = sorted(set(ma_windows))
+        self.rsi_window = rsi_window
+        self.volatility_window = volatility_window
+        self.last_date = None
+        self.last_close = None
+        self.latest = {}
+        self._closes = {w: RollingWindow(w) for w in self.ma_windows}
+        self._gains = RollingWindow(rsi_window)
+        self._losses = RollingWindow(rsi_window)
+        self._returns = RollingWindow(volatility_window)
+
+    @property
+    def config(self):
+        return {"ma_windows": self.ma_windows, "rsi_window": self.rsi_window,
+                "volatility_window": self.volatility_window}
+
+    def update(self, day, bar):
+        """
+        日足を1本追加し、最新の指標値を返す
+
+        Parameters:
+        -----------
+        day : str
+            日付（YYYY-MM-DD形式）
+        bar : dict
+            Open, High, Low, Close, Volume
+
+        Returns:
+        --------
+        dict
+            株価と指標の最新値
+        """
+        close = float(bar["Close"])
+        for window in self._closes.values():
+            window.push(close)
+
+        # calculate_rsi と同様に、最初の日足の値幅は 0 として扱う
+        delta = close - self.last_close if self.last_close is not None else 0.0
+        self._gains.push(max(delta, 0.0))
+        self._losses.push(max(-delta, 0.0))
+
+        daily_return = math.nan
+        if self.last_close is not None:
+            daily_return = (close / self.last_close - 1) * 100
+            self._returns.push(daily_return)
+
+        rsi = math.nan
+        if self._gains.full:
+            gain, loss = self._gains.mean(), self._losses.mean()
+            if loss:
+                rsi = 100 - 100 / (1 + gain / loss)
+            elif gain:
+                rsi = 100.0
+
+        self.latest = {name: float(bar.get(name, math.nan)) for name in ("Open", "High", "Low", "Volume")}
+        self.latest.update({
+            "Close": close,
+            "Daily_Return": daily_return,
+            "RSI": rsi,
+            "Volatility": self._returns.std(),
+        })
+        self.latest.update({f"MA_{w}": window.mean() for w, window in self._closes.items()})
+        self.last_date = day
+        self.last_close = close
+        return self.latest
+
+    def to_dict(self):
+        return {
+            **self.config,
+            "last_date": self.last_date,
+            "last_close": self.last_close,
+            "closes": list(self._closes[max(self.ma_windows)].values) if self.ma_windows else [],
+            "gains": list(self._gains.values),
+            "losses": list(self._losses.values),
+            "returns": list(self._returns.values),
+            "latest": self.latest,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["ma_windows"], data["rsi_window"], data["volatility_window"])
+        state.last_date = data["last_date"]
+        state.last_close = data["last_close"]
+        # 最長の窓の終値から各期間の窓を復元する
+        closes = data["closes"]
+        state._closes = {w: RollingWindow(w, closes[-w:]) for w in state.ma_windows}
+        state._gains = RollingWindow(state.rsi_window, data["gains"])
+        state._losses = RollingWindow(state.rsi_window, data["losses"])
+        state._returns = RollingWindow(state.volatility_window, data["returns"])
+        state.latest = data["latest"]
+        return state
+
+
+class AlertRule:
+    """
+    アラート条件
+
+    Parameters:
+    -----------
+    market : str
+        市場（"jp" または "us"）
+    symbol : str
+        銘柄コード
+    condition : str
+        条件式（例: "Close > MA_25", "RSI < 30"）
+    name : str, optional
+        表示名（省略時は条件式）
+
+    Raises:
+    -------
+    ValueError
+        市場の指定が不正な場合や、条件式が不正・未対応の指標を含む場合
+    """
+
+    def __init__(self, market, symbol, condition, name=None):
+        if market not in ("jp", "us"):
+            raise ValueError(f"市場の指定が不正です: {market}（jp または us）")
+        self.market = market
+        self.symbol = str(symbol)
+        self.condition = condition
+        self.name = name or condition
+        self.predicate = compile_predicate(condition)
+        unknown = {c for c in self.predicate.columns if c not in _BASE_COLUMNS and not _MA_RE.match(c)}
+        if unknown:
+            raise ValueError(f"アラートで使えない指標です: {', '.join(sorted(unknown))}")
+
+    @property
+    def key(self):
+        return f"{self.market}:{self.symbol}:{self.condition}"
+
+    @property
+    def ma_windows(self):
+        return [int(_MA_RE.match(c).group(1)) for c in self.predicate.columns if _MA_RE.match(c)]
+
+    def evaluate(self, values):
+        """最新の指標値で条件を評価する（欠損値を含む場合は False）"""
+        table = pd.DataFrame({name: [values.get(name, math.nan)] for name in self.predicate.columns})
+        return bool(self.predicate.evaluate(table)[0])
+
+
+def load_rules(path):
+    """
+    設定ファイルからアラート条件を読み込む関数
+
+    Parameters:
+    -----------
+    path : str or pathlib.Path
+        設定ファイル（JSON）
+
+    Returns:
+    --------
+    list of AlertRule
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return [AlertRule(**rule) for rule in config.get("rules", [])]
+
+
+class JsonlSink:
+    """
+    発火したアラートを JSON Lines 形式で追記するシンク
+
+    Parameters:
+    -----------
+    path : str or pathlib.Path
+        出力ファイル
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def write(self, alerts):
+        if not alerts:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+def _empty_bars():
+    return pd.DataFrame({c: np.array([], dtype=np.float64) for c in ("Open", "High", "Low", "Close", "Volume")},
+                        index=pd.DatetimeIndex([], name="Date"))
+
+
+def fetch_new_bars(market, symbol, since=None, lookback=0, today=None):
+    """
+    指定日より後の日足を data_fetcher で取得する関数
+
+    Parameters:
+    -----------
+    market : str
+        市場（"jp" または "us"）
+    symbol : str
+        銘柄コード
+    since : str, optional
+        取得済みの最終日（YYYY-MM-DD形式）。省略時は lookback 本分を取得する
+    lookback : int, optional
+        初回取得時に必要な日足の本数
+    today : datetime.date, optional
+        取得終了日（省略時は今日）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        since より後の株価データ（新しい日足がない場合は空）
+    """
+    today = today or date.today()
+    if since and since >= today.isoformat():
+        return _empty_bars()
+    if market == "jp":
+        if since:
+            from_date = (date.fromisoformat(since) + timedelta(days=1)).isoformat()
+        else:
+            # 営業日数を暦日数に換算して余裕を持たせる
+            from_date = (today - timedelta(days=lookback * 7 // 5 + 14)).isoformat()
+        try:
+            data = get_stock_data_jquants(symbol, from_date, today.isoformat())
+        except NoDataError:
+            # 休日・取引時間中など、まだ新しい日足がない場合
+            return _empty_bars()
+    else:
+        outputsize = "compact" if since or lookback <= ALPHAVANTAGE_COMPACT_SIZE else "full"
+        data = get_stock_data_alpha_vantage(symbol, outputsize=outputsize)
+    if since:
+        data = data[data.index > pd.Timestamp(since)]
+    return data[data.index <= pd.Timestamp(today)]
+
+
+class AlertEngine:
+    """
+    監視銘柄の指標状態を保持し、新しい日足ごとにアラート条件を評価するクラス
+
+    Parameters:
+    -----------
+    rules : list of AlertRule
+        アラート条件
+    sink : JsonlSink, optional
+        発火したアラートの出力先
+    state_path : str or pathlib.Path, optional
+        計算状態の保存先（再起動時に過去データを再取得しないため）
+    fetcher : callable, optional
+        fetch_new_bars と同じ引数で日足を返す関数
+    """
+
+    def __init__(self, rules, sink=None, state_path=None, fetcher=fetch_new_bars):
+        self.rules = list(rules)
+        self.sink = sink
+        self.state_path = Path(state_path) if state_path else None
+        self.fetcher = fetcher
+        self.states = {}
+        self.active = {}
+        self._load_state()
+
+    def _symbols(self):
+        symbols = {}
+        for rule in self.rules:
+            symbols.setdefault((rule.market, rule.symbol), []).append(rule)
+        return symbols
+
+    def _load_state(self):
+        if not self.state_path or not self.state_path.exists():
+            return
+        with open(self.state_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        self.states = {tuple(k.split(":", 1)): IndicatorState.from_dict(v) for k, v in saved["states"].items()}
+        self.active = saved.get("active", {})
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "states": {f"{m}:{s}": state.to_dict() for (m, s), state in self.states.items()},
+                "active": self.active,
+            }, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+    def process(self, market, symbol, data, emit=True):
+        """
+        新しい日足を1本ずつ反映し、条件が偽から真に変わったアラートを返す
+
+        Parameters:
+        -----------
+        market : str
+            市場
+        symbol : str
+            銘柄コード
+        data : pandas.DataFrame
+            新しい日足（最終処理日以前の行は無視する）
+        emit : bool, optional
+            False の場合は状態の更新のみ行う（初回の過去データ読み込み用）
+
+        Returns:
+        --------
+        list of dict
+            発火したアラート
+        """
+        rules = self._symbols().get((market, symbol), [])
+        state = self.states[(market, symbol)]
+        alerts = []
+        columns = [c for c in ("Open", "High", "Low", "Close", "Volume") if c in data.columns]
+        dates = data.index.strftime("%Y-%m-%d")
+        rows = data[columns].to_numpy(dtype=np.float64)
+        for day, row in zip(dates, rows):
+            if state.last_date is not None and day <= state.last_date:
+                continue
+            bar = dict(zip(columns, row))
+            if math.isnan(bar["Close"]):
+                continue
+            values = state.update(day, bar)
+            for rule in rules:
+                triggered = rule.evaluate(values)
+                was_active = self.active.get(rule.key, False)
+                self.active[rule.key] = triggered
+                if emit and triggered and not was_active:
+                    alerts.append({
+                        "time": datetime.now().isoformat(timespec="seconds"),
+                        "market": market,
+                        "symbol": symbol,
+                        "date": day,
+                        "name": rule.name,
+                        "condition": rule.condition,
+                        "values": {c: values.get(c) for c in sorted(rule.predicate.columns)},
+                    })
+        return alerts
+
+    def poll(self, today=None):
+        """
+        全監視銘柄の差分を取得してアラートを評価する
+
+        計算状態のない銘柄（初回・条件の期間変更時）は必要な本数の過去データを読み込み、
+        状態の初期化のみ行う。
+
+        Parameters:
+        -----------
+        today : datetime.date, optional
+            取得終了日（省略時は今日）
+
+        Returns:
+        --------
+        dict
+            alerts: 発火したアラート, bars: 反映した日足の本数, errors: 銘柄ごとのエラー
+        """
+        alerts, errors, bars = [], {}, 0
+        for (market, symbol), rules in self._symbols().items():
+            ma_windows = sorted({w for rule in rules for w in rule.ma_windows})
+            state = self.states.get((market, symbol))
+            fresh = state is None or state.ma_windows != ma_windows
+            if fresh:
+                state = IndicatorState(ma_windows)
+                self.states[(market, symbol)] = state
+            lookback = max(ma_windows + [state.rsi_window + 1, state.volatility_window + 1])
+            try:
+                data = self.fetcher(market, symbol, None if fresh else state.last_date, lookback, today)
+            except Exception as e:
+                errors[f"{market}:{symbol}"] = str(e)
+                if fresh:
+                    del self.states[(market, symbol)]
+                continue
+            alerts.extend(self.process(market, symbol, data, emit=not fresh))
+            bars += len(data)
+
+        if self.sink:
+            self.sink.write(alerts)
+        self.save_state()
+        return {"alerts": alerts, "bars": bars, "errors": errors}
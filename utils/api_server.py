@@ -0,0 +1,493 @@
+"""
+株価・指標・スクリーニング結果をJSONで返すHTTP API
+
+Streamlitアプリと同じデータサービス（utils.data_service）とスクリーナーを使うため、
+アプリと同じプロセス内キャッシュを共有し、プロバイダーへの問い合わせを重複させない。
+エンコード済みのレスポンスもキャッシュし、ETag / If-None-Match による 304 応答と
+gzip 圧縮に対応する。API の利用回数の上限に達して保存済みのデータを返す場合は、
+レスポンスをキャッシュせず、本文の degraded と Warning ヘッダーで古いデータであることを示す。
+
+エンドポイント:
+    GET /prices/{symbol}?market=jp&from=YYYY-MM-DD&to=YYYY-MM-DD&adjusted=1
+    GET /indicators/{symbol}?ma=5,25,75&rsi=1&volatility=1&returns=1&adjusted=1&from=...&to=...
+    GET /screen?q=Close > MA_75 and RSI < 30&sort=RSI&order=asc&limit=200
+    GET /metrics（Prometheus形式の計測値）
+"""
+import gzip
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import numpy as np
+
+from utils.data_service import get_data_service
+from utils.instrumentation import get_recorder, increment, register_collector, span, to_prometheus
+from utils.quota import QuotaExceeded
+
+try:
+    import orjson
+except ImportError:  # orjson がない環境では標準の json を使う（速度のみ異なる）
+    orjson = None
+
+# 期間を省略した場合の取得日数
+DEFAULT_PERIOD_DAYS = 365
+
+# エンコード済みレスポンスのキャッシュ上限（バイト）
+DEFAULT_RESPONSE_CACHE_BYTES = 64 * 1024 * 1024
+
+# これより小さいレスポンスは圧縮しない
+GZIP_MIN_BYTES = 1024
+
+# クライアントにキャッシュを許可する秒数
+CACHE_MAX_AGE = 60
+
+# 保存済みのデータで代替したレスポンスのヘッダー（クライアント・中継サーバーにキャッシュさせない）
+DEGRADED_HEADERS = {"Cache-Control": "no-store", "Warning": '110 - "Response is Stale"'}
+
+MAX_SCREEN_LIMIT = 5000
+
+
+class ApiError(Exception):
+    """
+    HTTPステータスコード付きのエラー
+    """
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class _Response:
+    """
+    エンコード済みのレスポンス（gzip版は初回に要求された時点で作成する）
+    """
+
+    def __init__(self, body, content_type="application/json; charset=utf-8", headers=None):
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self._gzipped = None
+
+    @property
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+    @property
+    def nbytes(self):
+        # キャッシュ上限の計算に使うため、後から作成する gzip 版を含めず一定の値にする
+        return len(self.body)
+
+
+class _ResponseCache:
+    """
+    エンコード済みレスポンスのLRUキャッシュ（バイト数上限付き）
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key, response):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._items[key] = response
+            self.nbytes += response.nbytes
+            while self.nbytes > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {"items": len(self._items), "nbytes": self.nbytes, "hits": self.hits, "misses": self.misses}
+
+
+def dumps(payload):
+    """
+    JSONをバイト列にエンコードする関数（orjson があれば使用する）
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _column_values(values):
+    """
+    列の値をJSON用のリストに変換する（NaN は null、float32 は元の桁数の値にする）
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        return values.tolist()
+    if values.dtype == np.float32:
+        # float64 に広げると 123.4 が 123.40000153 のようになるため、最短表記を経由する
+        values = values.astype(str).astype(np.float64)
+    values = values.astype(np.float64)
+    result = values.tolist()
+    if np.isnan(values).any():
+        result = [None if v != v else v for v in result]
+    return result
+
+
+def frame_to_payload(data, **meta):
+    """
+    株価データを列ごとのJSON形式にする関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        DatetimeIndex を持つ株価データ
+    **meta
+        ペイロードに含める付加情報（symbol, market など）
+
+    Returns:
+    --------
+    dict
+        {..meta, "dates": [...], "columns": {列名: [...]}}
+    """
+    return {
+        **meta,
+        "dates": data.index.strftime("%Y-%m-%d").tolist(),
+        "columns": {col: _column_values(data[col].to_numpy()) for col in data.columns},
+    }
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise ApiError(400, f"{name} はYYYY-MM-DD形式で指定してください: {value}")
+
+
+def _parse_bool(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def resolve_symbol(symbol, market=None):
+    """
+    パスの銘柄と market パラメータから (市場, 正規化された証券コード) を決める関数
+
+    market を省略した場合、数字で始まる銘柄は日本株、それ以外は米国株とみなす。
+    """
+    symbol = symbol.strip().upper()
+    if not symbol:
+        raise ApiError(400, "銘柄を指定してください")
+    if market is None:
+        market = "jp" if symbol[0].isdigit() else "us"
+    if market not in ("jp", "us"):
+        raise ApiError(400, f"market は jp または us を指定してください: {market}")
+    if market == "jp" and symbol.isdigit() and len(symbol) == 4:
+        symbol = f"{symbol}.T"
+    return market, symbol
+
+
+def resolve_period(params):
+    """
+    from / to パラメータから取得期間を決める関数（省略時は直近 DEFAULT_PERIOD_DAYS 日）
+    """
+    today = date.today()
+    to_date = _parse_date(params["to"], "to") if "to" in params else today.isoformat()
+    if "from" in params:
+        from_date = _parse_date(params["from"], "from")
+    else:
+        from_date = (today - timedelta(days=DEFAULT_PERIOD_DAYS)).isoformat()
+    if from_date > to_date:
+        raise ApiError(400, "from は to 以前の日付を指定してください")
+    return from_date, to_date
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    server_version = "StockVisualizerAPI/1.0"
+    protocol_version = "HTTP/1.1"
+    # keep-alive でヘッダーと本文を別々に送るため、Nagle アルゴリズムによる遅延を避ける
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, response, extra_headers=None):
+        headers = {"ETag": response.etag, "Cache-Control": f"max-age={CACHE_MAX_AGE}", "Vary": "Accept-Encoding"}
+        headers.update(response.headers)
+        headers.update(extra_headers or {})
+        if_none_match = self.headers.get("If-None-Match")
+        if status == 200 and if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if response.etag in tags or "*" in tags:
+                self.send_response(304)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return 304
+
+        body = response.body
+        accepts_gzip = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        if accepts_gzip and len(body) >= GZIP_MIN_BYTES:
+            body = response.gzipped
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        return status
+
+    def _send_error(self, status, message, headers=None):
+        response = _Response(dumps({"error": message}))
+        self.send_response(status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(response.body)
+        return status
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        segments = [unquote(s) for s in parts.path.strip("/").split("/") if s]
+        params = dict(parse_qsl(parts.query))
+        endpoint = segments[0] if segments else ""
+        with span("api.request", endpoint=endpoint):
+            try:
+                if endpoint in ("prices", "indicators") and len(segments) == 2:
+                    response = self.server.api.symbol_response(endpoint, segments[1], params)
+                elif endpoint == "screen" and len(segments) == 1:
+                    response = self.server.api.screen_response(params)
+                elif endpoint == "metrics" and len(segments) == 1:
+                    response = _Response(to_prometheus(get_recorder().snapshot()).encode("utf-8"),
+                                         "text/plain; version=0.0.4; charset=utf-8")
+                else:
+                    raise ApiError(404, f"Not found: {parts.path}")
+                status = self._send(200, response)
+            except ApiError as e:
+                status = self._send_error(e.status, e.message, e.headers)
+        increment("api_requests", endpoint=endpoint or "/", status=str(status))
+
+    def do_HEAD(self):
+        self.do_GET()
+
+
+class StockApi:
+    """
+    APIの各エンドポイントの処理（HTTPに依存しない部分）
+
+    Parameters:
+    -----------
+    service : utils.data_service.DataService, optional
+        データサービス（省略時はプロセス共通のもの）
+    panel_dir : str or pathlib.Path, optional
+        スクリーニングに使う株価パネルのディレクトリ
+    response_cache_bytes : int, optional
+        エンコード済みレスポンスのキャッシュ上限（バイト）
+    """
+
+    def __init__(self, service=None, panel_dir=None, response_cache_bytes=DEFAULT_RESPONSE_CACHE_BYTES):
+        self.service = service if service is not None else get_data_service()
+        self.panel_dir = panel_dir
+        self.responses = _ResponseCache(response_cache_bytes)
+        self._tables = {}
+        self._tables_lock = threading.Lock()
+        register_collector("api_responses", self.stats)
+
+    def _cached(self, key, build):
+        key = (key, date.today().isoformat())
+        response = self.responses.get(key)
+        if response is None:
+            payload = build()
+            if payload.get("degraded"):
+                # 上限が解除された後は取得し直すため、保存済みのデータで代替した結果はキャッシュしない
+                return _Response(dumps(payload), headers=DEGRADED_HEADERS)
+            response = self.responses.put(key, _Response(dumps(payload)))
+        return response
+
+    def symbol_response(self, endpoint, symbol, params):
+        """
+        /prices/{symbol} と /indicators/{symbol} のレスポンスを返す
+        """
+        market, code = resolve_symbol(symbol, params.get("market"))
+        from_date, to_date = resolve_period(params)
+        adjusted = _parse_bool(params.get("adjusted", "0"))
+        options = ()
+        if endpoint == "indicators":
+            try:
+                ma_windows = tuple(sorted({int(w) for w in params.get("ma", "5,25,75").split(",") if w.strip()}))
+            except ValueError:
+                raise ApiError(400, f"ma はカンマ区切りの整数で指定してください: {params.get('ma')}")
+            if any(w < 1 for w in ma_windows):
+                raise ApiError(400, "ma には1以上の整数を指定してください")
+            options = (ma_windows, _parse_bool(params.get("returns", "1")),
+                       _parse_bool(params.get("rsi", "1")), _parse_bool(params.get("volatility", "1")))
+
+        def build():
+            try:
+                if endpoint == "prices":
+                    data = self.service.prices(market, code, from_date, to_date, adjusted=adjusted)
+                else:
+                    ma_windows, returns, rsi, volatility = options
+                    data = self.service.indicators(market, code, from_date, to_date, ma_windows=ma_windows,
+                                                   returns=returns, rsi=rsi, volatility=volatility,
+                                                   adjusted=adjusted)
+            except QuotaExceeded as e:
+                headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+                raise ApiError(503, str(e), headers)
+            except Exception as e:
+                raise ApiError(502, f"データ取得エラー: {e}")
+            if data is None or data.empty:
+                raise ApiError(404, f"データがありません: {code}")
+            payload = frame_to_payload(data, symbol=code, market=market, adjusted=adjusted,
+                                       **{"from": from_date, "to": to_date})
+            notice = self.service.degraded(market, code)
+            if notice:
+                payload["degraded"] = notice
+            return payload
+
+        return self._cached((endpoint, market, code, from_date, to_date, adjusted, options), build)
+
+    def _latest_table(self):
+        from utils.panel import PricePanel
+        from utils.screener import load_latest_table
+
+        try:
+            panel = PricePanel.open(self.panel_dir)
+        except ValueError as e:
+            raise ApiError(503, f"株価パネルを開けません: {e}")
+        updated = panel.meta.get("updated") or ""
+        with self._tables_lock:
+            table = self._tables.get(updated)
+            if table is None:
+                # パネルが更新されたら古い表は破棄する
+                self._tables = {updated: load_latest_table(panel)}
+                table = self._tables[updated]
+        return updated, table
+
+    def screen_response(self, params):
+        """
+        /screen のレスポンスを返す
+        """
+        from utils.screener import screen
+
+        expression = params.get("q", "").strip()
+        if not expression:
+            raise ApiError(400, "q に条件式を指定してください")
+        sort_by = params.get("sort") or None
+        order = params.get("order", "asc")
+        if order not in ("asc", "desc"):
+            raise ApiError(400, "order は asc または desc を指定してください")
+        try:
+            limit = int(params.get("limit", 200))
+        except ValueError:
+            raise ApiError(400, f"limit は整数で指定してください: {params.get('limit')}")
+        limit = max(1, min(limit, MAX_SCREEN_LIMIT))
+
+        updated, table = self._latest_table()
+        if sort_by is not None and sort_by not in table.columns:
+            raise ApiError(400, f"並べ替えに使えない列です: {sort_by}")
+
+        def build():
+            try:
+                result = screen(expression, table, sort_by=sort_by, ascending=order == "asc", limit=limit)
+            except ValueError as e:
+                raise ApiError(400, f"条件式エラー: {e}")
+            return {
+                "expression": expression,
+                "as_of": str(table.attrs.get("as_of")),
+                "universe": len(table),
+                "count": len(result),
+                "symbols": [str(code) for code in result.index],
+                "columns": {col: _column_values(result[col].to_numpy()) for col in result.columns},
+            }
+
+        return self._cached(("screen", updated, expression, sort_by, order, limit), build)
+
+    def stats(self):
+        return self.responses.stats()
+
+
+class _ApiHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, api, verbose):
+        super().__init__(address, _ApiHandler)
+        self.api = api
+        self.verbose = verbose
+
+
+class ApiServer:
+    """
+    APIサーバーをバックグラウンドスレッドで起動・停止するクラス
+
+    Parameters:
+    -----------
+    host : str, optional
+        待ち受けアドレス
+    port : int, optional
+        待ち受けポート（0の場合は空きポートを自動選択）
+    service : utils.data_service.DataService, optional
+        データサービス（省略時はプロセス共通のもの）
+    panel_dir : str or pathlib.Path, optional
+        スクリーニングに使う株価パネルのディレクトリ
+    verbose : bool, optional
+        アクセスログを出力するか
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, service=None, panel_dir=None, verbose=False):
+        self.api = StockApi(service=service, panel_dir=panel_dir)
+        self.httpd = _ApiHTTPServer((host, port), self.api, verbose)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
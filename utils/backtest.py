@@ -0,0 +1,396 @@
+"""
+テクニカル指標のシグナルに基づくベクトル化バックテスト
+
+- backtest_rules: calculate_* 関数の出力（1銘柄のDataFrame）に対し、
+  スクリーナーと同じ条件式でエントリー・エグジットを指定して損益曲線を計算する
+- run_ma_crossover_grid / run_rsi_grid: 複数銘柄 × 多数のパラメータの組み合わせを
+  時間方向・パラメータ方向にまとめてベクトル演算し、成績指標を返す
+- run_grid_on_panel: 銘柄を分割してプロセスプールで並列実行する
+  （各プロセスは株価パネルをメモリマップで開くため、価格データを受け渡さない）
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from utils.panel import PricePanel
+from utils.screener import compile_predicate
+
+TRADING_DAYS_PER_YEAR = 252
+
+# パラメータ方向に一度に展開する組み合わせ数（メモリ使用量の上限を決める）
+PARAM_CHUNK_SIZE = 64
+
+STAT_COLUMNS = ["total_return", "cagr", "sharpe", "max_drawdown", "trades", "exposure"]
+
+
+def _as_2d(closes):
+    values = np.asarray(closes, dtype=np.float64)
+    return values[None, :] if values.ndim == 1 else values
+
+
+def _window_sums(values, window):
+    """欠損を除いた移動合計と、窓内の有効件数を返す（先頭 window-1 個は件数不足）"""
+    valid = ~np.isnan(values)
+    zeros = np.zeros(values.shape[:-1] + (1,))
+    csum = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0), axis=-1)], axis=-1)
+    ccount = np.concatenate([zeros, np.cumsum(valid, axis=-1)], axis=-1)
+    sums = np.full(values.shape, np.nan)
+    counts = np.zeros(values.shape)
+    sums[..., window - 1:] = csum[..., window:] - csum[..., :-window]
+    counts[..., window - 1:] = ccount[..., window:] - ccount[..., :-window]
+    return sums, counts
+
+
+def rolling_means(closes, windows):
+    """
+    複数期間の移動平均をまとめて計算する関数（calculate_moving_averages と同じ定義）
+
+    Parameters:
+    -----------
+    closes : numpy.ndarray
+        終値（営業日、または 銘柄 × 営業日）
+    windows : list of int
+        移動平均の期間
+
+    Returns:
+    --------
+    numpy.ndarray
+        期間 × 銘柄 × 営業日 の移動平均（期間が満たない位置は NaN）
+    """
+    values = _as_2d(closes)
+    result = np.full((len(windows),) + values.shape, np.nan)
+    for i, window in enumerate(windows):
+        sums, counts = _window_sums(values, window)
+        result[i] = np.where(counts == window, sums / window, np.nan)
+    return result
+
+
+def rolling_rsi(closes, windows):
+    """
+    複数期間のRSIをまとめて計算する関数（calculate_rsi と同じ定義）
+
+    Parameters:
+    -----------
+    closes : numpy.ndarray
+        終値（営業日、または 銘柄 × 営業日）
+    windows : list of int
+        RSIの計算期間
+
+    Returns:
+    --------
+    numpy.ndarray
+        期間 × 銘柄 × 営業日 のRSI
+    """
+    values = _as_2d(closes)
+    delta = np.diff(values, axis=-1, prepend=np.nan)
+    # calculate_rsi と同様に、差分の欠損は上昇・下落とも 0 として扱う
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    result = np.full((len(windows),) + values.shape, np.nan)
+    for i, window in enumerate(windows):
+        gain_sum, _ = _window_sums(gain, window)
+        loss_sum, _ = _window_sums(loss, window)
+        _, close_counts = _window_sums(values, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rsi = 100 - (100 / (1 + gain_sum / loss_sum))
+        result[i] = np.where(close_counts == window, rsi, np.nan)
+    return result
+
+
+def hold_positions(entry, exit):
+    """
+    エントリー・エグジットの真偽値から保有状態（0/1）を作る関数
+
+    エントリーで1、エグジットで0になり、それ以外の日は前日の状態を維持する。
+    両方が真の日はエグジットを優先する。
+
+    Parameters:
+    -----------
+    entry : numpy.ndarray
+        エントリー条件（最後の軸が時間）
+    exit : numpy.ndarray
+        エグジット条件（entry と同じ形）
+
+    Returns:
+    --------
+    numpy.ndarray
+        保有状態（float64）
+    """
+    state = np.where(exit, 0.0, np.where(entry, 1.0, np.nan))
+    # 直近の確定した状態を前方に埋める（インデックスの累積最大値を使ったベクトル化）
+    positions = np.arange(state.shape[-1])
+    last = np.where(~np.isnan(state), positions, 0)
+    last = np.maximum.accumulate(last, axis=-1)
+    filled = np.take_along_axis(state, last, axis=-1)
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def simulate(closes, positions, cost_bps=10.0):
+    """
+    保有状態から日次損益を計算する関数
+
+    シグナルはその日の終値で判定し、翌営業日の値動きから損益に反映する。
+    保有状態が変化するたびに売買コストを差し引く。
+
+    Parameters:
+    -----------
+    closes : numpy.ndarray
+        終値（... × 営業日）
+    positions : numpy.ndarray
+        保有状態（closes とブロードキャスト可能な形）
+    cost_bps : float, optional
+        片道の売買コスト（ベーシスポイント）
+
+    Returns:
+    --------
+    numpy.ndarray
+        戦略の日次リターン（positions と同じ形）
+    """
+    values = np.asarray(closes, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.diff(values, axis=-1, prepend=np.nan) / np.concatenate(
+            [np.full(values.shape[:-1] + (1,), np.nan), values[..., :-1]], axis=-1
+        )
+    returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    held = np.concatenate([np.zeros(positions.shape[:-1] + (1,)), positions[..., :-1]], axis=-1)
+    trades = np.abs(np.diff(held, axis=-1, prepend=0.0))
+    return held * returns - trades * cost_bps / 10000
+
+
+def summarize(strategy_returns, positions=None):
+    """
+    日次リターンから成績指標を計算する関数
+
+    Parameters:
+    -----------
+    strategy_returns : numpy.ndarray
+        日次リターン（... × 営業日）
+    positions : numpy.ndarray, optional
+        保有状態（取引回数と保有率の計算に使用）
+
+    Returns:
+    --------
+    dict
+        total_return, cagr, sharpe, max_drawdown, trades, exposure（各 ... の形の配列）
+    """
+    equity = np.cumprod(1 + strategy_returns, axis=-1)
+    total_return = equity[..., -1] - 1
+    years = strategy_returns.shape[-1] / TRADING_DAYS_PER_YEAR
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cagr = np.where(equity[..., -1] > 0, equity[..., -1] ** (1 / years) - 1, -1.0)
+        std = strategy_returns.std(axis=-1, ddof=1)
+        sharpe = np.where(std > 0, strategy_returns.mean(axis=-1) / std * np.sqrt(TRADING_DAYS_PER_YEAR), 0.0)
+    drawdown = 1 - equity / np.maximum.accumulate(equity, axis=-1)
+
+    stats = {
+        "total_return": total_return,
+        "cagr": cagr,
+        "sharpe": sharpe,
+        "max_drawdown": drawdown.max(axis=-1),
+    }
+    if positions is not None:
+        stats["trades"] = np.abs(np.diff(positions, axis=-1, prepend=0.0)).sum(axis=-1)
+        stats["exposure"] = positions.mean(axis=-1)
+    return stats
+
+
+def backtest_rules(data, entry, exit=None, cost_bps=10.0):
+    """
+    条件式で指定した売買ルールを1銘柄のデータでバックテストする関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        Close と指標列（calculate_moving_averages, calculate_rsi などの出力）を含むデータ
+    entry : str
+        エントリー条件（例: "MA_5 > MA_25"）
+    exit : str, optional
+        エグジット条件（省略時はエントリー条件を満たさなくなった日に手仕舞う）
+    cost_bps : float, optional
+        片道の売買コスト（ベーシスポイント）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Position, Strategy_Return, Equity, Drawdown 列を追加したデータフレーム
+        （attrs["stats"] に成績指標）
+    """
+    entry_signal = compile_predicate(entry).evaluate(data)
+    if exit:
+        positions = hold_positions(entry_signal, compile_predicate(exit).evaluate(data))
+    else:
+        positions = entry_signal.astype(np.float64)
+
+    strategy_returns = simulate(data["Close"].to_numpy(dtype=np.float64), positions, cost_bps)
+    df = data.copy(deep=False)
+    df["Position"] = positions
+    df["Strategy_Return"] = strategy_returns * 100
+    equity = np.cumprod(1 + strategy_returns)
+    df["Equity"] = equity
+    df["Drawdown"] = (1 - equity / np.maximum.accumulate(equity)) * 100
+    df.attrs["stats"] = {k: float(v) for k, v in summarize(strategy_returns, positions).items()}
+    return df
+
+
+def _grid_frame(stats, params, param_names, symbols):
+    """(パラメータ × 銘柄) の成績指標を縦長のデータフレームにする"""
+    n_params, n_symbols = len(params), len(symbols)
+    frame = pd.DataFrame({
+        "symbol": np.tile(np.asarray(symbols, dtype=object), n_params),
+        **{name: np.repeat([p[i] for p in params], n_symbols) for i, name in enumerate(param_names)},
+    })
+    for column in STAT_COLUMNS:
+        frame[column] = np.asarray(stats[column]).reshape(-1)
+    return frame
+
+
+def _concat_stats(chunks):
+    return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in STAT_COLUMNS}
+
+
+def run_ma_crossover_grid(closes, symbols, fast_windows, slow_windows, cost_bps=10.0):
+    """
+    移動平均クロス戦略（短期 > 長期で保有）を全パラメータ・全銘柄でまとめて評価する関数
+
+    Parameters:
+    -----------
+    closes : numpy.ndarray
+        終値（銘柄 × 営業日）
+    symbols : list of str
+        銘柄コード
+    fast_windows : list of int
+        短期移動平均の期間
+    slow_windows : list of int
+        長期移動平均の期間（短期以下の組み合わせは除外）
+    cost_bps : float, optional
+        片道の売買コスト（ベーシスポイント）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        symbol, fast, slow と成績指標の列
+    """
+    values = _as_2d(closes)
+    params = [(fast, slow) for fast, slow in product(fast_windows, slow_windows) if fast < slow]
+    windows = sorted({w for pair in params for w in pair})
+    means = rolling_means(values, windows)
+    lookup = {w: i for i, w in enumerate(windows)}
+
+    chunks = []
+    for start in range(0, len(params), PARAM_CHUNK_SIZE):
+        chunk = params[start:start + PARAM_CHUNK_SIZE]
+        fast = means[[lookup[f] for f, _ in chunk]]
+        slow = means[[lookup[s] for _, s in chunk]]
+        positions = (fast > slow).astype(np.float64)
+        chunks.append(summarize(simulate(values[None], positions, cost_bps), positions))
+    return _grid_frame(_concat_stats(chunks), params, ["fast", "slow"], symbols)
+
+
+def run_rsi_grid(closes, symbols, windows, lower_levels, upper_levels, cost_bps=10.0):
+    """
+    RSI逆張り戦略（RSI < 下限で買い、RSI > 上限で手仕舞い）を全パラメータ・全銘柄で評価する関数
+
+    Parameters:
+    -----------
+    closes : numpy.ndarray
+        終値（銘柄 × 営業日）
+    symbols : list of str
+        銘柄コード
+    windows : list of int
+        RSIの計算期間
+    lower_levels : list of float
+        買いの閾値
+    upper_levels : list of float
+        手仕舞いの閾値（下限以下の組み合わせは除外）
+    cost_bps : float, optional
+        片道の売買コスト（ベーシスポイント）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        symbol, window, lower, upper と成績指標の列
+    """
+    values = _as_2d(closes)
+    params = [
+        (window, lower, upper)
+        for window, lower, upper in product(windows, lower_levels, upper_levels) if lower < upper
+    ]
+    rsi = rolling_rsi(values, list(windows))
+    lookup = {w: i for i, w in enumerate(windows)}
+
+    chunks = []
+    for start in range(0, len(params), PARAM_CHUNK_SIZE):
+        chunk = params[start:start + PARAM_CHUNK_SIZE]
+        series = rsi[[lookup[w] for w, _, _ in chunk]]
+        lower = np.array([p[1] for p in chunk])[:, None, None]
+        upper = np.array([p[2] for p in chunk])[:, None, None]
+        positions = hold_positions(series < lower, series > upper)
+        chunks.append(summarize(simulate(values[None], positions, cost_bps), positions))
+    return _grid_frame(_concat_stats(chunks), params, ["window", "lower", "upper"], symbols)
+
+
+GRID_STRATEGIES = {
+    "ma_crossover": run_ma_crossover_grid,
+    "rsi": run_rsi_grid,
+}
+
+
+def _run_panel_shard(panel_path, symbols, from_date, to_date, strategy, kwargs):
+    """プロセスプールの各ワーカーで実行する処理（パネルをメモリマップで開く）"""
+    panel = PricePanel.open(panel_path)
+    part = panel.select(symbols, from_date, to_date, ["Close"])
+    return GRID_STRATEGIES[strategy](part.field("Close"), part.symbols, **kwargs)
+
+
+def run_grid_on_panel(strategy, symbols=None, panel_path=None, from_date=None, to_date=None,
+                      max_workers=None, shard_size=32, **kwargs):
+    """
+    株価パネルの銘柄を分割し、パラメータグリッドのバックテストを並列実行する関数
+
+    Parameters:
+    -----------
+    strategy : str
+        "ma_crossover" または "rsi"
+    symbols : list of str, optional
+        対象銘柄（省略時はパネルの全銘柄）
+    panel_path : str or pathlib.Path, optional
+        パネルのディレクトリ
+    from_date : str, optional
+        開始日（YYYY-MM-DD形式）
+    to_date : str, optional
+        終了日（YYYY-MM-DD形式）
+    max_workers : int, optional
+        プロセス数（省略時はCPU数、1の場合は同一プロセスで実行）
+    shard_size : int, optional
+        1タスクあたりの銘柄数
+    **kwargs
+        戦略ごとのパラメータ（run_ma_crossover_grid / run_rsi_grid の引数）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        銘柄 × パラメータごとの成績指標
+
+    Raises:
+    -------
+    ValueError
+        未知の戦略が指定された場合
+    """
+    if strategy not in GRID_STRATEGIES:
+        raise ValueError(f"未知の戦略です: {strategy}（{', '.join(GRID_STRATEGIES)} のいずれか）")
+    panel = PricePanel.open(panel_path)
+    symbols = list(symbols) if symbols is not None else panel.symbols
+    shards = [symbols[i:i + shard_size] for i in range(0, len(symbols), shard_size)]
+    args = [(panel.path, shard, from_date, to_date, strategy, kwargs) for shard in shards]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(shards) == 1:
+        results = [_run_panel_shard(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_run_panel_shard, *zip(*args)))
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
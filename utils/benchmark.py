@@ -0,0 +1,256 @@
+"""
+チャート表示の各ステージ（取得データの変換・指標計算・描画・CSV出力）を計測するベンチマーク
+
+疑似データ（utils.mock_server）を使うため、ネットワークや認証情報なしで
+再現性のある計測ができる。結果は保存済みのベースラインと比較して回帰を検出する。
+"""
+import gc
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from utils.data_fetcher import parse_time_series_daily
+from utils.decoder import loads
+from utils.data_processor import (
+    calculate_returns, calculate_moving_averages, calculate_volatility, calculate_rsi
+)
+from utils.jquants_api import parse_daily_quotes
+from utils.mock_server import synthetic_daily_quotes, synthetic_time_series_daily
+
+DEFAULT_BASELINE_PATH = Path(__file__).parent.parent / "data" / "benchmark_baseline.json"
+
+# ベースラインからの悪化率がこれを超えたら回帰とみなす
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+def make_payloads(years=10, symbol="7203"):
+    """
+    指定年数分の疑似APIレスポンス（JSON文字列）を作成する関数
+
+    Parameters:
+    -----------
+    years : int, optional
+        データの年数
+    symbol : str, optional
+        疑似データの銘柄
+
+    Returns:
+    --------
+    dict
+        "jquants" と "alphavantage" のJSON文字列
+    """
+    from_date = (date.today() - timedelta(days=int(365.25 * years))).strftime("%Y-%m-%d")
+    return {
+        "jquants": json.dumps({"daily_quotes": synthetic_daily_quotes(symbol, from_date)}),
+        "alphavantage": json.dumps(synthetic_time_series_daily(symbol, "full", from_date)),
+    }
+
+
+def build_stages(payloads):
+    """
+    計測対象のステージを作成する関数
+
+    各ステージは引数なしの関数で、前段の結果を入力として使う。
+
+    Parameters:
+    -----------
+    payloads : dict
+        make_payloads の戻り値
+
+    Returns:
+    --------
+    list of tuple
+        (ステージ名, 関数) のリスト
+    """
+    # 価格チャートはアプリと同じ utils.visualizer で作成する
+    from utils.visualizer import build_price_figure
+
+    jq_json = payloads["jquants"]
+    av_json = payloads["alphavantage"]
+
+    data = parse_daily_quotes(json.loads(jq_json)["daily_quotes"])
+    with_ma = calculate_moving_averages(data, windows=[5, 25, 75])
+    with_returns = calculate_returns(with_ma)
+    with_indicators = calculate_volatility(calculate_rsi(with_returns))
+    ma_colors = dict.fromkeys([5, 25, 75])
+    figure = build_price_figure(with_ma, ma_colors)
+
+    return [
+        ("decode_jquants", lambda: parse_daily_quotes(loads(jq_json)["daily_quotes"])),
+        ("decode_alphavantage", lambda: parse_time_series_daily(loads(av_json))),
+        ("calculate_returns", lambda: calculate_returns(data)),
+        ("calculate_moving_averages", lambda: calculate_moving_averages(data, windows=[5, 25, 75])),
+        ("calculate_volatility", lambda: calculate_volatility(with_returns)),
+        ("calculate_rsi", lambda: calculate_rsi(data)),
+        ("build_figure", lambda: build_price_figure(with_ma, ma_colors)),
+        ("serialize_figure", lambda: figure.to_json()),
+        ("to_csv", lambda: with_indicators.to_csv()),
+    ]
+
+
+def measure(func, repeat=5):
+    """
+    関数の実行時間とメモリ使用量のピークを計測する関数
+
+    時間計測とメモリ計測は別々に実行する（tracemalloc のオーバーヘッドを時間に含めないため）。
+
+    Parameters:
+    -----------
+    func : callable
+        計測する関数
+    repeat : int, optional
+        時間計測の繰り返し回数
+
+    Returns:
+    --------
+    dict
+        min_ms, median_ms, peak_kib
+    """
+    func()  # ウォームアップ
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(years=10, repeat=5, stages=None):
+    """
+    全ステージのベンチマークを実行する関数
+
+    Parameters:
+    -----------
+    years : int, optional
+        疑似データの年数
+    repeat : int, optional
+        各ステージの繰り返し回数
+    stages : list of str, optional
+        実行するステージ名（省略時は全ステージ）
+
+    Returns:
+    --------
+    dict
+        メタ情報と各ステージの計測結果
+    """
+    payloads = make_payloads(years)
+    results = {}
+    for name, func in build_stages(payloads):
+        if stages and name not in stages:
+            continue
+        results[name] = measure(func, repeat)
+
+    return {
+        "meta": {
+            "years": years,
+            "rows": len(json.loads(payloads["jquants"])["daily_quotes"]),
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+        },
+        "stages": results,
+    }
+
+
+def save_baseline(report, path=DEFAULT_BASELINE_PATH):
+    """
+    計測結果をベースラインとして保存する関数
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def load_baseline(path=DEFAULT_BASELINE_PATH):
+    """
+    保存済みのベースラインを読み込む関数（存在しない場合はNone）
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_with_baseline(report, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    計測結果をベースラインと比較する関数
+
+    Parameters:
+    -----------
+    report : dict
+        run_benchmarks の戻り値
+    baseline : dict
+        ベースライン（run_benchmarks の戻り値と同じ形式）
+    threshold : float, optional
+        回帰とみなす悪化率（0.2 = 20%）
+
+    Returns:
+    --------
+    list of dict
+        ステージごとの比較結果（stage, metric, baseline, current, change, regression）
+    """
+    rows = []
+    for stage, current in report["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for metric in ("median_ms", "peak_kib"):
+            if not base.get(metric):
+                continue
+            change = current[metric] / base[metric] - 1
+            rows.append({
+                "stage": stage,
+                "metric": metric,
+                "baseline": base[metric],
+                "current": current[metric],
+                "change": round(change, 3),
+                "regression": change > threshold,
+            })
+    return rows
+
+
+def format_report(report, comparison=None):
+    """
+    計測結果を表形式の文字列に整形する関数
+    """
+    meta = report["meta"]
+    lines = [
+        f"データ: {meta['years']}年分 ({meta['rows']}行), 繰り返し: {meta['repeat']}回",
+        f"{'stage':<28}{'min_ms':>10}{'median_ms':>12}{'peak_kib':>12}",
+    ]
+    for stage, result in report["stages"].items():
+        lines.append(
+            f"{stage:<28}{result['min_ms']:>10.2f}{result['median_ms']:>12.2f}{result['peak_kib']:>12.1f}"
+        )
+    if comparison:
+        lines.append("")
+        lines.append("ベースラインとの比較:")
+        for row in comparison:
+            mark = "回帰" if row["regression"] else "OK"
+            lines.append(
+                f"  {row['stage']:<26}{row['metric']:<10}{row['baseline']:>10.2f} -> "
+                f"{row['current']:>10.2f} ({row['change']:+.1%}) {mark}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,280 @@
+"""
+株価データのメモリ効率の良い保持形式とプロセス内キャッシュ
+
+CompactFrame は日付を基準日からの int32 日数、価格を（精度が許せば）float32、
+出来高を uint64 で保持する。to_frame() は配列をコピーせずに pandas.DataFrame の列として
+参照するため、calculate_* 関数にそのまま渡せる。
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import register_collector
+
+DEFAULT_PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+
+# 価格の小数点以下の桁数を判定する上限
+MAX_PRICE_DECIMALS = 6
+
+# プロセス内キャッシュのデフォルト上限（バイト）
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def _price_decimals(values):
+    """価格データで使われている小数点以下の桁数を推定する"""
+    finite = values[np.isfinite(values)]
+    for decimals in range(MAX_PRICE_DECIMALS + 1):
+        if np.allclose(np.round(finite, decimals), finite, rtol=0, atol=1e-9):
+            return decimals
+    return None
+
+
+def _fits_float32(values):
+    """
+    float32 に変換しても元の桁数で丸めれば同じ値に戻るかを判定する
+    """
+    decimals = _price_decimals(values)
+    if decimals is None:
+        return False
+    restored = np.round(values.astype(np.float32).astype(np.float64), decimals)
+    return np.array_equal(restored, np.round(values, decimals), equal_nan=True)
+
+
+class CompactFrame:
+    """
+    1銘柄分の株価データをコンパクトな配列で保持するクラス
+
+    Attributes:
+    -----------
+    base_date : numpy.datetime64
+        日数オフセットの基準日
+    days : numpy.ndarray
+        基準日からの日数（int32）
+    prices : numpy.ndarray
+        価格（列数 × 行数、float32 または float64）
+    price_columns : list of str
+        prices の各行に対応する列名
+    volume : numpy.ndarray or None
+        出来高（欠損がなければ uint64、あれば float64）
+    index_name : str or None
+        to_frame() で復元するインデックス名
+    """
+
+    def __init__(self, base_date, days, prices, price_columns, volume=None, index_name=None):
+        self.base_date = np.datetime64(base_date, "D")
+        self.days = days
+        self.prices = prices
+        self.price_columns = list(price_columns)
+        self.volume = volume
+        self.index_name = index_name
+        self._index = None
+        # キャッシュ上の配列がDataFrame経由で書き換えられないよう読み取り専用にする
+        for array in (self.days, self.prices, self.volume):
+            if array is not None:
+                array.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, data, allow_float32=True):
+        """
+        株価データフレームからCompactFrameを作成する
+
+        Parameters:
+        -----------
+        data : pandas.DataFrame
+            DatetimeIndex を持つ株価データ
+        allow_float32 : bool, optional
+            精度が許す場合に価格を float32 で保持するか
+
+        Returns:
+        --------
+        CompactFrame
+        """
+        dates = data.index.values.astype("datetime64[D]")
+        base_date = dates[0] if len(dates) else np.datetime64("1970-01-01", "D")
+        days = (dates - base_date).astype(np.int32)
+
+        price_columns = [col for col in data.columns if col != "Volume"]
+        prices = np.ascontiguousarray(data[price_columns].to_numpy(dtype=np.float64).T)
+        if allow_float32 and prices.size and _fits_float32(prices):
+            prices = prices.astype(np.float32)
+
+        volume = None
+        if "Volume" in data.columns:
+            values = data["Volume"].to_numpy(dtype=np.float64)
+            if np.isfinite(values).all() and (values >= 0).all():
+                volume = values.astype(np.uint64)
+            else:
+                volume = values
+
+        return cls(base_date, days, prices, price_columns, volume, data.index.name)
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def nbytes(self):
+        """配列の合計バイト数"""
+        total = self.days.nbytes + self.prices.nbytes
+        if self.volume is not None:
+            total += self.volume.nbytes
+        return total
+
+    @property
+    def index(self):
+        """日付インデックス（初回アクセス時に作成して使い回す）"""
+        if self._index is None:
+            dates = (self.base_date + self.days).astype("datetime64[ns]")
+            self._index = pd.DatetimeIndex(dates, name=self.index_name)
+        return self._index
+
+    def to_frame(self):
+        """
+        配列をコピーせずに参照する pandas.DataFrame を作成する
+
+        Returns:
+        --------
+        pandas.DataFrame
+            株価データ（列は内部配列のビュー）
+        """
+        columns = {name: self.prices[i] for i, name in enumerate(self.price_columns)}
+        if self.volume is not None:
+            columns["Volume"] = self.volume
+        ordered = [col for col in DEFAULT_PRICE_COLUMNS + ["Volume"] if col in columns]
+        ordered += [col for col in columns if col not in ordered]
+        return pd.DataFrame({col: columns[col] for col in ordered}, index=self.index, copy=False)
+
+    def slice(self, from_date=None, to_date=None):
+        """
+        日付範囲で切り出したCompactFrameを返す（配列はビュー）
+
+        Parameters:
+        -----------
+        from_date : str, optional
+            開始日（YYYY-MM-DD形式）
+        to_date : str, optional
+            終了日（YYYY-MM-DD形式）
+
+        Returns:
+        --------
+        CompactFrame
+        """
+        start = 0
+        stop = len(self.days)
+        if from_date:
+            offset = (np.datetime64(from_date, "D") - self.base_date).astype(np.int64)
+            start = int(np.searchsorted(self.days, offset, side="left"))
+        if to_date:
+            offset = (np.datetime64(to_date, "D") - self.base_date).astype(np.int64)
+            stop = int(np.searchsorted(self.days, offset, side="right"))
+        volume = self.volume[start:stop] if self.volume is not None else None
+        return CompactFrame(
+            self.base_date, self.days[start:stop], self.prices[:, start:stop],
+            self.price_columns, volume, self.index_name
+        )
+
+
+class CompactCache:
+    """
+    銘柄ごとのCompactFrameを保持するプロセス内キャッシュ（LRU、バイト数上限付き）
+
+    Parameters:
+    -----------
+    max_bytes : int, optional
+        保持する配列の合計バイト数の上限
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        """
+        キャッシュからCompactFrameを取得する（存在しなければNone）
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key, frame):
+        """
+        CompactFrameをキャッシュに追加する
+
+        Parameters:
+        -----------
+        key : hashable
+            キャッシュキー
+        frame : CompactFrame or pandas.DataFrame
+            追加するデータ（DataFrameの場合はCompactFrameに変換する）
+
+        Returns:
+        --------
+        CompactFrame
+            キャッシュに格納したデータ
+        """
+        if isinstance(frame, pd.DataFrame):
+            frame = CompactFrame.from_frame(frame)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._items[key] = frame
+            self.nbytes += frame.nbytes
+            while self.nbytes > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return frame
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """
+        キャッシュの統計情報を返す
+        """
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_price_cache = None
+_price_cache_lock = threading.Lock()
+
+
+def get_price_cache():
+    """
+    プロセス全体で共有する株価キャッシュを取得する関数
+
+    Returns:
+    --------
+    CompactCache
+    """
+    global _price_cache
+    with _price_cache_lock:
+        if _price_cache is None:
+            _price_cache = CompactCache()
+            register_collector("price_cache", _price_cache.stats)
+        return _price_cache
@@ -0,0 +1,296 @@
+"""
+多数の銘柄の日次リターンの相関行列・共分散行列
+
+リターンは (銘柄 × 営業日) の float32 配列で扱い、欠損日（売買停止・上場前など）は
+銘柄の組ごとに両方のリターンがある日だけを使う（pandas.DataFrame.corr と同じ pairwise-complete）。
+欠損の有無を表す行列 M と、欠損を0にしたリターン X の行列積
+
+    N = M M^T,  S = X M^T,  Q = X² M^T,  C = X X^T
+
+から全ての組の件数・和・二乗和・積和が得られるため、行列積（BLAS）だけで計算できる。
+行列積は行をブロックに分けて行い、作業用の配列が (ブロック × 銘柄数) を超えないようにする。
+
+RollingCorrelation は直近 window 日の N, S, Q, C を保持し、1日進めるごとに新しい日を足して
+古い日を引くため、銘柄数 n に対して1日あたり O(n²) で相関行列を更新できる。
+"""
+import numpy as np
+import pandas as pd
+
+# 相関を計算する最小の共通日数（これより少ない組は NaN）
+DEFAULT_MIN_PERIODS = 20
+
+# 行列積を分割する行数
+DEFAULT_BLOCK_SIZE = 512
+
+
+def return_panel(panel, symbols=None, from_date=None, to_date=None, field="Close"):
+    """
+    パネルから日次リターンの (銘柄 × 営業日) 配列を作成する関数
+
+    前日の終値がない日（欠損の翌日）のリターンは NaN とする。
+
+    Parameters:
+    -----------
+    panel : utils.panel.PricePanel
+        株価パネル
+    symbols : list of str, optional
+        銘柄コード（省略時は全銘柄）
+    from_date : str, optional
+        開始日（YYYY-MM-DD形式）
+    to_date : str, optional
+        終了日（YYYY-MM-DD形式）
+    field : str, optional
+        リターンを計算する項目
+
+    Returns:
+    --------
+    tuple
+        (リターン（float32、営業日数 - 1 列）, 銘柄コードのリスト, リターンの日付)
+    """
+    sliced = panel.select(symbols, from_date, to_date, fields=[field])
+    closes = sliced.field(field)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (closes[:, 1:] / closes[:, :-1] - 1).astype(np.float32)
+    returns[~np.isfinite(returns)] = np.nan
+    return returns, sliced.symbols, sliced.dates[1:]
+
+
+def _blocks(n, block_size):
+    for start in range(0, n, block_size):
+        yield start, min(start + block_size, n)
+
+
+def _moments_to_matrices(counts, sums, sums_t, squares, squares_t, cross, min_periods):
+    """件数・和・二乗和・積和から共分散行列と相関行列を求める"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (cross - sums * sums_t / counts) / (counts - 1)
+        var = (squares - sums * sums / counts) / (counts - 1)
+        var_t = (squares_t - sums_t * sums_t / counts) / (counts - 1)
+        corr = cov / np.sqrt(var * var_t)
+    too_few = counts < max(min_periods, 2)
+    cov[too_few] = np.nan
+    corr[too_few] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    return cov, corr
+
+
+def pairwise_cov_corr(returns, min_periods=DEFAULT_MIN_PERIODS, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    リターンの共分散行列・相関行列を計算する関数（欠損日は組ごとに除外する）
+
+    Parameters:
+    -----------
+    returns : numpy.ndarray
+        (銘柄 × 日) のリターン（欠損は NaN）
+    min_periods : int, optional
+        計算に必要な共通日数（これより少ない組は NaN）
+    block_size : int, optional
+        行列積を分割する行数
+
+    Returns:
+    --------
+    tuple of numpy.ndarray
+        (共分散行列, 相関行列, 共通日数)。行列は float32
+    """
+    returns = np.asarray(returns, dtype=np.float32)
+    n = len(returns)
+    valid = ~np.isnan(returns)
+    mask = valid.astype(np.float32)
+    # 桁落ちを抑えるため、銘柄ごとの平均を引いてから積和を取る（共分散・相関は平行移動で変わらない）
+    counts_total = mask.sum(axis=1)
+    with np.errstate(invalid="ignore"):
+        means = np.where(counts_total > 0, np.nansum(returns, axis=1) / np.maximum(counts_total, 1), 0)
+    x = np.where(valid, returns - means[:, None].astype(np.float32), np.float32(0))
+    x2 = x * x
+
+    cov = np.empty((n, n), dtype=np.float32)
+    corr = np.empty((n, n), dtype=np.float32)
+    counts = np.empty((n, n), dtype=np.float32)
+    complete = valid.all()
+    for start, stop in _blocks(n, block_size):
+        rows = slice(start, stop)
+        cross = x[rows] @ x.T
+        if complete:
+            # 欠損がなければ件数・和は行列積を使わずに求まる
+            block_counts = np.full(cross.shape, returns.shape[1], dtype=np.float32)
+            sums = np.broadcast_to(x[rows].sum(axis=1)[:, None], cross.shape)
+            sums_t = np.broadcast_to(x.sum(axis=1)[None, :], cross.shape)
+            squares = np.broadcast_to(x2[rows].sum(axis=1)[:, None], cross.shape)
+            squares_t = np.broadcast_to(x2.sum(axis=1)[None, :], cross.shape)
+        else:
+            block_counts = mask[rows] @ mask.T
+            sums = x[rows] @ mask.T
+            sums_t = mask[rows] @ x.T
+            squares = x2[rows] @ mask.T
+            squares_t = mask[rows] @ x2.T
+        cov[rows], corr[rows] = _moments_to_matrices(block_counts, sums, sums_t, squares, squares_t, cross,
+                                                     min_periods)
+        counts[rows] = block_counts
+    np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+    return cov, corr, counts.astype(np.int32)
+
+
+def correlation_frame(returns, symbols, min_periods=DEFAULT_MIN_PERIODS, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    相関行列を銘柄コードをラベルにした DataFrame で返す関数
+
+    Parameters:
+    -----------
+    returns : numpy.ndarray
+        (銘柄 × 日) のリターン
+    symbols : list of str
+        銘柄コード
+    min_periods : int, optional
+        計算に必要な共通日数
+    block_size : int, optional
+        行列積を分割する行数
+
+    Returns:
+    --------
+    pandas.DataFrame
+    """
+    _, corr, _ = pairwise_cov_corr(returns, min_periods=min_periods, block_size=block_size)
+    return pd.DataFrame(corr, index=symbols, columns=symbols)
+
+
+class RollingCorrelation:
+    """
+    直近 window 日のリターンの相関行列・共分散行列を1日ずつ更新するクラス
+
+    日を足し引きする累積値は誤差が蓄積しないよう float64 で保持する。
+
+    Parameters:
+    -----------
+    n_symbols : int
+        銘柄数
+    window : int
+        相関を計算する日数
+    min_periods : int, optional
+        計算に必要な共通日数
+    """
+
+    def __init__(self, n_symbols, window, min_periods=DEFAULT_MIN_PERIODS):
+        if window < 2:
+            raise ValueError(f"window は2以上を指定してください: {window}")
+        self.window = window
+        self.min_periods = min_periods
+        self._history = np.full((window, n_symbols), np.nan)
+        self._position = 0
+        self.n_days = 0
+        shape = (n_symbols, n_symbols)
+        self._counts = np.zeros(shape)
+        self._sums = np.zeros(shape)
+        self._squares = np.zeros(shape)
+        self._cross = np.zeros(shape)
+
+    def _accumulate(self, day, sign):
+        valid = ~np.isnan(day)
+        mask = valid.astype(np.float64)
+        x = np.where(valid, day, 0.0)
+        self._counts += sign * np.outer(mask, mask)
+        self._sums += sign * np.outer(x, mask)
+        self._squares += sign * np.outer(x * x, mask)
+        self._cross += sign * np.outer(x, x)
+
+    def push(self, day):
+        """
+        1日分のリターン（銘柄数の配列、欠損は NaN）を追加し、window 日より前の日を除く
+        """
+        day = np.asarray(day, dtype=np.float64)
+        if self.n_days >= self.window:
+            self._accumulate(self._history[self._position], -1)
+        self._accumulate(day, 1)
+        self._history[self._position] = day
+        self._position = (self._position + 1) % self.window
+        self.n_days += 1
+
+    def extend(self, returns):
+        """
+        (銘柄 × 日) のリターンを古い日から順に追加する
+        """
+        for day in np.asarray(returns).T:
+            self.push(day)
+
+    def cov_corr(self):
+        """
+        現在の window の共分散行列・相関行列を返す
+
+        Returns:
+        --------
+        tuple of numpy.ndarray
+            (共分散行列, 相関行列, 共通日数)
+        """
+        counts = np.rint(self._counts)
+        cov, corr = _moments_to_matrices(counts, self._sums, self._sums.T, self._squares, self._squares.T,
+                                         self._cross, self.min_periods)
+        np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+        return cov.astype(np.float32), corr.astype(np.float32), counts.astype(np.int32)
+
+
+def seriation_order(corr, iterations=100, seed=0):
+    """
+    似た値動きの銘柄が隣り合うように並べ替える順序を返す関数
+
+    scipy の階層クラスタリングを使わず、相関行列の上位2つの固有ベクトル（部分空間反復で求める）の
+    角度で並べる。銘柄数 n に対して O(n² × iterations) で済む。
+
+    Parameters:
+    -----------
+    corr : numpy.ndarray
+        相関行列（NaN は0として扱う）
+    iterations : int, optional
+        反復回数
+    seed : int, optional
+        初期値の乱数シード
+
+    Returns:
+    --------
+    numpy.ndarray
+        並べ替えの順序（インデックスの配列）
+    """
+    similarity = np.nan_to_num(np.asarray(corr, dtype=np.float64))
+    n = len(similarity)
+    if n < 3:
+        return np.arange(n)
+    basis = np.random.default_rng(seed).standard_normal((n, 2))
+    for _ in range(iterations):
+        basis, _ = np.linalg.qr(similarity @ basis)
+    first, second = basis[:, 0], basis[:, 1]
+    # 固有ベクトルの符号は任意のため、合計が正になる向きに揃える
+    if first.sum() < 0:
+        first = -first
+    angle = np.arctan2(second, first)
+    # 角度が最も離れた位置で円環を切る
+    order = np.argsort(angle, kind="stable")
+    gaps = np.diff(np.concatenate([angle[order], [angle[order[0]] + 2 * np.pi]]))
+    cut = int(np.argmax(gaps)) + 1
+    return np.roll(order, -cut)
+
+
+def downsample_matrix(matrix, max_size):
+    """
+    行列を max_size × max_size 以下になるよう隣接するブロックの平均で縮小する関数
+
+    Parameters:
+    -----------
+    matrix : numpy.ndarray
+        正方行列
+    max_size : int
+        縮小後の最大の行数
+
+    Returns:
+    --------
+    tuple
+        (縮小後の行列, 各ブロックの開始位置)
+    """
+    n = len(matrix)
+    if n <= max_size:
+        return matrix, np.arange(n)
+    edges = np.linspace(0, n, max_size + 1).astype(int)
+    starts = edges[:-1]
+    with np.errstate(invalid="ignore"):
+        filled = np.nan_to_num(matrix)
+        weight = (~np.isnan(matrix)).astype(np.float64)
+        sums = np.add.reduceat(np.add.reduceat(filled, starts, axis=0), starts, axis=1)
+        counts = np.add.reduceat(np.add.reduceat(weight, starts, axis=0), starts, axis=1)
+        return (sums / counts).astype(np.float32), starts
@@ -1,9 +1,70 @@
 import os
 import requests
-import pandas as pd
+from utils.errors import RetryableError, is_retryable_status, request_error
 from utils.jquants_api import get_stock_data
+from utils.replay import http_get
+from utils.decoder import decode_time_series_daily, decode_time_series_intraday, loads
+from utils.instrumentation import span
+from utils.quota import QuotaExceeded, charge_request
 
-def get_stock_data_alpha_vantage(symbol, outputsize="full"):
+# 接続先のベースURL（モックサーバー利用時は環境変数で上書きする）
+ALPHAVANTAGE_BASE_URL_ENV = "ALPHAVANTAGE_API_BASE_URL"
+DEFAULT_ALPHAVANTAGE_BASE_URL = "https://www.alphavantage.co"
+
+
+def get_alphavantage_api_key():
+    """
+    Alpha Vantage の API キーを環境変数 ALPHAVANTAGE_API_KEY から取得する関数
+
+    Returns:
+    --------
+    str
+        API キー
+
+    Raises:
+    -------
+    ValueError
+        環境変数が設定されていない場合（お試し用の demo キーは明示的に設定した場合のみ使う）
+    """
+    api_key = os.environ.get("ALPHAVANTAGE_API_KEY", "").strip()
+    if not api_key:
+        raise ValueError(
+            "環境変数 ALPHAVANTAGE_API_KEY が設定されていません"
+            "（お試し用の demo キーを使う場合は ALPHAVANTAGE_API_KEY=demo を設定してください）"
+        )
+    return api_key
+
+def _parse_response(r):
+    """
+    Alpha Vantage のレスポンスを解析する関数（レート制限・サーバーエラーの場合は RetryableError）
+    """
+    if is_retryable_status(r.status_code):
+        raise RetryableError(f"データ取得失敗: ステータスコード {r.status_code}", r.status_code)
+    with span("alphavantage.json_parse", bytes=len(r.content)):
+        data = loads(r.content)
+    # 1分あたりの上限を超えた場合も HTTP 200 で "Note" を返す
+    if "Note" in data:
+        raise RetryableError("データ取得失敗: " + data["Note"])
+    return data
+
+def parse_time_series_daily(data):
+    """
+    Alpha Vantage TIME_SERIES_DAILY のレスポンスを株価データフレームに変換する関数
+    
+    Parameters:
+    -----------
+    data : dict
+        "Time Series (Daily)" を含むレスポンス
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        株価データ
+    """
+    return decode_time_series_daily(data)
+
+
+def get_stock_data_alpha_vantage(symbol, outputsize="full", adjusted=False):
     """
     Alpha Vantage APIから株価データを取得する関数
     
@@ -13,6 +74,9 @@ def get_stock_data_alpha_vantage(symbol, outputsize="full"):
         ティッカーシンボル（例: "AAPL", "MSFT"）
     outputsize : str, optional
         取得するデータ量（"compact"または"full"）
+    adjusted : bool, optional
+        TIME_SERIES_DAILY_ADJUSTED を使い、調整後終値（Adj Close）・配当（Dividend）・
+        分割係数（Split Coefficient）の列も取得するか（Alpha Vantage のプレミアムプランが必要）
         
     Returns:
     --------
@@ -20,44 +84,95 @@ def get_stock_data_alpha_vantage(symbol, outputsize="full"):
         株価データ
     """
     try:
-        api_key = os.environ.get("ALPHAVANTAGE_API_KEY", "demo")
-        url = (
-            f"https://www.alphavantage.co/query"
-            f"?function=TIME_SERIES_DAILY"
-            f"&symbol={symbol}"
-            f"&outputsize={outputsize}"
-            f"&apikey={api_key}"
-        )
-        r = requests.get(url)
-        data = r.json()
+        api_key = get_alphavantage_api_key()
+        base_url = (os.environ.get(ALPHAVANTAGE_BASE_URL_ENV) or DEFAULT_ALPHAVANTAGE_BASE_URL).rstrip("/")
+        charge_request("alphavantage", api_key, base_url, DEFAULT_ALPHAVANTAGE_BASE_URL)
+        params = {
+            "function": "TIME_SERIES_DAILY_ADJUSTED" if adjusted else "TIME_SERIES_DAILY",
+            "symbol": symbol,
+            "outputsize": outputsize,
+            "apikey": api_key
+        }
+        with span("alphavantage.time_series_daily", symbol=symbol, outputsize=outputsize, adjusted=adjusted):
+            r = http_get(f"{base_url}/query", params=params)
+        data = _parse_response(r)
         
         if "Time Series (Daily)" not in data:
-            error_msg = data.get("Note") or data.get("Error Message") or str(data)
+            error_msg = data.get("Error Message") or str(data)
             raise ValueError("データ取得失敗: " + error_msg)
             
-        df = pd.DataFrame(data["Time Series (Daily)"]).T
-        df = df.rename(columns={
-            "1. open": "Open",
-            "2. high": "High",
-            "3. low": "Low",
-            "4. close": "Close",
-            "5. adjusted close": "Adj Close",
-            "6. volume": "Volume"
-        })
+        with span("alphavantage.decode"):
+            return parse_time_series_daily(data)
+    except QuotaExceeded:
+        raise
+    except RetryableError as e:
+        raise RetryableError(f"Alpha Vantage APIデータ取得エラー: {e}", e.status)
+    except requests.exceptions.RequestException as e:
+        raise request_error("Alpha Vantage APIデータ取得エラー", e)
+    except Exception as e:
+        raise ValueError(f"Alpha Vantage APIデータ取得エラー: {e}")
+
+
+# TIME_SERIES_INTRADAY で指定できる足の間隔
+ALPHAVANTAGE_INTRADAY_INTERVALS = ["1min", "5min", "15min", "30min", "60min"]
+
+
+def get_intraday_data_alpha_vantage(symbol, interval="1min", outputsize="compact", month=None):
+    """
+    Alpha Vantage APIから分足データを取得する関数
+    
+    Parameters:
+    -----------
+    symbol : str
+        ティッカーシンボル（例: "AAPL", "MSFT"）
+    interval : str, optional
+        足の間隔（"1min", "5min", "15min", "30min", "60min"）
+    outputsize : str, optional
+        "compact"（直近100本）または "full"（直近30日分、month 指定時はその月）
+    month : str, optional
+        過去の月を取得する場合の年月（YYYY-MM形式）
         
-        columns_to_keep = ["Open", "High", "Low", "Close", "Volume", "Adj Close"]
-        available_columns = [col for col in columns_to_keep if col in df.columns]
-        df = df[available_columns]
+    Returns:
+    --------
+    pandas.DataFrame
+        分足データ（インデックスは取引所の現地時刻）
+    """
+    if interval not in ALPHAVANTAGE_INTRADAY_INTERVALS:
+        raise ValueError(f"interval は {ALPHAVANTAGE_INTRADAY_INTERVALS} のいずれかを指定してください: {interval}")
+    try:
+        api_key = get_alphavantage_api_key()
+        base_url = (os.environ.get(ALPHAVANTAGE_BASE_URL_ENV) or DEFAULT_ALPHAVANTAGE_BASE_URL).rstrip("/")
+        charge_request("alphavantage", api_key, base_url, DEFAULT_ALPHAVANTAGE_BASE_URL)
+        params = {
+            "function": "TIME_SERIES_INTRADAY",
+            "symbol": symbol,
+            "interval": interval,
+            "outputsize": outputsize,
+            "apikey": api_key
+        }
+        if month:
+            params["month"] = month
+        with span("alphavantage.time_series_intraday", symbol=symbol, interval=interval, outputsize=outputsize):
+            r = http_get(f"{base_url}/query", params=params)
+        data = _parse_response(r)
         
-        df = df.astype(float)
-        df.index = pd.to_datetime(df.index)
-        df = df.sort_index()
-        return df
+        if f"Time Series ({interval})" not in data:
+            error_msg = data.get("Error Message") or data.get("Information") or str(data)
+            raise ValueError("データ取得失敗: " + error_msg)
+            
+        with span("alphavantage.decode"):
+            return decode_time_series_intraday(data)
+    except QuotaExceeded:
+        raise
+    except RetryableError as e:
+        raise RetryableError(f"Alpha Vantage API分足データ取得エラー: {e}", e.status)
+    except requests.exceptions.RequestException as e:
+        raise request_error("Alpha Vantage API分足データ取得エラー", e)
     except Exception as e:
-        raise ValueError(f"Alpha Vantage APIデータ取得エラー: {e}")
+        raise ValueError(f"Alpha Vantage API分足データ取得エラー: {e}")
 
 
-def get_stock_data_jquants(symbol, from_date=None, to_date=None):
+def get_stock_data_jquants(symbol, from_date=None, to_date=None, adjustment=False):
     """
     J-Quants APIから株価データを取得する関数
     jquants_apiモジュールを使用
@@ -70,10 +185,12 @@ def get_stock_data_jquants(symbol, from_date=None, to_date=None):
         取得開始日（YYYY-MM-DD形式）
     to_date : str, optional
         取得終了日（YYYY-MM-DD形式）
+    adjustment : bool, optional
+        調整係数（AdjustmentFactor）と調整後終値（Adj Close）の列を残すか
         
     Returns:
     --------
     pandas.DataFrame
         株価データ
     """
-    return get_stock_data(symbol, from_date, to_date)
+    return get_stock_data(symbol, from_date, to_date, adjustment=adjustment)
@@ -1,6 +1,17 @@
 import pandas as pd
 import numpy as np
 
+from utils.instrumentation import instrumented
+from utils.rolling import (rolling_beta, rolling_max, rolling_max_drawdown, rolling_min, rolling_quantile,
+                           rolling_sharpe, rolling_std)
+
+# ベータの計算に使う市場ごとのベンチマーク（日経225連動ETF、S&P500連動ETF）
+BENCHMARK_CODES = {"jp": "1321.T", "us": "SPY"}
+
+# 各関数は列を追加するだけで既存の列を書き換えないため、入力は浅いコピーで十分
+# （キャッシュ上の配列を参照するDataFrameを渡しても価格データは複製されない）
+
+@instrumented()
 def calculate_returns(data):
     """
     株価データからリターンを計算する関数
@@ -15,12 +26,13 @@ def calculate_returns(data):
     pandas.DataFrame
         リターンを追加したデータフレーム
     """
-    df = data.copy()
+    df = data.copy(deep=False)
     df['Daily_Return'] = df['Close'].pct_change() * 100
     df['Cumulative_Return'] = (1 + df['Daily_Return'] / 100).cumprod() - 1
     df['Cumulative_Return'] = df['Cumulative_Return'] * 100
     return df
 
+@instrumented()
 def calculate_moving_averages(data, windows=[5, 20, 60, 120]):
     """
     移動平均を計算する関数
@@ -37,11 +49,12 @@ def calculate_moving_averages(data, windows=[5, 20, 60, 120]):
     pandas.DataFrame
         移動平均を追加したデータフレーム
     """
-    df = data.copy()
+    df = data.copy(deep=False)
     for window in windows:
         df[f'MA_{window}'] = df['Close'].rolling(window=window).mean()
     return df
 
+@instrumented()
 def calculate_volatility(data, window=20):
     """
     ボラティリティを計算する関数
@@ -58,10 +71,11 @@ def calculate_volatility(data, window=20):
     pandas.DataFrame
         ボラティリティを追加したデータフレーム
     """
-    df = data.copy()
-    df['Volatility'] = df['Daily_Return'].rolling(window=window).std()
+    df = data.copy(deep=False)
+    df['Volatility'] = rolling_std(df['Daily_Return'].to_numpy(dtype=np.float64), window)
     return df
 
+@instrumented()
 def calculate_rsi(data, window=14):
     """
     RSI (Relative Strength Index)を計算する関数
@@ -78,7 +92,7 @@ def calculate_rsi(data, window=14):
     pandas.DataFrame
         RSIを追加したデータフレーム
     """
-    df = data.copy()
+    df = data.copy(deep=False)
     delta = df['Close'].diff()
     gain = delta.where(delta > 0, 0)
     loss = -delta.where(delta < 0, 0)
@@ -89,3 +103,126 @@ def calculate_rsi(data, window=14):
     rs = avg_gain / avg_loss
     df['RSI'] = 100 - (100 / (1 + rs))
     return df
+
+@instrumented()
+def calculate_rolling_sharpe(data, window=60, risk_free=0.0, periods_per_year=252):
+    """
+    移動シャープレシオ（年率）を計算する関数
+    
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        日次リターン（Daily_Return 列）を含む株価データ
+    window : int, optional
+        計算期間
+    risk_free : float, optional
+        無リスク金利（年率、%）
+    periods_per_year : int, optional
+        1年あたりの営業日数
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        シャープレシオ（Sharpe 列）を追加したデータフレーム
+    """
+    df = data.copy(deep=False)
+    df['Sharpe'] = rolling_sharpe(df['Daily_Return'].to_numpy(dtype=np.float64), window,
+                                  risk_free=risk_free, periods_per_year=periods_per_year)
+    return df
+
+@instrumented()
+def calculate_beta(data, benchmark, window=60):
+    """
+    ベンチマークに対する移動ベータを計算する関数
+    
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        日次リターン（Daily_Return 列）を含む株価データ
+    benchmark : pandas.DataFrame or pandas.Series
+        ベンチマーク（BENCHMARK_CODES の銘柄など）の終値（DataFrame の場合は Close 列）。
+        data の日付に合わせ、取引のない日は前日の終値を使う
+    window : int, optional
+        計算期間
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        ベータ（Beta 列）を追加したデータフレーム
+    """
+    if isinstance(benchmark, pd.DataFrame):
+        benchmark = benchmark['Close']
+    df = data.copy(deep=False)
+    benchmark_close = benchmark.reindex(df.index.union(benchmark.index)).ffill().reindex(df.index)
+    benchmark_returns = benchmark_close.pct_change() * 100
+    df['Beta'] = rolling_beta(df['Daily_Return'].to_numpy(dtype=np.float64),
+                              benchmark_returns.to_numpy(dtype=np.float64), window)
+    return df
+
+@instrumented()
+def calculate_rolling_drawdown(data, window=250):
+    """
+    移動最大ドローダウン（直近 window 日の高値からの最大の下落率、%）を計算する関数
+    
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        株価データ
+    window : int, optional
+        計算期間
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        最大ドローダウン（Max_Drawdown 列）を追加したデータフレーム
+    """
+    df = data.copy(deep=False)
+    df['Max_Drawdown'] = rolling_max_drawdown(df['Close'].to_numpy(dtype=np.float64), window)
+    return df
+
+@instrumented()
+def calculate_return_quantiles(data, window=60, quantiles=(0.05, 0.95)):
+    """
+    日次リターンの移動分位点を計算する関数
+    
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        日次リターン（Daily_Return 列）を含む株価データ
+    window : int, optional
+        計算期間
+    quantiles : tuple of float, optional
+        0〜1 の確率
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        分位点（5% 点は Return_Q05 列など）を追加したデータフレーム
+    """
+    df = data.copy(deep=False)
+    returns = df['Daily_Return'].to_numpy(dtype=np.float64)
+    for q in quantiles:
+        df[f'Return_Q{round(q * 100):02d}'] = rolling_quantile(returns, window, q)
+    return df
+
+@instrumented()
+def calculate_price_channel(data, window=20):
+    """
+    直近 window 日の高値・安値（チャネル）を計算する関数
+    
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        株価データ
+    window : int, optional
+        計算期間
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        高値（High_{window} 列）・安値（Low_{window} 列）を追加したデータフレーム
+    """
+    df = data.copy(deep=False)
+    df[f'High_{window}'] = rolling_max(df['High'].to_numpy(dtype=np.float64), window)
+    df[f'Low_{window}'] = rolling_min(df['Low'].to_numpy(dtype=np.float64), window)
+    return df
@@ -0,0 +1,518 @@
+"""
+アプリの各ページで共有するデータサービス
+
+株価の取得・指標の計算・図の作成の結果をプロセス内でキャッシュし、再実行時や
+他のセッションからは計算済みの結果を返す。返すDataFrameはキャッシュ上の読み取り専用の
+配列を参照するため、呼び出し側で書き換えないこと（列の追加は calculate_* 関数と同様に
+浅いコピーに対して行う）。
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+
+from utils.adjustment import AdjustedHistory, AdjustmentStore
+from utils.compact import CompactCache, CompactFrame, get_price_cache
+from utils.distribution import DistributionCache
+from utils.errors import NoDataError, RetryableError
+from utils.instrumentation import increment, instrumented, register_collector
+from utils.intraday import DEFAULT_MAX_POINTS, IntradayStore, TieredBars
+from utils.quota import QuotaExceeded
+from utils.resample import ResampleCache
+
+# 指標計算結果のキャッシュ上限（バイト）と、図のキャッシュ件数
+DEFAULT_INDICATOR_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_FIGURE_CACHE_SIZE = 64
+
+# 分足を取得し直す間隔（秒）。前回から INTRADAY_FULL_REFRESH_SECONDS 以上空いた場合は
+# 直近100本では足りないため、直近30日分を取得する
+INTRADAY_REFRESH_SECONDS = 60
+INTRADAY_FULL_REFRESH_SECONDS = 90 * 60
+
+
+class DataService:
+    """
+    株価・指標・図を提供するサービス
+
+    Parameters:
+    -----------
+    price_cache : CompactCache, optional
+        株価のキャッシュ（省略時はプロセス共通のキャッシュ）
+    indicator_cache_bytes : int, optional
+        指標計算結果のキャッシュ上限（バイト）
+    figure_cache_size : int, optional
+        図のキャッシュ件数
+    adjustment_store : utils.adjustment.AdjustmentStore, optional
+        調整後株価に使う未調整の日足と調整イベントの保存先
+    intraday_store : utils.intraday.IntradayStore, optional
+        分足の保存先
+    panel_path : str or pathlib.Path, optional
+        API の利用回数の上限に達した場合に使う株価パネル（省略時は get_panel_dir()）
+    """
+
+    def __init__(self, price_cache=None, indicator_cache_bytes=DEFAULT_INDICATOR_CACHE_BYTES,
+                 figure_cache_size=DEFAULT_FIGURE_CACHE_SIZE, adjustment_store=None, intraday_store=None,
+                 panel_path=None):
+        self.price_cache = price_cache if price_cache is not None else get_price_cache()
+        self.indicator_cache = CompactCache(indicator_cache_bytes)
+        self.figure_cache_size = figure_cache_size
+        self.adjustment_store = adjustment_store if adjustment_store is not None else AdjustmentStore()
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self._histories = {}
+        self._history_checked = {}
+        self._history_locks = {}
+        self._history_lock = threading.Lock()
+        self.intraday_store = intraday_store if intraday_store is not None else IntradayStore()
+        self._intraday = {}
+        self._intraday_fetched = {}
+        self._intraday_locks = {}
+        self.resample_cache = ResampleCache()
+        self.distribution_cache = DistributionCache()
+        self.panel_path = panel_path
+        self._last_price_keys = {}
+        self._degraded = {}
+        self.figure_hits = 0
+        self.figure_misses = 0
+
+    @instrumented("service.prices")
+    def prices(self, market_code, stock_code, from_date, to_date, adjusted=False):
+        """
+        株価データを取得する
+
+        Parameters:
+        -----------
+        market_code : str
+            市場（"jp" または "us"）
+        stock_code : str
+            正規化された証券コード
+        from_date : str
+            取得開始日（YYYY-MM-DD形式）
+        to_date : str
+            取得終了日（YYYY-MM-DD形式）
+        adjusted : bool, optional
+            株式分割・配当を調整した株価を返すか
+
+        Returns:
+        --------
+        pandas.DataFrame
+            株価データ（キャッシュの配列を参照する読み取り専用のDataFrame）
+        """
+        from utils.data_fetcher import get_stock_data_alpha_vantage, get_stock_data_jquants
+
+        cache = self.price_cache
+        if adjusted:
+            key = ("adjusted", market_code, stock_code, from_date, to_date, date.today().isoformat())
+            compact = cache.get(key)
+            if compact is None:
+                history = self.adjusted_history(market_code, stock_code, from_date)
+                with self._history_locks[(market_code, stock_code)]:
+                    data = history.adjusted(from_date, to_date)
+                    if not self._history_current(market_code, stock_code, history):
+                        # 更新に失敗した履歴から作った株価はキャッシュしない
+                        return CompactFrame.from_frame(data).to_frame()
+                    compact = cache.put(key, data)
+            self._degraded.pop((market_code, stock_code), None)
+            return compact.to_frame()
+
+        try:
+            if market_code == "jp":
+                key = ("jp", stock_code, from_date, to_date)
+                compact = cache.get(key)
+                if compact is None:
+                    compact = cache.put(key, get_stock_data_jquants(stock_code, from_date=from_date, to_date=to_date))
+            else:
+                # Alpha Vantageは全期間を取得するため、キャッシュから期間を切り出す
+                key = ("us", stock_code, date.today().isoformat())
+                compact = cache.get(key)
+                if compact is None:
+                    compact = cache.put(key, get_stock_data_alpha_vantage(stock_code))
+        except QuotaExceeded as e:
+            data = self._fallback_prices(market_code, stock_code, from_date, to_date)
+            if data is None:
+                raise
+            self._degraded[(market_code, stock_code)] = (
+                f"{e}。保存済みのデータ（{data.index[-1]:%Y-%m-%d} まで）を表示しています。"
+            )
+            increment("service.quota_fallbacks", market=market_code)
+            return data
+        self._degraded.pop((market_code, stock_code), None)
+        self._last_price_keys[(market_code, stock_code)] = key
+        if market_code == "jp":
+            return compact.to_frame()
+        return compact.slice(from_date, to_date).to_frame()
+
+    def _fallback_prices(self, market_code, stock_code, from_date, to_date):
+        """
+        API の利用回数の上限に達した場合に、前回取得したキャッシュか株価パネルから株価を返す（なければNone）
+        """
+        from utils.panel import PricePanel
+
+        key = self._last_price_keys.get((market_code, stock_code))
+        compact = self.price_cache.get(key) if key is not None else None
+        if compact is not None:
+            data = compact.slice(from_date, to_date).to_frame()
+            if len(data):
+                return data
+        try:
+            panel = PricePanel.open(self.panel_path)
+        except ValueError:
+            return None
+        symbol = stock_code.replace(".T", "") if market_code == "jp" else stock_code
+        if symbol not in panel:
+            return None
+        data = panel.frame(symbol, from_date, to_date)
+        return CompactFrame.from_frame(data).to_frame() if len(data) else None
+
+    def degraded(self, market_code, stock_code):
+        """
+        直近の prices() が API の上限（調整後株価では一時的なエラーも）のため保存済みのデータを返した場合は
+        その説明を、そうでなければNoneを返す
+        """
+        return self._degraded.get((market_code, stock_code))
+
+    @instrumented("service.candles")
+    def candles(self, market_code, stock_code, from_date, to_date, timeframe="daily", adjusted=False):
+        """
+        日足・週足・月足の株価データを返す
+
+        週足・月足は prices() の日足（キャッシュ済みであれば取得し直さない）から作成し、
+        終了した期間の集約結果は再利用する。
+
+        Parameters:
+        -----------
+        market_code : str
+            市場（"jp" または "us"）
+        stock_code : str
+            正規化された証券コード
+        from_date : str
+            取得開始日（YYYY-MM-DD形式）
+        to_date : str
+            取得終了日（YYYY-MM-DD形式）
+        timeframe : str, optional
+            "daily", "weekly", "monthly"
+        adjusted : bool, optional
+            株式分割・配当を調整した株価を使うか
+
+        Returns:
+        --------
+        pandas.DataFrame
+            インデックスを期間の開始日とした Open/High/Low/Close/Volume
+        """
+        data = self.prices(market_code, stock_code, from_date, to_date, adjusted=adjusted)
+        if timeframe == "daily":
+            return data
+        key = (market_code, stock_code, bool(adjusted))
+        return self.resample_cache.resample(key, data, timeframe, from_date=from_date)
+
+    def adjusted_history(self, market_code, stock_code, from_date):
+        """
+        調整後株価の元になる履歴（未調整の日足と調整イベント）を返す
+
+        初回は期間全体を取得し、以降は保持している最終日より後の日足だけを1日1回取得して追加する。
+        新しい分割・配当は保持している株価を取得し直さず、イベント日より前の係数だけを更新する。
+        追加の取得が一時的なエラー・利用回数の上限で失敗した場合は保持している履歴を返し、
+        次の呼び出しで取得し直す（それ以外のエラーは送出する）。
+
+        Parameters:
+        -----------
+        market_code : str
+            市場（"jp" または "us"）
+        stock_code : str
+            正規化された証券コード
+        from_date : str
+            必要な期間の開始日（YYYY-MM-DD形式）
+
+        Returns:
+        --------
+        utils.adjustment.AdjustedHistory
+        """
+        from utils.data_fetcher import get_stock_data_alpha_vantage, get_stock_data_jquants
+
+        key = (market_code, stock_code)
+        today = date.today().isoformat()
+        # 取得中に他の銘柄の読み出しを止めないよう、銘柄ごとのロックを使う
+        with self._history_lock:
+            lock = self._history_locks.setdefault(key, threading.Lock())
+        with lock:
+            history = self._histories.get(key)
+            if history is None:
+                history = self.adjustment_store.load(market_code, stock_code)
+
+            covered = history is not None and (market_code == "us" or history.coverage_start <= from_date)
+            if not covered:
+                # 未取得、または保持している期間より前が必要な場合は全期間を取得し直す
+                if market_code == "jp":
+                    start = min(from_date, history.coverage_start) if history is not None else from_date
+                    data = get_stock_data_jquants(stock_code, from_date=start, to_date=today, adjustment=True)
+                    history = AdjustedHistory.from_frame(data, coverage_start=start)
+                else:
+                    history = AdjustedHistory.from_frame(get_stock_data_alpha_vantage(stock_code, adjusted=True))
+                increment("adjusted_history_fetch", market=market_code, kind="full")
+            elif self._history_checked.get(key) != today and history.last_date < today:
+                try:
+                    if market_code == "jp":
+                        start = (date.fromisoformat(history.last_date) + timedelta(days=1)).isoformat()
+                        data = get_stock_data_jquants(stock_code, from_date=start, to_date=today, adjustment=True)
+                    else:
+                        data = get_stock_data_alpha_vantage(stock_code, outputsize="compact", adjusted=True)
+                    history.append(data)
+                    increment("adjusted_history_fetch", market=market_code, kind="incremental")
+                except NoDataError:
+                    # 新しい日足がない（休日など）
+                    increment("adjusted_history_fetch", market=market_code, kind="unchanged")
+                except (RetryableError, QuotaExceeded) as e:
+                    # 一時的なエラー・上限に達した場合は保持している履歴を使い、次の呼び出しで取得し直す
+                    increment("adjusted_history_fetch", market=market_code, kind="failed")
+                    if isinstance(e, QuotaExceeded):
+                        increment("service.quota_fallbacks", market=market_code)
+                    self._degraded[key] = f"{e}。保存済みのデータ（{history.last_date} まで）を表示しています。"
+                    self._histories[key] = history
+                    return history
+            else:
+                self._histories[key] = history
+                return history
+
+            self._histories[key] = history
+            self._history_checked[key] = today
+            self.adjustment_store.save(market_code, stock_code, history)
+            return history
+
+    def _history_current(self, market_code, stock_code, history):
+        """調整用の履歴が今日の時点で最新か（今日確認済み、または今日の日足まである）"""
+        today = date.today().isoformat()
+        return self._history_checked.get((market_code, stock_code)) == today or history.last_date >= today
+
+    @instrumented("service.intraday")
+    def intraday(self, symbol, days=None, max_points=DEFAULT_MAX_POINTS):
+        """
+        分足を返す（期間をカバーし、本数が max_points 以下になる中で最も細かい足を使う）
+
+        初回は直近30日分の1分足を取得し、以降は INTRADAY_REFRESH_SECONDS ごとに直近の1分足だけを
+        取得して追加する。取得した1分足は utils.intraday.TieredBars で5分足・1時間足・日足に集約して保存する。
+        取得に失敗した場合は保持している足を返す。
+
+        Parameters:
+        -----------
+        symbol : str
+            ティッカーシンボル（米国株のみ）
+        days : int, optional
+            最新の足の日を含む表示日数（省略時は保持している全期間）
+        max_points : int, optional
+            足の本数の上限
+
+        Returns:
+        --------
+        tuple
+            (足の名前, pandas.DataFrame)
+        """
+        from utils.data_fetcher import get_intraday_data_alpha_vantage
+
+        with self._history_lock:
+            lock = self._intraday_locks.setdefault(symbol, threading.Lock())
+        with lock:
+            bars = self._intraday.get(symbol)
+            if bars is None:
+                bars = self.intraday_store.load(symbol) or TieredBars()
+                self._intraday[symbol] = bars
+
+            now = time.monotonic()
+            fetched = self._intraday_fetched.get(symbol)
+            if fetched is None or now - fetched >= INTRADAY_REFRESH_SECONDS:
+                # 保存済みの足を読み込んだ直後は前回の取得時刻が分からないため、直近30日分を取得する
+                kind = "full" if (fetched is None or now - fetched >= INTRADAY_FULL_REFRESH_SECONDS) else "compact"
+                try:
+                    data = get_intraday_data_alpha_vantage(symbol, "1min", outputsize=kind)
+                    bars.ingest(data)
+                    self.intraday_store.save(symbol, bars)
+                    increment("intraday_fetch", kind=kind)
+                except (ValueError, QuotaExceeded):
+                    if bars.last_time is None:
+                        raise
+                    increment("intraday_fetch", kind="failed")
+                self._intraday_fetched[symbol] = now
+
+            start = None
+            if days is not None and bars.last_time is not None:
+                start = bars.last_time.normalize() - timedelta(days=days - 1)
+            return bars.query(start, max_points=max_points)
+
+    @instrumented("service.return_distribution")
+    def return_distribution(self, market_code, stock_code, from_date, to_date, adjusted=False):
+        """
+        日次リターン(%)の分布（ヒストグラム・要約統計量）を返す
+
+        銘柄と期間の長さごとに分布を保持し、前回から加わった日・なくなった日のリターンだけで
+        更新する（期間がずれても全体を計算し直さない）。
+
+        Parameters:
+        -----------
+        market_code : str
+            市場（"jp" または "us"）
+        stock_code : str
+            正規化された証券コード
+        from_date : str
+            取得開始日（YYYY-MM-DD形式）
+        to_date : str
+            取得終了日（YYYY-MM-DD形式）
+        adjusted : bool, optional
+            株式分割・配当を調整した株価から計算するか
+
+        Returns:
+        --------
+        utils.distribution.ReturnDistribution
+            分布のコピー
+        """
+        data = self.prices(market_code, stock_code, from_date, to_date, adjusted=adjusted)
+        close = data['Close'].to_numpy(dtype=np.float64)
+        returns = (close[1:] / close[:-1] - 1) * 100
+        span = (date.fromisoformat(to_date) - date.fromisoformat(from_date)).days
+        key = (market_code, stock_code, bool(adjusted), span)
+        return self.distribution_cache.update(key, data.index[1:], returns)
+
+    @instrumented("service.indicators")
+    def indicators(self, market_code, stock_code, from_date, to_date, ma_windows=(),
+                   returns=False, rsi=False, volatility=False, adjusted=False):
+        """
+        株価データに指標を追加したデータを返す（同じ条件の計算結果は再利用する）
+
+        Parameters:
+        -----------
+        market_code : str
+            市場（"jp" または "us"）
+        stock_code : str
+            正規化された証券コード
+        from_date : str
+            取得開始日（YYYY-MM-DD形式）
+        to_date : str
+            取得終了日（YYYY-MM-DD形式）
+        ma_windows : list of int, optional
+            移動平均の期間（空の場合は計算しない）
+        returns : bool, optional
+            日次・累積リターンを計算するか（rsi, volatility の場合は常に計算する）
+        rsi : bool, optional
+            RSIを計算するか
+        volatility : bool, optional
+            ボラティリティを計算するか
+        adjusted : bool, optional
+            株式分割・配当を調整した株価から計算するか
+
+        Returns:
+        --------
+        pandas.DataFrame
+            株価と指標のデータ（読み取り専用）
+        """
+        from utils.data_processor import (calculate_moving_averages, calculate_returns, calculate_rsi,
+                                          calculate_volatility)
+
+        key = (market_code, stock_code, from_date, to_date, tuple(ma_windows), bool(returns),
+               bool(rsi), bool(volatility), bool(adjusted), date.today().isoformat())
+        compact = self.indicator_cache.get(key)
+        if compact is not None:
+            return compact.to_frame()
+
+        data = self.prices(market_code, stock_code, from_date, to_date, adjusted=adjusted)
+        degraded = self.degraded(market_code, stock_code) is not None
+        if ma_windows:
+            data = calculate_moving_averages(data, windows=list(ma_windows))
+        if returns or rsi or volatility:
+            data = calculate_returns(data)
+        if rsi:
+            data = calculate_rsi(data)
+        if volatility:
+            data = calculate_volatility(data)
+        if degraded:
+            # 保存済みのデータから計算した結果はキャッシュせず、上限が空いた後に取得し直す
+            return CompactFrame.from_frame(data).to_frame()
+        return self.indicator_cache.put(key, data).to_frame()
+
+    def figure(self, key, builder, *args, **kwargs):
+        """
+        図を作成する（同じキーの図は作成済みのものを返す）
+
+        Parameters:
+        -----------
+        key : tuple
+            図を識別するキー（データの取得条件と表示オプションを含めること）
+        builder : callable
+            図を作成する関数
+        *args, **kwargs
+            builder に渡す引数
+
+        Returns:
+        --------
+        plotly.graph_objects.Figure
+        """
+        key = (key, date.today().isoformat())
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                self.figure_hits += 1
+                return fig
+            self.figure_misses += 1
+        fig = builder(*args, **kwargs)
+        with self._lock:
+            self._figures[key] = fig
+            while len(self._figures) > self.figure_cache_size:
+                self._figures.popitem(last=False)
+        return fig
+
+    def stats(self):
+        """
+        各キャッシュの統計情報を返す
+        """
+        indicator = self.indicator_cache.stats()
+        resample = self.resample_cache.stats()
+        distribution = self.distribution_cache.stats()
+        with self._lock:
+            return {
+                "indicator_items": indicator["items"],
+                "indicator_nbytes": indicator["nbytes"],
+                "indicator_hits": indicator["hits"],
+                "indicator_misses": indicator["misses"],
+                "figure_items": len(self._figures),
+                "figure_hits": self.figure_hits,
+                "figure_misses": self.figure_misses,
+                "resample_periods": resample["periods"],
+                "resample_reused_periods": resample["reused_periods"],
+                "resample_aggregated_periods": resample["aggregated_periods"],
+                "distribution_reused_values": distribution["reused_values"],
+                "distribution_added_values": distribution["added_values"],
+            }
+
+    def clear(self):
+        self.indicator_cache.clear()
+        self.resample_cache.clear()
+        self.distribution_cache.clear()
+        with self._lock:
+            self._figures.clear()
+        with self._history_lock:
+            self._histories.clear()
+            self._history_checked.clear()
+            self._intraday.clear()
+            self._intraday_fetched.clear()
+        self._last_price_keys.clear()
+        self._degraded.clear()
+
+
+_data_service = None
+_data_service_lock = threading.Lock()
+
+
+def get_data_service():
+    """
+    プロセス全体で共有するデータサービスを取得する関数
+
+    Returns:
+    --------
+    DataService
+    """
+    global _data_service
+    with _data_service_lock:
+        if _data_service is None:
+            _data_service = DataService()
+            register_collector("data_service", _data_service.stats)
+        return _data_service
@@ -0,0 +1,199 @@
+"""
+APIレスポンス（JSON）を株価データフレームに高速変換するデコーダー
+
+辞書のリストから DataFrame を作ってから型変換する代わりに、
+レスポンスを1回走査して型付きの列配列（datetime64 の日付、float64 の価格、int64 の出来高）を
+直接作成する。orjson がインストールされていればJSONの解析にも使用する。
+"""
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson がない環境では標準の json を使う（速度のみ異なる）
+    orjson = None
+    import json
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+
+# J-Quants の調整関連のキー名と列名の対応（adjustment=True の場合に残す）
+JQUANTS_ADJUSTMENT_FIELDS = {
+    "AdjustmentFactor": "AdjustmentFactor",
+    "AdjustmentClose": "Adj Close",
+}
+
+# Alpha Vantageのキー名と列名の対応（TIME_SERIES_DAILY と TIME_SERIES_DAILY_ADJUSTED の両方に対応）
+ALPHAVANTAGE_FIELDS = {
+    "1. open": "Open",
+    "2. high": "High",
+    "3. low": "Low",
+    "4. close": "Close",
+    "5. adjusted close": "Adj Close",
+    "5. volume": "Volume",
+    "6. volume": "Volume",
+    "7. dividend amount": "Dividend",
+    "8. split coefficient": "Split Coefficient",
+}
+
+
+def loads(raw):
+    """
+    JSONを解析する関数（orjson があれば使用する）
+
+    Parameters:
+    -----------
+    raw : bytes or str
+        JSON文字列
+
+    Returns:
+    --------
+    object
+        解析結果
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _to_int_if_integral(values):
+    """欠損がなく全て整数値であれば int64 に変換する"""
+    if values.size and not np.isnan(values).any() and np.array_equal(values, np.floor(values)):
+        return values.astype(np.int64)
+    return values
+
+
+def _build_frame(dates, columns, index_name=None):
+    index = pd.DatetimeIndex(dates.astype("datetime64[ns]"), name=index_name)
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def decode_daily_quotes(rows, adjustment=False):
+    """
+    J-Quants daily_quotes のレコードを株価データフレームに変換する関数
+
+    Parameters:
+    -----------
+    rows : list of dict
+        daily_quotes の各行（価格は数値または None）
+    adjustment : bool, optional
+        調整係数（AdjustmentFactor）と調整後終値（Adj Close）の列を残すか
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Date をインデックスとする株価データ（Open/High/Low/Close は float64、
+        Volume は欠損がなければ int64）
+
+    Raises:
+    -------
+    ValueError
+        必要なカラムがない場合
+    """
+    first = rows[0] if rows else {}
+    available_columns = [col for col in PRICE_COLUMNS + ["Volume"] if col in first]
+    if not available_columns:
+        raise ValueError(f"J-Quants APIデータ取得失敗: 必要なカラムがありません。利用可能なカラム: {list(first)}")
+
+    keys = list(available_columns)
+    if adjustment:
+        keys += [key for key in JQUANTS_ADJUSTMENT_FIELDS if key in first]
+    getter = itemgetter("Date", *keys)
+    dates, *values = zip(*map(getter, rows))
+
+    columns = {
+        JQUANTS_ADJUSTMENT_FIELDS.get(key, key): np.array(col_values, dtype=np.float64)
+        for key, col_values in zip(keys, values)
+    }
+    if "Volume" in columns:
+        columns["Volume"] = _to_int_if_integral(columns["Volume"])
+
+    dates = np.array(dates, dtype="datetime64[D]")
+    if dates.size > 1 and not (dates[1:] >= dates[:-1]).all():
+        order = np.argsort(dates, kind="stable")
+        dates = dates[order]
+        columns = {col: arr[order] for col, arr in columns.items()}
+    return _build_frame(dates, columns, index_name="Date")
+
+
+def decode_time_series_daily(data):
+    """
+    Alpha Vantage TIME_SERIES_DAILY(_ADJUSTED) のレスポンスを株価データフレームに変換する関数
+
+    Parameters:
+    -----------
+    data : dict or bytes or str
+        "Time Series (Daily)" を含むレスポンス（未解析のJSONも可）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        日付昇順の株価データ（価格は float64、Volume は int64）
+    """
+    if isinstance(data, (bytes, str)):
+        data = loads(data)
+    series = data["Time Series (Daily)"]
+    if not series:
+        return pd.DataFrame(columns=PRICE_COLUMNS + ["Volume"], index=pd.DatetimeIndex([]), dtype=np.float64)
+
+    first = next(iter(series.values()))
+    keys = [key for key in ALPHAVANTAGE_FIELDS if key in first]
+    names = [ALPHAVANTAGE_FIELDS[key] for key in keys]
+
+    # Alpha Vantageは日付の降順で返すため、反転して昇順にする
+    dates = np.array(list(series), dtype="datetime64[D]")[::-1]
+    values = np.array(list(map(itemgetter(*keys), series.values())), dtype=np.float64)[::-1]
+
+    columns = {name: values[:, i] for i, name in enumerate(names)}
+    if "Volume" in columns:
+        columns["Volume"] = columns["Volume"].astype(np.int64)
+
+    if dates.size > 1 and not (dates[1:] >= dates[:-1]).all():
+        order = np.argsort(dates, kind="stable")
+        dates = dates[order]
+        columns = {col: arr[order] for col, arr in columns.items()}
+
+    ordered = [col for col in ["Open", "High", "Low", "Close", "Volume", "Adj Close", "Dividend", "Split Coefficient"]
+               if col in columns]
+    return _build_frame(dates, {col: columns[col] for col in ordered})
+
+
+def decode_time_series_intraday(data):
+    """
+    Alpha Vantage TIME_SERIES_INTRADAY のレスポンスを株価データフレームに変換する関数
+
+    Parameters:
+    -----------
+    data : dict or bytes or str
+        "Time Series (1min)" などを含むレスポンス（未解析のJSONも可）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        時刻昇順の分足（時刻は取引所の現地時刻、価格は float64、Volume は int64）
+
+    Raises:
+    -------
+    ValueError
+        時系列が含まれていない場合
+    """
+    if isinstance(data, (bytes, str)):
+        data = loads(data)
+    key = next((k for k in data if k.startswith("Time Series (")), None)
+    if key is None:
+        raise ValueError(f"分足データがありません: {list(data)}")
+    series = data[key]
+    if not series:
+        return pd.DataFrame(columns=PRICE_COLUMNS + ["Volume"], index=pd.DatetimeIndex([]), dtype=np.float64)
+
+    keys = ["1. open", "2. high", "3. low", "4. close", "5. volume"]
+    times = np.array(list(series), dtype="datetime64[s]")
+    values = np.array(list(map(itemgetter(*keys), series.values())), dtype=np.float64)
+
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+    values = values[order]
+    columns = {name: values[:, i] for i, name in enumerate(PRICE_COLUMNS)}
+    columns["Volume"] = values[:, 4].astype(np.int64)
+    return _build_frame(times, columns, index_name="Datetime")
@@ -0,0 +1,394 @@
+"""
+リターンの分布（ヒストグラム・要約統計量）を逐次計算するモジュール
+
+平均・分散・歪度・尖度は中心モーメント（Pébay の結合式）で、分位点は固定幅の細かいヒストグラム
+から求める。どちらも値の追加・削除ができるため、新しいリターンが加わった場合や期間がずれた場合も
+全体を計算し直さずに更新できる。チャートには細かいビンを DEFAULT_BINS 本程度にまとめたものだけを送る。
+"""
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# チャートに表示するビンの数（目安）
+DEFAULT_BINS = 50
+
+# 内部で保持する細かいビンの最大数（超える場合はビンの幅を2倍にして隣接するビンをまとめる）
+MAX_FINE_BINS = 1024
+
+# 要約に含める分位点
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# DistributionCache が保持する系列数の上限
+DEFAULT_MAX_SERIES = 512
+
+
+def moments(values):
+    """
+    値の個数・平均・中心モーメントの和（M2, M3, M4）を求める関数
+
+    Parameters:
+    -----------
+    values : array-like
+        値（NaN を含まないこと）
+
+    Returns:
+    --------
+    tuple
+        (n, mean, M2, M3, M4)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return (0, 0.0, 0.0, 0.0, 0.0)
+    mean = values.mean()
+    deviation = values - mean
+    squared = deviation * deviation
+    return (n, float(mean), float(squared.sum()), float((squared * deviation).sum()),
+            float((squared * squared).sum()))
+
+
+def combine_moments(a, b):
+    """
+    2つの集合の moments を結合する関数（Pébay の結合式）
+    """
+    na, mean_a, m2a, m3a, m4a = a
+    nb, mean_b, m2b, m3b, m4b = b
+    if na == 0:
+        return b
+    if nb == 0:
+        return a
+    n = na + nb
+    delta = mean_b - mean_a
+    mean = mean_a + delta * nb / n
+    m2 = m2a + m2b + delta ** 2 * na * nb / n
+    m3 = (m3a + m3b + delta ** 3 * na * nb * (na - nb) / n ** 2
+          + 3 * delta * (na * m2b - nb * m2a) / n)
+    m4 = (m4a + m4b + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+          + 6 * delta ** 2 * (na * na * m2b + nb * nb * m2a) / n ** 2
+          + 4 * delta * (na * m3b - nb * m3a) / n)
+    return (n, mean, m2, m3, m4)
+
+
+def subtract_moments(total, b):
+    """
+    結合した集合の moments から一部の集合 b を取り除いた moments を求める関数（combine_moments の逆）
+    """
+    n, mean, m2, m3, m4 = total
+    nb, mean_b, m2b, m3b, m4b = b
+    na = n - nb
+    if na < 0:
+        raise ValueError("取り除く値の数が全体の値の数を超えています")
+    if na == 0:
+        return (0, 0.0, 0.0, 0.0, 0.0)
+    if nb == 0:
+        return total
+    mean_a = (n * mean - nb * mean_b) / na
+    delta = mean_b - mean_a
+    m2a = max(m2 - m2b - delta ** 2 * na * nb / n, 0.0)
+    m3a = (m3 - m3b - delta ** 3 * na * nb * (na - nb) / n ** 2
+           - 3 * delta * (na * m2b - nb * m2a) / n)
+    m4a = max(m4 - m4b - delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+              - 6 * delta ** 2 * (na * na * m2b + nb * nb * m2a) / n ** 2
+              - 4 * delta * (na * m3b - nb * m3a) / n, 0.0)
+    return (na, mean_a, m2a, m3a, m4a)
+
+
+class ReturnDistribution:
+    """
+    値の追加・削除に合わせて要約統計量とヒストグラムを更新するクラス
+
+    ヒストグラムは幅 width（2のべき乗）の細かいビンで数え、ビンの境界は width の整数倍に揃える。
+    範囲外の値が加わってビンの数が max_fine_bins を超える場合は幅を2倍にして隣接するビンを
+    まとめる（境界が揃っているため、まとめた後の度数も正確）。分位点は経験分布関数の逆関数
+    （numpy.quantile の method="inverted_cdf"）をビンの中で線形に補間して求めるため、誤差は
+    細かいビン1本の幅以下になる。
+
+    Parameters:
+    -----------
+    values : array-like, optional
+        最初に追加する値
+    max_fine_bins : int, optional
+        細かいビンの最大数
+    """
+
+    def __init__(self, values=None, max_fine_bins=MAX_FINE_BINS):
+        if max_fine_bins < 2:
+            raise ValueError("max_fine_bins は2以上を指定してください")
+        self.max_fine_bins = max_fine_bins
+        self._moments = (0, 0.0, 0.0, 0.0, 0.0)
+        self.width = None
+        self._start = 0
+        self._counts = np.zeros(0, dtype=np.int64)
+        if values is not None:
+            self.add(values)
+
+    @staticmethod
+    def _finite(values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        return values[np.isfinite(values)]
+
+    def _bin_index(self, values):
+        return np.floor(values / self.width).astype(np.int64)
+
+    def _coarsen(self):
+        """ビンの幅を2倍にして隣接するビンをまとめる"""
+        index = np.arange(self._start, self._start + len(self._counts)) // 2
+        start = self._start // 2
+        self._counts = np.bincount(index - start, weights=self._counts,
+                                   minlength=index[-1] - start + 1 if len(index) else 0).astype(np.int64)
+        self._start = start
+        self.width *= 2
+
+    def _cover(self, values):
+        """values がすべて収まるようにビンの範囲を広げる"""
+        low, high = values.min(), values.max()
+        if self.width is None:
+            span = max(high - low, abs(high) * 1e-6, 1e-12)
+            # 範囲の2倍を覆う幅にして、後から少し外れた値が加わってもまとめ直さずに済むようにする
+            self.width = 2.0 ** math.ceil(math.log2(2 * span / self.max_fine_bins))
+            self._start = int(np.floor(low / self.width))
+            self._counts = np.zeros(0, dtype=np.int64)
+        while True:
+            first = min(self._start, int(np.floor(low / self.width)))
+            last = max(self._start + len(self._counts) - 1, int(np.floor(high / self.width)))
+            if last - first + 1 <= self.max_fine_bins:
+                break
+            self._coarsen()
+        counts = np.zeros(last - first + 1, dtype=np.int64)
+        offset = self._start - first
+        counts[offset:offset + len(self._counts)] = self._counts
+        self._start, self._counts = first, counts
+
+    def add(self, values):
+        """
+        値を追加する（NaN・無限大は無視する）
+        """
+        values = self._finite(values)
+        if not len(values):
+            return self
+        self._cover(values)
+        self._counts += np.bincount(self._bin_index(values) - self._start, minlength=len(self._counts))
+        self._moments = combine_moments(self._moments, moments(values))
+        return self
+
+    def remove(self, values):
+        """
+        追加済みの値を取り除く（NaN・無限大は無視する）
+
+        Raises:
+        -------
+        ValueError
+            追加されていない値を取り除こうとした場合
+        """
+        values = self._finite(values)
+        if not len(values):
+            return self
+        index = self._bin_index(values) - self._start
+        if self.width is None or index.min() < 0 or index.max() >= len(self._counts):
+            raise ValueError("追加されていない値は取り除けません")
+        counts = self._counts - np.bincount(index, minlength=len(self._counts))
+        if (counts < 0).any():
+            raise ValueError("追加されていない値は取り除けません")
+        self._counts = counts
+        self._moments = subtract_moments(self._moments, moments(values))
+        return self
+
+    def copy(self):
+        """
+        現在の状態のコピーを返す
+        """
+        other = ReturnDistribution(max_fine_bins=self.max_fine_bins)
+        other._moments = self._moments
+        other.width = self.width
+        other._start = self._start
+        other._counts = self._counts.copy()
+        return other
+
+    @property
+    def n(self):
+        return self._moments[0]
+
+    @property
+    def mean(self):
+        return self._moments[1] if self.n else math.nan
+
+    @property
+    def std(self):
+        """標本標準偏差（不偏分散の平方根）"""
+        n, _, m2, _, _ = self._moments
+        return math.sqrt(m2 / (n - 1)) if n > 1 else math.nan
+
+    @property
+    def skew(self):
+        """歪度（pandas の Series.skew と同じ補正済みの値）"""
+        n, _, m2, m3, _ = self._moments
+        if n < 3:
+            return math.nan
+        if m2 <= 0:
+            return 0.0
+        g1 = math.sqrt(n) * m3 / m2 ** 1.5
+        return math.sqrt(n * (n - 1)) / (n - 2) * g1
+
+    @property
+    def kurtosis(self):
+        """超過尖度（pandas の Series.kurt と同じ補正済みの値）"""
+        n, _, m2, _, m4 = self._moments
+        if n < 4:
+            return math.nan
+        if m2 <= 0:
+            return 0.0
+        g2 = n * m4 / (m2 * m2) - 3
+        return ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+    def quantiles(self, qs=QUANTILES):
+        """
+        分位点を求める（細かいビンの中で線形に補間する）
+
+        Parameters:
+        -----------
+        qs : sequence of float, optional
+            0〜1 の確率
+
+        Returns:
+        --------
+        numpy.ndarray
+        """
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.n:
+            return np.full(qs.shape, np.nan)
+        cumulative = np.cumsum(self._counts)
+        target = qs * self.n
+        position = np.minimum(np.searchsorted(cumulative, target, side="left"), len(cumulative) - 1)
+        before = np.where(position > 0, cumulative[np.maximum(position - 1, 0)], 0)
+        fraction = np.clip((target - before) / np.maximum(self._counts[position], 1), 0.0, 1.0)
+        return (self._start + position + fraction) * self.width
+
+    def histogram(self, bins=DEFAULT_BINS):
+        """
+        度数のある範囲を bins 本以下のビンにまとめたヒストグラムを返す
+
+        Parameters:
+        -----------
+        bins : int, optional
+            ビンの最大数
+
+        Returns:
+        --------
+        tuple
+            (ビンの境界（ビン数 + 1）, 度数) の numpy 配列
+        """
+        if not self.n:
+            return np.zeros(0), np.zeros(0, dtype=np.int64)
+        occupied = np.flatnonzero(self._counts)
+        first, last = occupied[0], occupied[-1]
+        group = max(1, -(-(last - first + 1) // bins))
+        # 境界を group の倍数に揃えてまとめる（更新しても既存のビンの境界が変わりにくい）
+        first = (self._start + first) // group * group - self._start
+        size = -(-(last + 1 - first) // group)
+        padded = np.zeros(size * group, dtype=np.int64)
+        available = self._counts[max(first, 0):first + size * group]
+        padded[max(-first, 0):max(-first, 0) + len(available)] = available
+        counts = padded.reshape(size, group).sum(axis=1)
+        edges = (self._start + first + np.arange(size + 1) * group) * self.width
+        return edges, counts
+
+    def summary(self, qs=QUANTILES):
+        """
+        要約統計量の辞書を返す（n, mean, std, skew, kurtosis と分位点 "q01", "q50" など）
+        """
+        result = {"n": self.n, "mean": self.mean, "std": self.std, "skew": self.skew, "kurtosis": self.kurtosis}
+        for q, value in zip(qs, self.quantiles(qs)):
+            result[f"q{round(q * 100):02d}"] = float(value)
+        return result
+
+
+class DistributionCache:
+    """
+    系列（銘柄・期間の長さなど）ごとに ReturnDistribution を保持し、差分だけで更新するクラス
+
+    前回の日付・値と比べて、なくなった日・値が変わった日のリターンを取り除き、新しく加わった日・
+    値が変わった日のリターンを追加する。取り除く値が全体の半分を超える場合は作り直す。
+
+    Parameters:
+    -----------
+    max_series : int, optional
+        保持する系列数の上限（超えた場合は最も古く使われた系列から削除する）
+    max_fine_bins : int, optional
+        ReturnDistribution の細かいビンの最大数
+    """
+
+    def __init__(self, max_series=DEFAULT_MAX_SERIES, max_fine_bins=MAX_FINE_BINS):
+        self.max_series = max_series
+        self.max_fine_bins = max_fine_bins
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+        self.reused_values = 0
+        self.added_values = 0
+        self.removed_values = 0
+
+    def update(self, key, dates, values):
+        """
+        系列の分布を更新して、そのコピーを返す
+
+        Parameters:
+        -----------
+        key : tuple
+            系列を識別するキー
+        dates : array-like
+            各リターンの日付（昇順）
+        values : array-like
+            リターン（NaN の日は除外する）
+
+        Returns:
+        --------
+        ReturnDistribution
+        """
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        values = np.asarray(values, dtype=np.float64)
+        valid = np.isfinite(values)
+        dates, values = dates[valid], values[valid]
+
+        with self._lock:
+            entry = self._series.get(key)
+            if entry is None:
+                distribution = ReturnDistribution(values, max_fine_bins=self.max_fine_bins)
+                reused, added, removed = 0, len(values), 0
+            else:
+                distribution, old_dates, old_values = entry
+                position = np.minimum(np.searchsorted(dates, old_dates), max(len(dates) - 1, 0))
+                matched = (np.zeros(len(old_dates), dtype=bool) if not len(dates)
+                           else (dates[position] == old_dates) & (values[position] == old_values))
+                new = np.ones(len(dates), dtype=bool)
+                new[position[matched]] = False
+                stale = old_values[~matched]
+                if len(stale) * 2 > distribution.n:
+                    distribution = ReturnDistribution(values, max_fine_bins=self.max_fine_bins)
+                else:
+                    distribution.remove(stale).add(values[new])
+                reused, added, removed = int(matched.sum()), int(new.sum()), len(stale)
+            self._series[key] = (distribution, dates, values)
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+            self.reused_values += reused
+            self.added_values += added
+            self.removed_values += removed
+            return distribution.copy()
+
+    def stats(self):
+        """
+        キャッシュの統計情報を返す
+        """
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "reused_values": self.reused_values,
+                "added_values": self.added_values,
+                "removed_values": self.removed_values,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
@@ -0,0 +1,58 @@
+"""
+データ取得で送出する例外
+
+いずれも ValueError を継承するため、取得エラーをまとめて ValueError で扱う既存の呼び出し側は
+そのまま動作する。再試行や「新しいデータなし」の判定はメッセージではなく型で行う。
+"""
+import requests
+
+
+class NoDataError(ValueError):
+    """
+    指定した期間に株価データがないことを表す例外（休日のみの期間など。サブスクリプション対象期間外は含まない）
+    """
+
+
+class RetryableError(ValueError):
+    """
+    時間をおけば成功する可能性がある一時的なエラー（レート制限・サーバーエラー・通信エラー）
+
+    Attributes:
+    -----------
+    status : int or None
+        HTTPステータスコード（通信エラーや Alpha Vantage のレート制限の通知の場合は None）
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def is_retryable_status(status):
+    """
+    再試行すべきHTTPステータスコード（429・5xx）かを判定する関数
+    """
+    return status == 429 or 500 <= status < 600
+
+
+def request_error(message, error):
+    """
+    requests の例外を ValueError に変換する関数（通信エラー・429・5xx の場合は RetryableError）
+
+    Parameters:
+    -----------
+    message : str
+        メッセージの先頭に付ける説明
+    error : requests.exceptions.RequestException
+        元の例外
+
+    Returns:
+    --------
+    ValueError
+    """
+    response = getattr(error, "response", None)
+    status = response.status_code if response is not None else None
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)) or (
+            status is not None and is_retryable_status(status)):
+        return RetryableError(f"{message}: {error}", status)
+    return ValueError(f"{message}: {error}")
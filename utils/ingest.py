@@ -0,0 +1,242 @@
+"""
+銘柄マスタの銘柄の日足を API から取得して株価パネルに書き込むバッチ取り込み
+
+Web アプリを経由せずにパネルを更新するためのモジュール（cron からの定期実行を想定）。
+取得は提供元ごとのトークンバケットでリクエスト数を制限しながらスレッドで並列に行い、
+レート制限・一時的な通信エラー（utils.errors.RetryableError）は指数バックオフで再試行する。パネルへの書き込みは
+メインスレッドでまとめて行う（PricePanel.update はスレッドセーフではないため）。
+パネルにデータがある銘柄は最終日より後の日足だけを取得する。
+
+API の利用回数は utils.quota の記録に BACKGROUND の優先度で加算するため、画面の操作用の枠を
+使い切ることはない。1日の上限に達した銘柄は失敗ではなく次回に持ち越す（deferred）。
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from utils.alerts import fetch_new_bars
+from utils.errors import RetryableError
+from utils.panel import PricePanel
+from utils.quota import BACKGROUND, PROVIDER_NAMES, QuotaExceeded, get_limits, get_quota_ledger, request_priority
+from utils.symbols import load_symbol_master
+
+# 提供元ごとの既定のリクエスト数（1秒あたり）
+# Alpha Vantage の無料プランは 1分あたり5回まで
+DEFAULT_RATES = {"jp": 2.0, "us": 5 / 60}
+
+# 市場ごとの提供元（utils.quota の提供元名）
+MARKET_PROVIDERS = {"jp": "jquants", "us": "alphavantage"}
+
+# 初回取得時の日足の本数（約2年）
+DEFAULT_LOOKBACK = 500
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+
+# 再試行の待ち時間（秒）の基準値。attempt 回目は BACKOFF_SECONDS × 2^attempt に ±50% の揺らぎを加える
+BACKOFF_SECONDS = 1.0
+
+# パネルにまとめて書き込む銘柄数
+WRITE_BATCH_SIZE = 50
+
+
+class TokenBucket:
+    """
+    トークンバケット方式のレート制限（トークンが貯まるまで待つ）
+
+    Parameters:
+    -----------
+    rate_per_second : float
+        1秒あたりに補充するトークン数
+    burst : float, optional
+        貯められるトークンの上限（省略時は max(1, rate_per_second)）
+    """
+
+    def __init__(self, rate_per_second, burst=None, clock=time.monotonic, sleep=time.sleep):
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second は正の値を指定してください")
+        self.rate = rate_per_second
+        self.capacity = burst or max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        トークンを1つ消費する（足りなければ補充されるまで待つ）
+
+        Returns:
+        --------
+        float
+            待った時間（秒）
+        """
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # 先にトークンを予約し、不足分が補充されるまでの時間だけ待つ（待つ順番はロックの取得順）
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+def resolve_symbols(market, symbols=None):
+    """
+    取り込む銘柄を決める関数（省略時は銘柄マスタの全銘柄）
+
+    Parameters:
+    -----------
+    market : str
+        市場（"jp" または "us"）
+    symbols : list of str, optional
+        対象銘柄（日本株は .T を除いた4桁のコード）
+
+    Returns:
+    --------
+    list of str
+    """
+    if symbols:
+        return [symbol.strip().upper().replace(".T", "") if market == "jp" else symbol.strip().upper()
+                for symbol in symbols]
+    return load_symbol_master(market)["code"].tolist()
+
+
+def ingest(market, symbols=None, panel_path=None, workers=DEFAULT_WORKERS, rate=None, max_retries=DEFAULT_MAX_RETRIES,
+           lookback=DEFAULT_LOOKBACK, fetcher=fetch_new_bars, sleep=time.sleep, today=None):
+    """
+    銘柄の日足を並列に取得して株価パネルに書き込む関数
+
+    Parameters:
+    -----------
+    market : str
+        市場（"jp" または "us"）
+    symbols : list of str, optional
+        対象銘柄（省略時は銘柄マスタの全銘柄）
+    panel_path : str or pathlib.Path, optional
+        株価パネルのディレクトリ（省略時は get_panel_dir()、存在しなければ作成する）
+    workers : int, optional
+        取得に使うスレッド数
+    rate : float, optional
+        1秒あたりのリクエスト数の上限（省略時は DEFAULT_RATES[market]）
+    max_retries : int, optional
+        一時的なエラーの再試行回数
+    lookback : int, optional
+        パネルにデータがない銘柄で取得する日足の本数
+    fetcher : callable, optional
+        utils.alerts.fetch_new_bars と同じ引数で日足を返す関数（一時的なエラーは RetryableError を送出する）
+    sleep : callable, optional
+        待機に使う関数（テスト用）
+    today : datetime.date, optional
+        取得終了日（省略時は今日）
+
+    Returns:
+    --------
+    dict
+        実行結果（symbols: 対象銘柄数, updated: 更新した銘柄数, up_to_date: 新しい日足がなかった銘柄数,
+        failed: 銘柄 → エラーメッセージ, rows: 書き込んだ日足の数, requests: API呼び出し回数（再試行を含む）,
+        deferred: 1日の上限に達したため取得しなかった銘柄数, retries: 再試行回数,
+        throttled_seconds: レート制限で待った時間の合計, seconds: 処理時間,
+        quota: 提供元の1日あたりの上限・今日の利用回数（他のプロセスの分を含む）・今回の呼び出し回数）
+
+    Raises:
+    -------
+    ValueError
+        市場の指定が不正な場合
+    """
+    if market not in DEFAULT_RATES:
+        raise ValueError(f"市場の指定が不正です: {market}（jp または us）")
+    started = time.perf_counter()
+    symbols = resolve_symbols(market, symbols)
+    panel = PricePanel.open_or_create(panel_path)
+    since = {}
+    for symbol in symbols:
+        last_date = panel.last_date(symbol)
+        since[symbol] = last_date.strftime("%Y-%m-%d") if last_date is not None else None
+
+    end_date = (today or date.today()).isoformat()
+    bucket = TokenBucket(rate or DEFAULT_RATES[market], sleep=sleep)
+    counters = {"requests": 0, "retries": 0, "throttled_seconds": 0.0}
+    counters_lock = threading.Lock()
+
+    def fetch(symbol):
+        if since[symbol] and since[symbol] >= end_date:
+            return None
+        for attempt in range(max_retries + 1):
+            waited = bucket.acquire()
+            with counters_lock:
+                counters["requests"] += 1
+                counters["throttled_seconds"] += waited
+            try:
+                with request_priority(BACKGROUND):
+                    return fetcher(market, symbol, since[symbol], lookback, today)
+            except QuotaExceeded:
+                # 上限に達した場合は API を呼んでいないため回数に含めない
+                with counters_lock:
+                    counters["requests"] -= 1
+                raise
+            except RetryableError:
+                # レート制限・サーバーエラー・通信エラーは待ち時間を延ばしながら再試行する
+                if attempt == max_retries:
+                    raise
+            with counters_lock:
+                counters["retries"] += 1
+            sleep(BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    result = {"symbols": len(symbols), "updated": 0, "up_to_date": 0, "deferred": 0, "failed": {}, "rows": 0}
+    pending = {}
+
+    def flush():
+        if pending:
+            panel.update(pending)
+            pending.clear()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(fetch, symbol): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                data = future.result()
+            except QuotaExceeded:
+                result["deferred"] += 1
+                continue
+            except Exception as e:
+                result["failed"][symbol] = str(e)
+                continue
+            if data is None or data.empty:
+                result["up_to_date"] += 1
+                continue
+            pending[symbol] = data
+            result["updated"] += 1
+            result["rows"] += len(data)
+            if len(pending) >= WRITE_BATCH_SIZE:
+                flush()
+    flush()
+
+    result.update(counters)
+    result["seconds"] = time.perf_counter() - started
+    provider = MARKET_PROVIDERS[market]
+    result["quota"] = {
+        "provider": PROVIDER_NAMES[provider],
+        "requests": counters["requests"],
+        "daily_limit": get_limits(provider)[1],
+        "used_today": _used_today(market),
+    }
+    return result
+
+
+def _used_today(market):
+    """提供元・API キーの今日の利用回数（記録がない・キーが未設定の場合は None）"""
+    from utils.data_fetcher import get_alphavantage_api_key
+
+    try:
+        api_key = get_alphavantage_api_key() if market == "us" else os.environ.get("JQUANTS_EMAIL")
+    except ValueError:
+        return None
+    return get_quota_ledger().usage(MARKET_PROVIDERS[market], api_key)["day"]
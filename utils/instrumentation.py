@@ -0,0 +1,261 @@
+"""
+取得・計算・描画の処理時間を計測する軽量な計測モジュール
+
+- span: 処理区間の時間を計測するコンテキストマネージャー（入れ子可）
+- instrumented: 関数全体を span で囲むデコレーター
+- increment: キャッシュのヒット・ミスなどのカウンター
+- register_collector: 出力時に値を取得するゲージ（キャッシュの統計など）
+
+計測結果は snapshot() で集計値を取得でき、to_prometheus() で Prometheus のテキスト形式に
+出力できる。環境変数 STOCK_VISUALIZER_TRACE_LOG にファイルパスを指定すると、
+終了した区間を1行1件の JSON として追記する。
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+TRACE_LOG_ENV = "STOCK_VISUALIZER_TRACE_LOG"
+METRIC_PREFIX = "stock_visualizer"
+
+# 直近の区間を保持する件数
+RECENT_SPANS = 500
+
+
+class Recorder:
+    """
+    区間の計測結果とカウンターを保持するクラス（スレッドセーフ）
+    """
+
+    def __init__(self, recent=RECENT_SPANS):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans = {}
+        self._counters = {}
+        self._collectors = {}
+        self.recent = deque(maxlen=recent)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        started_at = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            self._finish(name, parent, started_at, elapsed, error, attrs)
+
+    def _finish(self, name, parent, started_at, elapsed, error, attrs):
+        record = {
+            "name": name,
+            "parent": parent,
+            "start": datetime.fromtimestamp(started_at).isoformat(timespec="milliseconds"),
+            "ms": elapsed * 1000,
+            "error": error,
+            "thread": threading.current_thread().name,
+            **({"attrs": attrs} if attrs else {}),
+        }
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = {"count": 0, "errors": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+            stats["count"] += 1
+            stats["errors"] += error is not None
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            stats["last"] = elapsed
+            self.recent.append(record)
+
+        path = os.environ.get(TRACE_LOG_ENV)
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_collector(self, name, func):
+        with self._lock:
+            self._collectors[name] = func
+
+    def snapshot(self):
+        """
+        集計値を返す
+
+        Returns:
+        --------
+        dict
+            spans: 区間名ごとの count, errors, total_ms, mean_ms, max_ms, last_ms
+            counters: {(名前, ラベル): 値}
+            gauges: {コレクター名: {項目: 値}}
+        """
+        with self._lock:
+            spans = {
+                name: {
+                    "count": s["count"],
+                    "errors": s["errors"],
+                    "total_ms": s["total"] * 1000,
+                    "mean_ms": s["total"] / s["count"] * 1000,
+                    "max_ms": s["max"] * 1000,
+                    "last_ms": s["last"] * 1000,
+                }
+                for name, s in self._spans.items()
+            }
+            counters = dict(self._counters)
+            collectors = dict(self._collectors)
+        gauges = {}
+        for name, func in collectors.items():
+            try:
+                gauges[name] = func()
+            except Exception:
+                continue
+        return {"spans": spans, "counters": counters, "gauges": gauges}
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self.recent.clear()
+
+
+_recorder = Recorder()
+
+
+def get_recorder():
+    """プロセス全体で共有する Recorder を返す"""
+    return _recorder
+
+
+def span(name, **attrs):
+    """
+    処理区間の時間を計測するコンテキストマネージャー
+
+    Parameters:
+    -----------
+    name : str
+        区間名（例: "jquants.daily_quotes"）
+    **attrs
+        区間に付与する属性（ブロック内で返される辞書に追加も可能）
+
+    Examples:
+    ---------
+    >>> with span("jquants.daily_quotes", code="7203") as attrs:
+    ...     attrs["rows"] = 250
+    """
+    return _recorder.span(name, **attrs)
+
+
+def instrumented(name=None):
+    """
+    関数の呼び出しを span で計測するデコレーター（区間名の省略時は関数名）
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _recorder.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(name, value=1, **labels):
+    """
+    カウンターを加算する関数
+
+    Parameters:
+    -----------
+    name : str
+        カウンター名（例: "cache_requests"）
+    value : int, optional
+        加算する値
+    **labels
+        ラベル（例: cache="price", result="hit"）
+    """
+    _recorder.increment(name, value, **labels)
+
+
+def register_collector(name, func):
+    """
+    出力時に呼び出して値を取得するゲージを登録する関数
+
+    Parameters:
+    -----------
+    name : str
+        コレクター名
+    func : callable
+        {項目名: 数値} を返す関数
+    """
+    _recorder.register_collector(name, func)
+
+
+def _labels(items):
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items) + "}"
+
+
+def to_prometheus(snapshot=None):
+    """
+    計測結果を Prometheus のテキスト形式に変換する関数
+
+    Parameters:
+    -----------
+    snapshot : dict, optional
+        snapshot() の結果（省略時は現在の値）
+
+    Returns:
+    --------
+    str
+    """
+    snapshot = snapshot or _recorder.snapshot()
+    p = METRIC_PREFIX
+    lines = [
+        f"# HELP {p}_span_seconds 処理区間の所要時間",
+        f"# TYPE {p}_span_seconds summary",
+    ]
+    for name, s in sorted(snapshot["spans"].items()):
+        label = _labels([("span", name)])
+        lines.append(f"{p}_span_seconds_count{label} {s['count']}")
+        lines.append(f"{p}_span_seconds_sum{label} {s['total_ms'] / 1000:.6f}")
+    lines += [f"# HELP {p}_span_max_seconds 処理区間の最大所要時間", f"# TYPE {p}_span_max_seconds gauge"]
+    for name, s in sorted(snapshot["spans"].items()):
+        lines.append(f"{p}_span_max_seconds{_labels([('span', name)])} {s['max_ms'] / 1000:.6f}")
+    lines += [f"# HELP {p}_span_errors_total 例外で終了した処理区間の数", f"# TYPE {p}_span_errors_total counter"]
+    for name, s in sorted(snapshot["spans"].items()):
+        lines.append(f"{p}_span_errors_total{_labels([('span', name)])} {s['errors']}")
+
+    counter_names = sorted({name for name, _ in snapshot["counters"]})
+    for counter in counter_names:
+        lines.append(f"# TYPE {p}_{counter}_total counter")
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            if name == counter:
+                lines.append(f"{p}_{name}_total{_labels(labels)} {value}")
+
+    for collector, values in sorted(snapshot["gauges"].items()):
+        for key, value in sorted(values.items()):
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {p}_{collector}_{key} gauge")
+                lines.append(f"{p}_{collector}_{key} {value}")
+    return "\n".join(lines) + "\n"
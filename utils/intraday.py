@@ -0,0 +1,264 @@
+"""
+分足の段階的な保持（1分足 → 5分足 → 1時間足 → 日足）
+
+取得した1分足は短期間だけ保持し、5分足・1時間足・日足に集約して、それぞれの保持期間
+（細かい足ほど短い）を過ぎたものから削除する。集約は新しく取り込んだ足を含む区間だけを
+計算し直す。読み出し時は、要求された期間をカバーし、かつ本数が上限以下になる中で
+最も細かい足を返すため、チャートに数十万本の足を渡すことはない。
+
+時刻は取引所の現地時刻（タイムゾーンなし）で扱い、日足はその日付ごとに集約する。
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.resample import aggregate_ohlcv
+
+INTRADAY_DIR_ENV = "STOCK_VISUALIZER_INTRADAY_DIR"
+DEFAULT_INTRADAY_DIR = Path(__file__).parent.parent / "data" / "intraday"
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# 足の名前と長さ（秒）。先頭が取り込む足で、以降は1つ前の足から集約する
+TIERS = [("1min", 60), ("5min", 300), ("60min", 3600), ("daily", 86400)]
+
+# 足ごとの保持日数（None は無期限）
+DEFAULT_RETENTION_DAYS = {"1min": 7, "5min": 60, "60min": 730, "daily": None}
+
+# チャートに渡す足の本数の上限
+DEFAULT_MAX_POINTS = 2000
+
+SECONDS_PER_DAY = 86400
+
+
+def get_intraday_dir():
+    """
+    分足の保存先ディレクトリを取得する関数（環境変数 STOCK_VISUALIZER_INTRADAY_DIR で変更可能）
+
+    Returns:
+    --------
+    pathlib.Path
+    """
+    return Path(os.environ.get(INTRADAY_DIR_ENV) or DEFAULT_INTRADAY_DIR)
+
+
+def _to_seconds(value):
+    """日時（文字列・datetime64・Timestamp）を現地時刻の UNIX 秒にする"""
+    return int(np.datetime64(pd.Timestamp(value).to_datetime64(), "s").astype(np.int64))
+
+
+def rollup(times, values, seconds):
+    """
+    足を指定した長さに集約する関数
+
+    Parameters:
+    -----------
+    times : numpy.ndarray
+        各足の開始時刻（UNIX 秒、昇順）
+    values : numpy.ndarray
+        Open/High/Low/Close/Volume（行数 × 5）
+    seconds : int
+        集約後の足の長さ（秒）
+
+    Returns:
+    --------
+    tuple of numpy.ndarray
+        (集約後の開始時刻, 集約後の値)
+    """
+    return aggregate_ohlcv(times // seconds * seconds, values)
+
+
+def _merge(times, values, new_times, new_values):
+    """既存の足に新しい足を追加する（同じ時刻の足は新しい方で置き換える）"""
+    keep = ~np.isin(times, new_times)
+    times = np.concatenate([times[keep], new_times])
+    values = np.concatenate([values[keep], new_values])
+    order = np.argsort(times, kind="stable")
+    return times[order], values[order]
+
+
+class TieredBars:
+    """
+    1銘柄分の分足を足の長さごとに保持するクラス
+
+    Parameters:
+    -----------
+    retention_days : dict, optional
+        足ごとの保持日数（省略時は DEFAULT_RETENTION_DAYS）
+    """
+
+    def __init__(self, retention_days=None):
+        self.retention_days = {**DEFAULT_RETENTION_DAYS, **(retention_days or {})}
+        self.tiers = {name: (np.empty(0, dtype=np.int64), np.empty((0, len(FIELDS)))) for name, _ in TIERS}
+        # 取り込んだ最も古い足の時刻（期間をカバーしているかの判定に使う）
+        self.first_time = None
+
+    def __len__(self):
+        return len(self.tiers[TIERS[0][0]][0])
+
+    @property
+    def last_time(self):
+        """最新の足の時刻（pandas.Timestamp、足がなければ None）"""
+        # 細かい足ほど新しい時刻まで表すため、足のある最も細かい足の最後の時刻を使う
+        for name, _ in TIERS:
+            times = self.tiers[name][0]
+            if len(times):
+                return pd.Timestamp(int(times[-1]), unit="s")
+        return None
+
+    def ingest(self, data):
+        """
+        1分足を取り込み、影響を受ける区間の集約を計算し直してから保持期間を過ぎた足を削除する
+
+        保持期間を過ぎて1分足が削除された日に、その日の一部の足だけを後から取り込むと、
+        その日の集約は取り込んだ足だけから計算される（1日単位で取り込むこと）。
+
+        Parameters:
+        -----------
+        data : pandas.DataFrame
+            DatetimeIndex を持つ1分足（Open/High/Low/Close/Volume）
+
+        Returns:
+        --------
+        int
+            取り込んだ足の本数
+        """
+        if data is None or data.empty:
+            return 0
+        new_times = data.index.values.astype("datetime64[s]").astype(np.int64)
+        new_values = np.column_stack([data[field].to_numpy(dtype=np.float64) for field in FIELDS])
+        order = np.argsort(new_times, kind="stable")
+        new_times, new_values = new_times[order], new_values[order]
+
+        base = TIERS[0][0]
+        self.tiers[base] = _merge(*self.tiers[base], new_times, new_values)
+        lo, hi = int(new_times[0]), int(new_times[-1])
+        self.first_time = lo if self.first_time is None else min(self.first_time, lo)
+
+        source_times, source_values = self.tiers[base]
+        for name, seconds in TIERS[1:]:
+            start = lo // seconds * seconds
+            stop = hi // seconds * seconds + seconds
+            selected = (source_times >= start) & (source_times < stop)
+            times, values = rollup(source_times[selected], source_values[selected], seconds)
+            self.tiers[name] = _merge(*self.tiers[name], times, values)
+            source_times, source_values = self.tiers[name]
+
+        self._prune()
+        return len(new_times)
+
+    def _cutoff(self, name):
+        """足の保持期間の開始時刻（日単位に切り捨て）"""
+        days = self.retention_days.get(name)
+        if days is None or self.last_time is None:
+            return None
+        last_day = _to_seconds(self.last_time) // SECONDS_PER_DAY
+        return (last_day - days + 1) * SECONDS_PER_DAY
+
+    def _prune(self):
+        cutoffs = {name: self._cutoff(name) for name, _ in TIERS}
+        for name, cutoff in cutoffs.items():
+            if cutoff is not None:
+                times, values = self.tiers[name]
+                keep = times >= cutoff
+                self.tiers[name] = (times[keep], values[keep])
+
+    def valid_from(self, name):
+        """
+        その足で欠けなく取得できる最初の時刻（UNIX 秒）
+        """
+        if self.first_time is None:
+            return None
+        first_day = self.first_time // SECONDS_PER_DAY * SECONDS_PER_DAY
+        cutoff = self._cutoff(name)
+        return first_day if cutoff is None else max(first_day, cutoff)
+
+    def query(self, start=None, end=None, max_points=DEFAULT_MAX_POINTS):
+        """
+        期間をカバーし、本数が上限以下になる中で最も細かい足を返す
+
+        Parameters:
+        -----------
+        start : str or pandas.Timestamp, optional
+            開始時刻（省略時は保持している全期間）
+        end : str or pandas.Timestamp, optional
+            終了時刻
+        max_points : int, optional
+            足の本数の上限（日足でも超える場合は日足をそのまま返す）
+
+        Returns:
+        --------
+        tuple
+            (足の名前, pandas.DataFrame)
+        """
+        if self.first_time is None:
+            return TIERS[-1][0], self._frame(*self.tiers[TIERS[-1][0]])
+        start_s = max(_to_seconds(start), self.first_time) if start is not None else self.first_time
+        end_s = _to_seconds(end) if end is not None else None
+
+        for name, seconds in TIERS:
+            times, values = self.tiers[name]
+            # 開始時刻を含む足から返す
+            lo = int(np.searchsorted(times, start_s // seconds * seconds, side="left"))
+            hi = int(np.searchsorted(times, end_s, side="right")) if end_s is not None else len(times)
+            covered = self.valid_from(name) <= start_s // SECONDS_PER_DAY * SECONDS_PER_DAY
+            if name == TIERS[-1][0] or (covered and hi - lo <= max_points):
+                return name, self._frame(times[lo:hi], values[lo:hi])
+
+    @staticmethod
+    def _frame(times, values):
+        index = pd.DatetimeIndex(times.astype("datetime64[s]").astype("datetime64[ns]"), name="Datetime")
+        return pd.DataFrame({field: values[:, i] for i, field in enumerate(FIELDS)}, index=index)
+
+    def tier_frame(self, name):
+        """
+        指定した足を全期間返す
+        """
+        return self._frame(*self.tiers[name])
+
+
+class IntradayStore:
+    """
+    TieredBars を銘柄ごとのファイル（.npz）に保存・読み込みするクラス
+
+    Parameters:
+    -----------
+    root : str or pathlib.Path, optional
+        保存先ディレクトリ（省略時は get_intraday_dir()）
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else get_intraday_dir()
+
+    def path(self, symbol):
+        return self.root / f"{symbol}.npz"
+
+    def load(self, symbol):
+        """
+        保存済みの分足を読み込む（なければ None）
+        """
+        path = self.path(symbol)
+        if not path.exists():
+            return None
+        bars = TieredBars()
+        with np.load(path) as f:
+            for name, _ in TIERS:
+                bars.tiers[name] = (f[f"{name}_times"], f[f"{name}_values"])
+            bars.first_time = int(f["first_time"]) if f["first_time"] >= 0 else None
+        return bars
+
+    def save(self, symbol, bars):
+        """
+        分足を保存する（一時ファイルに書き込んでから置き換える）
+        """
+        path = self.path(symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        arrays = {}
+        for name, _ in TIERS:
+            arrays[f"{name}_times"], arrays[f"{name}_values"] = bars.tiers[name]
+        with open(tmp, "wb") as f:
+            np.savez(f, first_time=np.int64(-1 if bars.first_time is None else bars.first_time), **arrays)
+        os.replace(tmp, path)
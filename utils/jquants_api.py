@@ -4,13 +4,33 @@ J-Quants API関連の機能を提供するユーティリティモジュール
 import os
 import requests
 import json
-import pandas as pd
 from datetime import datetime, date
+from utils.replay import http_get, http_post
+from utils.decoder import decode_daily_quotes, loads
+from utils.errors import NoDataError, RetryableError, is_retryable_status, request_error
+from utils.instrumentation import instrumented, span
+from utils.quota import QuotaExceeded, charge_request
 
 # J-Quants APIのサブスクリプション対象期間
 SUBSCRIPTION_START_DATE = "2023-02-10"
 SUBSCRIPTION_END_DATE = "2025-02-10"
 
+# 接続先のベースURL（モックサーバー利用時は環境変数で上書きする）
+JQUANTS_BASE_URL_ENV = "JQUANTS_API_BASE_URL"
+DEFAULT_JQUANTS_BASE_URL = "https://api.jquants.com"
+
+def get_base_url():
+    """
+    J-Quants APIのベースURLを取得する関数
+    
+    Returns:
+    --------
+    str
+        ベースURL（末尾のスラッシュなし）
+    """
+    return (os.environ.get(JQUANTS_BASE_URL_ENV) or DEFAULT_JQUANTS_BASE_URL).rstrip("/")
+
+@instrumented("jquants.get_refresh_token")
 def get_refresh_token():
     """
     J-Quants APIからリフレッシュトークンを取得する関数
@@ -23,7 +43,7 @@ def get_refresh_token():
     Raises:
     -------
     ValueError
-        トークン取得に失敗した場合
+        トークン取得に失敗した場合（通信エラー・429・5xx の場合は RetryableError）
     """
     try:
         email = os.environ.get("JQUANTS_EMAIL")
@@ -32,8 +52,8 @@ def get_refresh_token():
         if not email or not password:
             raise ValueError("環境変数 JQUANTS_EMAIL または JQUANTS_PASSWORD が設定されていません")
             
-        url = "https://api.jquants.com/v1/token/auth_user"
-        res = requests.post(url, json={"mailaddress": email, "password": password})
+        url = f"{get_base_url()}/v1/token/auth_user"
+        res = http_post(url, json={"mailaddress": email, "password": password})
         res.raise_for_status()  # HTTPエラーがあれば例外を発生
         
         response_json = res.json()
@@ -46,12 +66,13 @@ def get_refresh_token():
             raise ValueError(f"リフレッシュトークン取得失敗: refreshTokenがレスポンスに含まれていません。レスポンス: {response_json}")
                 
     except requests.exceptions.RequestException as e:
-        raise ValueError(f"J-Quants APIリクエストエラー: {e}")
+        raise request_error("J-Quants APIリクエストエラー", e)
     except json.JSONDecodeError:
         raise ValueError(f"J-Quants API JSONデコードエラー: {res.text}")
     except Exception as e:
         raise ValueError(f"J-Quants APIリフレッシュトークン取得エラー: {e}")
 
+@instrumented("jquants.get_id_token")
 def get_id_token(refresh_token):
     """
     J-Quants APIからIDトークンを取得する関数
@@ -69,13 +90,13 @@ def get_id_token(refresh_token):
     Raises:
     -------
     ValueError
-        IDトークン取得に失敗した場合
+        IDトークン取得に失敗した場合（通信エラー・429・5xx の場合は RetryableError）
     """
     try:
-        id_token_url = "https://api.jquants.com/v1/token/auth_refresh"
+        id_token_url = f"{get_base_url()}/v1/token/auth_refresh"
         params = {"refreshtoken": refresh_token}
         
-        id_token_res = requests.post(id_token_url, params=params)
+        id_token_res = http_post(id_token_url, params=params)
         id_token_res.raise_for_status()
         
         id_token_json = id_token_res.json()
@@ -86,7 +107,7 @@ def get_id_token(refresh_token):
         
         return id_token
     except requests.exceptions.RequestException as e:
-        raise ValueError(f"J-Quants API IDトークンリクエストエラー: {e}")
+        raise request_error("J-Quants API IDトークンリクエストエラー", e)
     except json.JSONDecodeError:
         raise ValueError(f"J-Quants API IDトークン JSONデコードエラー: {id_token_res.text}")
     except Exception as e:
@@ -128,7 +149,7 @@ def validate_date_range(from_date, to_date):
     Raises:
     -------
     ValueError
-        日付範囲が完全にサブスクリプション対象期間外の場合
+        日付範囲が完全にサブスクリプション対象期間外の場合（契約の期限切れ・設定の誤りのため NoDataError にしない）
     """
     subscription_start = datetime.strptime(SUBSCRIPTION_START_DATE, "%Y-%m-%d").date()
     subscription_end = datetime.strptime(SUBSCRIPTION_END_DATE, "%Y-%m-%d").date()
@@ -147,7 +168,30 @@ def validate_date_range(from_date, to_date):
     
     return valid_from.strftime("%Y-%m-%d"), valid_to.strftime("%Y-%m-%d")
 
-def get_stock_data(symbol, from_date=None, to_date=None):
+def parse_daily_quotes(data, adjustment=False):
+    """
+    daily_quotes のレコードを株価データフレームに変換する関数
+    
+    Parameters:
+    -----------
+    data : list of dict
+        daily_quotes の各行
+    adjustment : bool, optional
+        調整係数（AdjustmentFactor）と調整後終値（Adj Close）の列を残すか
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        株価データ
+        
+    Raises:
+    -------
+    ValueError
+        必要なカラムがない場合
+    """
+    return decode_daily_quotes(data, adjustment=adjustment)
+
+def get_stock_data(symbol, from_date=None, to_date=None, adjustment=False):
     """
     J-Quants APIから株価データを取得する関数
     
@@ -159,6 +203,8 @@ def get_stock_data(symbol, from_date=None, to_date=None):
         取得開始日（YYYY-MM-DD形式）
     to_date : str, optional
         取得終了日（YYYY-MM-DD形式）
+    adjustment : bool, optional
+        調整係数（AdjustmentFactor）と調整後終値（Adj Close）の列を残すか
         
     Returns:
     --------
@@ -167,8 +213,14 @@ def get_stock_data(symbol, from_date=None, to_date=None):
         
     Raises:
     -------
+    NoDataError
+        サブスクリプション対象期間内で、期間内に株価データがない場合（休日のみの期間など）
+    RetryableError
+        レート制限・サーバーエラー・通信エラーの場合
     ValueError
         データ取得に失敗した場合
+    QuotaExceeded
+        API の利用回数の上限に達した場合
     """
     try:
         code = symbol.replace('.T', '')
@@ -199,7 +251,7 @@ def get_stock_data(symbol, from_date=None, to_date=None):
         
         id_token = get_id_token(refresh_token)
         
-        url = "https://api.jquants.com/v1/prices/daily_quotes"
+        url = f"{get_base_url()}/v1/prices/daily_quotes"
         headers = {"Authorization": f"Bearer {id_token}"}
         
         params = {
@@ -207,40 +259,47 @@ def get_stock_data(symbol, from_date=None, to_date=None):
             "from": valid_from,
             "to": valid_to
         }
-            
-        res = requests.get(url, headers=headers, params=params)
         
-        if res.status_code != 200:
-            error_msg = f"J-Quants APIエラー: ステータスコード {res.status_code}"
-            try:
-                error_json = res.json()
-                if "message" in error_json:
-                    error_msg += f", メッセージ: {error_json['message']}"
-            except:
-                error_msg += f", レスポンス: {res.text}"
-            raise ValueError(error_msg)
-        
-        data_json = res.json()
-        data = data_json.get("daily_quotes", [])
+        data = []
+        page = 0
+        while True:
+            page += 1
+            charge_request("jquants", os.environ.get("JQUANTS_EMAIL"), get_base_url(), DEFAULT_JQUANTS_BASE_URL)
+            with span("jquants.daily_quotes", code=code, page=page):
+                res = http_get(url, headers=headers, params=params)
+            
+            if res.status_code != 200:
+                error_msg = f"J-Quants APIエラー: ステータスコード {res.status_code}"
+                try:
+                    error_json = res.json()
+                    if "message" in error_json:
+                        error_msg += f", メッセージ: {error_json['message']}"
+                except:
+                    error_msg += f", レスポンス: {res.text}"
+                if is_retryable_status(res.status_code):
+                    raise RetryableError(error_msg, res.status_code)
+                raise ValueError(error_msg)
+            
+            with span("jquants.json_parse", bytes=len(res.content)):
+                data_json = loads(res.content)
+            data.extend(data_json.get("daily_quotes", []))
+            
+            # レスポンスが分割されている場合は pagination_key で続きを取得
+            pagination_key = data_json.get("pagination_key")
+            if not pagination_key:
+                break
+            params = {**params, "pagination_key": pagination_key}
         
         if not data:
-            raise ValueError(f"J-Quants APIデータ取得失敗: データが空です。レスポンス: {data_json}")
+            raise NoDataError(f"J-Quants APIデータ取得失敗: データが空です。レスポンス: {data_json}")
                 
-        df = pd.DataFrame(data)
-        df["Date"] = pd.to_datetime(df["Date"])
-        df = df.set_index("Date")
-        
-        columns_to_extract = ["Open", "High", "Low", "Close", "Volume"]
-        available_columns = [col for col in columns_to_extract if col in df.columns]
-        
-        if not available_columns:
-            raise ValueError(f"J-Quants APIデータ取得失敗: 必要なカラムがありません。利用可能なカラム: {list(df.columns)}")
-        
-        df = df[available_columns].astype(float)
-        return df
+        with span("jquants.decode", rows=len(data)):
+            return parse_daily_quotes(data, adjustment=adjustment)
             
-    except ValueError:
-        # ValueErrorはそのまま再発生させる
+    except (ValueError, QuotaExceeded):
+        # ValueError・利用回数の上限はそのまま再発生させる
         raise
+    except requests.exceptions.RequestException as e:
+        raise request_error("J-Quants APIデータ取得エラー", e)
     except Exception as e:
         raise ValueError(f"J-Quants APIデータ取得エラー: {e}")
@@ -0,0 +1,518 @@
+"""
+J-Quants / Alpha Vantage APIのローカル代替（モック）サーバー
+
+記録済みのカセット（utils.replay）または決定的に生成した疑似株価を
+本番APIと同じ形式で返す。レイテンシとレート制限を設定できるため、
+キャッシュ・並列化・ページネーションの変更をオフラインで再現性のある形で計測できる。
+
+クライアント側は環境変数 JQUANTS_API_BASE_URL と ALPHAVANTAGE_API_BASE_URL に
+サーバーのURLを設定して利用する。
+"""
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from utils.replay import cassette_path
+
+MOCK_REFRESH_TOKEN = "mock-refresh-token"
+MOCK_ID_TOKEN = "mock-id-token"
+
+# 疑似株価の生成開始日（この日からの乱数列で価格を決めるため、取得期間によらず値は一定）
+SYNTHETIC_START_DATE = date(2000, 1, 3)
+
+ALPHAVANTAGE_RATE_LIMIT_NOTE = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is "
+    "5 calls per minute. (mock server)"
+)
+
+
+@lru_cache(maxsize=256)
+def _synthetic_series(symbol, end_date):
+    rng = random.Random(zlib.crc32(symbol.encode("utf-8")))
+    price = rng.uniform(500, 5000)
+    rows = []
+    day = SYNTHETIC_START_DATE
+    while day <= end_date:
+        if day.weekday() < 5:
+            open_ = price * math.exp(rng.gauss(0, 0.004))
+            close = open_ * math.exp(rng.gauss(0.0002, 0.015))
+            high = max(open_, close) * (1 + abs(rng.gauss(0, 0.006)))
+            low = min(open_, close) * (1 - abs(rng.gauss(0, 0.006)))
+            volume = int(rng.lognormvariate(13, 0.6))
+            rows.append((day.isoformat(), round(open_, 1), round(high, 1), round(low, 1), round(close, 1), volume))
+            price = close
+        day += timedelta(days=1)
+    return tuple(rows)
+
+
+def generate_daily_bars(symbol, from_date=None, to_date=None):
+    """
+    銘柄ごとに決定的な疑似日足データを生成する関数
+
+    Parameters:
+    -----------
+    symbol : str
+        証券コードまたはティッカーシンボル
+    from_date : str, optional
+        開始日（YYYY-MM-DD形式）
+    to_date : str, optional
+        終了日（YYYY-MM-DD形式、省略時は今日）
+
+    Returns:
+    --------
+    list of tuple
+        (日付, 始値, 高値, 安値, 終値, 出来高) のリスト（日付昇順）
+    """
+    end = datetime.strptime(to_date, "%Y-%m-%d").date() if to_date else date.today()
+    rows = _synthetic_series(symbol, end)
+    if from_date:
+        rows = [row for row in rows if row[0] >= from_date]
+    return list(rows)
+
+
+def synthetic_daily_quotes(code, from_date=None, to_date=None):
+    """
+    J-Quants daily_quotes 形式の疑似データを生成する関数
+
+    Parameters:
+    -----------
+    code : str
+        証券コード（4桁または5桁）
+    from_date : str, optional
+        開始日（YYYY-MM-DD形式）
+    to_date : str, optional
+        終了日（YYYY-MM-DD形式）
+
+    Returns:
+    --------
+    list of dict
+        daily_quotes の各行
+    """
+    code = code.replace(".T", "")
+    code5 = code if len(code) == 5 else f"{code}0"
+    return [
+        {
+            "Date": day,
+            "Code": code5,
+            "Open": open_,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "UpperLimit": "0",
+            "LowerLimit": "0",
+            "Volume": float(volume),
+            "TurnoverValue": round(close * volume, 1),
+            "AdjustmentFactor": 1.0,
+            "AdjustmentOpen": open_,
+            "AdjustmentHigh": high,
+            "AdjustmentLow": low,
+            "AdjustmentClose": close,
+            "AdjustmentVolume": float(volume),
+        }
+        for day, open_, high, low, close, volume in generate_daily_bars(code[:4], from_date, to_date)
+    ]
+
+
+def synthetic_time_series_daily(symbol, outputsize="compact", from_date=None, adjusted=False):
+    """
+    Alpha Vantage TIME_SERIES_DAILY 形式の疑似レスポンスを生成する関数
+
+    Parameters:
+    -----------
+    symbol : str
+        ティッカーシンボル
+    outputsize : str, optional
+        "compact"（直近100件）または "full"
+    from_date : str, optional
+        "full" の場合の開始日（YYYY-MM-DD形式、省略時は全期間）
+    adjusted : bool, optional
+        TIME_SERIES_DAILY_ADJUSTED 形式にするか（疑似データには分割・配当はない）
+
+    Returns:
+    --------
+    dict
+        TIME_SERIES_DAILY のレスポンス
+    """
+    rows = generate_daily_bars(symbol, from_date)
+    if outputsize != "full":
+        rows = rows[-100:]
+    if adjusted:
+        series = {
+            day: {
+                "1. open": f"{open_:.4f}",
+                "2. high": f"{high:.4f}",
+                "3. low": f"{low:.4f}",
+                "4. close": f"{close:.4f}",
+                "5. adjusted close": f"{close:.4f}",
+                "6. volume": str(volume),
+                "7. dividend amount": "0.0000",
+                "8. split coefficient": "1.0",
+            }
+            for day, open_, high, low, close, volume in reversed(rows)
+        }
+    else:
+        series = {
+            day: {
+                "1. open": f"{open_:.4f}",
+                "2. high": f"{high:.4f}",
+                "3. low": f"{low:.4f}",
+                "4. close": f"{close:.4f}",
+                "5. volume": str(volume),
+            }
+            for day, open_, high, low, close, volume in reversed(rows)
+        }
+    return {
+        "Meta Data": {
+            "1. Information": "Daily Prices (open, high, low, close) and Volumes",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": rows[-1][0] if rows else "",
+            "4. Output Size": "Full size" if outputsize == "full" else "Compact",
+            "5. Time Zone": "US/Eastern",
+        },
+        "Time Series (Daily)": series,
+    }
+
+
+# 疑似分足の取引時間（米国市場の現地時刻 9:30〜16:00）と、full で返す日数
+INTRADAY_OPEN_MINUTE = 9 * 60 + 30
+INTRADAY_MINUTES = 390
+INTRADAY_FULL_DAYS = 30
+
+
+@lru_cache(maxsize=1024)
+def generate_intraday_bars(symbol, day):
+    """
+    1日分の疑似1分足を生成する関数（始値・終値はその日の疑似日足と一致する）
+
+    Parameters:
+    -----------
+    symbol : str
+        ティッカーシンボル
+    day : str
+        日付（YYYY-MM-DD形式、平日）
+
+    Returns:
+    --------
+    list of tuple
+        (時刻, 始値, 高値, 安値, 終値, 出来高) のリスト（時刻昇順）
+    """
+    # 日足の系列は最終日ごとにキャッシュされるため、今日までの系列から該当日を探す
+    series = _synthetic_series(symbol, max(date.fromisoformat(day), date.today()))
+    daily = next((row for row in series if row[0] == day), None)
+    if daily is None:
+        return ()
+    _, day_open, _, _, day_close, day_volume = daily
+    rng = random.Random(zlib.crc32(f"{symbol}:{day}".encode("utf-8")))
+    # ランダムウォークを始値から終値へのブラウン橋に補正する
+    walk = [0.0]
+    for _ in range(INTRADAY_MINUTES):
+        walk.append(walk[-1] + rng.gauss(0, 0.0008))
+    drift = math.log(day_close / day_open) - walk[-1]
+    path = [day_open * math.exp(w + drift * i / INTRADAY_MINUTES) for i, w in enumerate(walk)]
+    rows = []
+    for i in range(INTRADAY_MINUTES):
+        minute = INTRADAY_OPEN_MINUTE + i
+        open_, close = path[i], path[i + 1]
+        high = max(open_, close) * (1 + abs(rng.gauss(0, 0.0003)))
+        low = min(open_, close) * (1 - abs(rng.gauss(0, 0.0003)))
+        volume = int(day_volume / INTRADAY_MINUTES * rng.lognormvariate(0, 0.5))
+        rows.append((f"{day} {minute // 60:02d}:{minute % 60:02d}:00", round(open_, 4), round(high, 4),
+                     round(low, 4), round(close, 4), volume))
+    return tuple(rows)
+
+
+def synthetic_time_series_intraday(symbol, interval="1min", outputsize="compact", to_date=None):
+    """
+    Alpha Vantage TIME_SERIES_INTRADAY 形式の疑似レスポンスを生成する関数
+
+    Parameters:
+    -----------
+    symbol : str
+        ティッカーシンボル
+    interval : str, optional
+        足の間隔（"1min", "5min", "15min", "30min", "60min"）
+    outputsize : str, optional
+        "compact"（直近100本）または "full"（直近30営業日）
+    to_date : str, optional
+        最終日（YYYY-MM-DD形式、省略時は今日）
+
+    Returns:
+    --------
+    dict
+        TIME_SERIES_INTRADAY のレスポンス
+    """
+    step = int(interval.replace("min", ""))
+    end = datetime.strptime(to_date, "%Y-%m-%d").date() if to_date else date.today()
+    days = []
+    day = end
+    while len(days) < INTRADAY_FULL_DAYS:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day -= timedelta(days=1)
+
+    rows = []
+    for day in reversed(days):
+        minutes = generate_intraday_bars(symbol, day)
+        for i in range(0, len(minutes), step):
+            chunk = minutes[i:i + step]
+            rows.append((chunk[0][0], chunk[0][1], max(r[2] for r in chunk), min(r[3] for r in chunk),
+                         chunk[-1][4], sum(r[5] for r in chunk)))
+    if outputsize != "full":
+        rows = rows[-100:]
+    series = {
+        time: {
+            "1. open": f"{open_:.4f}",
+            "2. high": f"{high:.4f}",
+            "3. low": f"{low:.4f}",
+            "4. close": f"{close:.4f}",
+            "5. volume": str(volume),
+        }
+        for time, open_, high, low, close, volume in reversed(rows)
+    }
+    return {
+        "Meta Data": {
+            "1. Information": f"Intraday ({interval}) open, high, low, close prices and volume",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": rows[-1][0] if rows else "",
+            "4. Interval": interval,
+            "5. Output Size": "Full size" if outputsize == "full" else "Compact",
+            "6. Time Zone": "US/Eastern",
+        },
+        f"Time Series ({interval})": series,
+    }
+
+
+class RateLimiter:
+    """
+    トークンバケット方式のレート制限
+    """
+
+    def __init__(self, rate_per_second, burst=None):
+        self.rate = rate_per_second
+        self.capacity = burst or max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        トークンを1つ消費する（消費できなければFalse）
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    server_version = "StockVisualizerMock/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_cassette(self, path):
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+        body = record["body"].encode("utf-8")
+        self.send_response(record["status_code"])
+        self.send_header("Content-Type", record.get("headers", {}).get("Content-Type", "application/json"))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            return None
+
+    def _handle(self, method):
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        body = self._read_json_body() if method == "POST" else None
+        mock = self.server
+
+        mock.record_request(parts.path)
+        if mock.latency or mock.jitter:
+            time.sleep(mock.latency + random.uniform(0, mock.jitter))
+
+        is_alphavantage = parts.path == "/query"
+        if mock.rate_limiter and not mock.rate_limiter.acquire():
+            mock.record_request("rate_limited")
+            if is_alphavantage:
+                # Alpha Vantageはレート制限時もHTTP 200で "Note" を返す
+                return self._send_json(200, {"Note": ALPHAVANTAGE_RATE_LIMIT_NOTE})
+            return self._send_json(429, {"message": "Rate limit exceeded (mock server)"})
+
+        if mock.cassette_dir:
+            recorded = cassette_path(method, parts.path, params, body, cassette_dir=mock.cassette_dir)
+            if recorded.exists():
+                mock.record_request("cassette_hit")
+                return self._send_cassette(recorded)
+
+        if method == "POST" and parts.path == "/v1/token/auth_user":
+            if not body or not body.get("mailaddress") or not body.get("password"):
+                return self._send_json(400, {"message": "'mailaddress' and 'password' are required."})
+            return self._send_json(200, {"refreshToken": MOCK_REFRESH_TOKEN})
+
+        if method == "POST" and parts.path == "/v1/token/auth_refresh":
+            if params.get("refreshtoken") != MOCK_REFRESH_TOKEN:
+                return self._send_json(400, {"message": "'refreshtoken' is invalid."})
+            return self._send_json(200, {"idToken": MOCK_ID_TOKEN})
+
+        if method == "GET" and parts.path == "/v1/prices/daily_quotes":
+            if self.headers.get("Authorization") != f"Bearer {MOCK_ID_TOKEN}":
+                return self._send_json(401, {"message": "The incoming token is invalid or expired."})
+            return self._send_daily_quotes(params)
+
+        if method == "GET" and is_alphavantage:
+            function = params.get("function")
+            if function == "TIME_SERIES_INTRADAY" and params.get("symbol") and \
+                    params.get("interval") in ("1min", "5min", "15min", "30min", "60min"):
+                return self._send_json(200, synthetic_time_series_intraday(
+                    params["symbol"], params["interval"], params.get("outputsize", "compact")
+                ))
+            if function not in ("TIME_SERIES_DAILY", "TIME_SERIES_DAILY_ADJUSTED") or not params.get("symbol"):
+                return self._send_json(200, {"Error Message": "Invalid API call (mock server)."})
+            return self._send_json(200, synthetic_time_series_daily(
+                params["symbol"], params.get("outputsize", "compact"),
+                adjusted=function == "TIME_SERIES_DAILY_ADJUSTED"
+            ))
+
+        return self._send_json(404, {"message": f"Not found: {parts.path}"})
+
+    def _send_daily_quotes(self, params):
+        code = params.get("code")
+        if not code:
+            return self._send_json(400, {"message": "'code' is required (mock server)."})
+        rows = synthetic_daily_quotes(code, params.get("from"), params.get("to"))
+
+        page_size = self.server.page_size
+        offset = int(params.get("pagination_key") or 0)
+        if not page_size:
+            return self._send_json(200, {"daily_quotes": rows})
+        payload = {"daily_quotes": rows[offset:offset + page_size]}
+        if offset + page_size < len(rows):
+            payload["pagination_key"] = str(offset + page_size)
+        return self._send_json(200, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency, jitter, rate_limit, page_size, cassette_dir, verbose):
+        super().__init__(address, _MockHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.page_size = page_size
+        self.cassette_dir = cassette_dir
+        self.verbose = verbose
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def record_request(self, key):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+
+class MockServer:
+    """
+    モックサーバーをバックグラウンドスレッドで起動・停止するクラス
+
+    Parameters:
+    -----------
+    host : str, optional
+        待ち受けアドレス
+    port : int, optional
+        待ち受けポート（0の場合は空きポートを自動選択）
+    latency : float, optional
+        各レスポンスに加える固定遅延（秒）
+    jitter : float, optional
+        固定遅延に加える一様乱数の最大値（秒）
+    rate_limit : float, optional
+        1秒あたりの許容リクエスト数（Noneの場合は無制限）
+    page_size : int, optional
+        daily_quotes の1ページあたりの件数（0の場合はページ分割しない）
+    cassette_dir : str or pathlib.Path, optional
+        記録済みカセットのディレクトリ（一致するものがあれば優先して返す）
+    verbose : bool, optional
+        アクセスログを出力するか
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 rate_limit=None, page_size=0, cassette_dir=None, verbose=False):
+        self.httpd = _MockHTTPServer(
+            (host, port), latency, jitter, rate_limit, page_size, cassette_dir, verbose
+        )
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        with self.httpd.stats_lock:
+            return dict(self.httpd.stats)
+
+    def env(self):
+        """
+        クライアントをこのサーバーに向けるための環境変数を返す
+        """
+        return {
+            "JQUANTS_API_BASE_URL": self.url,
+            "ALPHAVANTAGE_API_BASE_URL": self.url,
+            "ALPHAVANTAGE_API_KEY": "mock",
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,459 @@
+"""
+全銘柄・全期間の株価を保持するメモリマップ形式のパネル
+
+(銘柄 × 営業日 × 項目) の float32 配列を .npy ファイルとしてメモリマップで開くため、
+ファイルサイズによらず一瞬で開ける。日付範囲・項目・連続する銘柄の切り出しは
+コピーを伴わないビューになる。
+
+ディレクトリ構成:
+    meta.json   銘柄リスト・項目・有効日数・容量
+    days.npy    営業日（1970-01-01 からの日数、int32）
+    values.npy  株価（銘柄容量 × 営業日容量 × 項目数、float32、欠損は NaN）
+
+日次更新では新しい営業日を末尾の空き容量に書き込むだけで済むよう、
+銘柄と営業日の両方に余裕を持たせて確保する。容量を超えた場合や
+過去の営業日が追加された場合のみファイルを作り直す。
+"""
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+PANEL_DIR_ENV = "STOCK_VISUALIZER_PANEL_DIR"
+DEFAULT_PANEL_DIR = Path(__file__).parent.parent / "data" / "panel"
+DEFAULT_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# 容量を拡張する際に追加する営業日数（約1年）と銘柄数の最小値
+DAY_CAPACITY_STEP = 260
+SYMBOL_CAPACITY_STEP = 64
+
+EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def get_panel_dir():
+    """
+    パネルのディレクトリを取得する関数（環境変数 STOCK_VISUALIZER_PANEL_DIR で変更可能）
+
+    Returns:
+    --------
+    pathlib.Path
+        パネルのディレクトリ
+    """
+    return Path(os.environ.get(PANEL_DIR_ENV) or DEFAULT_PANEL_DIR)
+
+
+def _to_day_offsets(index):
+    """DatetimeIndex を 1970-01-01 からの日数（int32）に変換する"""
+    return (pd.DatetimeIndex(index).values.astype("datetime64[D]") - EPOCH).astype(np.int32)
+
+
+def _to_day_offset(value):
+    return int((np.datetime64(value, "D") - EPOCH).astype(np.int64))
+
+
+class PanelSlice:
+    """
+    パネルから切り出したデータ
+
+    Attributes:
+    -----------
+    values : numpy.ndarray
+        (銘柄 × 営業日 × 項目) の配列（可能な限りパネルのビュー）
+    symbols : list of str
+        銘柄コード
+    dates : pandas.DatetimeIndex
+        営業日
+    fields : list of str
+        項目名
+    """
+
+    def __init__(self, values, symbols, dates, fields):
+        self.values = values
+        self.symbols = symbols
+        self.dates = dates
+        self.fields = fields
+
+    def field(self, name):
+        """
+        1項目分の (銘柄 × 営業日) 配列を返す（ビュー）
+        """
+        return self.values[:, :, self.fields.index(name)]
+
+    def to_frame(self, symbol):
+        """
+        1銘柄分の株価データフレームを返す（列はビュー）
+        """
+        row = self.values[self.symbols.index(symbol)]
+        return pd.DataFrame(
+            {name: row[:, i] for i, name in enumerate(self.fields)}, index=self.dates, copy=False
+        )
+
+
+class PricePanel:
+    """
+    メモリマップ形式の株価パネル
+
+    PricePanel.open() で既存のパネルを開き、PricePanel.create() で新規作成する。
+    書き込みは mode="r+" で開いた場合のみ可能。
+    """
+
+    def __init__(self, path, meta, days, values, mode):
+        self.path = Path(path)
+        self.meta = meta
+        self.mode = mode
+        self._days = days
+        self._values = values
+        self._symbol_index = {symbol: i for i, symbol in enumerate(meta["symbols"])}
+
+    @classmethod
+    def create(cls, path=None, fields=None, day_capacity=DAY_CAPACITY_STEP,
+               symbol_capacity=SYMBOL_CAPACITY_STEP):
+        """
+        空のパネルを作成する
+
+        Parameters:
+        -----------
+        path : str or pathlib.Path, optional
+            パネルのディレクトリ（省略時は get_panel_dir()）
+        fields : list of str, optional
+            保持する項目
+        day_capacity : int, optional
+            初期の営業日容量
+        symbol_capacity : int, optional
+            初期の銘柄容量
+
+        Returns:
+        --------
+        PricePanel
+            書き込み可能なパネル
+        """
+        path = Path(path or get_panel_dir())
+        path.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "symbols": [],
+            "fields": list(fields or DEFAULT_FIELDS),
+            "n_days": 0,
+            "day_capacity": day_capacity,
+            "symbol_capacity": symbol_capacity,
+            "updated": None,
+        }
+        days, values = cls._allocate(path, "", day_capacity, symbol_capacity, len(meta["fields"]))
+        cls._write_meta(path, meta)
+        return cls(path, meta, days, values, "r+")
+
+    @classmethod
+    def open(cls, path=None, mode="r"):
+        """
+        既存のパネルを開く
+
+        Parameters:
+        -----------
+        path : str or pathlib.Path, optional
+            パネルのディレクトリ（省略時は get_panel_dir()）
+        mode : str, optional
+            "r"（読み取り専用）または "r+"（更新可能）
+
+        Returns:
+        --------
+        PricePanel
+
+        Raises:
+        -------
+        ValueError
+            パネルが存在しない場合
+        """
+        path = Path(path or get_panel_dir())
+        if not (path / "meta.json").exists():
+            raise ValueError(f"パネルが見つかりません: {path}")
+        with open(path / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        days = np.load(path / "days.npy", mmap_mode=mode)
+        values = np.load(path / "values.npy", mmap_mode=mode)
+        return cls(path, meta, days, values, mode)
+
+    @classmethod
+    def write(cls, path, symbols, day_offsets, fields, values):
+        """
+        全銘柄分の配列からパネルを作り直す（バッチ処理の結果の保存用）
+
+        一時ファイルに書き込んでから置き換えるため、読み取り中のプロセスは
+        書き込み途中のデータを参照しない。
+
+        Parameters:
+        -----------
+        path : str or pathlib.Path
+            パネルのディレクトリ
+        symbols : list of str
+            銘柄コード
+        day_offsets : numpy.ndarray
+            営業日（1970-01-01 からの日数）
+        fields : list of str
+            項目名
+        values : numpy.ndarray
+            (銘柄 × 営業日 × 項目) の配列
+
+        Returns:
+        --------
+        PricePanel
+            読み取り専用で開いたパネル
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        n_symbols, n_days = len(symbols), len(day_offsets)
+        day_capacity = n_days + DAY_CAPACITY_STEP
+        symbol_capacity = n_symbols + SYMBOL_CAPACITY_STEP
+        days, array = cls._allocate(path, ".tmp", day_capacity, symbol_capacity, len(fields))
+        days[:n_days] = day_offsets
+        array[:n_symbols, :n_days] = values
+        days.flush()
+        array.flush()
+        del days, array
+
+        os.replace(path / "days.tmp.npy", path / "days.npy")
+        os.replace(path / "values.tmp.npy", path / "values.npy")
+        cls._write_meta(path, {
+            "symbols": [str(symbol) for symbol in symbols],
+            "fields": list(fields),
+            "n_days": n_days,
+            "day_capacity": day_capacity,
+            "symbol_capacity": symbol_capacity,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        })
+        return cls.open(path)
+
+    @classmethod
+    def open_or_create(cls, path=None, fields=None):
+        """
+        パネルを更新可能なモードで開く（存在しなければ作成する）
+        """
+        path = Path(path or get_panel_dir())
+        if (path / "meta.json").exists():
+            return cls.open(path, mode="r+")
+        return cls.create(path, fields)
+
+    @staticmethod
+    def _allocate(path, suffix, day_capacity, symbol_capacity, n_fields):
+        days = open_memmap(path / f"days{suffix}.npy", mode="w+", dtype=np.int32, shape=(day_capacity,))
+        values = open_memmap(
+            path / f"values{suffix}.npy", mode="w+", dtype=np.float32,
+            shape=(symbol_capacity, day_capacity, n_fields)
+        )
+        for row in values:
+            row[:] = np.nan
+        return days, values
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp = path / "meta.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, path / "meta.json")
+
+    @property
+    def symbols(self):
+        return list(self.meta["symbols"])
+
+    @property
+    def fields(self):
+        return list(self.meta["fields"])
+
+    @property
+    def n_days(self):
+        return self.meta["n_days"]
+
+    @property
+    def day_offsets(self):
+        """有効な営業日（1970-01-01 からの日数）"""
+        return self._days[:self.n_days]
+
+    @property
+    def dates(self):
+        """有効な営業日の DatetimeIndex"""
+        return pd.DatetimeIndex((EPOCH + self.day_offsets).astype("datetime64[ns]"), name="Date")
+
+    @property
+    def values(self):
+        """有効範囲の (銘柄 × 営業日 × 項目) 配列（メモリマップのビュー）"""
+        return self._values[:len(self.meta["symbols"]), :self.n_days]
+
+    def __contains__(self, symbol):
+        return symbol in self._symbol_index
+
+    def day_range(self, from_date=None, to_date=None):
+        """
+        日付範囲に対応する営業日の位置（start, stop）を返す
+        """
+        offsets = self.day_offsets
+        start = int(np.searchsorted(offsets, _to_day_offset(from_date), side="left")) if from_date else 0
+        stop = int(np.searchsorted(offsets, _to_day_offset(to_date), side="right")) if to_date else len(offsets)
+        return start, stop
+
+    def last_date(self, symbol):
+        """
+        銘柄の最終データ日を返す（データがなければNone）
+        """
+        row = self._symbol_index.get(symbol)
+        if row is None:
+            return None
+        valid = np.flatnonzero(~np.isnan(self._values[row, :self.n_days, self.fields.index("Close")]))
+        if not valid.size:
+            return None
+        return pd.Timestamp(EPOCH + self.day_offsets[valid[-1]])
+
+    def select(self, symbols=None, from_date=None, to_date=None, fields=None):
+        """
+        銘柄・日付範囲・項目を指定してデータを切り出す
+
+        日付範囲と項目の指定、および連続する銘柄の指定はコピーなしのビューになる。
+        連続しない銘柄を指定した場合は、その銘柄の行のみコピーする。
+
+        Parameters:
+        -----------
+        symbols : list of str, optional
+            銘柄コード（省略時は全銘柄）
+        from_date : str, optional
+            開始日（YYYY-MM-DD形式）
+        to_date : str, optional
+            終了日（YYYY-MM-DD形式）
+        fields : list of str, optional
+            項目（省略時は全項目）
+
+        Returns:
+        --------
+        PanelSlice
+        """
+        start, stop = self.day_range(from_date, to_date)
+        values = self.values[:, start:stop]
+
+        if symbols is None:
+            symbols = self.symbols
+        else:
+            rows = [self._symbol_index[symbol] for symbol in symbols]
+            if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+                values = values[rows[0]:rows[0] + len(rows)]
+            else:
+                values = values[rows]
+            symbols = list(symbols)
+
+        all_fields = self.fields
+        if fields is None:
+            fields = all_fields
+        else:
+            cols = [all_fields.index(name) for name in fields]
+            if cols == list(range(cols[0], cols[0] + len(cols))):
+                values = values[:, :, cols[0]:cols[0] + len(cols)]
+            else:
+                values = values[:, :, cols]
+            fields = list(fields)
+
+        return PanelSlice(values, symbols, self.dates[start:stop], fields)
+
+    def frame(self, symbol, from_date=None, to_date=None):
+        """
+        1銘柄分の株価データフレームを返す（欠損日は除外する）
+        """
+        data = self.select([symbol], from_date, to_date).to_frame(symbol)
+        return data[data["Close"].notna()]
+
+    def update(self, frames):
+        """
+        銘柄ごとの株価データをパネルに書き込む
+
+        既存の営業日より後の日付は末尾に追記し、既存の値は上書きする。
+        容量不足や過去の営業日の追加がある場合のみファイルを作り直す。
+
+        Parameters:
+        -----------
+        frames : dict
+            銘柄コード → 株価データフレーム（DatetimeIndex、項目名の列）
+
+        Returns:
+        --------
+        dict
+            更新内容（symbols: 更新銘柄数, new_days: 追加営業日数, rebuilt: 作り直したか）
+
+        Raises:
+        -------
+        ValueError
+            読み取り専用で開いている場合
+        """
+        if self.mode != "r+":
+            raise ValueError("読み取り専用のパネルは更新できません。mode=\"r+\" で開いてください。")
+
+        frames = {str(symbol): data for symbol, data in frames.items() if data is not None and len(data)}
+        if not frames:
+            return {"symbols": 0, "new_days": 0, "rebuilt": False}
+
+        existing = np.asarray(self.day_offsets)
+        incoming = np.unique(np.concatenate([_to_day_offsets(data.index) for data in frames.values()]))
+        added = np.setdiff1d(incoming, existing, assume_unique=True)
+        all_days = np.union1d(existing, added).astype(np.int32)
+        new_symbols = [symbol for symbol in frames if symbol not in self._symbol_index]
+
+        n_symbols = len(self.meta["symbols"]) + len(new_symbols)
+        backfill = existing.size and added.size and added[0] < existing[-1]
+        rebuilt = bool(
+            backfill
+            or len(all_days) > self.meta["day_capacity"]
+            or n_symbols > self.meta["symbol_capacity"]
+        )
+        if rebuilt:
+            self._rebuild(all_days, n_symbols)
+        else:
+            self._days[len(existing):len(all_days)] = added
+            self.meta["n_days"] = len(all_days)
+
+        for symbol in new_symbols:
+            self._symbol_index[symbol] = len(self.meta["symbols"])
+            self.meta["symbols"].append(symbol)
+
+        fields = self.fields
+        for symbol, data in frames.items():
+            row = self._symbol_index[symbol]
+            positions = np.searchsorted(all_days, _to_day_offsets(data.index))
+            block = np.full((len(data), len(fields)), np.nan, dtype=np.float32)
+            for i, name in enumerate(fields):
+                if name in data.columns:
+                    block[:, i] = data[name].to_numpy(dtype=np.float64)
+            self._values[row, positions] = block
+
+        self._values.flush()
+        self._days.flush()
+        self.meta["updated"] = datetime.now().isoformat(timespec="seconds")
+        self._write_meta(self.path, self.meta)
+        return {"symbols": len(frames), "new_days": int(added.size), "rebuilt": rebuilt}
+
+    def _rebuild(self, all_days, n_symbols):
+        """
+        容量を拡張してファイルを作り直す（既存データは新しい営業日の位置に移す）
+        """
+        day_capacity = max(self.meta["day_capacity"], len(all_days) + DAY_CAPACITY_STEP)
+        symbol_capacity = max(
+            self.meta["symbol_capacity"], n_symbols + max(SYMBOL_CAPACITY_STEP, n_symbols // 4)
+        )
+        n_old = len(self.meta["symbols"])
+        old_days = np.asarray(self.day_offsets)
+        positions = np.searchsorted(all_days, old_days)
+
+        days, values = self._allocate(self.path, ".tmp", day_capacity, symbol_capacity, len(self.fields))
+        days[:len(all_days)] = all_days
+        for row in range(n_old):
+            values[row, positions] = self._values[row, :len(old_days)]
+        days.flush()
+        values.flush()
+        del days, values
+        self._days = self._values = None
+
+        os.replace(self.path / "days.tmp.npy", self.path / "days.npy")
+        os.replace(self.path / "values.tmp.npy", self.path / "values.npy")
+        self._days = np.load(self.path / "days.npy", mmap_mode="r+")
+        self._values = np.load(self.path / "values.npy", mmap_mode="r+")
+        self.meta.update({
+            "n_days": len(all_days),
+            "day_capacity": day_capacity,
+            "symbol_capacity": symbol_capacity,
+        })
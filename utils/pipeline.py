@@ -0,0 +1,257 @@
+"""
+全銘柄のテクニカル指標をプロセスプールで並列計算するバッチパイプライン
+
+株価パネルの (銘柄 × 営業日 × 項目) 配列を共有メモリ（multiprocessing.shared_memory）に
+一度だけ読み込み、各ワーカーは銘柄の範囲（開始・終了位置）だけを受け取って
+共有メモリ上の配列を直接参照する。計算結果も共有メモリ上の出力配列に書き込むため、
+DataFrame のピックル化によるプロセス間のコピーは発生しない。
+
+計算結果はパネルのディレクトリ内の indicators/ に同じ形式のパネルとして保存する。
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processor import calculate_moving_averages, calculate_returns, calculate_rsi, calculate_volatility
+from utils.panel import EPOCH, PricePanel
+from utils.screener import DEFAULT_MA_WINDOWS, DEFAULT_RSI_WINDOW, DEFAULT_VOLATILITY_WINDOW
+from utils.symbols import load_symbol_master
+
+INDICATOR_DIR_NAME = "indicators"
+
+# ワーカーあたりのタスク数（銘柄ごとの計算量のばらつきを吸収する）
+TASKS_PER_WORKER = 4
+
+# ワーカープロセス内で共有メモリと設定を保持する
+_worker_state = {}
+
+
+def get_indicator_dir(panel_path=None):
+    """
+    指標パネルのディレクトリを取得する関数
+
+    Parameters:
+    -----------
+    panel_path : str or pathlib.Path, optional
+        株価パネルのディレクトリ（省略時は get_panel_dir()）
+
+    Returns:
+    --------
+    pathlib.Path
+    """
+    return PricePanel.open(panel_path).path / INDICATOR_DIR_NAME
+
+
+def indicator_columns(ma_windows=DEFAULT_MA_WINDOWS):
+    """
+    パイプラインが出力する指標の列名
+    """
+    return ["Daily_Return", "Cumulative_Return"] + [f"MA_{w}" for w in ma_windows] + ["RSI", "Volatility"]
+
+
+def compute_indicators(data, ma_windows=DEFAULT_MA_WINDOWS, rsi_window=DEFAULT_RSI_WINDOW,
+                       volatility_window=DEFAULT_VOLATILITY_WINDOW):
+    """
+    1銘柄の株価データに data_processor の各関数を適用する関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        株価データ（Close 列を含む）
+    ma_windows : list of int, optional
+        移動平均の期間
+    rsi_window : int, optional
+        RSIの計算期間
+    volatility_window : int, optional
+        ボラティリティの計算期間
+
+    Returns:
+    --------
+    pandas.DataFrame
+        indicator_columns() の列を持つデータフレーム
+    """
+    df = calculate_returns(data)
+    df = calculate_moving_averages(df, windows=list(ma_windows))
+    df = calculate_rsi(df, window=rsi_window)
+    df = calculate_volatility(df, window=volatility_window)
+    return df[indicator_columns(ma_windows)]
+
+
+class _SharedArray:
+    """共有メモリ上の numpy 配列（作成側は close_and_unlink() で解放する）"""
+
+    def __init__(self, shape, dtype, name=None):
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+        self.spec = (self.shm.name, shape, dtype.str)
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        return cls(shape, dtype, name=name)
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+
+    def close_and_unlink(self):
+        self.close()
+        self.shm.unlink()
+
+
+def _init_worker(input_spec, output_spec, day_offsets, fields, params):
+    _worker_state.update(
+        inputs=_SharedArray.attach(input_spec),
+        outputs=_SharedArray.attach(output_spec),
+        dates=pd.DatetimeIndex((EPOCH + day_offsets).astype("datetime64[ns]"), name="Date"),
+        fields=fields,
+        params=params,
+    )
+
+
+def _process_range(start, stop):
+    """共有メモリ上の銘柄 [start, stop) の指標を計算して出力配列に書き込む"""
+    inputs = _worker_state["inputs"].array
+    outputs = _worker_state["outputs"].array
+    dates = _worker_state["dates"]
+    fields = _worker_state["fields"]
+    close = fields.index("Close")
+    for row in range(start, stop):
+        block = inputs[row]
+        valid = ~np.isnan(block[:, close])
+        if not valid.any():
+            continue
+        data = pd.DataFrame(
+            {name: block[valid, i].astype(np.float64) for i, name in enumerate(fields)}, index=dates[valid]
+        )
+        result = compute_indicators(data, **_worker_state["params"])
+        outputs[row, valid] = result.to_numpy(dtype=np.float32)
+    return stop - start
+
+
+def _shards(n_symbols, max_workers):
+    size = max(1, -(-n_symbols // (max_workers * TASKS_PER_WORKER)))
+    return [(start, min(start + size, n_symbols)) for start in range(0, n_symbols, size)]
+
+
+def run_indicator_pipeline(panel_path=None, symbols=None, market=None, output_path=None, max_workers=None,
+                           ma_windows=DEFAULT_MA_WINDOWS, rsi_window=DEFAULT_RSI_WINDOW,
+                           volatility_window=DEFAULT_VOLATILITY_WINDOW):
+    """
+    株価パネルの銘柄の指標を並列計算し、指標パネルとして保存する関数
+
+    Parameters:
+    -----------
+    panel_path : str or pathlib.Path, optional
+        株価パネルのディレクトリ（省略時は get_panel_dir()）
+    symbols : list of str, optional
+        対象銘柄（省略時は market の銘柄マスタ、market も省略時はパネルの全銘柄）
+    market : str, optional
+        銘柄マスタの市場（"jp" または "us"）
+    output_path : str or pathlib.Path, optional
+        指標パネルの保存先（省略時はパネル内の indicators/）
+    max_workers : int, optional
+        プロセス数（省略時はCPU数、1の場合は同一プロセスで実行）
+    ma_windows : list of int, optional
+        移動平均の期間
+    rsi_window : int, optional
+        RSIの計算期間
+    volatility_window : int, optional
+        ボラティリティの計算期間
+
+    Returns:
+    --------
+    dict
+        実行結果（symbols: 銘柄数, days: 営業日数, workers: プロセス数, seconds: 処理時間,
+        path: 保存先）
+    """
+    started = time.perf_counter()
+    panel = PricePanel.open(panel_path)
+    if symbols is None:
+        symbols = panel.symbols
+        if market is not None:
+            codes = set(load_symbol_master(market)["code"])
+            symbols = [symbol for symbol in symbols if symbol in codes]
+    else:
+        symbols = [symbol for symbol in symbols if symbol in panel]
+
+    fields = panel.fields
+    columns = indicator_columns(ma_windows)
+    day_offsets = np.asarray(panel.day_offsets)
+    n_days = len(day_offsets)
+    params = dict(ma_windows=tuple(ma_windows), rsi_window=rsi_window, volatility_window=volatility_window)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    inputs = _SharedArray((len(symbols), n_days, len(fields)), np.float32)
+    outputs = _SharedArray((len(symbols), n_days, len(columns)), np.float32)
+    try:
+        inputs.array[:] = panel.select(symbols).values
+        outputs.array[:] = np.nan
+        init_args = (inputs.spec, outputs.spec, day_offsets, fields, params)
+        shards = _shards(len(symbols), max_workers)
+
+        if max_workers == 1 or len(shards) <= 1:
+            _init_worker(*init_args)
+            try:
+                for start, stop in shards:
+                    _process_range(start, stop)
+            finally:
+                _worker_state["inputs"].close()
+                _worker_state["outputs"].close()
+                _worker_state.clear()
+        else:
+            with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=init_args) as executor:
+                list(executor.map(_process_range, *zip(*shards)))
+
+        output_path = Path(output_path or panel.path / INDICATOR_DIR_NAME)
+        PricePanel.write(output_path, symbols, day_offsets, columns, outputs.array)
+    finally:
+        inputs.close_and_unlink()
+        outputs.close_and_unlink()
+
+    return {
+        "symbols": len(symbols),
+        "days": n_days,
+        "workers": max_workers,
+        "seconds": time.perf_counter() - started,
+        "path": str(output_path),
+    }
+
+
+def load_indicators(symbol, panel_path=None, from_date=None, to_date=None):
+    """
+    指標パネルから1銘柄分の指標を読み込む関数
+
+    Parameters:
+    -----------
+    symbol : str
+        銘柄コード
+    panel_path : str or pathlib.Path, optional
+        株価パネルのディレクトリ
+    from_date : str, optional
+        開始日（YYYY-MM-DD形式）
+    to_date : str, optional
+        終了日（YYYY-MM-DD形式）
+
+    Returns:
+    --------
+    pandas.DataFrame or None
+        指標のデータフレーム（未計算の銘柄はNone）
+    """
+    prices = PricePanel.open(panel_path)
+    indicator_dir = prices.path / INDICATOR_DIR_NAME
+    if not (indicator_dir / "meta.json").exists():
+        return None
+    panel = PricePanel.open(indicator_dir)
+    if symbol not in panel:
+        return None
+    # 指標が全て欠損する営業日（上場初日など）も残すため、株価パネルの取引日に合わせる
+    data = panel.select([symbol], from_date, to_date).to_frame(symbol)
+    return data.reindex(prices.frame(symbol, from_date, to_date).index)
@@ -0,0 +1,381 @@
+"""
+ポートフォリオの評価（基準価額・寄与度・リスク指標）
+
+保有銘柄と売買履歴から、株価パネル（utils.panel）の終値を使って日々の純資産（NAV）を計算する。
+ポジション・終値は (銘柄 × 営業日) の配列として扱い、売買は np.add.at で該当日に加えてから
+累積和を取るため、銘柄数・日数によらず行列演算だけで評価できる。
+
+売買は当日の終値（価格を指定した場合はその価格）で約定し、代金は現金から差し引く
+（入出金のない自己資金の運用とみなす）。日々の損益は銘柄ごとに
+
+    前日のポジション × (当日の終値 − 前日の終値) + 当日の売買数量 × (当日の終値 − 約定価格)
+
+に分解でき、その合計が NAV の増減に一致する。
+
+PortfolioTracker は最後に評価した営業日の状態（ポジション・終値・現金・NAV）を保持し、
+パネルに追加された営業日だけを評価する。
+
+売買履歴（CSV）の例:
+    Date,Symbol,Quantity,Price
+    2024-01-04,7203,100,2500
+    2024-02-01,6758,50,
+    2024-03-01,7203,-100,
+"""
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+
+TRADE_COLUMNS = ["Date", "Symbol", "Quantity", "Price"]
+
+TRADING_DAYS_PER_YEAR = 252
+DEFAULT_VAR_CONFIDENCE = 0.95
+
+
+def _normalize_symbol(symbol):
+    """パネルの銘柄コードに合わせる（日本株の ".T" を除く）"""
+    symbol = str(symbol).strip().upper()
+    return symbol[:-2] if symbol.endswith(".T") else symbol
+
+
+def load_trades(source):
+    """
+    売買履歴を読み込む関数
+
+    Parameters:
+    -----------
+    source : str, file-like, pandas.DataFrame or list of dict
+        CSV のパス・ファイル・文字列、または Date/Symbol/Quantity（Price は任意）を持つ表
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Date（datetime64）, Symbol, Quantity, Price（指定がなければ NaN）の日付順の表
+
+    Raises:
+    -------
+    ValueError
+        必須の列がない、または値が不正な場合
+    """
+    if isinstance(source, pd.DataFrame):
+        trades = source.copy()
+    elif isinstance(source, list):
+        trades = pd.DataFrame(source, columns=None if source else TRADE_COLUMNS)
+    elif isinstance(source, str) and "\n" in source:
+        trades = pd.read_csv(io.StringIO(source))
+    else:
+        trades = pd.read_csv(source)
+
+    trades.columns = [str(column).strip().capitalize() for column in trades.columns]
+    missing = [column for column in TRADE_COLUMNS[:3] if column not in trades.columns]
+    if missing:
+        raise ValueError(f"売買履歴に必要な列がありません: {', '.join(missing)}")
+    if "Price" not in trades.columns:
+        trades["Price"] = np.nan
+
+    try:
+        trades["Date"] = pd.to_datetime(trades["Date"])
+        trades["Quantity"] = pd.to_numeric(trades["Quantity"])
+        trades["Price"] = pd.to_numeric(trades["Price"])
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"売買履歴の値が不正です: {e}")
+    if trades["Quantity"].isna().any() or trades["Date"].isna().any():
+        raise ValueError("売買履歴に日付・数量のない行があります")
+    trades["Symbol"] = trades["Symbol"].map(_normalize_symbol)
+    return trades[TRADE_COLUMNS].sort_values("Date", kind="stable").reset_index(drop=True)
+
+
+class Portfolio:
+    """
+    保有銘柄と売買履歴
+
+    Parameters:
+    -----------
+    holdings : dict, optional
+        評価開始時点の保有数量（銘柄コード → 数量）
+    trades : pandas.DataFrame or list of dict, optional
+        売買履歴（load_trades で読み込める形式）
+    cash : float, optional
+        評価開始時点の現金
+    """
+
+    def __init__(self, holdings=None, trades=None, cash=0.0):
+        self.holdings = {_normalize_symbol(symbol): float(quantity) for symbol, quantity in (holdings or {}).items()}
+        self.trades = load_trades(trades if trades is not None else [])
+        self.cash = float(cash)
+
+    @property
+    def symbols(self):
+        """保有・売買のある銘柄（初出順）"""
+        return list(dict.fromkeys(list(self.holdings) + self.trades["Symbol"].tolist()))
+
+
+def _forward_fill(values, seed):
+    """(銘柄 × 日) の NaN を直前の値で埋める（先頭は seed の値を使う）"""
+    filled = np.concatenate([seed[:, None], values], axis=1)
+    valid = ~np.isnan(filled)
+    index = np.where(valid, np.arange(filled.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    return np.take_along_axis(filled, index, axis=1)[:, 1:]
+
+
+class PortfolioTracker:
+    """
+    ポートフォリオの NAV・寄与度をパネルの営業日に合わせて更新するクラス
+
+    Parameters:
+    -----------
+    portfolio : Portfolio
+        評価するポートフォリオ
+    from_date : str, optional
+        評価開始日（YYYY-MM-DD形式、省略時は最初の売買日。売買がなければパネルの最初の営業日）。
+        これより前の売買は使わないため、開始時点の保有は Portfolio の holdings で指定する
+    """
+
+    def __init__(self, portfolio, from_date=None):
+        self.portfolio = portfolio
+        self.symbols = portfolio.symbols
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        trades = portfolio.trades
+        if from_date is None and len(trades):
+            from_date = trades["Date"].iloc[0].strftime("%Y-%m-%d")
+        self.from_date = from_date
+        self._trade_days = trades["Date"].values.astype("datetime64[D]")
+        self._trade_rows = trades["Symbol"].map(self._index).to_numpy(dtype=np.int64)
+        self._trade_quantities = trades["Quantity"].to_numpy(dtype=np.float64)
+        self._trade_prices = trades["Price"].to_numpy(dtype=np.float64)
+
+        n = len(self.symbols)
+        self._positions = np.array([portfolio.holdings.get(symbol, 0.0) for symbol in self.symbols])
+        self._prices = np.full(n, np.nan)
+        self._cash = portfolio.cash
+        self._nav = None
+        self._last_day = None
+        self._dates = []
+        self._navs = []
+        self._contributions = []
+        self._values = []
+        self._lock = threading.Lock()
+
+    @property
+    def last_date(self):
+        """最後に評価した営業日（未評価なら None）"""
+        return None if self._last_day is None else pd.Timestamp(self._last_day)
+
+    def update(self, panel):
+        """
+        前回評価した営業日より後のパネルの営業日を評価する
+
+        Parameters:
+        -----------
+        panel : utils.panel.PricePanel
+            株価パネル
+
+        Returns:
+        --------
+        int
+            評価した営業日数
+
+        Raises:
+        -------
+        ValueError
+            パネルにない銘柄がある場合、またはポジションのある銘柄の終値がない場合
+        """
+        # アプリでは複数のセッションが同じインスタンスを更新するため、更新は1つずつ行う
+        with self._lock:
+            return self._update(panel)
+
+    def _update(self, panel):
+        missing = [symbol for symbol in self.symbols if symbol not in panel]
+        if missing:
+            raise ValueError(f"株価パネルにない銘柄があります: {', '.join(missing)}")
+
+        offsets = panel.day_offsets
+        if self._last_day is None:
+            start, stop = panel.day_range(self.from_date, None)
+            # 評価開始日に取引のない銘柄は、それより前の直近の終値で評価する
+            first = 0
+        else:
+            start = int(np.searchsorted(offsets, self._last_day.astype(np.int64), side="right"))
+            first, stop = start, panel.n_days
+        if start >= stop:
+            return 0
+
+        # 日付範囲を先に切り出すため、コピーされるのは評価する営業日の分だけ
+        from_day = str(np.datetime64(int(offsets[first]), "D"))
+        sliced = panel.select(self.symbols, from_date=from_day, fields=["Close"])
+        closes = np.asarray(sliced.field("Close"), dtype=np.float64)
+        prices = _forward_fill(closes, self._prices)[:, start - first:]
+        days = np.asarray(sliced.dates.values, dtype="datetime64[D]")[start - first:]
+
+        # 前回の評価日より後、今回の最終営業日までの売買を営業日に割り当てる（休日の売買は翌営業日）
+        selected = self._trade_days <= days[-1]
+        if self._last_day is not None:
+            selected &= self._trade_days > self._last_day
+        elif self.from_date is not None:
+            selected &= self._trade_days >= np.datetime64(self.from_date, "D")
+        columns = np.searchsorted(days, self._trade_days[selected], side="left")
+        rows = self._trade_rows[selected]
+        quantities = self._trade_quantities[selected]
+        execution = np.where(np.isnan(self._trade_prices[selected]), prices[rows, columns],
+                             self._trade_prices[selected])
+
+        n, k = len(self.symbols), len(days)
+        deltas = np.zeros((n, k))
+        np.add.at(deltas, (rows, columns), quantities)
+        flows = np.zeros((n, k))
+        np.add.at(flows, (rows, columns), quantities * execution)
+
+        positions = self._positions[:, None] + np.cumsum(deltas, axis=1)
+        unpriced = (np.isnan(prices) & (positions != 0)).any(axis=1)
+        if unpriced.any():
+            names = [self.symbols[i] for i in np.flatnonzero(unpriced)]
+            raise ValueError(f"ポジションのある銘柄の終値がありません: {', '.join(names)}")
+        prices_filled = np.nan_to_num(prices)
+        previous_prices = np.concatenate([np.nan_to_num(self._prices)[:, None], prices_filled[:, :-1]], axis=1)
+        previous_positions = np.concatenate([self._positions[:, None], positions[:, :-1]], axis=1)
+
+        values = positions * prices_filled
+        cash = self._cash - np.cumsum(flows.sum(axis=0))
+        nav = values.sum(axis=0) + cash
+        contributions = previous_positions * (prices_filled - previous_prices) + deltas * prices_filled - flows
+        if self._nav is None:
+            # 評価開始日の損益は数えない（開始日の NAV が基準）
+            contributions[:, 0] = 0.0
+
+        self._dates.append(days)
+        self._navs.append(nav)
+        self._contributions.append(contributions)
+        self._values.append(values[:, -1:])
+        self._positions = positions[:, -1].copy()
+        self._prices = prices[:, -1].copy()
+        self._cash = float(cash[-1])
+        self._nav = float(nav[-1])
+        self._last_day = days[-1]
+        return k
+
+    def _concat(self, chunks):
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks, axis=-1)]
+        return chunks[0] if chunks else np.empty(0)
+
+    @property
+    def nav(self):
+        """日々の NAV（pandas.Series）"""
+        index = pd.DatetimeIndex(self._concat(self._dates).astype("datetime64[ns]"), name="Date")
+        return pd.Series(self._concat(self._navs), index=index, name="NAV")
+
+    @property
+    def returns(self):
+        """日次リターン（前日の NAV に対する損益の比率、pandas.Series）"""
+        nav = self.nav
+        pnl = self._concat(self._contributions).sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            previous = np.concatenate([[np.nan], nav.to_numpy()[:-1]])
+            return pd.Series(pnl / previous, index=nav.index, name="Return")
+
+    def contributions(self, from_date=None, to_date=None):
+        """
+        銘柄ごとの損益の寄与
+
+        Parameters:
+        -----------
+        from_date : str, optional
+            集計開始日（YYYY-MM-DD形式）
+        to_date : str, optional
+            集計終了日（YYYY-MM-DD形式）
+
+        Returns:
+        --------
+        pandas.DataFrame
+            銘柄ごとの損益（PnL）・期間の開始時点の NAV に対する寄与（Contribution, %）・
+            最新の評価額（Value）・構成比（Weight, %）
+        """
+        dates = self._concat(self._dates)
+        matrix = self._concat(self._contributions)
+        lo = 0 if from_date is None else int(np.searchsorted(dates, np.datetime64(from_date, "D"), side="left"))
+        hi = len(dates) if to_date is None else int(np.searchsorted(dates, np.datetime64(to_date, "D"), side="right"))
+        pnl = matrix[:, lo:hi].sum(axis=1)
+        navs = self._concat(self._navs)
+        base = navs[lo - 1] if lo > 0 else (navs[0] if len(navs) else np.nan)
+        value = self._values[-1][:, 0] if self._values else np.zeros(len(self.symbols))
+        nav = self._nav if self._nav else np.nan
+        return pd.DataFrame({
+            "PnL": pnl,
+            "Contribution": pnl / base * 100,
+            "Value": value,
+            "Weight": value / nav * 100,
+        }, index=pd.Index(self.symbols, name="Symbol"))
+
+
+def drawdown(nav):
+    """
+    NAV の直近の最高値からの下落率（%）を返す関数
+    """
+    nav = pd.Series(nav)
+    return (nav / nav.cummax() - 1) * 100
+
+
+def risk_metrics(returns, confidence=DEFAULT_VAR_CONFIDENCE, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    日次リターンからリスク指標を計算する関数
+
+    Parameters:
+    -----------
+    returns : pandas.Series or numpy.ndarray
+        日次リターン（比率、NaN は除外する）
+    confidence : float, optional
+        VaR の信頼水準
+    periods_per_year : int, optional
+        年率換算に使う1年の営業日数
+
+    Returns:
+    --------
+    dict
+        volatility（年率, %）, var_historical / var_parametric / cvar（1日, 損失を正の%で表す）,
+        max_drawdown / current_drawdown（%、負の値）
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = r[np.isfinite(r)]
+    if len(r) < 2:
+        raise ValueError("リスク指標の計算には2日以上のリターンが必要です")
+    std = r.std(ddof=1)
+    quantile = np.quantile(r, 1 - confidence)
+    # scipy を使わず、正規分布の分位点は Acklam の近似で求める
+    z = _normal_ppf(confidence)
+    # 評価開始時点（1.0）を含めた最高値からの下落率
+    growth = np.cumprod(1 + r)
+    dd = growth / np.maximum.accumulate(np.maximum(growth, 1.0)) - 1
+    return {
+        "volatility": float(std * np.sqrt(periods_per_year) * 100),
+        "var_historical": float(-quantile * 100),
+        "var_parametric": float((z * std - r.mean()) * 100),
+        "cvar": float(-r[r <= quantile].mean() * 100),
+        "max_drawdown": float(dd.min() * 100),
+        "current_drawdown": float(dd[-1] * 100),
+    }
+
+
+def _normal_ppf(p):
+    """標準正規分布の分位点（Acklam の有理近似、相対誤差 1e-9 程度）"""
+    a = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00]
+    b = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01]
+    c = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00]
+    d = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00]
+    if not 0 < p < 1:
+        raise ValueError(f"p は0より大きく1より小さい値を指定してください: {p}")
+    low = 0.02425
+    if p < low:
+        q = np.sqrt(-2 * np.log(p))
+        return (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+            ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+    if p > 1 - low:
+        return -_normal_ppf(1 - p)
+    q = p - 0.5
+    r = q * q
+    return (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+        (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1)
@@ -0,0 +1,349 @@
+"""
+API の利用回数（1日・1分あたり）を提供元と API キーごとに記録し、上限を超えないように調整するモジュール
+
+記録はファイル（data/quota/ledger.json）に保存するため、Web アプリと cron のバッチ取り込みなど
+複数のプロセスで同じ上限を共有できる（fcntl が使える環境ではファイルロックで排他する）。
+API キーはそのまま保存せず、ハッシュ値の先頭だけを識別子として使う。
+
+リクエストには優先度があり、画面の操作による取得（INTERACTIVE）は上限まで使えるが、
+バッチ取り込みなどの先読み（BACKGROUND）は INTERACTIVE_RESERVE の分を残した範囲でしか使えない。
+同じプロセス内で INTERACTIVE のリクエストが待っている間は BACKGROUND のリクエストを止める。
+上限に達した場合は QuotaExceeded を送出し、呼び出し側はキャッシュ済みのデータで表示を続ける。
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス間のロックを行わない
+    fcntl = None
+
+from utils.instrumentation import register_collector
+
+QUOTA_DIR_ENV = "STOCK_VISUALIZER_QUOTA_DIR"
+DEFAULT_QUOTA_DIR = Path(__file__).parent.parent / "data" / "quota"
+LEDGER_FILE_NAME = "ledger.json"
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# 提供元ごとの上限（1分あたり, 1日あたり、None は上限なし）
+# 環境変数 {接頭辞}_QUOTA_PER_MINUTE / {接頭辞}_QUOTA_PER_DAY で変更できる（有料プランのキーを使う場合など）
+PROVIDER_LIMITS = {
+    "alphavantage": (5, 25),
+    "jquants": (None, None),
+}
+
+PROVIDER_ENV_PREFIXES = {"alphavantage": "ALPHAVANTAGE", "jquants": "JQUANTS"}
+
+PROVIDER_NAMES = {"alphavantage": "Alpha Vantage", "jquants": "J-Quants"}
+
+# BACKGROUND のリクエストが使わずに残しておく上限の割合（INTERACTIVE 専用）
+INTERACTIVE_RESERVE = 0.2
+
+# 1分あたりの上限に達した場合に待つ最大時間（秒）。これより長く待つ必要がある場合は QuotaExceeded
+DEFAULT_MAX_WAIT = {INTERACTIVE: 5.0, BACKGROUND: 65.0}
+
+_priority = ContextVar("quota_priority", default=INTERACTIVE)
+
+
+class QuotaExceeded(RuntimeError):
+    """
+    API の利用回数の上限に達したことを表す例外
+
+    入力の誤り（ValueError）と区別するため RuntimeError を継承する。
+
+    Attributes:
+    -----------
+    provider : str
+        提供元
+    retry_after : float or None
+        再び利用できるまでの秒数（1日の上限の場合は翌日 0 時 UTC まで）
+    """
+
+    def __init__(self, message, provider, retry_after=None):
+        super().__init__(message)
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    ブロック内の API リクエストの優先度を指定する（スレッドごとに有効）
+
+    使用例:
+        with request_priority(BACKGROUND):
+            data = get_stock_data_alpha_vantage("AAPL")
+    """
+    if priority not in (INTERACTIVE, BACKGROUND):
+        raise ValueError(f"優先度の指定が不正です: {priority}（{INTERACTIVE} または {BACKGROUND}）")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def key_id(api_key):
+    """
+    API キーの識別子（SHA-256 の先頭12文字）を返す関数
+    """
+    return hashlib.sha256(str(api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+def get_limits(provider):
+    """
+    提供元の上限（1分あたり, 1日あたり）を返す関数（環境変数の指定を優先する）
+
+    Raises:
+    -------
+    ValueError
+        未知の提供元の場合
+    """
+    if provider not in PROVIDER_LIMITS:
+        raise ValueError(f"未知の提供元です: {provider}（{', '.join(PROVIDER_LIMITS)}）")
+    limits = []
+    prefix = PROVIDER_ENV_PREFIXES[provider]
+    for name, default in zip(("MINUTE", "DAY"), PROVIDER_LIMITS[provider]):
+        value = os.environ.get(f"{prefix}_QUOTA_PER_{name}")
+        if value is None or not value.strip():
+            limits.append(default)
+        else:
+            limits.append(int(value) if int(value) > 0 else None)
+    return tuple(limits)
+
+
+def get_quota_dir():
+    """
+    利用回数の記録先を取得する関数（環境変数 STOCK_VISUALIZER_QUOTA_DIR で変更可能）
+    """
+    return Path(os.environ.get(QUOTA_DIR_ENV) or DEFAULT_QUOTA_DIR)
+
+
+class QuotaLedger:
+    """
+    提供元・API キーごとの利用回数の記録
+
+    Parameters:
+    -----------
+    path : str or pathlib.Path, optional
+        記録ファイル（省略時は get_quota_dir() / ledger.json）
+    clock : callable, optional
+        現在時刻（UNIX 時間）を返す関数（テスト用）
+    sleep : callable, optional
+        待機に使う関数（テスト用）
+    """
+
+    def __init__(self, path=None, clock=time.time, sleep=time.sleep):
+        self.path = Path(path) if path else get_quota_dir() / LEDGER_FILE_NAME
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._interactive_waiting = 0
+
+    @staticmethod
+    def _entry_key(provider, api_key):
+        return f"{provider}:{key_id(api_key)}"
+
+    def _today(self, now):
+        return datetime.fromtimestamp(now, timezone.utc).date().isoformat()
+
+    @contextmanager
+    def _locked(self):
+        # プロセス内はスレッドのロック、プロセス間はロックファイルで排他する
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path.with_suffix(".lock"), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, ledger):
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(ledger, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def _current(self, entry, now):
+        """日付が変わった場合・1分より前の記録を除いた (今日の回数, 直近1分の時刻のリスト) を返す"""
+        today = self._today(now)
+        day_count = entry.get("day_count", 0) if entry.get("day") == today else 0
+        recent = [t for t in entry.get("recent", []) if now - t < 60]
+        return day_count, recent
+
+    def _check(self, provider, day_count, recent, priority, now):
+        """利用できる場合は None、待てば利用できる場合は待ち時間、今日は利用できない場合は inf を返す"""
+        per_minute, per_day = get_limits(provider)
+        reserve = priority == BACKGROUND
+        if per_day is not None:
+            allowed = per_day - math.ceil(per_day * INTERACTIVE_RESERVE) if reserve else per_day
+            if day_count >= allowed:
+                return math.inf
+        if per_minute is not None:
+            allowed = max(1, per_minute - math.ceil(per_minute * INTERACTIVE_RESERVE)) if reserve else per_minute
+            if len(recent) >= allowed:
+                return recent[len(recent) - allowed] + 60 - now
+        if reserve and self._interactive_waiting:
+            return 0.5
+        return None
+
+    def acquire(self, provider, api_key, priority=None, max_wait=None):
+        """
+        リクエスト1回分の利用を記録する（1分あたりの上限に達している場合は空くまで待つ）
+
+        Parameters:
+        -----------
+        provider : str
+            提供元（PROVIDER_LIMITS のキー）
+        api_key : str
+            API キー（識別子のみ保存する）
+        priority : str, optional
+            INTERACTIVE または BACKGROUND（省略時は request_priority で指定した優先度）
+        max_wait : float, optional
+            待つ最大時間（秒、省略時は DEFAULT_MAX_WAIT[priority]）
+
+        Raises:
+        -------
+        QuotaExceeded
+            1日の上限に達している場合、または max_wait 以内に空かない場合
+        """
+        priority = priority or current_priority()
+        max_wait = DEFAULT_MAX_WAIT[priority] if max_wait is None else max_wait
+        entry_key = self._entry_key(provider, api_key)
+        deadline = self.clock() + max_wait
+        waiting = False
+        try:
+            while True:
+                with self._locked():
+                    now = self.clock()
+                    ledger = self._load()
+                    entry = ledger.get(entry_key, {})
+                    day_count, recent = self._current(entry, now)
+                    wait = self._check(provider, day_count, recent, priority, now)
+                    if wait is None:
+                        ledger[entry_key] = {
+                            "provider": provider,
+                            "day": self._today(now),
+                            "day_count": day_count + 1,
+                            "recent": recent + [now],
+                            "total": entry.get("total", 0) + 1,
+                        }
+                        self._save(ledger)
+                        return
+                name = PROVIDER_NAMES.get(provider, provider)
+                if wait == math.inf:
+                    tomorrow = (now // 86400 + 1) * 86400
+                    raise QuotaExceeded(f"{name} の1日あたりの利用回数の上限に達しました", provider, tomorrow - now)
+                if now + wait > deadline:
+                    raise QuotaExceeded(f"{name} の1分あたりの利用回数の上限に達しました", provider, wait)
+                if priority == INTERACTIVE and not waiting:
+                    waiting = True
+                    with self._lock:
+                        self._interactive_waiting += 1
+                self.sleep(wait)
+        finally:
+            if waiting:
+                with self._lock:
+                    self._interactive_waiting -= 1
+
+    def usage(self, provider, api_key):
+        """
+        提供元・API キーの利用状況を返す
+
+        Returns:
+        --------
+        dict
+            minute: 直近1分の回数, day: 今日（UTC）の回数, total: 累計,
+            per_minute / per_day: 上限（None は上限なし）
+        """
+        with self._locked():
+            entry = self._load().get(self._entry_key(provider, api_key), {})
+        day_count, recent = self._current(entry, self.clock())
+        per_minute, per_day = get_limits(provider)
+        return {"minute": len(recent), "day": day_count, "total": entry.get("total", 0),
+                "per_minute": per_minute, "per_day": per_day}
+
+    def stats(self):
+        """
+        提供元ごとの今日の利用回数（全 API キーの合計）を返す
+        """
+        with self._locked():
+            ledger = self._load()
+        now = self.clock()
+        result = {f"{provider}_day": 0 for provider in PROVIDER_LIMITS}
+        for entry in ledger.values():
+            name = f"{entry.get('provider')}_day"
+            if name in result:
+                result[name] += self._current(entry, now)[0]
+        return result
+
+
+def charge_request(provider, api_key, base_url, default_base_url):
+    """
+    本番の API へのリクエストであれば利用回数を記録する関数（上限に達している場合は QuotaExceeded）
+
+    接続先を変更している場合（モックサーバー）や記録済みのレスポンスを再生する場合は提供元の上限を
+    消費しないため記録しない。
+
+    Parameters:
+    -----------
+    provider : str
+        提供元（PROVIDER_LIMITS のキー）
+    api_key : str
+        API キー（J-Quants はメールアドレス）
+    base_url : str
+        リクエスト先のベースURL
+    default_base_url : str
+        提供元の本番のベースURL
+    """
+    from utils.replay import get_http_mode
+
+    if base_url.rstrip("/") != default_base_url.rstrip("/") or get_http_mode() == "replay":
+        return
+    get_quota_ledger().acquire(provider, api_key)
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_quota_ledger():
+    """
+    プロセス全体で共有する利用回数の記録を取得する関数
+
+    Returns:
+    --------
+    QuotaLedger
+    """
+    global _ledger
+    path = get_quota_dir() / LEDGER_FILE_NAME
+    with _ledger_lock:
+        # 記録先の環境変数が変更された場合は作り直す
+        if _ledger is None or _ledger.path != path:
+            _ledger = QuotaLedger(path)
+            register_collector("quota", _ledger.stats)
+        return _ledger
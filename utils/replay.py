@@ -0,0 +1,243 @@
+"""
+HTTPリクエストの記録・再生（オフラインリプレイ）を提供するユーティリティモジュール
+
+環境変数 STOCK_VISUALIZER_HTTP_MODE で動作モードを切り替える。
+
+- "live"   : 通常通りAPIへリクエストする（デフォルト）
+- "record" : APIへリクエストし、レスポンスをカセットファイルに保存する
+- "replay" : ネットワークを使わず、カセットファイルからレスポンスを返す
+
+カセットの保存先は環境変数 STOCK_VISUALIZER_CASSETTE_DIR で指定する。
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+
+HTTP_MODE_ENV = "STOCK_VISUALIZER_HTTP_MODE"
+CASSETTE_DIR_ENV = "STOCK_VISUALIZER_CASSETTE_DIR"
+
+HTTP_MODES = ("live", "record", "replay")
+DEFAULT_CASSETTE_DIR = Path(__file__).parent.parent / "data" / "cassettes"
+
+# カセットに保存しない（キーにも含めない）認証情報のパラメータ名（レスポンスのJSONにも適用する）
+REDACTED_KEYS = {"mailaddress", "password", "refreshtoken", "idtoken", "apikey", "authorization"}
+REDACTED_VALUE = "***"
+
+
+class ReplayResponse:
+    """
+    カセットから復元したレスポンス（requests.Responseの必要最小限の互換）
+    """
+
+    def __init__(self, status_code, body, headers=None, url=""):
+        self.status_code = status_code
+        self.content = body.encode("utf-8") if isinstance(body, str) else body
+        self.headers = dict(headers or {})
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error (replay) for url: {self.url}", response=self
+            )
+
+
+def get_http_mode():
+    """
+    現在のHTTP動作モードを取得する関数
+
+    Returns:
+    --------
+    str
+        "live"、"record"、"replay" のいずれか
+
+    Raises:
+    -------
+    ValueError
+        未知のモードが指定されている場合
+    """
+    mode = os.environ.get(HTTP_MODE_ENV, "live").strip().lower() or "live"
+    if mode not in HTTP_MODES:
+        raise ValueError(f"{HTTP_MODE_ENV} の値が不正です: {mode}（{', '.join(HTTP_MODES)} のいずれか）")
+    return mode
+
+
+def get_cassette_dir():
+    """
+    カセットの保存ディレクトリを取得する関数
+
+    Returns:
+    --------
+    pathlib.Path
+        カセットディレクトリ
+    """
+    return Path(os.environ.get(CASSETTE_DIR_ENV) or DEFAULT_CASSETTE_DIR)
+
+
+def _redact(mapping):
+    if not mapping:
+        return {}
+    return {
+        k: (REDACTED_VALUE if k.lower() in REDACTED_KEYS else v)
+        for k, v in mapping.items()
+    }
+
+
+def _redact_json(value):
+    """JSON の値から認証情報のキーの値を再帰的に伏せる（伏せたかどうかも返す）"""
+    if isinstance(value, dict):
+        redacted, changed = {}, False
+        for k, v in value.items():
+            if k.lower() in REDACTED_KEYS:
+                redacted[k], changed = REDACTED_VALUE, True
+            else:
+                redacted[k], child_changed = _redact_json(v)
+                changed = changed or child_changed
+        return redacted, changed
+    if isinstance(value, list):
+        items = [_redact_json(v) for v in value]
+        return [v for v, _ in items], any(c for _, c in items)
+    return value, False
+
+
+def _redact_body(content):
+    """レスポンスの本文を文字列にする（JSON の認証情報は伏せる）"""
+    body = content.decode("utf-8", errors="replace")
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    redacted, changed = _redact_json(data)
+    # 伏せた値がない場合は元の本文をそのまま保存する
+    return json.dumps(redacted, ensure_ascii=False) if changed else body
+
+
+def _request_signature(method, url, params=None, json_body=None):
+    """
+    ホスト名と認証情報を除いたリクエストの識別情報を作成する
+
+    ホスト名を含めないため、本番APIで記録したカセットをモックサーバー向けの
+    リクエストでもそのまま再生できる。
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update({k: str(v) for k, v in (params or {}).items() if v is not None})
+    return {
+        "method": method.upper(),
+        "path": parts.path or "/",
+        "params": dict(sorted(_redact(query).items())),
+        "json": _redact(json_body),
+    }
+
+
+def cassette_path(method, url, params=None, json_body=None, cassette_dir=None):
+    """
+    リクエストに対応するカセットファイルのパスを返す関数
+
+    Parameters:
+    -----------
+    method : str
+        HTTPメソッド
+    url : str
+        リクエストURL
+    params : dict, optional
+        クエリパラメータ
+    json_body : dict, optional
+        JSONボディ
+    cassette_dir : str or pathlib.Path, optional
+        カセットディレクトリ（省略時は環境変数またはデフォルト）
+
+    Returns:
+    --------
+    pathlib.Path
+        カセットファイルのパス
+    """
+    signature = _request_signature(method, url, params, json_body)
+    digest = hashlib.sha1(
+        json.dumps(signature, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:16]
+    name = signature["path"].strip("/").replace("/", "_") or "root"
+    return Path(cassette_dir or get_cassette_dir()) / f"{name}-{digest}.json"
+
+
+def _save_cassette(path, signature, response):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {
+        "request": signature,
+        "status_code": response.status_code,
+        "headers": {"Content-Type": response.headers.get("Content-Type", "application/json")},
+        "body": _redact_body(response.content),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+
+
+def _load_cassette(path, url):
+    if not path.exists():
+        raise requests.exceptions.ConnectionError(
+            f"リプレイ用のカセットが見つかりません: {path.name}（{url}）"
+        )
+    with open(path, encoding="utf-8") as f:
+        record = json.load(f)
+    return ReplayResponse(record["status_code"], record["body"], record.get("headers"), url)
+
+
+def http_request(method, url, params=None, json=None, headers=None, timeout=30):
+    """
+    記録・再生モードに対応したHTTPリクエスト関数
+
+    Parameters:
+    -----------
+    method : str
+        HTTPメソッド（"GET"、"POST"）
+    url : str
+        リクエストURL
+    params : dict, optional
+        クエリパラメータ
+    json : dict, optional
+        JSONボディ
+    headers : dict, optional
+        リクエストヘッダー
+    timeout : float, optional
+        タイムアウト秒数
+
+    Returns:
+    --------
+    requests.Response or ReplayResponse
+        レスポンス
+    """
+    mode = get_http_mode()
+    if mode == "replay":
+        return _load_cassette(cassette_path(method, url, params, json), url)
+
+    response = requests.request(method, url, params=params, json=json, headers=headers, timeout=timeout)
+
+    if mode == "record":
+        signature = _request_signature(method, url, params, json)
+        _save_cassette(cassette_path(method, url, params, json), signature, response)
+    return response
+
+
+def http_get(url, params=None, headers=None, timeout=30):
+    """
+    記録・再生モードに対応したGETリクエスト関数
+    """
+    return http_request("GET", url, params=params, headers=headers, timeout=timeout)
+
+
+def http_post(url, params=None, json=None, headers=None, timeout=30):
+    """
+    記録・再生モードに対応したPOSTリクエスト関数
+    """
+    return http_request("POST", url, params=params, json=json, headers=headers, timeout=timeout)
@@ -0,0 +1,229 @@
+"""
+日足から週足・月足を作成する処理
+
+期間の区切り（週は月曜日、月は1日を開始日とする）は numpy の日付演算で求めるため、
+pandas のバージョンによって頻度文字列（"M" / "ME"）が変わる影響を受けない。
+ResampleCache は終了した期間の集約結果を系列ごとに保持し、2回目以降は進行中の期間と
+新しく加わった期間だけを集約する。
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+TIMEFRAMES = ("daily", "weekly", "monthly")
+
+# ResampleCache が保持する系列数の上限
+DEFAULT_MAX_SERIES = 512
+
+
+def period_starts(dates, timeframe):
+    """
+    各日付が属する期間の開始日を返す関数
+
+    Parameters:
+    -----------
+    dates : array-like
+        日付（DatetimeIndex や datetime64 の配列）
+    timeframe : str
+        "daily", "weekly"（月曜日始まり）, "monthly"
+
+    Returns:
+    --------
+    numpy.ndarray
+        期間の開始日（datetime64[D]）
+    """
+    days = np.asarray(dates, dtype="datetime64[D]")
+    if timeframe == "daily":
+        return days
+    if timeframe == "weekly":
+        # 1970-01-01 は木曜日のため、3日ずらして月曜日を0とする
+        weekday = (days.astype(np.int64) + 3) % 7
+        return days - weekday.astype("timedelta64[D]")
+    if timeframe == "monthly":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    raise ValueError(f"timeframe は {list(TIMEFRAMES)} のいずれかを指定してください: {timeframe}")
+
+
+def aggregate_ohlcv(buckets, values):
+    """
+    同じ区切りが連続する行を1本の足に集約する関数
+
+    Parameters:
+    -----------
+    buckets : numpy.ndarray
+        各行の区切り（昇順）
+    values : numpy.ndarray
+        Open/High/Low/Close/Volume（行数 × 5）
+
+    Returns:
+    --------
+    tuple of numpy.ndarray
+        (各足の区切り, 集約後の値)
+    """
+    if not len(buckets):
+        return buckets[:0], values[:0]
+    starts = np.concatenate([[0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1])
+    ends = np.concatenate([starts[1:], [len(buckets)]]) - 1
+    result = np.empty((len(starts), len(FIELDS)))
+    result[:, 0] = values[starts, 0]
+    result[:, 1] = np.fmax.reduceat(values[:, 1], starts)
+    result[:, 2] = np.fmin.reduceat(values[:, 2], starts)
+    result[:, 3] = values[ends, 3]
+    result[:, 4] = np.add.reduceat(values[:, 4], starts)
+    return buckets[starts], result
+
+
+def _prepare(data):
+    """終値のある行の日付と Open/High/Low/Close/Volume の配列を取り出す（出来高がなければ0）"""
+    data = data[data["Close"].notna()]
+    columns = [data[field].to_numpy(dtype=np.float64) if field in data.columns else np.zeros(len(data))
+               for field in FIELDS]
+    columns[4] = np.nan_to_num(columns[4])
+    values = np.column_stack(columns) if len(data) else np.empty((0, len(FIELDS)))
+    return data.index.values.astype("datetime64[D]"), values
+
+
+def _frame(labels, values):
+    index = pd.DatetimeIndex(labels.astype("datetime64[ns]"), name="Date")
+    return pd.DataFrame({field: values[:, i] for i, field in enumerate(FIELDS)}, index=index)
+
+
+def resample_ohlcv(data, timeframe):
+    """
+    日足を週足・月足に集約する関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        日足（Open/High/Low/Close、Volume は任意）
+    timeframe : str
+        "daily", "weekly", "monthly"
+
+    Returns:
+    --------
+    pandas.DataFrame
+        インデックスを期間の開始日とした Open/High/Low/Close/Volume
+    """
+    days, values = _prepare(data)
+    return _frame(*aggregate_ohlcv(period_starts(days, timeframe), values))
+
+
+class ResampleCache:
+    """
+    系列ごとに終了した期間の週足・月足を保持するクラス
+
+    期間の最初の日（ただし取得開始日より前から始まる期間は除く）から最後の日まで日足が揃っていて、
+    かつ後に次の期間の日足がある期間を「終了した期間」としてキャッシュする。キャッシュした足は
+    日数・始値・終値が現在の日足と一致する場合だけ使うため、分割・配当の調整で過去の株価が
+    変わった場合は集約し直す。
+
+    Parameters:
+    -----------
+    max_series : int, optional
+        保持する系列数の上限（超えた場合は最も古く使われた系列から削除する）
+    """
+
+    def __init__(self, max_series=DEFAULT_MAX_SERIES):
+        self.max_series = max_series
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+        self.reused_periods = 0
+        self.aggregated_periods = 0
+
+    def resample(self, key, data, timeframe, from_date=None):
+        """
+        日足を週足・月足に集約する（終了した期間はキャッシュを使う）
+
+        Parameters:
+        -----------
+        key : tuple
+            系列を識別するキー（市場・銘柄・調整の有無など）
+        data : pandas.DataFrame
+            日足
+        timeframe : str
+            "daily", "weekly", "monthly"
+        from_date : str, optional
+            日足の取得開始日（YYYY-MM-DD形式）。この日より前から始まる期間はキャッシュしない
+
+        Returns:
+        --------
+        pandas.DataFrame
+            resample_ohlcv と同じ形式の足
+        """
+        days, values = _prepare(data)
+        buckets = period_starts(days, timeframe)
+        if not len(buckets) or timeframe == "daily":
+            return _frame(*aggregate_ohlcv(buckets, values))
+
+        starts = np.concatenate([[0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1])
+        ends = np.concatenate([starts[1:], [len(buckets)]]) - 1
+        labels = buckets[starts]
+        counts = ends - starts + 1
+        opens, closes = values[starts, 0], values[ends, 3]
+
+        finished = labels < labels[-1]
+        if from_date is not None:
+            finished &= labels >= np.datetime64(from_date, "D")
+
+        series_key = (key, timeframe)
+        with self._lock:
+            cached = self._series.get(series_key)
+            if cached is not None:
+                self._series.move_to_end(series_key)
+
+        result = np.empty((len(labels), len(FIELDS)))
+        reuse = np.zeros(len(labels), dtype=bool)
+        if cached is not None:
+            cached_labels, cached_values, cached_counts = cached
+            position = np.minimum(np.searchsorted(cached_labels, labels), len(cached_labels) - 1)
+            candidate = cached_values[position]
+            reuse = (finished & (cached_labels[position] == labels) & (cached_counts[position] == counts)
+                     & (candidate[:, 0] == opens) & (candidate[:, 3] == closes))
+            result[reuse] = candidate[reuse]
+
+        # キャッシュにない期間の行だけを集約する
+        missing = ~reuse
+        if missing.any():
+            rows = np.repeat(missing, counts)
+            _, result[missing] = aggregate_ohlcv(buckets[rows], values[rows])
+
+        store = finished & missing
+        if store.any():
+            if cached is None:
+                merged = (labels[store], result[store], counts[store])
+            else:
+                keep = ~np.isin(cached[0], labels[store])
+                order_labels = np.concatenate([cached[0][keep], labels[store]])
+                order = np.argsort(order_labels, kind="stable")
+                merged = (order_labels[order], np.concatenate([cached[1][keep], result[store]])[order],
+                          np.concatenate([cached[2][keep], counts[store]])[order])
+            with self._lock:
+                self._series[series_key] = merged
+                self._series.move_to_end(series_key)
+                while len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+
+        with self._lock:
+            self.reused_periods += int(reuse.sum())
+            self.aggregated_periods += int(missing.sum())
+        return _frame(labels, result)
+
+    def stats(self):
+        """
+        キャッシュの統計情報を返す
+        """
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "periods": sum(len(labels) for labels, _, _ in self._series.values()),
+                "reused_periods": self.reused_periods,
+                "aggregated_periods": self.aggregated_periods,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
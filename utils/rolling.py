@@ -0,0 +1,454 @@
+"""
+移動窓の統計量を計算するモジュール
+
+いずれも window 本の値がすべて揃った窓だけ計算し、NaN を含む窓と先頭の window - 1 本は NaN にする
+（pandas の rolling(window) と同じ）。
+
+- 最大値・最小値・最大ドローダウン: 系列を window 本ずつのブロックに分け、各ブロックの先頭からの
+  累積値と末尾からの累積値を組み合わせる（van Herk / Gil-Werman 法。単調キューと同じ O(n) を
+  numpy の累積演算だけで求める）
+- 平均・分散・共分散: 窓を1本ずらすごとの Welford の更新式（追加と削除）の増分をまとめて累積する
+  （累積の誤差が系列全体に広がらないよう、一定の本数ごとに直接計算した値から累積し直し、誤差に比べて
+  結果が小さい窓は直接計算する。値がすべて同じ窓は pandas と同じく分散・共分散を 0 にする）
+- 分位点: 窓の値を2つのヒープに分けて保持する（O(n log w)）
+"""
+import heapq
+import math
+from collections import deque
+
+import numpy as np
+
+# 共変動の増分の累積を直接計算した値からやり直す間隔（窓の数。window がこれより長い場合は window ごと）
+REANCHOR_INTERVAL = 1024
+
+# 増分の累積による誤差の見積もりがこの相対誤差を超える窓は直接計算し直す
+RELATIVE_TOLERANCE = 1e-8
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _check_window(n, window):
+    if window < 1:
+        raise ValueError("window は1以上を指定してください")
+    return n >= window
+
+
+def _incomplete(values, window):
+    """NaN を含む窓（各位置で終わる window 本）の真偽値の配列"""
+    missing = np.concatenate([[0], np.cumsum(np.isnan(values))])
+    counts = np.zeros(len(values), dtype=np.int64)
+    counts[window - 1:] = missing[window:] - missing[:-window]
+    incomplete = counts > 0
+    incomplete[:window - 1] = True
+    return incomplete
+
+
+def _blocks(values, window, fill):
+    """window 本ずつのブロックに分けた2次元配列（末尾は fill で埋める）"""
+    n_blocks = -(-len(values) // window)
+    padded = np.full(n_blocks * window, fill)
+    padded[:len(values)] = values
+    return padded.reshape(n_blocks, window)
+
+
+def _block_scans(values, window, ufunc, fill):
+    """ブロックごとの先頭からの累積（prefix）と末尾からの累積（suffix）を返す"""
+    blocks = _blocks(values, window, fill)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return prefix, suffix
+
+
+def _rolling_extreme(values, window, ufunc, fill):
+    values = _as_array(values)
+    result = np.full(len(values), np.nan)
+    if not _check_window(len(values), window):
+        return result
+    filled = np.where(np.isnan(values), fill, values)
+    prefix, suffix = _block_scans(filled, window, ufunc, fill)
+    # 位置 t で終わる窓 [t - window + 1, t] は、開始位置のブロックの末尾までと、t のブロックの先頭からに分かれる
+    end = np.arange(window - 1, len(values))
+    result[window - 1:] = ufunc(suffix[end - window + 1], prefix[end])
+    result[_incomplete(values, window)] = np.nan
+    return result
+
+
+def rolling_max(values, window):
+    """
+    移動最大値を求める関数
+
+    Parameters:
+    -----------
+    values : array-like
+        値
+    window : int
+        窓の本数
+
+    Returns:
+    --------
+    numpy.ndarray
+    """
+    return _rolling_extreme(values, window, np.maximum, -np.inf)
+
+
+def rolling_min(values, window):
+    """
+    移動最小値を求める関数（引数・戻り値は rolling_max と同じ）
+    """
+    return _rolling_extreme(values, window, np.minimum, np.inf)
+
+
+def _exact_comoments(x, y, window, starts):
+    """starts から始まる窓の共変動を直接計算する"""
+    x_windows = np.lib.stride_tricks.sliding_window_view(x, window)[starts]
+    y_windows = np.lib.stride_tricks.sliding_window_view(y, window)[starts]
+    return np.sum((x_windows - x_windows.mean(axis=1, keepdims=True))
+                  * (y_windows - y_windows.mean(axis=1, keepdims=True)), axis=1)
+
+
+def _sliding_moments(x, y, window):
+    """
+    NaN を 0 にした x, y について、各位置で終わる窓の平均と共変動（偏差の積の和）を求める
+
+    REANCHOR_INTERVAL 個（window の方が大きければ window 個）ごとの窓は直接計算し、その間は Welford の更新式
+    C_t = C_{t-1} + (x_t - x_{t-w})(y_t - ȳ_t) + (y_t - y_{t-w})(x_{t-w} - x̄_{t-1})
+    の増分を累積する（偏差の大きさの値だけを足し合わせるため、値の二乗の和から求めるより誤差が小さい）。
+    累積の誤差は直前の直接計算から足した増分の絶対値の和に比例するため、値の大きい期間の後に
+    値の小さい窓が続く場合など、その誤差に比べて結果が小さい窓は直接計算し直す。
+    """
+    n = len(x)
+    x = np.where(np.isnan(x), 0.0, x)
+    y = np.where(np.isnan(y), 0.0, y)
+    # 平均は先頭の値を引いた累積和から求める
+    x0, y0 = x[0], y[0]
+    cx = np.concatenate([[0.0], np.cumsum(x - x0)])
+    cy = np.concatenate([[0.0], np.cumsum(y - y0)])
+    mean_x = (cx[window:] - cx[:-window]) / window + x0
+    mean_y = (cy[window:] - cy[:-window]) / window + y0
+
+    # increments[i] は窓 i - 1 から窓 i への増分（窓 0 は直接計算するため 0）
+    m = n - window + 1
+    new_x, old_x = x[window:], x[:n - window]
+    new_y, old_y = y[window:], y[:n - window]
+    increments = np.concatenate([[0.0], (new_x - old_x) * (new_y - mean_y[1:])
+                                 + (new_y - old_y) * (old_x - mean_x[:-1])])
+
+    interval = min(max(window, REANCHOR_INTERVAL), m)
+    blocks = _blocks(increments, interval, 0.0)
+    blocks[:, 0] = _exact_comoments(x, y, window, np.arange(0, m, interval))
+    comoment = np.cumsum(blocks, axis=1).ravel()[:m]
+
+    drift = _blocks(np.abs(increments), interval, 0.0)
+    drift[:, 0] = 0.0
+    drift = np.cumsum(drift, axis=1).ravel()[:m]
+    inexact = np.flatnonzero(np.abs(comoment) * RELATIVE_TOLERANCE < np.finfo(np.float64).eps * drift)
+    if len(inexact):
+        comoment[inexact] = _exact_comoments(x, y, window, inexact)
+    return mean_x, mean_y, comoment
+
+
+def _constant(values, window):
+    """各位置で終わる窓の値がすべて同じかの真偽値の配列（window - 1 本目以降）"""
+    # 直前の値と異なる位置の数の累積が窓の中で増えていなければ、すべて同じ値（NaN を含む窓は同じとみなさない）
+    changes = np.concatenate([[0], np.cumsum(values[1:] != values[:-1])])
+    return changes[window - 1:] == changes[:len(values) - window + 1]
+
+
+def rolling_mean_var(values, window, ddof=1):
+    """
+    移動平均と移動分散を求める関数
+
+    Parameters:
+    -----------
+    values : array-like
+        値
+    window : int
+        窓の本数（2以上）
+    ddof : int, optional
+        分散の自由度の補正（1 で不偏分散）
+
+    Returns:
+    --------
+    tuple of numpy.ndarray
+        (平均, 分散)
+    """
+    values = _as_array(values)
+    mean = np.full(len(values), np.nan)
+    var = np.full(len(values), np.nan)
+    if not _check_window(len(values), window) or window <= ddof:
+        return mean, var
+    mean_x, _, m2 = _sliding_moments(values, values, window)
+    m2[_constant(values, window)] = 0.0
+    mean[window - 1:] = mean_x
+    var[window - 1:] = np.maximum(m2, 0.0) / (window - ddof)
+    incomplete = _incomplete(values, window)
+    mean[incomplete] = np.nan
+    var[incomplete] = np.nan
+    return mean, var
+
+
+def rolling_std(values, window, ddof=1):
+    """
+    移動標準偏差を求める関数（引数は rolling_mean_var と同じ）
+    """
+    return np.sqrt(rolling_mean_var(values, window, ddof=ddof)[1])
+
+
+def rolling_cov(x, y, window, ddof=1):
+    """
+    移動共分散と、y の移動分散を求める関数
+
+    Parameters:
+    -----------
+    x, y : array-like
+        同じ長さの値
+    window : int
+        窓の本数（2以上）
+    ddof : int, optional
+        自由度の補正
+
+    Returns:
+    --------
+    tuple of numpy.ndarray
+        (x と y の共分散, y の分散)
+    """
+    x, y = _as_array(x), _as_array(y)
+    if len(x) != len(y):
+        raise ValueError("x と y の長さが異なります")
+    cov = np.full(len(x), np.nan)
+    var_y = np.full(len(x), np.nan)
+    if not _check_window(len(x), window) or window <= ddof:
+        return cov, var_y
+    _, _, cxy = _sliding_moments(x, y, window)
+    _, _, cyy = _sliding_moments(y, y, window)
+    constant_y = _constant(y, window)
+    cxy[_constant(x, window) | constant_y] = 0.0
+    cyy[constant_y] = 0.0
+    cov[window - 1:] = cxy / (window - ddof)
+    var_y[window - 1:] = np.maximum(cyy, 0.0) / (window - ddof)
+    incomplete = _incomplete(x + y, window)
+    cov[incomplete] = np.nan
+    var_y[incomplete] = np.nan
+    return cov, var_y
+
+
+def rolling_sharpe(returns, window, risk_free=0.0, periods_per_year=252):
+    """
+    移動シャープレシオ（年率）を求める関数
+
+    Parameters:
+    -----------
+    returns : array-like
+        期間ごとのリターン（% でも小数でもよい。risk_free も同じ単位の年率で指定する）
+    window : int
+        窓の本数
+    risk_free : float, optional
+        無リスク金利（年率）
+    periods_per_year : int, optional
+        1年あたりの期間数
+
+    Returns:
+    --------
+    numpy.ndarray
+    """
+    mean, var = rolling_mean_var(returns, window)
+    excess = mean - risk_free / periods_per_year
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = excess / np.sqrt(var) * math.sqrt(periods_per_year)
+    return np.where(var > 0, sharpe, np.nan)
+
+
+def rolling_beta(returns, benchmark_returns, window):
+    """
+    ベンチマークに対する移動ベータ（共分散 / ベンチマークの分散）を求める関数
+
+    Parameters:
+    -----------
+    returns : array-like
+        銘柄のリターン
+    benchmark_returns : array-like
+        同じ日付のベンチマークのリターン
+    window : int
+        窓の本数
+
+    Returns:
+    --------
+    numpy.ndarray
+    """
+    cov, var = rolling_cov(returns, benchmark_returns, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(var > 0, cov / var, np.nan)
+
+
+def rolling_max_drawdown(prices, window):
+    """
+    各窓の中での最大ドローダウン（%。高値からの最大の下落率で、0 以下）を求める関数
+
+    対数価格 L について、窓の区間の (最大値, 最小値, 区間内で前の値から後の値を引いた差の最大値) は
+    2つの区間を結合できる（結合した区間の最大の下落 = max(前の区間, 後の区間, 前の最大値 - 後の最小値)）
+    ため、rolling_max と同じブロックの累積で O(n) で求める。
+
+    Parameters:
+    -----------
+    prices : array-like
+        価格（正の値）
+    window : int
+        窓の本数
+
+    Returns:
+    --------
+    numpy.ndarray
+    """
+    prices = _as_array(prices)
+    result = np.full(len(prices), np.nan)
+    if not _check_window(len(prices), window):
+        return result
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(prices)
+    logs = np.where(np.isfinite(logs), logs, np.nan)
+    filled = np.where(np.isnan(logs), 0.0, logs)
+
+    blocks = _blocks(filled, window, 0.0)
+    # ブロックの先頭から t まで: 最小値と、(それまでの最大値 - その時点の値) の最大値
+    prefix_max = np.maximum.accumulate(blocks, axis=1)
+    prefix_min = np.minimum.accumulate(blocks, axis=1).ravel()
+    prefix_drop = np.maximum.accumulate(prefix_max - blocks, axis=1).ravel()
+    # s からブロックの末尾まで: 最大値と、(その時点の値 - それ以降の最小値) の最大値
+    reverse = blocks[:, ::-1]
+    suffix_max = np.maximum.accumulate(reverse, axis=1)[:, ::-1].ravel()
+    suffix_min = np.minimum.accumulate(reverse, axis=1)[:, ::-1]
+    suffix_drop = np.maximum.accumulate((blocks - suffix_min)[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    end = np.arange(window - 1, len(prices))
+    start = end - window + 1
+    drop = np.maximum(np.maximum(suffix_drop[start], prefix_drop[end]), suffix_max[start] - prefix_min[end])
+    # 窓がちょうど1つのブロックに収まる場合はそのブロックの値だけを使う
+    aligned = start % window == 0
+    drop[aligned] = suffix_drop[start[aligned]]
+    result[window - 1:] = np.expm1(-drop) * 100
+    result[_incomplete(logs, window)] = np.nan
+    return result
+
+
+class RollingQuantile:
+    """
+    移動窓の分位点を2つのヒープで求めるクラス
+
+    窓の値を、小さい側（最大ヒープ）と大きい側（最小ヒープ）に分けて保持する。窓から外れた値は
+    ヒープの先頭に来た時点で捨てる（遅延削除）。小さい側の個数を floor(q * (w - 1)) + 1 に保つと、
+    小さい側の最大値と大きい側の最小値から pandas（線形補間）と同じ分位点が求まる。
+
+    Parameters:
+    -----------
+    window : int
+        窓の本数
+    q : float
+        0〜1 の確率
+    """
+
+    def __init__(self, window, q):
+        if window < 1:
+            raise ValueError("window は1以上を指定してください")
+        if not 0 <= q <= 1:
+            raise ValueError("q は0〜1の範囲で指定してください")
+        self.window = window
+        self.q = q
+        self._low = []   # (-値, 位置)
+        self._high = []  # (値, 位置)
+        self._in_low = {}
+        self._low_size = 0
+        self._high_size = 0
+        self._values = deque()
+        self._missing = 0
+        self.position = -1
+
+    def _expired(self, index):
+        return index <= self.position - self.window
+
+    def _prune(self):
+        while self._low and self._expired(self._low[0][1]):
+            heapq.heappop(self._low)
+        while self._high and self._expired(self._high[0][1]):
+            heapq.heappop(self._high)
+
+    def _rebalance(self):
+        count = self._low_size + self._high_size
+        target = int(math.floor(self.q * (count - 1))) + 1 if count else 0
+        while self._low_size > target:
+            self._prune()
+            value, index = heapq.heappop(self._low)
+            heapq.heappush(self._high, (-value, index))
+            self._in_low[index] = False
+            self._low_size -= 1
+            self._high_size += 1
+        while self._low_size < target:
+            self._prune()
+            value, index = heapq.heappop(self._high)
+            heapq.heappush(self._low, (-value, index))
+            self._in_low[index] = True
+            self._low_size += 1
+            self._high_size -= 1
+        self._prune()
+
+    def push(self, value):
+        """
+        値を1つ追加し、その位置で終わる窓の分位点を返す（窓が揃っていない場合は NaN）
+        """
+        self.position += 1
+        index = self.position
+        self._values.append(value)
+        if math.isnan(value):
+            self._missing += 1
+        else:
+            self._prune()
+            if self._low and value <= -self._low[0][0]:
+                heapq.heappush(self._low, (-value, index))
+                self._in_low[index] = True
+                self._low_size += 1
+            else:
+                heapq.heappush(self._high, (value, index))
+                self._in_low[index] = False
+                self._high_size += 1
+
+        if len(self._values) > self.window:
+            leaving = index - self.window
+            if math.isnan(self._values.popleft()):
+                self._missing -= 1
+            elif self._in_low.pop(leaving):
+                self._low_size -= 1
+            else:
+                self._high_size -= 1
+        self._rebalance()
+
+        if index < self.window - 1 or self._missing:
+            return math.nan
+        position = self.q * (self.window - 1)
+        lower = -self._low[0][0]
+        fraction = position - math.floor(position)
+        if fraction == 0 or not self._high:
+            return lower
+        return lower + (self._high[0][0] - lower) * fraction
+
+
+def rolling_quantile(values, window, q):
+    """
+    移動分位点（pandas の rolling(window).quantile(q) と同じ線形補間）を求める関数
+
+    Parameters:
+    -----------
+    values : array-like
+        値
+    window : int
+        窓の本数
+    q : float
+        0〜1 の確率
+
+    Returns:
+    --------
+    numpy.ndarray
+    """
+    quantile = RollingQuantile(window, q)
+    return np.fromiter((quantile.push(value) for value in _as_array(values).tolist()), dtype=np.float64,
+                       count=len(values))
@@ -0,0 +1,460 @@
+"""
+全銘柄を対象にしたテクニカル指標のスクリーナー
+
+"Close > MA_75 and RSI < 30" のような条件式を、パネル（utils.panel）から計算した
+各銘柄の最新指標値の表に対してベクトル演算で評価する。
+
+条件式の文法:
+    論理演算    and, or, not（& | ~ も可）
+    比較演算    <, <=, >, >=, ==, !=
+    算術演算    +, -, *, /
+    その他      数値、指標名、括弧
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.panel import PricePanel
+
+DEFAULT_MA_WINDOWS = (5, 25, 75)
+DEFAULT_RSI_WINDOW = 14
+DEFAULT_VOLATILITY_WINDOW = 20
+
+LATEST_TABLE_FILE = "latest.npz"
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<number>\d+(?:\.\d*)?|\.\d+)|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<op><=|>=|==|!=|<|>|\+|-|\*|/|\(|\)|&|\||~))"
+)
+_KEYWORDS = {"and": "&", "or": "|", "not": "~"}
+_COMPARISONS = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater,
+    ">=": np.greater_equal, "==": np.equal, "!=": np.not_equal,
+}
+_ARITHMETIC = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide}
+
+
+def _right_align_valid(values, length):
+    """
+    各行の欠損でない値を末尾に詰め、直近 length 個を取り出す（足りない部分は NaN）
+    """
+    valid = ~np.isnan(values)
+    order = np.argsort(~valid, axis=1, kind="stable")
+    packed = np.take_along_axis(values, order, axis=1)
+    n_valid = valid.sum(axis=1)
+    positions = n_valid[:, None] - length + np.arange(length)[None, :]
+    aligned = np.take_along_axis(packed, np.clip(positions, 0, None), axis=1)
+    aligned[positions < 0] = np.nan
+    return aligned, n_valid
+
+
+def compute_latest_indicators(closes, volumes=None, ma_windows=DEFAULT_MA_WINDOWS,
+                              rsi_window=DEFAULT_RSI_WINDOW, volatility_window=DEFAULT_VOLATILITY_WINDOW):
+    """
+    全銘柄の最新日の指標値をまとめて計算する関数
+
+    計算式は utils.data_processor の calculate_* 関数と同じ。各銘柄の取引のある日だけを
+    詰めてから直近の期間を銘柄方向にベクトル化して計算するため、売買停止日があっても
+    銘柄ごとに calculate_* を適用した最終行と一致する。最終日に取引のない銘柄は全て NaN になる。
+
+    Parameters:
+    -----------
+    closes : pandas.DataFrame
+        終値（行: 営業日、列: 銘柄、取引のない日は NaN）
+    volumes : pandas.DataFrame, optional
+        出来高（行: 営業日、列: 銘柄）
+    ma_windows : tuple of int, optional
+        移動平均の期間
+    rsi_window : int, optional
+        RSIの計算期間
+    volatility_window : int, optional
+        ボラティリティの計算期間
+
+    Returns:
+    --------
+    pandas.DataFrame
+        行: 銘柄、列: Close, Volume, Daily_Return, MA_*, RSI, Volatility
+    """
+    values = closes.to_numpy(dtype=np.float64).T
+    lookback = max(max(ma_windows), rsi_window + 1, volatility_window + 1, 2)
+    traded_today = ~np.isnan(values[:, -1]) if values.shape[1] else np.zeros(len(values), dtype=bool)
+    aligned, n_valid = _right_align_valid(values, lookback)
+
+    table = pd.DataFrame(index=closes.columns)
+    table["Close"] = aligned[:, -1]
+    if volumes is not None:
+        table["Volume"] = volumes.to_numpy(dtype=np.float64)[-1] if len(volumes) else np.nan
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily_return = (aligned[:, 1:] / aligned[:, :-1] - 1) * 100
+        table["Daily_Return"] = daily_return[:, -1]
+
+        for window in ma_windows:
+            table[f"MA_{window}"] = aligned[:, -window:].mean(axis=1)
+
+        # calculate_rsi と同様に、先頭の差分（NaN）は上昇・下落とも 0 として扱う
+        delta = np.diff(aligned[:, -(rsi_window + 1):], axis=1)
+        gain = np.where(delta > 0, delta, 0).mean(axis=1)
+        loss = np.where(delta < 0, -delta, 0).mean(axis=1)
+        rsi = 100 - (100 / (1 + gain / loss))
+        table["RSI"] = np.where(n_valid >= rsi_window, rsi, np.nan)
+
+        table["Volatility"] = np.std(daily_return[:, -volatility_window:], axis=1, ddof=1)
+
+    table.loc[~traded_today, :] = np.nan
+    return table.astype(np.float64)
+
+
+def build_latest_table(panel, ma_windows=DEFAULT_MA_WINDOWS, rsi_window=DEFAULT_RSI_WINDOW,
+                       volatility_window=DEFAULT_VOLATILITY_WINDOW):
+    """
+    パネルの最終営業日時点の指標表を作成する関数
+
+    Parameters:
+    -----------
+    panel : PricePanel
+        株価パネル
+
+    Returns:
+    --------
+    pandas.DataFrame
+        行: 銘柄、列: 指標（attrs["as_of"] に最終営業日）
+    """
+    # 売買停止日を詰めても計算期間が足りるよう、必要な日数の2倍を読み込む
+    lookback = 2 * max(max(ma_windows), rsi_window + 1, volatility_window + 1)
+    start = max(0, panel.n_days - lookback)
+    part = panel.select(from_date=panel.dates[start] if panel.n_days else None)
+    closes = pd.DataFrame(part.field("Close").T, index=part.dates, columns=part.symbols)
+    volumes = None
+    if "Volume" in part.fields:
+        volumes = pd.DataFrame(part.field("Volume").T, index=part.dates, columns=part.symbols)
+    table = compute_latest_indicators(closes, volumes, ma_windows, rsi_window, volatility_window)
+    table.attrs["as_of"] = part.dates[-1].strftime("%Y-%m-%d") if len(part.dates) else None
+    return table
+
+
+def load_latest_table(panel):
+    """
+    保存済みの最新指標表を読み込む関数（パネルが更新されていれば作り直す）
+
+    Parameters:
+    -----------
+    panel : PricePanel
+        株価パネル
+
+    Returns:
+    --------
+    pandas.DataFrame
+        行: 銘柄、列: 指標
+    """
+    path = panel.path / LATEST_TABLE_FILE
+    updated = panel.meta.get("updated") or ""
+    if path.exists():
+        with np.load(path, allow_pickle=False) as saved:
+            if str(saved["updated"]) == updated:
+                table = pd.DataFrame(saved["values"], index=saved["symbols"], columns=saved["columns"])
+                table.attrs["as_of"] = str(saved["as_of"]) or None
+                return table
+
+    table = build_latest_table(panel)
+    try:
+        np.savez(
+            path, values=table.to_numpy(), symbols=np.array(table.index, dtype=str),
+            columns=np.array(table.columns, dtype=str), updated=updated, as_of=table.attrs["as_of"] or "",
+        )
+    except OSError:
+        # 読み取り専用の環境では保存せずに返す
+        pass
+    return table
+
+
+def _tokenize(expression):
+    tokens = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"条件式を解析できません: 位置 {pos} 付近 '{expression[pos:pos + 10]}'")
+        pos = match.end()
+        if match.group("number"):
+            tokens.append(("number", float(match.group("number"))))
+        elif match.group("name"):
+            name = match.group("name")
+            if name.lower() in _KEYWORDS:
+                tokens.append(("op", _KEYWORDS[name.lower()]))
+            else:
+                tokens.append(("name", name))
+        elif match.group("op"):
+            tokens.append(("op", match.group("op")))
+    return tokens
+
+
+class _Parser:
+    """条件式を (演算子, 引数...) の木に変換する再帰下降パーサー"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, token = self.peek()
+        if kind is None or (value is not None and token != value):
+            raise ValueError(f"条件式が不正です: '{value or '値'}' が必要です")
+        self.pos += 1
+        return kind, token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"条件式が不正です: 余分なトークン '{self.peek()[1]}'")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == ("op", "|"):
+            self.take()
+            node = ("or", node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() == ("op", "&"):
+            self.take()
+            node = ("and", node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.peek() == ("op", "~"):
+            self.take()
+            return ("not", self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        node = self.parse_sum()
+        kind, token = self.peek()
+        if kind == "op" and token in _COMPARISONS:
+            self.take()
+            node = ("cmp", token, node, self.parse_sum())
+        return node
+
+    def parse_sum(self):
+        node = self.parse_product()
+        while self.peek()[0] == "op" and self.peek()[1] in ("+", "-"):
+            _, token = self.take()
+            node = ("arith", token, node, self.parse_product())
+        return node
+
+    def parse_product(self):
+        node = self.parse_factor()
+        while self.peek()[0] == "op" and self.peek()[1] in ("*", "/"):
+            _, token = self.take()
+            node = ("arith", token, node, self.parse_factor())
+        return node
+
+    def parse_factor(self):
+        kind, token = self.peek()
+        if kind == "number":
+            self.take()
+            return ("number", token)
+        if kind == "name":
+            self.take()
+            return ("name", token)
+        if (kind, token) == ("op", "-"):
+            self.take()
+            return ("neg", self.parse_factor())
+        if (kind, token) == ("op", "("):
+            self.take()
+            node = self.parse_or()
+            self.take(")")
+            return node
+        raise ValueError(f"条件式が不正です: '{token}' の位置に値が必要です" if token else "条件式が途中で終わっています")
+
+
+def _names(node):
+    if node[0] == "name":
+        return {node[1]}
+    return set().union(*[_names(child) for child in node[1:] if isinstance(child, tuple)])
+
+
+class Predicate:
+    """
+    コンパイル済みの条件式
+
+    Attributes:
+    -----------
+    expression : str
+        元の条件式
+    columns : set of str
+        条件式で参照している指標名
+    """
+
+    def __init__(self, expression, tree):
+        self.expression = expression
+        self.tree = tree
+        self.columns = _names(tree)
+
+    def evaluate(self, table):
+        """
+        指標表に対して条件式を評価する
+
+        Parameters:
+        -----------
+        table : pandas.DataFrame
+            行: 銘柄、列: 指標
+
+        Returns:
+        --------
+        numpy.ndarray
+            条件を満たす銘柄の真偽値（欠損値を含む比較は False）
+
+        Raises:
+        -------
+        ValueError
+            未知の指標名を参照している場合や、条件式が真偽値にならない場合
+        """
+        return self.evaluate_arrays({name: table[name] for name in table.columns if name in self.columns},
+                                    len(table), available=table.columns)
+
+    def evaluate_arrays(self, arrays, size, available=None):
+        """
+        列名 → 配列の辞書に対して条件式を評価する（参照している列だけを読む）
+
+        Parameters:
+        -----------
+        arrays : dict
+            列名 → 長さ size の配列（少なくとも条件式で参照する列を含む）
+        size : int
+            行数
+        available : iterable of str, optional
+            エラーメッセージに表示する利用可能な列名（省略時は arrays のキー）
+
+        Returns:
+        --------
+        numpy.ndarray
+            条件を満たす行の真偽値（欠損値を含む比較は False）
+
+        Raises:
+        -------
+        ValueError
+            未知の指標名を参照している場合や、条件式が真偽値にならない場合
+        """
+        missing = self.columns - set(arrays)
+        if missing:
+            available = arrays if available is None else available
+            raise ValueError(
+                f"未知の指標です: {', '.join(sorted(missing))}（利用可能: {', '.join(available)}）"
+            )
+        columns = {name: np.asarray(arrays[name], dtype=np.float64) for name in self.columns}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = self._eval(self.tree, columns, size)
+        if result.dtype != bool:
+            raise ValueError(f"条件式が真偽値になりません: {self.expression}")
+        return result
+
+    def _eval(self, node, columns, size):
+        op = node[0]
+        if op == "number":
+            return np.full(size, node[1])
+        if op == "name":
+            return columns[node[1]]
+        if op == "neg":
+            return -self._eval(node[1], columns, size)
+        if op == "not":
+            return ~self._as_bool(self._eval(node[1], columns, size))
+        if op in ("and", "or"):
+            left = self._as_bool(self._eval(node[1], columns, size))
+            right = self._as_bool(self._eval(node[2], columns, size))
+            return left & right if op == "and" else left | right
+        left = self._eval(node[2], columns, size)
+        right = self._eval(node[3], columns, size)
+        if op == "cmp":
+            return _COMPARISONS[node[1]](left, right)
+        return _ARITHMETIC[node[1]](left, right)
+
+    def _as_bool(self, values):
+        if values.dtype != bool:
+            raise ValueError(f"論理演算の対象が比較式ではありません: {self.expression}")
+        return values
+
+
+@lru_cache(maxsize=256)
+def compile_predicate(expression):
+    """
+    条件式をコンパイルする関数
+
+    Parameters:
+    -----------
+    expression : str
+        条件式（例: "Close > MA_75 and RSI < 30"）
+
+    Returns:
+    --------
+    Predicate
+
+    Raises:
+    -------
+    ValueError
+        条件式が不正な場合
+    """
+    if not expression or not expression.strip():
+        raise ValueError("条件式が空です")
+    return Predicate(expression, _Parser(_tokenize(expression)).parse())
+
+
+def screen(expression, table, names=None, sort_by=None, ascending=True, limit=None):
+    """
+    条件式に一致する銘柄を抽出する関数
+
+    Parameters:
+    -----------
+    expression : str
+        条件式
+    table : pandas.DataFrame
+        行: 銘柄、列: 指標（build_latest_table / load_latest_table の戻り値）
+    names : dict, optional
+        コード → 銘柄名（指定すると "銘柄名" 列を付ける）
+    sort_by : str, optional
+        並べ替えに使う指標
+    ascending : bool, optional
+        昇順に並べるか
+    limit : int, optional
+        返す最大件数
+
+    Returns:
+    --------
+    pandas.DataFrame
+        一致した銘柄の指標
+    """
+    predicate = compile_predicate(expression)
+    result = table[predicate.evaluate(table)]
+    if sort_by:
+        result = result.sort_values(sort_by, ascending=ascending)
+    if limit:
+        result = result.head(limit)
+    if names is not None:
+        result = result.copy()
+        result.insert(0, "銘柄名", [names.get(code, "") for code in result.index])
+    return result
+
+
+def open_latest_table(panel_dir=None):
+    """
+    パネルを読み取り専用で開き、最新指標表を返す関数
+
+    Parameters:
+    -----------
+    panel_dir : str or pathlib.Path, optional
+        パネルのディレクトリ（省略時はデフォルト）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        行: 銘柄、列: 指標
+    """
+    return load_latest_table(PricePanel.open(panel_dir))
@@ -0,0 +1,86 @@
+"""
+銘柄マスタ（data/data_j.xlsx, data/data_us.xlsx）を読み込むユーティリティモジュール
+
+Excelの読み込み（openpyxl の import を含む）は起動時間の大半を占めるため、
+初回に読み込んだ結果を data/.cache/ に JSON で保存し、Excelファイルが更新されるまで再利用する。
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+CACHE_DIR_NAME = ".cache"
+
+SYMBOL_MASTER_FILES = {
+    "jp": ("data_j.xlsx", "コード", "銘柄名"),
+    "us": ("data_us.xlsx", "ティッカーシンボル", "会社名"),
+}
+
+
+@lru_cache(maxsize=None)
+def _read_symbol_master(market, data_dir):
+    if market not in SYMBOL_MASTER_FILES:
+        raise ValueError(f"市場の指定が不正です: {market}（jp または us）")
+    filename, code_column, name_column = SYMBOL_MASTER_FILES[market]
+    source = Path(data_dir) / filename
+    stat = source.stat()
+    version = [stat.st_mtime_ns, stat.st_size]
+    cache_path = Path(data_dir) / CACHE_DIR_NAME / f"symbols_{market}.json"
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["version"] == version:
+            return pd.DataFrame({"code": cached["code"], "name": cached["name"]})
+    except (OSError, ValueError, KeyError):
+        pass
+
+    df = pd.read_excel(source)
+    codes = df[code_column].astype(str).str.strip()
+    if market == "jp":
+        # コード列をstr型・ゼロ埋め4桁に統一
+        codes = codes.str.zfill(4)
+    master = pd.DataFrame({"code": codes, "name": df[name_column].astype(str)})
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "code": master["code"].tolist(), "name": master["name"].tolist()},
+                      f, ensure_ascii=False)
+    except OSError:
+        # 読み取り専用の環境ではキャッシュせずに続行する
+        pass
+    return master
+
+
+def load_symbol_master(market="jp", data_dir=DATA_DIR):
+    """
+    銘柄マスタを読み込む関数
+
+    Parameters:
+    -----------
+    market : str, optional
+        市場（"jp" または "us"）
+    data_dir : str or pathlib.Path, optional
+        Excelファイルのディレクトリ
+
+    Returns:
+    --------
+    pandas.DataFrame
+        code（日本株はゼロ埋め4桁）と name の2列
+
+    Raises:
+    -------
+    ValueError
+        市場の指定が不正な場合
+    """
+    return _read_symbol_master(market, str(data_dir)).copy()
+
+
+def load_company_names(market="jp", data_dir=DATA_DIR):
+    """
+    コードから銘柄名を引く辞書を返す関数
+    """
+    master = _read_symbol_master(market, str(data_dir))
+    return dict(zip(master["code"], master["name"]))
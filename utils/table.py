@@ -0,0 +1,224 @@
+"""
+データテーブル表示用に、表示するページ・列だけを読み出すモジュール
+
+キャッシュ済みの時系列（日付順の DataFrame）の列配列をコピーせずに参照し、期間の絞り込みは
+日付の二分探索、条件式による絞り込みは参照している列だけ、並べ替えはキーの列だけで行う。
+表示用の DataFrame は最後に1ページ分（既定 DEFAULT_PAGE_SIZE 行）の選択した列だけで作るため、
+期間が長くても表示にかかる時間とメモリはページの大きさで決まる。
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.screener import compile_predicate
+
+# 1ページに表示する行数
+DEFAULT_PAGE_SIZE = 100
+
+# 日付の列として扱う名前（並べ替えのキーに指定すると日付順になる）
+DATE_COLUMN = "Date"
+
+
+class TablePage:
+    """
+    query の結果（1ページ分の表と件数）
+
+    Attributes:
+    -----------
+    frame : pandas.DataFrame
+        ページ内の行・選択した列だけの表（インデックスは日付）
+    total_rows : int
+        絞り込み後の全体の行数
+    page : int
+        ページ番号（0 始まり、範囲外の指定は最後のページに丸める）
+    page_size : int
+        1ページの行数
+    """
+
+    def __init__(self, frame, total_rows, page, page_size):
+        self.frame = frame
+        self.total_rows = total_rows
+        self.page = page
+        self.page_size = page_size
+
+    @property
+    def total_pages(self):
+        return max(1, math.ceil(self.total_rows / self.page_size))
+
+    @property
+    def first_row(self):
+        """ページ先頭の行番号（1 始まり、該当なしの場合は 0）"""
+        return self.page * self.page_size + 1 if self.total_rows else 0
+
+    @property
+    def last_row(self):
+        return self.page * self.page_size + len(self.frame)
+
+
+class TableSource:
+    """
+    日付順の時系列を列ごとの配列として保持し、ページ単位で読み出すクラス
+
+    from_frame は列を numpy 配列のビューとして取り出すだけでコピーしないため、
+    キャッシュ済みの読み取り専用の DataFrame をセッションごとに複製せずに共有できる。
+    """
+
+    def __init__(self, index, columns):
+        """
+        Parameters:
+        -----------
+        index : pandas.DatetimeIndex
+            昇順の日付
+        columns : dict
+            列名 → index と同じ長さの配列
+
+        Raises:
+        -------
+        ValueError
+            配列の長さが日付の数と一致しない場合や、日付が昇順でない場合
+        """
+        index = pd.DatetimeIndex(index)
+        for name, values in columns.items():
+            if len(values) != len(index):
+                raise ValueError(f"列 {name} の長さ({len(values)})が日付の数({len(index)})と一致しません")
+        if not index.is_monotonic_increasing:
+            raise ValueError("日付が昇順に並んでいません")
+        self.index = index
+        self._columns = dict(columns)
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        DataFrame の列をコピーせずに参照する TableSource を作成する
+
+        Parameters:
+        -----------
+        data : pandas.DataFrame
+            インデックスが昇順の日付の時系列
+
+        Returns:
+        --------
+        TableSource
+        """
+        return cls(data.index, {name: data[name].to_numpy() for name in data.columns})
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __len__(self):
+        return len(self.index)
+
+    def _row_range(self, from_date, to_date):
+        # 日付は昇順なので期間の絞り込みは二分探索で行の範囲に変換する
+        start, stop = 0, len(self.index)
+        if from_date is not None:
+            start = int(self.index.searchsorted(pd.Timestamp(from_date), side="left"))
+        if to_date is not None:
+            stop = int(self.index.searchsorted(pd.Timestamp(to_date), side="right"))
+        return start, max(start, stop)
+
+    def rows(self, where=None, sort_by=None, ascending=False, from_date=None, to_date=None):
+        """
+        条件に一致する行の番号を表示順に返す
+
+        Parameters:
+        -----------
+        where : str, optional
+            絞り込みの条件式（utils.screener と同じ書式、例: "Daily_Return < -3 and Volume > 1e6"）
+        sort_by : str, optional
+            並べ替えの列（省略時・DATE_COLUMN の場合は日付順）
+        ascending : bool, optional
+            昇順に並べるか（既定は新しい順・大きい順）
+        from_date, to_date : str or datetime, optional
+            期間（両端を含む）
+
+        Returns:
+        --------
+        numpy.ndarray or range
+            行番号（絞り込み・並べ替えがない場合は連続した範囲のまま返す）
+
+        Raises:
+        -------
+        ValueError
+            条件式や並べ替えの列が不正な場合
+        """
+        start, stop = self._row_range(from_date, to_date)
+        if where and where.strip():
+            predicate = compile_predicate(where)
+            arrays = {name: self._columns[name][start:stop] for name in predicate.columns if name in self._columns}
+            mask = predicate.evaluate_arrays(arrays, stop - start, available=self.columns)
+            rows = start + np.flatnonzero(mask)
+        else:
+            rows = range(start, stop)
+
+        if sort_by is None or sort_by == DATE_COLUMN:
+            return rows if ascending else rows[::-1]
+
+        # 値が同じ行は日付順（降順なら新しい順）に、欠損値はどちらの向きでも最後に並べる
+        if sort_by not in self._columns:
+            raise ValueError(f"並べ替えの列がありません: {sort_by}（利用可能: {', '.join(self._columns)}）")
+        rows = np.asarray(rows, dtype=np.intp)
+        if not ascending:
+            rows = rows[::-1]
+        keys = self._columns[sort_by][rows].astype(np.float64)
+        if not ascending:
+            keys = -keys
+        keys[np.isnan(keys)] = np.inf
+        order = np.argsort(keys, kind="stable")
+        return rows[order]
+
+    def take(self, rows, columns=None):
+        """
+        指定した行・列だけの DataFrame を作成する
+
+        Parameters:
+        -----------
+        rows : array-like or range
+            行番号
+        columns : list of str, optional
+            列（省略時は全列、存在しない列は無視する）
+
+        Returns:
+        --------
+        pandas.DataFrame
+        """
+        names = self.columns if columns is None else [name for name in columns if name in self._columns]
+        if isinstance(rows, range):
+            # 連続した範囲はスライスで読み出す（ページ内の行だけのビュー）
+            rows = slice(rows.start, rows.stop if rows.stop >= 0 else None, rows.step) if len(rows) else slice(0, 0)
+        return pd.DataFrame({name: self._columns[name][rows] for name in names}, index=self.index[rows])
+
+    def query(self, columns=None, where=None, sort_by=None, ascending=False, from_date=None, to_date=None,
+              page=0, page_size=DEFAULT_PAGE_SIZE):
+        """
+        絞り込み・並べ替えを行い、指定したページの指定した列だけを返す
+
+        Parameters:
+        -----------
+        columns : list of str, optional
+            表示する列（省略時は全列）
+        where, sort_by, ascending, from_date, to_date
+            rows と同じ
+        page : int, optional
+            ページ番号（0 始まり）
+        page_size : int, optional
+            1ページの行数
+
+        Returns:
+        --------
+        TablePage
+
+        Raises:
+        -------
+        ValueError
+            条件式や並べ替えの列が不正な場合、page_size が正でない場合
+        """
+        if page_size <= 0:
+            raise ValueError("page_size は正の整数を指定してください")
+        rows = self.rows(where, sort_by, ascending, from_date, to_date)
+        total_rows = len(rows)
+        page = min(max(0, int(page)), max(0, math.ceil(total_rows / page_size) - 1))
+        visible = rows[page * page_size:(page + 1) * page_size]
+        return TablePage(self.take(visible, columns), total_rows, page, page_size)
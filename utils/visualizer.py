@@ -1,10 +1,478 @@
-import plotly.graph_objects as go
-import plotly.express as px
-import matplotlib.pyplot as plt
-import pandas as pd
+"""
+Plotly の図を作成する関数
+
+数値の配列は numpy 配列のまま渡す（JSON のリストではなく base64 の型付き配列として送られる。
+plotly 6 以降が必要で、requirements.txt でも指定している）。日付の軸も UNIX ミリ秒の数値で渡し、軸の種類を "date" に指定する。
+点数の多い折れ線は WebGL（Scattergl）で描画し、棒・ローソク足はチャートの横幅より多い場合に
+隣接する足をまとめる。
+
+各ページの図はすべてこのモジュールで作成する。サブプロットの配置・配色などのレイアウトは
+行の高さごとに一度だけ作成して使い回し（make_subplots や update_xaxes は呼ばない）、
+テンプレートも plotly_dark のうち2次元のチャートで使う部分だけを保持する（全体を検証すると
+図1枚あたり 20ms 程度かかり、JSON も 7KB 程度増える）。
+"""
+import copy
+from functools import lru_cache
+
 import numpy as np
-import os
-import requests
+import plotly.graph_objects as go
+
+# この点数を超える折れ線は WebGL（Scattergl）で描画する
+WEBGL_THRESHOLD = 5000
+
+# 棒・ローソク足の最大本数（チャートの横幅のピクセル数程度。超える場合は隣接する足をまとめる）
+MAX_BARS = 1500
+
+# チャート共通の凡例・配色
+CHART_LAYOUT = dict(
+    legend=dict(
+        title="凡例",
+        orientation="h",
+        yanchor="top",
+        y=1.13,
+        xanchor="center",
+        x=0.5,
+        font=dict(size=12),
+        bgcolor="rgba(0,0,0,0.5)",
+        bordercolor="rgba(255,255,255,0.2)"
+    ),
+    margin=dict(t=120, b=60, l=60, r=40),
+    plot_bgcolor='rgba(25,25,25,1)',
+    paper_bgcolor='rgba(25,25,25,1)',
+    hovermode="x unified"
+)
+
+GRID_COLOR = 'rgba(255,255,255,0.1)'
+
+# サブプロットの間隔（図の高さに対する比率）
+VERTICAL_SPACING = 0.04
+
+# plotly_dark のテンプレートのうち、使用するレイアウトの項目
+TEMPLATE_KEYS = ('font', 'colorway', 'hoverlabel', 'xaxis', 'yaxis')
+
+
+def time_values(index):
+    """
+    日時のインデックスを UNIX ミリ秒（float64）の配列にする関数
+
+    日付の文字列より小さく、数値の配列として送られる（軸は make_figure で日付にする）。
+    """
+    return np.asarray(index, dtype="datetime64[ms]").astype(np.int64).astype(np.float64)
+
+
+def numeric_values(values):
+    """
+    数値の列を numpy 配列にする関数（float32 はそのまま、それ以外は float64）
+    """
+    values = np.asarray(values)
+    return values if values.dtype == np.float32 else values.astype(np.float64)
+
+
+def line_trace(x, y, threshold=WEBGL_THRESHOLD, **kwargs):
+    """
+    折れ線のトレースを作成する関数（点数が threshold を超える場合は Scattergl）
+
+    Parameters:
+    -----------
+    x : array-like
+        x の値（日時の場合は time_values で変換したもの）
+    y : array-like
+        y の値
+    threshold : int, optional
+        WebGL に切り替える点数
+    **kwargs
+        go.Scatter に渡す引数
+
+    Returns:
+    --------
+    plotly.graph_objects.Scatter or plotly.graph_objects.Scattergl
+    """
+    trace = go.Scattergl if len(x) > threshold else go.Scatter
+    return trace(x=x, y=numeric_values(y), **kwargs)
+
+
+def bar_buckets(n, max_bars=MAX_BARS):
+    """
+    n 本の足を max_bars 本以下にまとめる区切り（各足の番号 → まとめた後の番号）を返す関数
+    """
+    size = max(1, -(-n // max_bars))
+    return np.arange(n) // size
+
+
+def aggregate_bars(data, max_bars=MAX_BARS):
+    """
+    ローソク足・出来高を max_bars 本以下にまとめる関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        Open/High/Low/Close（Volume は任意）
+    max_bars : int, optional
+        最大本数
+
+    Returns:
+    --------
+    tuple
+        (各足の開始時刻（UNIX ミリ秒）, Open/High/Low/Close/Volume の辞書)。まとめた足の
+        出来高は合計になる
+    """
+    from utils.resample import FIELDS, aggregate_ohlcv
+
+    if 'Close' in data.columns:
+        data = data[data['Close'].notna()]
+    x = time_values(data.index)
+    columns = [numeric_values(data[field]) if field in data.columns else np.zeros(len(data)) for field in FIELDS]
+    columns[4] = np.nan_to_num(columns[4])
+    if len(data) <= max_bars:
+        return x, dict(zip(FIELDS, columns))
+    buckets = bar_buckets(len(data), max_bars)
+    starts, values = aggregate_ohlcv(buckets, np.column_stack(columns).astype(np.float64))
+    first = np.searchsorted(buckets, starts)
+    return x[first], {field: values[:, i] for i, field in enumerate(FIELDS)}
+
+
+@lru_cache(maxsize=None)
+def dark_template():
+    """
+    plotly_dark のうち2次元のチャートで使う部分（文字色・軸・配色）だけのテンプレートを返す関数
+    """
+    import plotly.io as pio
+
+    layout = pio.templates["plotly_dark"].layout.to_plotly_json()
+    return go.layout.Template(layout={key: layout[key] for key in TEMPLATE_KEYS})
+
+
+def axes(row):
+    """
+    row 行目のサブプロットに描くトレースの軸の指定（xaxis, yaxis）を返す関数
+    """
+    suffix = "" if row == 1 else str(row)
+    return dict(xaxis=f"x{suffix}", yaxis=f"y{suffix}")
+
+
+@lru_cache(maxsize=64)
+def _base_layout(row_heights, height, date_axis):
+    """
+    縦に並べたサブプロット（x 軸は共有）のレイアウトを作成する関数（結果は使い回すため変更しないこと）
+    """
+    rows = len(row_heights)
+    scale = (1 - VERTICAL_SPACING * (rows - 1)) / sum(row_heights)
+    bottom_axis = "x" if rows == 1 else f"x{rows}"
+    layout = dict(CHART_LAYOUT, height=height)
+    top = 1.0
+    for row, row_height in enumerate(row_heights, start=1):
+        bottom = max(top - row_height * scale, 0.0)
+        suffix = "" if row == 1 else str(row)
+        xaxis = dict(anchor=f"y{suffix}", domain=[0.0, 1.0], showgrid=True, gridcolor=GRID_COLOR)
+        if date_axis:
+            xaxis.update(type="date", tickformat='%y/%-m', tickangle=0, nticks=12)
+        if row < rows:
+            xaxis.update(matches=bottom_axis, showticklabels=False)
+        layout[f"xaxis{suffix}"] = xaxis
+        layout[f"yaxis{suffix}"] = dict(anchor=f"x{suffix}", domain=[bottom, top], showgrid=True,
+                                        gridcolor=GRID_COLOR)
+        top = bottom - VERTICAL_SPACING
+    return layout
+
+
+def make_figure(traces=(), row_heights=(1.0,), height=600, date_axis=True, x_axes=None, **layout):
+    """
+    共通のレイアウトで図を作成する関数
+
+    Parameters:
+    -----------
+    traces : list, optional
+        トレースのリスト（2行目以降のサブプロットに描くものは axes(row) で軸を指定する）
+    row_heights : tuple of float, optional
+        上から順に各サブプロットの高さの比率
+    height : int, optional
+        図の高さ（ピクセル）
+    date_axis : bool, optional
+        x 軸を日付の軸にするか（x は time_values で変換した値を渡す）
+    x_axes : dict, optional
+        すべての x 軸に追加する設定
+    **layout
+        レイアウトに追加する設定（辞書の値は共通のレイアウトの同じ項目に上書きで統合する）
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    base = copy.deepcopy(_base_layout(tuple(row_heights), height, date_axis))
+    if x_axes:
+        for key in [key for key in base if key.startswith("xaxis")]:
+            base[key].update(x_axes)
+    for key, value in layout.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            base[key].update(value)
+        else:
+            base[key] = value
+    base["template"] = dark_template()
+    return go.Figure(data=list(traces), layout=base)
+
+
+def _candle_traces(ohlc, show_volume):
+    """
+    ローソク足（1行目）と出来高（2行目）のトレースを作成する関数
+    """
+    # 横幅より多い足はまとめて送る（出来高は合計）
+    x, bars = aggregate_bars(ohlc)
+    traces = [go.Candlestick(
+        x=x,
+        open=bars['Open'],
+        high=bars['High'],
+        low=bars['Low'],
+        close=bars['Close'],
+        name='ローソク足',
+        increasing_line_color='#FF5252',  # 陽線
+        decreasing_line_color='#4CAF50',  # 陰線
+        showlegend=True,
+        legendgroup='candlestick'
+    )]
+    if show_volume:
+        traces.append(go.Bar(
+            x=x,
+            y=bars['Volume'],
+            name='出来高',
+            marker_color='rgba(100,181,246,0.5)',
+            showlegend=True,
+            **axes(2)
+        ))
+    return traces
+
+
+def _moving_average_traces(data, x, ma_colors):
+    """
+    移動平均線（MA_{期間} 列）のトレースを作成する関数
+    """
+    return [line_trace(x, data[f'MA_{window}'], mode='lines', name=f'MA({window}日)',
+                       line=dict(color=color, width=1.5), showlegend=True)
+            for window, color in (ma_colors or {}).items()]
+
+
+def build_price_figure(data, ma_colors=None, show_volume=True, candles=None, height=600):
+    """
+    ローソク足・移動平均線・出来高のチャートを作成する関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        株価データ（ma_colors の期間の MA_{期間} 列を含む）
+    ma_colors : dict, optional
+        表示する移動平均線の期間と色の辞書（省略時は表示しない）
+    show_volume : bool, optional
+        出来高を表示するか
+    candles : pandas.DataFrame, optional
+        ローソク足・出来高に使う週足・月足（省略時は data の日足。移動平均線は常に data から描く）
+    height : int, optional
+        図の高さ（ピクセル）
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    ohlc = data if candles is None else candles
+    show_volume = show_volume and 'Volume' in ohlc.columns
+    traces = _candle_traces(ohlc, show_volume)
+    traces[1:1] = _moving_average_traces(data, time_values(data.index), ma_colors)
+    if not show_volume:
+        return make_figure(traces, height=height)
+    return make_figure(traces, row_heights=(0.7, 0.3), height=height,
+                       xaxis2=dict(tickangle=45, showgrid=False))
+
+
+def build_technical_figure(data, ma_colors=None, show_rsi=False, show_volatility=False, height=700):
+    """
+    終値・RSI・ボラティリティのチャートを作成する関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        指標を含む株価データ
+    ma_colors : dict, optional
+        表示する移動平均線の期間と色の辞書（省略時は表示しない）
+    show_rsi : bool, optional
+        RSI（RSI 列）を表示するか
+    show_volatility : bool, optional
+        ボラティリティ（Volatility 列）を表示するか
+    height : int, optional
+        図の高さ（ピクセル）
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    x = time_values(data.index)
+    traces = [line_trace(x, data['Close'], mode='lines', name='終値',
+                         line=dict(color='#2196F3', width=2), showlegend=True)]
+    traces += _moving_average_traces(data, x, ma_colors)
+    layout = {}
+    row = 1
+    if show_rsi:
+        row += 1
+        ends = x[[0, -1]]
+        traces += [
+            line_trace(x, data['RSI'], mode='lines', name='RSI (14)',
+                       line=dict(color='#9C27B0', width=1.5), showlegend=True, **axes(row)),
+            go.Scatter(x=ends, y=[70, 70], mode='lines', name='過買い (70)',
+                       line=dict(color='rgba(255,82,82,0.5)', width=1, dash='dash'), showlegend=True, **axes(row)),
+            go.Scatter(x=ends, y=[30, 30], mode='lines', name='過売り (30)',
+                       line=dict(color='rgba(76,175,80,0.5)', width=1, dash='dash'), showlegend=True, **axes(row)),
+        ]
+        layout[f"yaxis{row}"] = dict(range=[0, 100])
+    if show_volatility:
+        row += 1
+        traces.append(line_trace(x, data['Volatility'], mode='lines', name='ボラティリティ (20日)',
+                                 line=dict(color='#FF9800', width=1.5), showlegend=True, **axes(row)))
+    return make_figure(traces, row_heights=(0.6,) + (0.2,) * (row - 1), height=height, **layout)
+
+
+def build_intraday_figure(data, tier):
+    """
+    分足のローソク足・出来高のチャートを作成する関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        分足データ（DataService.intraday の戻り値）
+    tier : str
+        足の名前（"1min", "5min", "60min", "daily"）
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    # 取引時間外（16:00〜9:30）と週末を詰めて表示する
+    rangebreaks = [dict(bounds=["sat", "mon"])]
+    if tier != "daily":
+        rangebreaks.append(dict(bounds=[16, 9.5], pattern="hour"))
+    tickformat = '%y/%-m/%-d' if tier == "daily" else '%-m/%-d %H:%M'
+    return make_figure(_candle_traces(data, show_volume=True), row_heights=(0.7, 0.3),
+                       x_axes=dict(rangebreaks=rangebreaks, tickformat=tickformat),
+                       xaxis2=dict(tickangle=45, showgrid=False))
+
+
+def build_line_figure(data, lines, height=600):
+    """
+    複数の列の折れ線グラフを作成する関数
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        日付をインデックスとするデータ
+    lines : list of tuple
+        (列名, 凡例の名前, 色, 線の太さ) のリスト
+    height : int, optional
+        図の高さ（ピクセル）
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    x = time_values(data.index)
+    return make_figure([line_trace(x, data[column], mode='lines', name=name, line=dict(color=color, width=width))
+                        for column, name, color, width in lines], height=height)
+
+
+def build_signed_bar_figure(labels, values, name, height=400):
+    """
+    正の値を緑、負の値を赤で塗り分けた棒グラフを作成する関数
+
+    Parameters:
+    -----------
+    labels : array-like
+        x 軸のラベル（"2024-01" などの文字列）
+    values : array-like
+        棒の値
+    name : str
+        凡例の名前
+    height : int, optional
+        図の高さ（ピクセル）
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    values = numeric_values(values)
+    colors = np.where(values >= 0, '#4CAF50', '#F44336')
+    return make_figure([go.Bar(x=np.asarray(labels), y=values, name=name, marker_color=colors)],
+                       height=height, date_axis=False)
+
+
+def build_nav_figure(nav, drawdown, height=600):
+    """
+    NAV とドローダウンのチャートを作成する関数
+
+    Parameters:
+    -----------
+    nav : pandas.Series
+        日々の NAV
+    drawdown : pandas.Series
+        日々のドローダウン(%)
+    height : int, optional
+        図の高さ（ピクセル）
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    x = time_values(nav.index)
+    return make_figure([
+        line_trace(x, nav, mode='lines', name='NAV', line=dict(color='#2196F3', width=2)),
+        line_trace(x, drawdown, mode='lines', name='ドローダウン(%)', fill='tozeroy',
+                   line=dict(color='#F44336', width=1), **axes(2)),
+    ], row_heights=(0.7, 0.3), height=height)
+
+
+def build_histogram_figure(edges, counts, markers=None, title="", xaxis_title="", height=400):
+    """
+    集計済みのヒストグラム（ビンの境界と度数）の棒グラフを作成する関数
+
+    Parameters:
+    -----------
+    edges : array-like
+        ビンの境界（ビン数 + 1）
+    counts : array-like
+        各ビンの度数
+    markers : dict, optional
+        縦線で示す値（凡例の名前 → 値）
+    title : str, optional
+        チャートのタイトル
+    xaxis_title : str, optional
+        x 軸のタイトル
+    height : int, optional
+        図の高さ（ピクセル）
+
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    widths = np.diff(edges)
+    shapes = [dict(type="line", xref="x", yref="paper", x0=value, x1=value, y0=0, y1=1,
+                   line=dict(color="rgba(255,255,255,0.6)", width=1, dash="dash"))
+              for value in (markers or {}).values()]
+    annotations = [dict(x=value, y=1, xref="x", yref="paper", text=name, showarrow=False, yanchor="bottom",
+                        font=dict(size=11))
+                   for name, value in (markers or {}).items()]
+    return make_figure([go.Bar(
+        x=edges[:-1] + widths / 2,
+        y=np.asarray(counts),
+        width=widths,
+        name='度数',
+        marker_color='rgba(100,181,246,0.7)',
+        hovertemplate='%{x:.2f}: %{y}<extra></extra>'
+    )],
+        height=height,
+        date_axis=False,
+        title=dict(text=title),
+        hovermode="closest",
+        bargap=0,
+        shapes=shapes,
+        annotations=annotations,
+        xaxis=dict(title=xaxis_title),
+        yaxis=dict(title="頻度")
+    )
 
 def plot_candlestick(data, title="日経225株価チャート"):
     """
@@ -22,23 +490,19 @@ def plot_candlestick(data, title="日経225株価チャート"):
     plotly.graph_objects.Figure
         ローソク足チャート
     """
-    fig = go.Figure(data=[go.Candlestick(
-        x=data.index,
-        open=data['Open'],
-        high=data['High'],
-        low=data['Low'],
-        close=data['Close'],
+    x, bars = aggregate_bars(data)
+    return make_figure([go.Candlestick(
+        x=x,
+        open=bars['Open'],
+        high=bars['High'],
+        low=bars['Low'],
+        close=bars['Close'],
         name="OHLC"
-    )])
-    
-    fig.update_layout(
+    )],
         title=title,
-        xaxis_title="日付",
-        yaxis_title="価格",
-        xaxis_rangeslider_visible=False
+        xaxis=dict(title="日付", rangeslider_visible=False),
+        yaxis=dict(title="価格")
     )
-    
-    return fig
 
 def plot_line_chart(data, columns=['Close'], title="日経225株価推移"):
     """
@@ -58,24 +522,21 @@ def plot_line_chart(data, columns=['Close'], title="日経225株価推移"):
     plotly.graph_objects.Figure
         折れ線グラフ
     """
-    fig = go.Figure()
+    x = time_values(data.index)
+    traces = [line_trace(
+        x,
+        data[column],
+        mode='lines',
+        name=column
+    ) for column in columns]
     
-    for column in columns:
-        fig.add_trace(go.Scatter(
-            x=data.index,
-            y=data[column],
-            mode='lines',
-            name=column
-        ))
-    
-    fig.update_layout(
+    return make_figure(
+        traces,
         title=title,
-        xaxis_title="日付",
-        yaxis_title="価格",
-        legend_title="指標"
+        xaxis=dict(title="日付"),
+        yaxis=dict(title="価格"),
+        legend=dict(title="指標")
     )
-    
-    return fig
 
 def plot_volume(data, title="取引量"):
     """
@@ -93,49 +554,45 @@ def plot_volume(data, title="取引量"):
     plotly.graph_objects.Figure
         出来高チャート
     """
-    fig = go.Figure(data=[go.Bar(
-        x=data.index,
-        y=data['Volume'],
+    x, bars = aggregate_bars(data)
+    return make_figure([go.Bar(
+        x=x,
+        y=bars['Volume'],
         name="Volume"
-    )])
-    
-    fig.update_layout(
+    )],
         title=title,
-        xaxis_title="日付",
-        yaxis_title="出来高"
+        xaxis=dict(title="日付"),
+        yaxis=dict(title="出来高")
     )
-    
-    return fig
 
-def plot_returns_histogram(data, title="日次リターン分布"):
+def plot_returns_histogram(data, title="日次リターン分布", bins=None):
     """
     リターンのヒストグラムを作成する関数
+
+    ビンの集計はサーバー側で行い（utils.distribution）、ブラウザにはビンごとの度数だけを送る。
     
     Parameters:
     -----------
-    data : pandas.DataFrame
-        リターンを含む株価データ
+    data : pandas.DataFrame or utils.distribution.ReturnDistribution
+        リターン（Daily_Return 列）を含む株価データ、または集計済みの分布
     title : str, optional
         チャートのタイトル
+    bins : int, optional
+        ビンの最大数（省略時は utils.distribution.DEFAULT_BINS）
         
     Returns:
     --------
     plotly.graph_objects.Figure
         ヒストグラム
     """
-    fig = px.histogram(
-        data, 
-        x="Daily_Return",
-        nbins=50,
-        title=title
-    )
-    
-    fig.update_layout(
-        xaxis_title="日次リターン (%)",
-        yaxis_title="頻度"
-    )
-    
-    return fig
+    from utils.distribution import DEFAULT_BINS, ReturnDistribution
+
+    distribution = data if isinstance(data, ReturnDistribution) else ReturnDistribution(data["Daily_Return"])
+    edges, counts = distribution.histogram(bins or DEFAULT_BINS)
+    q05, q50, q95 = distribution.quantiles([0.05, 0.5, 0.95])
+    return build_histogram_figure(edges, counts, markers={"5%": q05, "中央値": q50, "95%": q95},
+                                  title=title, xaxis_title="日次リターン (%)")
+
 
 def plot_correlation_heatmap(data, columns=None, title="相関ヒートマップ"):
     """
@@ -160,6 +617,8 @@ def plot_correlation_heatmap(data, columns=None, title="相関ヒートマップ
     
     corr_matrix = data[columns].corr()
     
+    import plotly.express as px
+    
     fig = px.imshow(
         corr_matrix,
         text_auto=True,
@@ -169,19 +628,55 @@ def plot_correlation_heatmap(data, columns=None, title="相関ヒートマップ
     
     return fig
 
-def get_stock_data_alpha_vantage(symbol, outputsize="full"):
-    api_key = os.environ["ALPHAVANTAGE_API_KEY"]
-    url = (
-        f"https://www.alphavantage.co/query"
-        f"?function=TIME_SERIES_DAILY_ADJUSTED"
-        f"&symbol={symbol}"
-        f"&outputsize={outputsize}"
-        f"&apikey={api_key}"
+def plot_clustered_correlation_heatmap(corr, labels, order=None, max_size=300, title="銘柄間の相関"):
+    """
+    多数の銘柄の相関行列を、似た値動きの銘柄が隣り合う順に並べたヒートマップを作成する関数
+
+    銘柄数が max_size を超える場合は、並べ替えた後に隣接する銘柄をまとめた平均値で表示する。
+    
+    Parameters:
+    -----------
+    corr : numpy.ndarray
+        相関行列
+    labels : list of str
+        銘柄のラベル
+    order : numpy.ndarray, optional
+        並べ替えの順序（省略時は utils.correlation.seriation_order で求める）
+    max_size : int, optional
+        表示する最大の行数
+    title : str, optional
+        チャートのタイトル
+        
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+        相関ヒートマップ
+    """
+    from utils.correlation import downsample_matrix, seriation_order
+
+    if order is None:
+        order = seriation_order(corr)
+    ordered = np.asarray(corr)[np.ix_(order, order)]
+    labels = [labels[i] for i in order]
+    matrix, starts = downsample_matrix(ordered, max_size)
+    if len(starts) < len(labels):
+        ends = np.append(starts[1:], len(labels)) - 1
+        labels = [labels[s] if s == e else f"{labels[s]}〜{labels[e]}" for s, e in zip(starts, ends)]
+
+    show_labels = len(labels) <= 60
+    return make_figure([go.Heatmap(
+        z=matrix,
+        x=labels,
+        y=labels,
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu_r',
+        colorbar=dict(title="相関")
+    )],
+        height=700,
+        date_axis=False,
+        title=dict(text=title),
+        hovermode="closest",
+        xaxis=dict(showticklabels=show_labels, showgrid=False),
+        yaxis=dict(showticklabels=show_labels, showgrid=False, autorange="reversed")
     )
-    r = requests.get(url)
-    data = r.json()
-    # エラー詳細を表示
-    if "Time Series (Daily)" not in data:
-        error_msg = data.get("Note") or data.get("Error Message") or str(data)
-        raise ValueError("データ取得失敗: " + error_msg)
-    # ...（以下略）